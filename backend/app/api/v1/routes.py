@@ -1,41 +1,87 @@
 """
 API routes for the Transcriber backend (v1).
+
+Handlers are async end to end: database access goes through async
+SQLAlchemy sessions and uploads are streamed to disk without blocking
+the event loop.
 """
 import os
+import json
 import uuid
-import shutil
-from typing import Optional
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+import anyio
+from fastapi import (
+    APIRouter, UploadFile, File, HTTPException, Depends, Header, Query, Request,
+    WebSocket, WebSocketDisconnect
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.models import TranscriptionJob, Segment
+from app.models import (
+    TranscriptionJob, Segment, JobStatistic, UploadSession, UploadChunk, ClientWebhook,
+    WebhookDelivery
+)
+from app.schemas import ClientWebhookUpdate, SpeakerEnrollRequest, UploadSessionCreate
 from app.utils.file_ops import (
     generate_job_id, 
     is_valid_audio_format, 
     get_file_size,
     cleanup_temp_files,
-    get_database_engine,
-    get_session
 )
+from app.utils.audio import audio_duration
+from app.utils.status_store import get_status_store, STORED_STATUSES, TERMINAL_STATUSES
+from app.utils.stats import record_completion, record_status_change, summarize_statistics
+from app.utils.idempotency import (
+    IDEMPOTENCY_KEY_MAX_LENGTH, add_idempotency_key, find_idempotency_key, request_fingerprint
+)
+from app.utils.scheduling import plan_job, resolve_deadline
+from app.utils.webhooks import check_callback_url, delivery_status
 
 router = APIRouter(prefix="/api/v1", tags=["transcription"])
 
+# Size of the chunks read from an upload and written to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Job states a cancellation can still interrupt
+CANCELLABLE_STATUSES = ("queued", "processing", "retrying")
+
 
 # Database dependency that can be overridden in tests
-def get_db():
-    """Get database session dependency."""
-    db = get_session()
+async def get_db():
+    """Get async database session dependency."""
+    from app.utils.file_ops import get_async_session
+    
+    db = get_async_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_read_db():
+    """Get async database session dependency for read-only queries.
+    
+    Bound to the read replica when ``DATABASE_READ_URL`` is set.
+    """
+    from app.utils.file_ops import get_async_session
+    
+    db = get_async_session(read_only=True)
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 # Lazy imports for Celery tasks (to avoid importing torch on module load)
 _process_transcription = None
 _delete_job = None
+_reclaim_files = None
 
 def _get_process_transcription():
     """Lazy load process_transcription task."""
@@ -53,151 +99,1257 @@ def _get_delete_job():
         _delete_job = delete_job
     return _delete_job
 
+def _get_reclaim_files():
+    """Lazy load reclaim_files task."""
+    global _reclaim_files
+    if _reclaim_files is None:
+        from app.tasks.tasks import reclaim_files
+        _reclaim_files = reclaim_files
+    return _reclaim_files
+
+def _revoke_task(task_id: str):
+    """Revoke a Celery task so no worker starts it."""
+    from app.tasks.celery_app import celery_app
+    celery_app.control.revoke(task_id)
+
+
+async def read_upload(file: UploadFile):
+    """
+    Read an upload in chunks, enforcing the size limit.
+    
+    Raises:
+        HTTPException: 413 if the upload exceeds MAX_UPLOAD_SIZE
+    """
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.MAX_UPLOAD_SIZE:
+            limit_mb = settings.MAX_UPLOAD_SIZE / (1024 * 1024)
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {limit_mb}MB"
+            )
+        yield chunk
+
+
+async def save_upload(file: UploadFile, dest_path: str, digest=None) -> int:
+    """
+    Stream an upload to disk in chunks without blocking the event loop.
+    
+    Args:
+        file: The uploaded file
+        dest_path: Path to write the file to
+        digest: hashlib object to feed the content to (optional)
+    
+    Returns:
+        int: Number of bytes written
+    
+    Raises:
+        HTTPException: 413 if the upload exceeds MAX_UPLOAD_SIZE
+    """
+    size = 0
+    async with await anyio.open_file(dest_path, "wb") as f:
+        async for chunk in read_upload(file):
+            size += len(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            await f.write(chunk)
+    return size
+
+
+async def hash_upload(file: UploadFile) -> str:
+    """Hash an upload without writing it anywhere."""
+    digest = hashlib.sha256()
+    async for chunk in read_upload(file):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def replay_idempotent_upload(db: AsyncSession, record, request_hash: str) -> JSONResponse:
+    """
+    Answer a retried upload with the job its Idempotency-Key created.
+    
+    Args:
+        db: Async database session
+        record: The stored IdempotencyKey
+        request_hash: Fingerprint of the retried request
+    
+    Returns:
+        JSONResponse: The original job, marked ``Idempotent-Replayed``
+    
+    Raises:
+        HTTPException: 422 if the key was used with a different payload, or
+            if the scheduler rejected the original job
+    """
+    if record.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different payload"
+        )
+    
+    job = await db.get(TranscriptionJob, record.job_id)
+    if job is not None and job.status == "rejected":
+        raise rejection(job)
+    live = await run_in_threadpool(get_status_store().get_live, record.job_id)
+    if live:
+        status = live["status"]
+    else:
+        status = job.status if job else "deleted"
+    
+    return JSONResponse(
+        content={
+            "job_id": record.job_id,
+            "status": status,
+            "message": "Duplicate request, returning the original job"
+        },
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def check_job_options(filename: str, engine: Optional[str], num_speakers: Optional[int],
+                      min_speakers: Optional[int], max_speakers: Optional[int]) -> str:
+    """
+    Validate the file name and options of a new job.
+    
+    Returns:
+        str: The transcription engine, defaulted from settings
+    
+    Raises:
+        HTTPException: 400 for an unsupported format or engine, or
+        contradicting speaker-count hints
+    """
+    # Check file extension
+    if not is_valid_audio_format(filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Supported formats: mp3, wav, mp4, mov, m4a, flac"
+        )
+    
+    # Check transcription engine
+    from app.services.transcriber import ENGINES
+    engine = engine or settings.TRANSCRIPTION_ENGINE
+    if engine not in ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported engine. Supported engines: {', '.join(ENGINES)}"
+        )
+    
+    # Check speaker-count hints
+    if num_speakers is not None and (min_speakers is not None or max_speakers is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="num_speakers cannot be combined with min_speakers or max_speakers"
+        )
+    if min_speakers is not None and max_speakers is not None and min_speakers > max_speakers:
+        raise HTTPException(
+            status_code=400,
+            detail="min_speakers cannot be greater than max_speakers"
+        )
+    return engine
+
+
+def check_deadline(deadline: Optional[datetime], sla: Optional[str]) -> Optional[datetime]:
+    """
+    Get the deadline of a new job from its deadline or SLA class.
+    
+    Raises:
+        HTTPException: 400 for an unknown SLA class or both options at once
+    """
+    try:
+        return resolve_deadline(deadline, sla)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def resolve_callback_url(db: AsyncSession, callback_url: Optional[str],
+                               client_id: Optional[str]) -> Optional[str]:
+    """
+    Get the completion webhook of a new job.
+    
+    An explicit ``callback_url`` wins over the client's default.
+    
+    Raises:
+        HTTPException: 400 for a callback URL that is not absolute http(s)
+            or points at a non-public address
+    """
+    if callback_url is not None:
+        try:
+            return await run_in_threadpool(check_callback_url, callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if client_id is not None:
+        default = await db.get(ClientWebhook, client_id)
+        if default is not None:
+            return default.callback_url
+    return None
+
+
+async def build_job(db: AsyncSession, job_id: str, path: str, filename: str,
+                    model: str, deadline: Optional[datetime] = None,
+                    sla_class: Optional[str] = None, allow_downgrade: bool = True,
+                    **options) -> TranscriptionJob:
+    """
+    Create the record of a new job for an uploaded file (not yet added).
+    
+    The scheduler estimates the job's processing time for the backlog
+    and, for a job with a deadline, may move it to a faster model or
+    reject it; a rejected job gets the ``rejected`` status and must not
+    be queued. Short clips are left without a Celery task id: they go to
+    the batching worker.
+    
+    Args:
+        db: Async database session
+        job_id: The ID of the new job
+        path: Path of the uploaded file
+        filename: Original filename
+        model: Requested Whisper model
+        deadline: Naive UTC deadline (optional)
+        sla_class: SLA class the deadline came from (optional)
+        allow_downgrade: Whether the scheduler may pick a faster model
+        **options: language, engine, the diarization options and the webhook
+    """
+    duration = await run_in_threadpool(audio_duration, path)
+    decision = await db.run_sync(plan_job, model, duration, deadline, allow_downgrade)
+    short = duration is not None and duration <= settings.BATCH_MAX_DURATION
+    batched = settings.BATCH_SHORT_JOBS and short
+    return TranscriptionJob(
+        id=job_id,
+        filename=filename,
+        original_path=path,
+        status="rejected" if decision["action"] == "rejected" else "queued",
+        task_id=None if batched else str(uuid.uuid4()),
+        model=decision["model"],
+        deadline=deadline,
+        sla_class=sla_class,
+        estimated_processing=decision["processing_estimate"],
+        schedule_decision=decision if deadline is not None else None,
+        **options
+    )
+
+
+def rejection(job: TranscriptionJob) -> HTTPException:
+    """Build the error refusing a job the scheduler rejected."""
+    return HTTPException(
+        status_code=422,
+        detail={
+            "message": "The deadline cannot be met",
+            "job_id": job.id,
+            "schedule": job.schedule_decision
+        }
+    )
+
+
+async def reject_job(db: AsyncSession, job: TranscriptionJob,
+                     idempotency_key: Optional[str] = None, request_hash: Optional[str] = None):
+    """
+    Store a job the scheduler rejected and refuse the request.
+    
+    The job is kept without its upload, so its decision can be looked up.
+    An Idempotency-Key is stored with it, so retries get the same answer
+    instead of being scheduled again.
+    
+    Args:
+        db: Async database session
+        job: The rejected job
+        idempotency_key: The request's Idempotency-Key (optional)
+        request_hash: Fingerprint of the request, if a key was given
+    
+    Raises:
+        HTTPException: 422 with the job ID and the scheduling decision
+    """
+    job.original_path = None
+    job.task_id = None
+    db.add(job)
+    await db.run_sync(record_status_change, None, "rejected")
+    if idempotency_key is not None:
+        await add_idempotency_key(db, idempotency_key, request_hash, job.id)
+    await db.commit()
+    raise rejection(job)
+
+
+def queued_response(job: TranscriptionJob, message: str) -> dict:
+    """Build the response to a newly queued job."""
+    response = {
+        "job_id": job.id,
+        "status": "queued",
+        "message": message
+    }
+    if job.schedule_decision is not None:
+        response["model"] = job.model
+        response["schedule"] = job.schedule_decision
+    return response
+
+
+async def queue_job(job: TranscriptionJob) -> None:
+    """
+    Publish a committed job's queued status and hand it to the workers.
+    
+    Short clips go to the batching worker; other jobs go to the pipelined
+    worker when ``PIPELINE_WORKER`` is set, else to Celery.
+    """
+    await run_in_threadpool(get_status_store().publish, job, "queued")
+    
+    # Queue the transcription task (publishing to the broker blocks)
+    diarization_options = {
+        "diarize": job.diarize,
+        "num_speakers": job.num_speakers,
+        "min_speakers": job.min_speakers,
+        "max_speakers": job.max_speakers
+    }
+    job_options = {
+        "model": job.model,
+        "language": job.language,
+        "engine": job.engine,
+        **diarization_options
+    }
+    if job.task_id is None:
+        from app.tasks.batching import get_redis, enqueue_short_job
+        await run_in_threadpool(
+            lambda: enqueue_short_job(
+                get_redis(), job.id, job.original_path, job.filename, **job_options
+            )
+        )
+    elif settings.PIPELINE_WORKER:
+        from app.tasks.batching import get_redis
+        from app.tasks.pipeline import enqueue_pipeline_job
+        await run_in_threadpool(
+            lambda: enqueue_pipeline_job(
+                get_redis(), job.id, job.original_path, job.filename, **job_options
+            )
+        )
+    else:
+        await run_in_threadpool(
+            lambda: _get_process_transcription().apply_async(
+                args=(job.id, job.original_path, job.filename, job.model, job.language, job.engine),
+                kwargs=diarization_options,
+                task_id=job.task_id
+            )
+        )
+
 
 @router.post("/transcribe")
 async def transcribe_audio(
     file: UploadFile = File(...),
     model: Optional[str] = "base",
-    language: Optional[str] = None
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    diarize: bool = True,
+    num_speakers: Optional[int] = Query(None, ge=1),
+    min_speakers: Optional[int] = Query(None, ge=1),
+    max_speakers: Optional[int] = Query(None, ge=1),
+    deadline: Optional[datetime] = None,
+    sla: Optional[str] = None,
+    allow_downgrade: bool = True,
+    callback_url: Optional[str] = None,
+    client_id: Optional[str] = Header(None, alias="X-Client-Id", min_length=1, max_length=255),
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", min_length=1, max_length=IDEMPOTENCY_KEY_MAX_LENGTH
+    ),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Upload and transcribe an audio file.
     
+    With an ``Idempotency-Key`` header, a retry carrying the same key and
+    payload returns the job the first request created instead of queueing
+    a second transcription; the same key with a different payload is
+    rejected with 422.
+    
+    A job with a deadline (or an SLA class) that would miss it on the
+    requested model runs on the most accurate faster model that meets it,
+    unless ``allow_downgrade`` is false; when no model can, the job is
+    recorded as rejected and the request fails with 422.
+    
+    When the job completes or fails, a signed summary is POSTed to
+    ``callback_url``, or to the default webhook of the ``X-Client-Id``
+    client.
+    
     Args:
         file: Audio file to transcribe
         model: Whisper model to use (base, small, medium, large)
         language: Language code (optional)
+        engine: Transcription engine, whisper or faster-whisper (optional)
+        diarize: Whether to label speakers; False skips diarization entirely
+        num_speakers: Exact number of speakers, if known (optional)
+        min_speakers: Minimum number of speakers (optional)
+        max_speakers: Maximum number of speakers (optional)
+        deadline: When the transcript is needed, ISO 8601 (optional)
+        sla: SLA class to derive the deadline from (optional)
+        allow_downgrade: Whether a faster model may be used to meet the deadline
+        callback_url: URL to notify when the job finishes (optional)
+        client_id: Client whose default webhook applies (optional)
+        idempotency_key: Client-chosen key that makes retries safe (optional)
     
     Returns:
         Job ID for tracking progress
     """
-    # Check file extension
-    if not is_valid_audio_format(file.filename):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file format. Supported formats: mp3, wav, mp4, mov, m4a, flac"
-        )
+    upload_params = {
+        "filename": file.filename,
+        "model": model,
+        "language": language,
+        "engine": engine,
+        "diarize": diarize,
+        "num_speakers": num_speakers,
+        "min_speakers": min_speakers,
+        "max_speakers": max_speakers,
+        "deadline": deadline.isoformat() if deadline else None,
+        "sla": sla,
+        "allow_downgrade": allow_downgrade,
+        "callback_url": callback_url,
+        "client_id": client_id
+    }
     
-    # Check file size
-    file_size = len(await file.read())
-    await file.seek(0)  # Reset file pointer
-    if file_size > settings.MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
-        )
+    engine = check_job_options(file.filename, engine, num_speakers, min_speakers, max_speakers)
+    deadline = check_deadline(deadline, sla)
+    callback_url = await resolve_callback_url(db, callback_url, client_id)
+    
+    # A retry of a stored key is hashed, never written to disk or queued
+    if idempotency_key is not None:
+        record = await find_idempotency_key(db, idempotency_key)
+        if record is not None:
+            request_hash = request_fingerprint(await hash_upload(file), upload_params)
+            return await replay_idempotent_upload(db, record, request_hash)
     
     # Generate job ID
     job_id = generate_job_id()
     
     # Save uploaded file temporarily
-    temp_dir = "/tmp/transcriber"
-    os.makedirs(temp_dir, exist_ok=True)
+    temp_dir = settings.UPLOAD_DIR
+    await anyio.Path(temp_dir).mkdir(parents=True, exist_ok=True)
     
     temp_path = os.path.join(temp_dir, f"{job_id}_{file.filename}")
     
     try:
-        with open(temp_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        # Stream to disk, enforcing the size limit as we go
+        digest = hashlib.sha256()
+        await save_upload(file, temp_path, digest=digest)
         
         # Create job record in database
-        from sqlalchemy.orm import Session
-        from app.utils.file_ops import get_session
-        
-        db = get_session()
+        job = await build_job(
+            db, job_id, temp_path, file.filename,
+            model=model,
+            deadline=deadline,
+            sla_class=sla,
+            allow_downgrade=allow_downgrade,
+            language=language,
+            engine=engine,
+            diarize=diarize,
+            num_speakers=num_speakers,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            client_id=client_id,
+            callback_url=callback_url
+        )
+        request_hash = None
+        if idempotency_key is not None:
+            request_hash = request_fingerprint(digest.hexdigest(), upload_params)
         try:
-            job = TranscriptionJob(
-                id=job_id,
-                filename=file.filename,
-                original_path=temp_path,
-                status="queued",
-                model=model,
-                language=language
-            )
+            if job.status == "rejected":
+                await reject_job(db, job, idempotency_key, request_hash)
+            
             db.add(job)
-            db.commit()
-        finally:
-            db.close()
+            await db.run_sync(record_status_change, None, "queued")
+            if idempotency_key is not None:
+                await add_idempotency_key(db, idempotency_key, request_hash, job_id)
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request with the same key created the job first
+            await db.rollback()
+            record = await find_idempotency_key(db, idempotency_key) if idempotency_key else None
+            if record is None:
+                raise
+            await run_in_threadpool(cleanup_temp_files, temp_path)
+            return await replay_idempotent_upload(db, record, request_hash)
         
-        # Queue the transcription task
-        _get_process_transcription().delay(job_id, temp_path, file.filename, model, language)
+        # Short clips go to the batching worker, the rest to Celery or the pipeline
+        await queue_job(job)
         
-        return {
-            "job_id": job_id,
-            "status": "queued",
-            "message": "File uploaded, processing started"
-        }
+        return queued_response(job, "File uploaded, processing started")
         
+    except HTTPException:
+        await run_in_threadpool(cleanup_temp_files, temp_path)
+        raise
     except Exception as e:
-        cleanup_temp_files(temp_path)
+        await run_in_threadpool(cleanup_temp_files, temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _get_upload(db: AsyncSession, upload_id: str) -> UploadSession:
+    """Get an unexpired upload session, or raise 404."""
+    upload = await db.get(UploadSession, upload_id)
+    if upload is None or upload.expires_at <= datetime.utcnow():
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+
+async def _received_ranges(db: AsyncSession, upload_id: str) -> list:
+    """Get the merged byte ranges an upload session has received."""
+    from app.utils.uploads import merge_ranges
+    
+    rows = (await db.execute(
+        select(UploadChunk.start_offset, UploadChunk.length)
+        .where(UploadChunk.upload_id == upload_id)
+    )).all()
+    return merge_ranges((row.start_offset, row.start_offset + row.length) for row in rows)
+
+
+@router.post("/uploads")
+async def create_upload(request: UploadSessionCreate, db: AsyncSession = Depends(get_db)):
+    """
+    Start a resumable upload.
+    
+    The file is preallocated at its full size; chunks are then sent with
+    ``PUT /uploads/{upload_id}`` in any order and in parallel, and
+    ``POST /uploads/{upload_id}/complete`` turns the upload into a job.
+    Sessions are refused with 503 while unfinished ones already reserve
+    ``UPLOAD_MAX_RESERVED`` bytes.
+    
+    Args:
+        request: File name and size in bytes
+    
+    Returns:
+        Upload ID, expiry and the largest accepted chunk size
+    """
+    from app.utils.uploads import (
+        partial_dir, preallocate, purge_expired_uploads, reserved_bytes
+    )
+    
+    if not is_valid_audio_format(request.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Supported formats: mp3, wav, mp4, mov, m4a, flac"
+        )
+    if request.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / (1024 * 1024)}MB"
+        )
+    
+    # Sessions abandoned past their expiry are dropped as new ones start
+    paths = await db.run_sync(purge_expired_uploads)
+    if paths:
+        await run_in_threadpool(_get_reclaim_files().delay, paths)
+    
+    # Unfinished sessions hold their full size on disk until they complete
+    if await db.run_sync(reserved_bytes) + request.size > settings.UPLOAD_MAX_RESERVED:
+        raise HTTPException(
+            status_code=503,
+            detail="Too much upload space is reserved by unfinished uploads, try again later"
+        )
+    
+    upload_id = generate_job_id()
+    path = os.path.join(partial_dir(), upload_id)
+    await anyio.Path(partial_dir()).mkdir(parents=True, exist_ok=True)
+    await run_in_threadpool(preallocate, path, request.size)
+    
+    upload = UploadSession(
+        id=upload_id,
+        filename=request.filename,
+        size=request.size,
+        path=path,
+        created_at=datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    )
+    db.add(upload)
+    await db.commit()
+    
+    return {
+        "upload_id": upload_id,
+        "size": upload.size,
+        "expires_at": upload.expires_at,
+        "max_chunk_size": settings.UPLOAD_CHUNK_MAX_SIZE
+    }
+
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Header(..., alias="Upload-Offset", ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Write one chunk of a resumable upload at its byte offset.
+    
+    Chunks may be sent in any order and concurrently. A chunk counts as
+    received only once its whole body has been written, so a chunk cut
+    off by a dropped connection is simply sent again. A chunk that lands
+    after the upload was finalized is refused with 409.
+    
+    Args:
+        upload_id: The ID of the upload session
+        offset: Byte offset of the chunk (``Upload-Offset`` header)
+    
+    Returns:
+        The byte range written
+    """
+    from app.utils.uploads import write_chunk
+    
+    upload = await _get_upload(db, upload_id)
+    if upload.job_id is not None:
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    if offset >= upload.size:
+        raise HTTPException(
+            status_code=416,
+            detail=f"Offset beyond the upload size ({upload.size})"
+        )
+    path, size = upload.path, upload.size
+    # Don't hold a database connection while the body streams in
+    await db.rollback()
+    
+    limit = min(size - offset, settings.UPLOAD_CHUNK_MAX_SIZE)
+    try:
+        length = await write_chunk(path, offset, request.stream(), limit)
+    except ValueError:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Chunk at offset {offset} may hold at most {limit} bytes"
+        )
+    except FileNotFoundError:
+        # Finalizing moved the file away while the chunk was streaming in
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    if length == 0:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+    
+    # Push the session's expiry back and record the range, unless the
+    # upload was finalized (or aborted) while the chunk was streaming in
+    extended = await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, UploadSession.job_id.is_(None))
+        .values(expires_at=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL))
+        .execution_options(synchronize_session=False)
+    )
+    if extended.rowcount == 0:
+        await db.rollback()
+        await _get_upload(db, upload_id)
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    db.add(UploadChunk(upload_id=upload_id, start_offset=offset, length=length))
+    await db.commit()
+    
+    return {"upload_id": upload_id, "offset": offset, "length": length}
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get the byte ranges an upload has received so far.
+    
+    Args:
+        upload_id: The ID of the upload session
+    
+    Returns:
+        Received and missing ranges (``[start, end)``), the contiguous
+        prefix length as ``offset``, and the job once finalized
+    """
+    from app.utils.uploads import missing_ranges
+    
+    upload = await _get_upload(db, upload_id)
+    received = await _received_ranges(db, upload_id)
+    
+    return {
+        "upload_id": upload_id,
+        "filename": upload.filename,
+        "size": upload.size,
+        "offset": received[0][1] if received and received[0][0] == 0 else 0,
+        "received_bytes": sum(end - start for start, end in received),
+        "received": received,
+        "missing": missing_ranges(received, upload.size),
+        "expires_at": upload.expires_at,
+        "job_id": upload.job_id
+    }
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    model: Optional[str] = "base",
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    diarize: bool = True,
+    num_speakers: Optional[int] = Query(None, ge=1),
+    min_speakers: Optional[int] = Query(None, ge=1),
+    max_speakers: Optional[int] = Query(None, ge=1),
+    deadline: Optional[datetime] = None,
+    sla: Optional[str] = None,
+    allow_downgrade: bool = True,
+    callback_url: Optional[str] = None,
+    client_id: Optional[str] = Header(None, alias="X-Client-Id", min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Turn a fully received upload into a transcription job.
+    
+    The preallocated file is moved into place as the job's upload; no
+    data is copied. Completing an upload again returns the same job.
+    Options are those of ``POST /transcribe``; when the scheduler rejects
+    the deadline, the upload is kept and may be completed again.
+    
+    Args:
+        upload_id: The ID of the upload session
+    
+    Returns:
+        Job ID for tracking progress
+    """
+    from app.utils.uploads import missing_ranges
+    
+    upload = await _get_upload(db, upload_id)
+    if upload.job_id is not None:
+        return {"job_id": upload.job_id, "status": "queued", "message": "Upload already finalized"}
+    
+    engine = check_job_options(upload.filename, engine, num_speakers, min_speakers, max_speakers)
+    deadline = check_deadline(deadline, sla)
+    callback_url = await resolve_callback_url(db, callback_url, client_id)
+    
+    missing = missing_ranges(await _received_ranges(db, upload_id), upload.size)
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is incomplete", "missing": missing}
+        )
+    
+    job_id = generate_job_id()
+    final_path = os.path.join(settings.UPLOAD_DIR, f"{job_id}_{upload.filename}")
+    job = await build_job(
+        db, job_id, upload.path, upload.filename,
+        model=model,
+        deadline=deadline,
+        sla_class=sla,
+        allow_downgrade=allow_downgrade,
+        language=language,
+        engine=engine,
+        diarize=diarize,
+        num_speakers=num_speakers,
+        min_speakers=min_speakers,
+        max_speakers=max_speakers,
+        client_id=client_id,
+        callback_url=callback_url
+    )
+    if job.status == "rejected":
+        await reject_job(db, job)
+    job.original_path = final_path
+    
+    # Claim the session, so concurrent completions create one job
+    claimed = await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id, UploadSession.job_id.is_(None))
+        .values(job_id=job_id)
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount == 0:
+        await db.rollback()
+        upload = await _get_upload(db, upload_id)
+        return {"job_id": upload.job_id, "status": "queued", "message": "Upload already finalized"}
+    
+    await db.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload_id))
+    db.add(job)
+    await db.run_sync(record_status_change, None, "queued")
+    await run_in_threadpool(os.replace, upload.path, final_path)
+    try:
+        await db.commit()
+    except Exception:
+        await run_in_threadpool(os.replace, final_path, upload.path)
+        raise
+    
+    await queue_job(job)
+    
+    return queued_response(job, "Upload finalized, processing started")
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Abandon an unfinished upload and delete what it received.
+    
+    Args:
+        upload_id: The ID of the upload session
+    
+    Returns:
+        Deletion confirmation
+    """
+    upload = await _get_upload(db, upload_id)
+    if upload.job_id is not None:
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    
+    path = upload.path
+    await db.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload_id))
+    await db.delete(upload)
+    await db.commit()
+    await run_in_threadpool(cleanup_temp_files, path)
+    
+    return {"message": "Upload aborted", "upload_id": upload_id}
+
+
+@router.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    model: str = "base",
+    language: Optional[str] = None,
+    engine: Optional[str] = None,
+    sample_rate: int = 16000,
+    encoding: str = "pcm_s16le",
+    filename: str = "live-stream.wav",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Transcribe live audio with low latency.
+    
+    The client sends binary frames (mono s16le PCM or Opus packets) and
+    receives ``partial`` hypotheses while an utterance is in progress and
+    ``final`` segments once it ends. Sending ``{"type": "stop"}`` or
+    closing the socket ends the stream; the session is then stored as a
+    completed TranscriptionJob and a ``done`` event carries its job ID.
+    
+    Args:
+        websocket: The client connection
+        model: Whisper model to use
+        language: Language code (optional)
+        engine: Transcription engine (optional)
+        sample_rate: Rate of the incoming audio
+        encoding: pcm_s16le or opus
+        filename: Name recorded for the job
+    """
+    from app.services.diarizer import label_single_speaker
+    from app.services.streaming import ENCODINGS, StreamingSession, decode_samples
+    from app.utils.segments import longest_span
+    from app.services.transcriber import ENGINES
+    
+    engine = engine or settings.TRANSCRIPTION_ENGINE
+    if engine not in ENGINES or encoding not in ENCODINGS or sample_rate <= 0:
+        await websocket.close(code=1008, reason="Unsupported engine, encoding or sample rate")
+        return
+    
+    job_id = generate_job_id()
+    await anyio.Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+    recording_path = os.path.join(settings.UPLOAD_DIR, f"{job_id}_stream.wav")
+    
+    try:
+        session = StreamingSession(
+            lambda samples: decode_samples(samples, model, engine, language),
+            sample_rate=sample_rate,
+            encoding=encoding,
+            recording_path=recording_path
+        )
+    except ImportError:
+        await websocket.close(code=1008, reason="Opus decoding is not available")
+        return
+    
+    await websocket.accept()
+    created_at = datetime.utcnow()
+    connected = True
+    status = "completed"
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes") is not None:
+                # Decoding is CPU-bound: keep it off the event loop
+                events = await run_in_threadpool(session.feed_frame, message["bytes"])
+                for event in events:
+                    await websocket.send_json(event)
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                break
+        events = await run_in_threadpool(session.close)
+    except WebSocketDisconnect:
+        connected = False
+        events = await run_in_threadpool(session.close)
+    except Exception as e:
+        status = "failed"
+        events = [{"type": "error", "message": str(e)}]
+        await run_in_threadpool(session.close)
+    
+    # Store the session like any other job
+    segments = label_single_speaker(session.segments)
+    job = TranscriptionJob(
+        id=job_id,
+        filename=filename,
+        original_path=recording_path,
+        audio_path=recording_path,
+        status=status,
+        model=model,
+        language=language or session.language,
+        engine=engine,
+        diarize=False,
+        created_at=created_at,
+        completed_at=datetime.utcnow(),
+        duration=session.duration,
+        speakers_detected=1 if segments else 0,
+        max_segment_span=longest_span(segments)
+    )
+    db.add(job)
+    if status == "completed":
+        await db.run_sync(record_completion, job, None)
+    else:
+        await db.run_sync(record_status_change, None, status)
+    db.add_all(
+        Segment(
+            job_id=job_id,
+            start_time=seg["start"],
+            end_time=seg["end"],
+            text=seg["text"],
+            speaker=seg["speaker"],
+            confidence=seg["confidence"]
+        )
+        for seg in segments
+    )
+    await db.commit()
+    
+    if connected:
+        for event in events:
+            await websocket.send_json(event)
+        await websocket.send_json({"type": "done", "job_id": job_id, "status": status})
+        await websocket.close()
+
+
 @router.get("/jobs/{job_id}")
-def get_job_status(job_id: str):
+async def get_job_status(job_id: str, expand: bool = False,
+                         db: AsyncSession = Depends(get_read_db)):
     """
     Check job status and get results.
     
+    Queued and running jobs are answered from the hot status store
+    (with their pipeline stage and progress) without touching the
+    database; finished jobs, and any job the store has no entry for,
+    are read from the database.
+    
     Args:
         job_id: The ID of the transcription job
+        expand: Whether to list a compacted job's original segments instead of its turns
     
     Returns:
         Job status and results if completed
     """
-    from app.utils.file_ops import get_session
+    live = await run_in_threadpool(get_status_store().get_live, job_id)
+    if live is not None:
+        return {
+            "job_id": job_id,
+            "status": live["status"],
+            "filename": live["filename"],
+            "language": live["language"],
+            "created_at": live["created_at"],
+            "stage": live.get("stage"),
+            "progress": live.get("progress")
+        }
     
-    db = get_session()
-    try:
-        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+    job = await db.get(TranscriptionJob, job_id)
+    
+    if not job and settings.DATABASE_READ_URL:
+        # The replica may not have caught up with a job created just now
+        from app.utils.file_ops import get_async_session
         
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
+        db = get_async_session()
+        try:
+            return await _job_status(db, job_id, await db.get(TranscriptionJob, job_id), expand)
+        finally:
+            await db.close()
+    
+    return await _job_status(db, job_id, job, expand)
+
+
+async def _job_status(db: AsyncSession, job_id: str, job: Optional[TranscriptionJob],
+                      expand: bool = False) -> dict:
+    """Build the status response of a job read from the database."""
+    from app.utils.segments import expand_turn, segment_to_dict
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "language": job.language,
+        "created_at": job.created_at
+    }
+    
+    if job.status == "completed":
+        segments = (await db.scalars(
+            select(Segment).where(Segment.job_id == job_id)
+        )).all()
         
-        result = {
-            "job_id": job.id,
-            "status": job.status,
-            "filename": job.filename,
-            "created_at": job.created_at
+        # Build full text
+        text = " ".join(seg.text for seg in segments)
+        
+        # Build segments list; compacted turns carry their segment boundaries
+        segments_list = [segment_to_dict(seg) for seg in segments]
+        if expand:
+            segments_list = [part for seg in segments_list for part in expand_turn(seg)]
+        
+        result["result"] = {
+            "text": text,
+            "segments": segments_list,
+            "speakers": job.speakers_detected,
+            "duration": job.duration,
+            "skipped_fraction": job.skipped_fraction
         }
+    
+    elif job.status == "failed":
+        result["error"] = "Transcription failed"
+    
+    elif job.status == "rejected":
+        result["error"] = "The deadline cannot be met"
+    
+    if job.schedule_decision is not None:
+        result["deadline"] = job.deadline
+        result["schedule"] = job.schedule_decision
+    
+    if job.callback_url:
+        delivery = (await db.scalars(
+            select(WebhookDelivery)
+            .where(WebhookDelivery.job_id == job_id)
+            .order_by(WebhookDelivery.id.desc())
+            .limit(1)
+        )).first()
+        result["webhook"] = {
+            "callback_url": job.callback_url,
+            "delivery": delivery_status(delivery)
+        }
+    
+    return result
+
+
+@router.get("/jobs/{job_id}/segments")
+async def get_job_segments(
+    request: Request,
+    job_id: str,
+    start: Optional[float] = Query(None, alias="from", ge=0),
+    end: Optional[float] = Query(None, alias="to", ge=0),
+    speaker: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=settings.SEGMENT_PAGE_MAX),
+    cursor: Optional[str] = None,
+    expand: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the segments of a completed job that overlap a time window.
+    
+    Pages are fetched through the ``(job_id, start_time)`` index and
+    continue with ``next_cursor``. With ``Accept: application/x-ndjson``
+    the segments are streamed one JSON object per line instead; a final
+    ``{"next_cursor": ...}`` line follows when ``limit`` cut the stream
+    short.
+    
+    Args:
+        job_id: The ID of the transcription job
+        start: Window start in seconds (``from``, optional)
+        end: Window end in seconds (``to``, optional)
+        speaker: Only segments of this speaker (optional)
+        limit: Maximum number of segments (default ``SEGMENT_PAGE_SIZE``;
+            unlimited when streaming)
+        cursor: ``next_cursor`` of the previous page (optional)
+        expand: Whether to split compacted turns back into the original
+            segments in the window; ``limit`` still counts stored rows
+    
+    Returns:
+        Segments in time order and the cursor of the next page
+    """
+    from app.utils.segments import (
+        NDJSON_MEDIA_TYPE, decode_cursor, encode_cursor, expand_turn, segment_to_dict,
+        segment_window_query
+    )
+    
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="to must be greater than from")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job = await db.get(TranscriptionJob, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Segments are available once the job is completed (job is {job.status})"
+        )
+    
+    max_span = job.max_segment_span
+    
+    def window(after, size):
+        return segment_window_query(job_id, start, end, speaker, after, max_span).limit(size)
+    
+    def serialize(segments):
+        rows = [segment_to_dict(seg) for seg in segments]
+        if not expand:
+            return rows
+        return [
+            part for row in rows for part in expand_turn(row)
+            if (start is None or part["end"] > start) and (end is None or part["start"] < end)
+        ]
+    
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        from app.utils.file_ops import get_async_session
         
-        if job.status == "completed":
-            segments = db.query(Segment).filter(Segment.job_id == job_id).all()
-            
-            # Build full text
-            text = " ".join(seg.text for seg in segments)
-            
-            # Build segments list
-            segments_list = [
-                {
-                    "start": seg.start_time,
-                    "end": seg.end_time,
-                    "text": seg.text,
-                    "speaker": seg.speaker,
-                    "confidence": seg.confidence
-                }
-                for seg in segments
-            ]
-            
-            result["result"] = {
-                "text": text,
-                "segments": segments_list,
-                "speakers": job.speakers_detected,
-                "duration": job.duration
-            }
+        async def stream():
+            # The request's session is closed once the response starts
+            session = get_async_session(read_only=True)
+            remaining = limit
+            position = after
+            try:
+                while True:
+                    size = min(remaining or settings.SEGMENT_PAGE_MAX, settings.SEGMENT_PAGE_MAX)
+                    segments = (await session.scalars(window(position, size))).all()
+                    if segments:
+                        yield "".join(json.dumps(row) + "\n" for row in serialize(segments))
+                        position = (segments[-1].start_time, segments[-1].id)
+                    if remaining is not None:
+                        remaining -= len(segments)
+                        if remaining == 0:
+                            if (await session.scalars(window(position, 1))).first() is not None:
+                                cursor = encode_cursor(segments[-1])
+                                yield json.dumps({"next_cursor": cursor}) + "\n"
+                            break
+                    if len(segments) < size:
+                        break
+            finally:
+                await session.close()
+        
+        return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+    
+    limit = limit or settings.SEGMENT_PAGE_SIZE
+    segments = (await db.scalars(window(after, limit + 1))).all()
+    
+    return {
+        "job_id": job_id,
+        "segments": serialize(segments[:limit]),
+        "next_cursor": encode_cursor(segments[limit - 1]) if len(segments) > limit else None
+    }
+
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Re-queue a failed or cancelled job.
+    
+    The job resumes after the last stage it checkpointed, so completed
+    transcription or diarization work is not repeated.
+    
+    Args:
+        job_id: The ID of the transcription job
+    
+    Returns:
+        Job ID and its new status
+    """
+    job = await db.get(TranscriptionJob, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Only failed or cancelled jobs can be retried (job is {job.status})"
+        )
+    
+    # A fresh task id: the previous one may be on the workers' revoked list
+    await db.run_sync(record_status_change, job.status, "queued")
+    job.status = "queued"
+    job.task_id = str(uuid.uuid4())
+    await db.commit()
+    await run_in_threadpool(get_status_store().publish, job, "queued")
+    
+    await run_in_threadpool(
+        lambda: _get_process_transcription().apply_async(
+            args=(job.id, job.original_path, job.filename, job.model, job.language, job.engine),
+            kwargs={
+                "diarize": job.diarize,
+                "num_speakers": job.num_speakers,
+                "min_speakers": job.min_speakers,
+                "max_speakers": job.max_speakers
+            },
+            task_id=job.task_id
+        )
+    )
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "message": "Retry queued"
+    }
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Cancel a queued or running job.
+    
+    Queued tasks are revoked so no worker picks them up. A running task
+    notices the cancellation at its next stage boundary (or decoded
+    segment / diarization step), stops and discards its partial results.
+    
+    Args:
+        job_id: The ID of the transcription job
+    
+    Returns:
+        Job ID and its new status
+    """
+    job = await db.get(TranscriptionJob, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Running jobs only report "processing" to the hot status store
+    live = await run_in_threadpool(get_status_store().get_live, job_id)
+    previous_status = live["status"] if live else job.status
+    
+    # Conditional update: never cancel a job that just finished, and move
+    # the status counters from the status actually replaced
+    while True:
+        if job.status not in CANCELLABLE_STATUSES:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Only queued or running jobs can be cancelled (job is {job.status})"
+            )
         
-        elif job.status == "failed":
-            result["error"] = "Transcription failed"
+        current = job.status
+        result = await db.execute(
+            update(TranscriptionJob)
+            .where(
+                TranscriptionJob.id == job_id,
+                TranscriptionJob.status == current
+            )
+            .values(status="cancelled")
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            await db.run_sync(record_status_change, current, "cancelled")
+            await db.commit()
+            break
         
-        return result
+        await db.rollback()
+        await db.refresh(job)
+    
+    await run_in_threadpool(get_status_store().clear, job_id)
+    if job.task_id:
+        await run_in_threadpool(_revoke_task, job.task_id)
+    
+    # A revoked task never runs again, so reclaim what earlier attempts left
+    if previous_status != "processing":
+        from app.utils.checkpoints import get_checkpoint_store
         
-    finally:
-        db.close()
+        paths = [get_checkpoint_store().job_dir(job_id)]
+        normalized = job.audio_path and job.audio_path != job.original_path
+        if normalized and job.original_path and os.path.exists(job.original_path):
+            paths.append(job.audio_path)
+        await run_in_threadpool(_get_reclaim_files().delay, paths)
+    
+    return {
+        "job_id": job_id,
+        "status": "cancelled",
+        "message": "Cancellation requested"
+    }
 
 
 @router.get("/history")
-def get_history(
+async def get_history(
     limit: int = 10,
-    offset: int = 0
+    offset: int = 0,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List all transcriptions with metadata.
@@ -209,35 +1361,119 @@ def get_history(
     Returns:
         List of transcription jobs
     """
-    from app.utils.file_ops import get_session
-    
-    db = get_session()
-    try:
-        jobs = db.query(TranscriptionJob).order_by(
+    jobs = (await db.scalars(
+        select(TranscriptionJob).order_by(
             TranscriptionJob.created_at.desc()
-        ).offset(offset).limit(limit).all()
-        
-        return {
-            "jobs": [
-                {
-                    "job_id": job.id,
-                    "filename": job.filename,
-                    "status": job.status,
-                    "created_at": job.created_at,
-                    "completed_at": job.completed_at,
-                    "speakers_detected": job.speakers_detected,
-                    "duration": job.duration
-                }
-                for job in jobs
-            ]
-        }
-        
-    finally:
-        db.close()
+        ).offset(offset).limit(limit)
+    )).all()
+    
+    # Unfinished jobs keep their live status in the hot status store
+    store = get_status_store()
+    live = await run_in_threadpool(lambda: {
+        job.id: store.get_live(job.id)
+        for job in jobs
+        if job.status not in TERMINAL_STATUSES
+    })
+    
+    return {
+        "jobs": [
+            {
+                "job_id": job.id,
+                "filename": job.filename,
+                "status": (live.get(job.id) or {}).get("status", job.status),
+                "created_at": job.created_at,
+                "completed_at": job.completed_at,
+                "speakers_detected": job.speakers_detected,
+                "duration": job.duration
+            }
+            for job in jobs
+        ]
+    }
+
+
+@router.get("/stats")
+async def get_stats(db: AsyncSession = Depends(get_read_db)):
+    """
+    Get aggregate statistics over all jobs.
+    
+    Served from counters kept up to date as jobs change, so the cost
+    does not grow with the number of jobs. Running jobs are counted as
+    ``queued`` while their live status is in the hot status store.
+    
+    Returns:
+        Jobs per status, audio hours processed, per-model totals with the
+        average real-time factor, and the speaker-count distribution
+    """
+    counters = (await db.scalars(select(JobStatistic))).all()
+    return summarize_statistics(counters)
+
+
+@router.delete("/jobs")
+async def delete_transcriptions(
+    ids: Optional[List[str]] = Query(None),
+    status: Optional[str] = None,
+    older_than: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Delete many transcription jobs at once.
+    
+    Rows are removed with batched set-based deletes; the associated files
+    are handed to the reclamation queue instead of being unlinked inline,
+    and the tasks of unfinished jobs are revoked.
+    
+    Running jobs are stored as ``queued`` until they finish (their live
+    status is only in the hot status store), so ``processing`` and
+    ``retrying`` cannot be selected; ``queued`` matches them.
+    
+    Args:
+        ids: Job IDs to delete (optional)
+        status: Only delete jobs with this stored status (optional)
+        older_than: Only delete jobs created before this time (optional)
+    
+    Returns:
+        Number of deleted jobs and files queued for removal
+    """
+    if ids is None and status is None and older_than is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Specify ids, status or older_than to select jobs to delete"
+        )
+    if status is not None and status not in STORED_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"status must be one of {', '.join(STORED_STATUSES)}"
+        )
+    
+    from app.utils.db_ops import chunked, delete_jobs_bulk
+    from app.tasks.tasks import unindex_speakers
+    
+    deleted, paths, task_ids = await db.run_sync(
+        delete_jobs_bulk,
+        job_ids=ids,
+        status=status,
+        older_than=older_than
+    )
+    
+    # Queued and running jobs still have a hot status that would outlive the row
+    await run_in_threadpool(get_status_store().clear, *deleted)
+    await run_in_threadpool(unindex_speakers, deleted)
+    for task_id in task_ids:
+        await run_in_threadpool(_revoke_task, task_id)
+    
+    # One reclamation task per batch of files, not one per job
+    for batch in chunked(paths, settings.RECLAIM_BATCH_SIZE):
+        await run_in_threadpool(_get_reclaim_files().delay, batch)
+    
+    return {
+        "message": "Deletion completed",
+        "deleted": len(deleted),
+        "files_queued": len(paths)
+    }
 
 
 @router.delete("/jobs/{job_id}")
-def delete_transcription(job_id: str):
+async def delete_transcription(job_id: str, db: AsyncSession = Depends(get_db)):
     """
     Delete a transcription job and associated files.
     
@@ -247,22 +1483,189 @@ def delete_transcription(job_id: str):
     Returns:
         Deletion confirmation
     """
-    from app.utils.file_ops import get_session
+    job = await db.get(TranscriptionJob, job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Queue deletion task
+    await run_in_threadpool(_get_delete_job().delay, job_id)
+    
+    return {
+        "message": "Deletion requested",
+        "job_id": job_id
+    }
+
+
+@router.put("/clients/{client_id}/webhook")
+async def set_client_webhook(client_id: str, request: ClientWebhookUpdate,
+                             db: AsyncSession = Depends(get_db)):
+    """
+    Set the default completion webhook of a client.
     
-    db = get_session()
+    Jobs submitted with an ``X-Client-Id`` header and no ``callback_url``
+    are reported to it.
+    
+    Args:
+        client_id: The client's ID
+        request: The callback URL
+    
+    Returns:
+        The client's webhook
+    """
     try:
-        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
-        
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-        
-        # Queue deletion task
-        _get_delete_job().delay(job_id)
-        
-        return {
-            "message": "Deletion requested",
-            "job_id": job_id
-        }
-        
-    finally:
-        db.close()
\ No newline at end of file
+        callback_url = await run_in_threadpool(check_callback_url, request.callback_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    webhook = await db.get(ClientWebhook, client_id)
+    if webhook is None:
+        webhook = ClientWebhook(client_id=client_id)
+        db.add(webhook)
+    webhook.callback_url = callback_url
+    webhook.updated_at = datetime.utcnow()
+    await db.commit()
+    
+    return {"client_id": client_id, "callback_url": callback_url}
+
+
+@router.get("/clients/{client_id}/webhook")
+async def get_client_webhook(client_id: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Get the default completion webhook of a client.
+    
+    Args:
+        client_id: The client's ID
+    
+    Returns:
+        The client's webhook
+    """
+    webhook = await db.get(ClientWebhook, client_id)
+    if webhook is None:
+        raise HTTPException(status_code=404, detail="No webhook for this client")
+    
+    return {"client_id": client_id, "callback_url": webhook.callback_url}
+
+
+@router.delete("/clients/{client_id}/webhook")
+async def delete_client_webhook(client_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Remove the default completion webhook of a client.
+    
+    Jobs already submitted keep their callback URL.
+    
+    Args:
+        client_id: The client's ID
+    """
+    deleted = await db.execute(delete(ClientWebhook).where(ClientWebhook.client_id == client_id))
+    if deleted.rowcount == 0:
+        raise HTTPException(status_code=404, detail="No webhook for this client")
+    await db.commit()
+    
+    return {"client_id": client_id, "message": "Webhook removed"}
+
+
+def _get_speaker_index():
+    """Get the speaker index, or 404 if it is disabled."""
+    if not settings.SPEAKER_INDEX_ENABLED:
+        raise HTTPException(status_code=404, detail="Speaker index is disabled")
+    
+    from app.services.speaker_index import get_speaker_index
+    return get_speaker_index()
+
+
+@router.get("/jobs/{job_id}/speakers")
+async def get_job_speakers(job_id: str, threshold: Optional[float] = None):
+    """
+    Identify a job's speakers against the enrolled voices.
+    
+    Uses the centroid embeddings stored when the job was diarized, so
+    nothing is re-processed.
+    
+    Args:
+        job_id: The ID of the transcription job
+        threshold: Minimum cosine similarity for a match (optional)
+    
+    Returns:
+        Each speaker label with its matched name and score, if any
+    """
+    index = _get_speaker_index()
+    embeddings = await run_in_threadpool(index.get_job, job_id)
+    
+    if not embeddings:
+        raise HTTPException(status_code=404, detail="No speaker embeddings for job")
+    
+    matches = await run_in_threadpool(
+        index.identify,
+        embeddings,
+        threshold if threshold is not None else settings.SPEAKER_MATCH_THRESHOLD
+    )
+    
+    return {
+        "job_id": job_id,
+        "speakers": [
+            {
+                "speaker": label,
+                "name": matches.get(label, {}).get("name"),
+                "score": matches.get(label, {}).get("score")
+            }
+            for label in sorted(embeddings)
+        ]
+    }
+
+
+@router.post("/speakers/enroll")
+async def enroll_speaker(request: SpeakerEnrollRequest):
+    """
+    Enroll a named voice from a speaker in an existing job.
+    
+    Args:
+        request: Name to enroll and the job speaker to take the voice from
+    
+    Returns:
+        Enrollment confirmation
+    """
+    index = _get_speaker_index()
+    embedding = await run_in_threadpool(index.get, request.job_id, request.speaker)
+    
+    if embedding is None:
+        raise HTTPException(status_code=404, detail="Speaker not found in index")
+    
+    await run_in_threadpool(
+        index.enroll, request.name, embedding, request.job_id, request.speaker
+    )
+    
+    return {
+        "message": "Speaker enrolled",
+        "name": request.name
+    }
+
+
+@router.get("/speakers/search")
+async def search_speakers(job_id: str, speaker: str, k: int = Query(10, ge=1, le=100)):
+    """
+    Find the stored speakers closest to a job's speaker across recordings.
+    
+    Args:
+        job_id: The ID of the transcription job
+        speaker: Speaker label within the job
+        k: Number of results (1 to 100)
+    
+    Returns:
+        Nearest speakers with their job, label, name and cosine score
+    """
+    index = _get_speaker_index()
+    embedding = await run_in_threadpool(index.get, job_id, speaker)
+    
+    if embedding is None:
+        raise HTTPException(status_code=404, detail="Speaker not found in index")
+    
+    # Ask for one extra neighbor: the query speaker itself is in the index
+    hits = (await run_in_threadpool(index.search, embedding, k + 1))[0]
+    
+    return {
+        "results": [
+            hit for hit in hits
+            if not (hit["job_id"] == job_id and hit["speaker"] == speaker and hit["name"] is None)
+        ][:k]
+    }
@@ -11,24 +11,167 @@ class Settings:
     APP_NAME: str = os.getenv("APP_NAME", "Echo API")
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+    # Response compression (brotli when installed, else gzip)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))  # bytes
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    
+    # Segment queries
+    SEGMENT_PAGE_SIZE: int = int(os.getenv("SEGMENT_PAGE_SIZE", "100"))
+    SEGMENT_PAGE_MAX: int = int(os.getenv("SEGMENT_PAGE_MAX", "1000"))
+    # Store adjacent same-speaker segments as one turn row
+    TURN_COMPACTION: bool = os.getenv("TURN_COMPACTION", "False").lower() == "true"
+    # Longest silence within a turn, in seconds
+    TURN_MAX_GAP: float = float(os.getenv("TURN_MAX_GAP", "1.5"))
+    TURN_MAX_DURATION: float = float(os.getenv("TURN_MAX_DURATION", "60"))  # seconds
     
     # Whisper
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "base")
     WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "cpu")
+    TRANSCRIPTION_ENGINE: str = os.getenv("TRANSCRIPTION_ENGINE", "whisper")  # or faster-whisper
+    WHISPER_COMPUTE_TYPE: str = os.getenv("WHISPER_COMPUTE_TYPE", "int8")  # faster-whisper only
+    
+    # Language-detection pre-pass (jobs without a language)
+    LANGUAGE_DETECTION: bool = os.getenv("LANGUAGE_DETECTION", "True").lower() == "true"
+    LANGUAGE_DETECTION_MODEL: str = os.getenv("LANGUAGE_DETECTION_MODEL", "tiny")
+    LANGUAGE_ROUTE_THRESHOLD: float = float(os.getenv("LANGUAGE_ROUTE_THRESHOLD", "0.8"))
+    LANGUAGE_CACHE_TTL: int = int(os.getenv("LANGUAGE_CACHE_TTL", str(30 * 24 * 3600)))
     
     # pyannote.audio
     PYANNOTE_MODEL: str = os.getenv("PYANNOTE_MODEL", "pyannote/speaker-diarization")
     
+    # Speaker-embedding index
+    SPEAKER_INDEX_ENABLED: bool = os.getenv("SPEAKER_INDEX_ENABLED", "False").lower() == "true"
+    SPEAKER_INDEX_DIR: str = os.getenv("SPEAKER_INDEX_DIR", "/tmp/transcriber/speaker_index")
+    SPEAKER_EMBEDDING_DIM: int = int(os.getenv("SPEAKER_EMBEDDING_DIM", "256"))
+    SPEAKER_MATCH_THRESHOLD: float = float(os.getenv("SPEAKER_MATCH_THRESHOLD", "0.7"))
+    
+    # Voice activity detection pre-pass
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "False").lower() == "true"
+    VAD_MODEL: str = os.getenv("VAD_MODEL", "pyannote/voice-activity-detection")
+    VAD_PADDING: float = float(os.getenv("VAD_PADDING", "0.2"))
+    VAD_MIN_GAP: float = float(os.getenv("VAD_MIN_GAP", "0.5"))
+    VAD_MIN_SKIP: float = float(os.getenv("VAD_MIN_SKIP", "0.05"))
+    
+    # Windowed decoding of long inputs from memory-mapped PCM (0 disables)
+    WINDOWED_MIN_DURATION: float = float(os.getenv("WINDOWED_MIN_DURATION", "1200"))  # seconds
+    TRANSCRIBE_WINDOW: float = float(os.getenv("TRANSCRIBE_WINDOW", "300"))
+    DIARIZE_WINDOW: float = float(os.getenv("DIARIZE_WINDOW", "900"))
+    WINDOW_CUT_SEARCH: float = float(os.getenv("WINDOW_CUT_SEARCH", "5"))
+    SPEAKER_LINK_THRESHOLD: float = float(os.getenv("SPEAKER_LINK_THRESHOLD", "0.6"))
+    
+    # Live streaming over WebSocket
+    STREAM_PARTIAL_INTERVAL: float = float(os.getenv("STREAM_PARTIAL_INTERVAL", "1.0"))
+    STREAM_ENDPOINT_SILENCE: float = float(os.getenv("STREAM_ENDPOINT_SILENCE", "0.6"))
+    STREAM_MAX_WINDOW: float = float(os.getenv("STREAM_MAX_WINDOW", "15"))
+    STREAM_SILENCE_DB: float = float(os.getenv("STREAM_SILENCE_DB", "-40"))
+    
     # Celery
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
     
+    # Retries and stage checkpoints
+    TASK_MAX_RETRIES: int = int(os.getenv("TASK_MAX_RETRIES", "3"))
+    # Seconds before the first retry, doubled per retry
+    TASK_RETRY_BACKOFF: int = int(os.getenv("TASK_RETRY_BACKOFF", "10"))
+    TASK_RETRY_BACKOFF_MAX: int = int(os.getenv("TASK_RETRY_BACKOFF_MAX", "600"))
+    # Seconds between a running job's checks for cancellation
+    CANCEL_CHECK_INTERVAL: float = float(os.getenv("CANCEL_CHECK_INTERVAL", "2"))
+    CHECKPOINT_DIR: str = os.getenv("CHECKPOINT_DIR", "/tmp/transcriber/checkpoints")
+    
+    # Completion webhooks
+    WEBHOOK_QUEUE: str = os.getenv("WEBHOOK_QUEUE", "webhooks")
+    # HMAC-SHA256 key of the X-Echo-Signature header (unsigned when empty)
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_TIMEOUT: float = float(os.getenv("WEBHOOK_TIMEOUT", "10"))  # seconds
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+    # Seconds before the first retry, doubled per retry
+    WEBHOOK_RETRY_BACKOFF: int = int(os.getenv("WEBHOOK_RETRY_BACKOFF", "10"))
+    WEBHOOK_RETRY_BACKOFF_MAX: int = int(os.getenv("WEBHOOK_RETRY_BACKOFF_MAX", "3600"))
+    # Events per request, and seconds to wait for more jobs to finish
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+    WEBHOOK_BATCH_WAIT: float = float(os.getenv("WEBHOOK_BATCH_WAIT", "1"))
+    WEBHOOK_SWEEP_INTERVAL: float = float(os.getenv("WEBHOOK_SWEEP_INTERVAL", "60"))
+    # Comma-separated callback hosts allowed to resolve to private addresses
+    WEBHOOK_ALLOWED_HOSTS: str = os.getenv("WEBHOOK_ALLOWED_HOSTS", "")
+    # Base of the result links in webhook payloads
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
+    
+    # Redis (short-job queue and other non-Celery state)
+    REDIS_URL: str = os.getenv("REDIS_URL", CELERY_BROKER_URL)
+    
+    # Hot status of queued and running jobs, kept in Redis
+    JOB_STATUS_STORE: bool = os.getenv("JOB_STATUS_STORE", "True").lower() == "true"
+    JOB_STATUS_TTL: int = int(os.getenv("JOB_STATUS_TTL", str(24 * 3600)))  # seconds
+    
+    # Cross-job batching for short clips
+    BATCH_SHORT_JOBS: bool = os.getenv("BATCH_SHORT_JOBS", "False").lower() == "true"
+    BATCH_MAX_DURATION: float = float(os.getenv("BATCH_MAX_DURATION", "30"))
+    BATCH_MAX_SIZE: int = int(os.getenv("BATCH_MAX_SIZE", "8"))
+    BATCH_MAX_WAIT: float = float(os.getenv("BATCH_MAX_WAIT", "0.5"))
+    # Seconds a queue worker's heartbeat lives; jobs claimed by a worker
+    # whose heartbeat expires are put back on the queue
+    QUEUE_HEARTBEAT_TTL: int = int(os.getenv("QUEUE_HEARTBEAT_TTL", "30"))
+    
+    # Pipelined worker: prefetch and decode upcoming jobs during inference
+    PIPELINE_WORKER: bool = os.getenv("PIPELINE_WORKER", "False").lower() == "true"
+    PIPELINE_PREFETCH: int = int(os.getenv("PIPELINE_PREFETCH", "2"))  # decoded jobs waiting
+    PIPELINE_PERSIST_QUEUE: int = int(os.getenv("PIPELINE_PERSIST_QUEUE", "4"))
+    
+    # Worker CPU budgeting (0 = derive from detected CPUs)
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "0"))
+    WORKER_THREADS_PER_CHILD: int = int(os.getenv("WORKER_THREADS_PER_CHILD", "0"))
+    WORKER_DEFAULT_THREADS: int = int(os.getenv("WORKER_DEFAULT_THREADS", "4"))
+    WORKER_INTEROP_THREADS: int = int(os.getenv("WORKER_INTEROP_THREADS", "1"))
+    WORKER_PIN_CPUS: bool = os.getenv("WORKER_PIN_CPUS", "False").lower() == "true"
+    # Load models in the worker parent and share them copy-on-write
+    PRELOAD_MODELS: bool = os.getenv("PRELOAD_MODELS", "False").lower() == "true"
+    
+    # Deadline-aware scheduling
+    # Jobs the workers run at once, across all worker processes
+    SCHEDULER_WORKER_SLOTS: int = int(os.getenv("SCHEDULER_WORKER_SLOTS", "1"))
+    # Processing seconds per audio second, until a model has enough history
+    MODEL_REAL_TIME_FACTORS: str = os.getenv(
+        "MODEL_REAL_TIME_FACTORS", "tiny=0.1,base=0.15,small=0.35,medium=0.8,large=1.5"
+    )
+    SCHEDULER_MIN_HISTORY: float = float(os.getenv("SCHEDULER_MIN_HISTORY", "600"))  # audio seconds
+    SCHEDULER_SAFETY_MARGIN: float = float(os.getenv("SCHEDULER_SAFETY_MARGIN", "1.2"))
+    # SLA classes: seconds from submission to the deadline
+    SLA_CLASSES: str = os.getenv("SLA_CLASSES", "interactive=900,standard=14400,batch=86400")
+    
     # File Upload
     MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", "524288000"))  # 500MB
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/tmp/transcriber")
+    # Resumable uploads: session lifetime since the last chunk, largest chunk
+    UPLOAD_SESSION_TTL: int = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))  # seconds
+    UPLOAD_CHUNK_MAX_SIZE: int = int(os.getenv("UPLOAD_CHUNK_MAX_SIZE", str(64 * 1024 * 1024)))
+    # Most bytes all unfinished upload sessions together may preallocate
+    UPLOAD_MAX_RESERVED: int = int(os.getenv("UPLOAD_MAX_RESERVED", str(8 * 1024 ** 3)))
+    # Seconds an upload's Idempotency-Key is remembered
+    IDEMPOTENCY_KEY_TTL: int = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 3600)))
+    
+    # Ingest normalization (16 kHz mono canonical copy)
+    NORMALIZE_AUDIO: bool = os.getenv("NORMALIZE_AUDIO", "True").lower() == "true"
+    NORMALIZE_FORMAT: str = os.getenv("NORMALIZE_FORMAT", "flac")  # flac or opus
+    NORMALIZE_OPUS_BITRATE: str = os.getenv("NORMALIZE_OPUS_BITRATE", "32k")
+    KEEP_ORIGINAL_UPLOAD: bool = os.getenv("KEEP_ORIGINAL_UPLOAD", "True").lower() == "true"
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./transcriber.db")
+    # Replica serving the read-only /history and /jobs queries (optional)
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    # Connection pool of server databases (PostgreSQL), per process
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+    # SQLite only
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_BUSY_TIMEOUT: float = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # seconds
+    
+    # Bulk deletion
+    BULK_DELETE_BATCH_SIZE: int = int(os.getenv("BULK_DELETE_BATCH_SIZE", "500"))
+    RECLAIM_BATCH_SIZE: int = int(os.getenv("RECLAIM_BATCH_SIZE", "1000"))
     
     # Video frames for preview
     PREVIEW_FRAMES: int = 5
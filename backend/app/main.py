@@ -8,6 +8,7 @@ from fastapi.responses import JSONResponse
 
 from app.config import settings
 from app.api.v1.routes import router as api_router
+from app.utils.compression import CompressionMiddleware
 
 
 app = FastAPI(
@@ -27,6 +28,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses with gzip or brotli, flushing streamed chunks
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
 
 @app.get("/")
 async def root():
@@ -1,7 +1,9 @@
 """
 Database models for the Transcriber application.
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, text
+from sqlalchemy import (
+    Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Index, JSON, text, true
+)
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -16,6 +18,11 @@ class TranscriptionJob(Base):
     id = Column(String, primary_key=True)
     filename = Column(String)
     original_path = Column(String)
+    # Canonical 16 kHz mono copy produced at ingest
+    audio_path = Column(String, nullable=True)
+    source_metadata = Column(JSON, nullable=True)
+    # Id of the Celery task currently queued for the job, used to revoke it
+    task_id = Column(String, nullable=True)
     # Default values for Python object creation
     status: str
     created_at: datetime
@@ -25,13 +32,37 @@ class TranscriptionJob(Base):
     duration: float | None
     
     # Database column definitions
-    status = Column(String, server_default="queued")
+    status = Column(String, server_default="queued", index=True)
     created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
     completed_at = Column(DateTime, nullable=True)
     model = Column(String, server_default="base")
+    engine = Column(String, nullable=True)
     language = Column(String, nullable=True)
+    # Confidence of the detected language (None when the client set it)
+    language_probability = Column(Float, nullable=True)
+    # Diarization options: diarize=False skips speaker labelling entirely
+    diarize = Column(Boolean, server_default=true())
+    num_speakers = Column(Integer, nullable=True)
+    min_speakers = Column(Integer, nullable=True)
+    max_speakers = Column(Integer, nullable=True)
     speakers_detected = Column(Integer, server_default="0")
     duration = Column(Float, nullable=True)
+    # Fraction of the audio the VAD pre-pass skipped as non-speech
+    skipped_fraction = Column(Float, nullable=True)
+    # Seconds spanned by the longest stored segment or turn, which bounds
+    # how far before a time window a segment overlapping it can start
+    max_segment_span = Column(Float, nullable=True)
+    # Wall-clock seconds of the attempt that completed the job
+    processing_time = Column(Float, nullable=True)
+    # Deadline scheduling: the job's deadline and SLA class, the estimated
+    # processing seconds it adds to the backlog, and the scheduler's decision
+    deadline = Column(DateTime, nullable=True)
+    sla_class = Column(String, nullable=True)
+    estimated_processing = Column(Float, nullable=True)
+    schedule_decision = Column(JSON, nullable=True)
+    # Completion webhook: the submitting client and the URL to notify
+    client_id = Column(String, nullable=True)
+    callback_url = Column(String, nullable=True)
     
     # Relationship to segments
     segments = relationship("Segment", back_populates="job", cascade="all, delete-orphan")
@@ -47,6 +78,8 @@ class TranscriptionJob(Base):
             kwargs['model'] = "base"
         if 'language' not in kwargs:
             kwargs['language'] = None
+        if 'diarize' not in kwargs:
+            kwargs['diarize'] = True
         if 'speakers_detected' not in kwargs:
             kwargs['speakers_detected'] = 0
         if 'duration' not in kwargs:
@@ -55,8 +88,10 @@ class TranscriptionJob(Base):
 
 
 class Segment(Base):
-    """Model representing a transcription segment with speaker label."""
+    """Model representing a transcription segment or speaker turn."""
     __tablename__ = "segment"
+    # Serves both per-job lookups and time-window queries
+    __table_args__ = (Index("ix_segment_job_id_start_time", "job_id", "start_time"),)
     
     id = Column(Integer, primary_key=True)
     job_id = Column(String, ForeignKey("transcriptionjob.id"))
@@ -65,6 +100,109 @@ class Segment(Base):
     text = Column(String)
     speaker = Column(String)
     confidence = Column(Float)
+    # For a compacted speaker turn, the original segments inside it as a
+    # flat [start ms, end ms, text offset, ...] array relative to the turn
+    boundaries = Column(JSON, nullable=True)
     
     # Relationship to job
     job = relationship("TranscriptionJob", back_populates="segments")
+
+
+class JobStatistic(Base):
+    """
+    Model representing one aggregate counter behind the stats endpoint.
+    
+    Counters are keyed by metric and key (a status, model or speaker
+    count) and adjusted in the same transaction as the jobs they count.
+    """
+    __tablename__ = "jobstatistic"
+    
+    metric = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(Float, nullable=False, server_default="0")
+
+
+class IdempotencyKey(Base):
+    """
+    Model binding a client's Idempotency-Key to the job it created.
+    
+    ``request_hash`` fingerprints the upload and its parameters, so a key
+    replayed with a different payload can be told apart from a retry.
+    """
+    __tablename__ = "idempotencykey"
+    
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    job_id = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class UploadSession(Base):
+    """
+    Model representing a resumable upload in progress.
+    
+    Chunks are written straight into a preallocated file at ``path``;
+    finalizing moves that file into place as the upload of a new job.
+    """
+    __tablename__ = "uploadsession"
+    
+    id = Column(String, primary_key=True)
+    filename = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    path = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+    # Pushed back by every chunk; incomplete sessions past it are purged
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Set once the upload is finalized into a job
+    job_id = Column(String, nullable=True)
+
+
+class UploadChunk(Base):
+    """Model representing a byte range received for an upload session."""
+    __tablename__ = "uploadchunk"
+    
+    id = Column(Integer, primary_key=True)
+    upload_id = Column(String, ForeignKey("uploadsession.id"), index=True)
+    start_offset = Column(Integer, nullable=False)
+    length = Column(Integer, nullable=False)
+
+
+class ClientWebhook(Base):
+    """Model holding a client's default completion webhook."""
+    __tablename__ = "clientwebhook"
+    
+    client_id = Column(String, primary_key=True)
+    callback_url = Column(String, nullable=False)
+    updated_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+
+
+class WebhookDelivery(Base):
+    """
+    Model representing one webhook event and the state of its delivery.
+    
+    The event's payload is captured when the job finishes, so retries send
+    the same content. Due deliveries are claimed by setting a claim token
+    and pushing ``next_attempt_at`` past the request timeout, so a sender
+    that dies mid-request only delays them.
+    """
+    __tablename__ = "webhookdelivery"
+    # Serves the scan for due deliveries
+    __table_args__ = (
+        Index("ix_webhookdelivery_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(String, nullable=False, index=True)
+    callback_url = Column(String, nullable=False)
+    event = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # pending, delivered or failed (attempts exhausted)
+    status = Column(String, nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_status_code = Column(Integer, nullable=True)
+    last_error = Column(String, nullable=True)
+    claim = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP"))
+    next_attempt_at = Column(DateTime, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 """
 Pydantic schemas for API request/response validation.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -51,6 +51,24 @@ class TranscriptionHistoryItem(BaseModel):
     duration: Optional[float]
 
 
+class SpeakerEnrollRequest(BaseModel):
+    """Request schema for enrolling a named voice from a job's speaker."""
+    name: str
+    job_id: str
+    speaker: str
+
+
+class UploadSessionCreate(BaseModel):
+    """Request schema for starting a resumable upload."""
+    filename: str
+    size: int = Field(..., ge=1)
+
+
+class ClientWebhookUpdate(BaseModel):
+    """Request schema for setting a client's default completion webhook."""
+    callback_url: str = Field(..., min_length=1)
+
+
 class ErrorResponse(BaseModel):
     """Response schema for errors."""
     error: str
@@ -3,12 +3,37 @@ Speaker diarization service using pyannote.audio.
 """
 import os
 import logging
-from typing import List, Dict, Optional
-
-import torch
+from typing import Callable, List, Dict, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Label used when there is only one speaker or diarization is skipped
+DEFAULT_SPEAKER = "SPEAKER_00"
+
+
+def label_single_speaker(transcription_segments: List[Dict]) -> List[Dict]:
+    """
+    Label every transcription segment with the default speaker.
+    
+    Used when diarization is skipped, so the pyannote pipeline is never loaded.
+    
+    Args:
+        transcription_segments: List of transcription segments with text
+    
+    Returns:
+        List[Dict]: Segments in the aligned format
+    """
+    return [
+        {
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+            "speaker": DEFAULT_SPEAKER,
+            "confidence": seg.get("confidence", 0.95)
+        }
+        for seg in transcription_segments
+    ]
+
 
 class Diarizer:
     """Service for speaker diarization using pyannote.audio."""
@@ -34,22 +59,59 @@ class Diarizer:
             )
         return self.pipeline
     
-    def diarize(self, audio_path: str) -> dict:
+    def load(self):
+        """Load the pipeline now instead of on first use."""
+        return self._load_pipeline()
+    
+    def diarize(self,
+                audio_path: Union[str, Dict],
+                return_embeddings: bool = False,
+                num_speakers: Optional[int] = None,
+                min_speakers: Optional[int] = None,
+                max_speakers: Optional[int] = None,
+                check_cancelled: Optional[Callable[[], None]] = None) -> dict:
         """
         Perform speaker diarization on an audio file.
         
         Args:
-            audio_path: Path to the audio file
+            audio_path: Path to the audio file, or a pyannote in-memory
+                input (``{"waveform": ..., "sample_rate": ...}``)
+            return_embeddings: Also return each speaker's centroid embedding
+            num_speakers: Exact number of speakers, if known
+            min_speakers: Lower bound on the number of speakers
+            max_speakers: Upper bound on the number of speakers
+            check_cancelled: Called between pipeline steps; raises to
+                abort the run (optional)
         
         Returns:
-            dict: Diarization result with speaker segments
+            dict: Diarization result with speaker segments (and embeddings
+            keyed by speaker label if requested)
         """
         pipeline = self._load_pipeline()
         
-        logger.info(f"Running speaker diarization on: {audio_path}")
+        source = audio_path if isinstance(audio_path, str) else "in-memory waveform"
+        logger.info(f"Running speaker diarization on: {source}")
+        
+        # Speaker-count hints constrain clustering
+        options = {
+            key: value
+            for key, value in (
+                ("num_speakers", num_speakers),
+                ("min_speakers", min_speakers),
+                ("max_speakers", max_speakers),
+            )
+            if value is not None
+        }
+        
+        # pyannote calls the hook after each step and batch of its pipeline
+        if check_cancelled is not None:
+            options["hook"] = lambda *args, **kwargs: check_cancelled()
         
         # Run diarization
-        diarization = pipeline(audio_path)
+        if return_embeddings:
+            diarization, centroids = pipeline(audio_path, return_embeddings=True, **options)
+        else:
+            diarization, centroids = pipeline(audio_path, **options), None
         
         # Convert to standard format
         segments = []
@@ -60,10 +122,36 @@ class Diarizer:
                 "speaker": speaker
             })
         
-        return {
+        result = {
             "segments": segments,
             "num_speakers": len(set(seg["speaker"] for seg in segments))
         }
+        
+        if return_embeddings:
+            # Centroid rows follow the order of diarization.labels()
+            result["embeddings"] = {
+                label: [float(x) for x in centroid]
+                for label, centroid in zip(diarization.labels(), centroids)
+                if not any(x != x for x in centroid)  # skip NaN centroids
+            }
+        
+        return result
+    
+    def diarize_samples(self, samples, **kwargs) -> dict:
+        """
+        Perform speaker diarization on an in-memory waveform.
+        
+        Args:
+            samples: 16 kHz mono float32 samples
+            **kwargs: Options accepted by :meth:`diarize`
+        
+        Returns:
+            dict: Diarization result with speaker segments
+        """
+        import torch
+        
+        waveform = torch.from_numpy(samples).unsqueeze(0)
+        return self.diarize({"waveform": waveform, "sample_rate": 16000}, **kwargs)
     
     def align_segments(self, 
                        transcription_segments: List[Dict], 
@@ -131,7 +219,7 @@ class Diarizer:
                 })
         
         if not overlaps:
-            return "SPEAKER_00"
+            return DEFAULT_SPEAKER
         
         # Return the speaker with the most overlap
         speaker = max(overlaps, key=lambda x: x["overlap"])["speaker"]
@@ -0,0 +1,94 @@
+"""
+Language-detection pre-pass.
+
+When a job has no language, a small multilingual model listens to the
+first 30s of audio. Confidently English audio is routed to the ``.en``
+checkpoint of the requested model, which is faster and more accurate at
+the same size. Results are cached per audio content hash, so re-uploads
+and retries skip detection.
+"""
+import json
+import logging
+from typing import Optional
+
+from app.config import settings
+from app.utils.audio import load_audio_head
+from app.utils.file_ops import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Whisper sizes that ship an English-only checkpoint
+ENGLISH_ONLY_SIZES = ("tiny", "base", "small", "medium")
+
+LANGUAGE_CACHE_PREFIX = "echo:language:"
+
+# Audio Whisper looks at to detect the language
+DETECTION_SECONDS = 30
+
+
+def english_variant(model: str) -> Optional[str]:
+    """Get the English-only checkpoint of a model, if there is one."""
+    if model.endswith(".en"):
+        return model
+    if model in ENGLISH_ONLY_SIZES:
+        return f"{model}.en"
+    return None
+
+
+def choose_model(model: str, language: str, probability: float,
+                 threshold: Optional[float] = None) -> str:
+    """
+    Pick the model to transcribe with once the language is known.
+
+    Args:
+        model: Requested model
+        language: Detected language code
+        probability: Detection confidence
+        threshold: Minimum confidence to switch models (defaults to settings)
+
+    Returns:
+        str: The ``.en`` variant for confident English, else ``model``
+    """
+    threshold = settings.LANGUAGE_ROUTE_THRESHOLD if threshold is None else threshold
+    if language == "en" and probability >= threshold:
+        return english_variant(model) or model
+    return model
+
+
+def detect_language(audio_path: str, transcriber, cache=None) -> dict:
+    """
+    Detect the spoken language of an audio file.
+
+    Cache errors are logged and never fail detection.
+
+    Args:
+        audio_path: Path to the audio file
+        transcriber: Transcriber with a multilingual model
+        cache: Redis client used as the result cache (optional)
+
+    Returns:
+        dict: ``language`` and ``probability``
+    """
+    key = LANGUAGE_CACHE_PREFIX + file_sha256(audio_path)
+
+    if cache is not None:
+        try:
+            cached = cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Language cache unavailable: {str(e)}")
+
+    language, probability = transcriber.detect_language(
+        load_audio_head(audio_path, DETECTION_SECONDS)
+    )
+    detection = {"language": language, "probability": probability}
+    logger.info(f"Detected language {language} ({probability:.0%})")
+
+    if cache is not None:
+        try:
+            cache.set(key, json.dumps(detection), ex=settings.LANGUAGE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Could not cache detected language: {str(e)}")
+
+    return detection
@@ -0,0 +1,321 @@
+"""
+Speaker-embedding index for cross-recording speaker identification.
+
+Every diarized speaker's centroid embedding is appended to a float32
+matrix on disk, which readers memory-map. Rows are L2-normalized, so
+cosine similarity against the whole index is a single matrix-vector
+product. Row metadata (job, speaker label, enrolled name) is kept in a
+JSON-lines file next to the matrix.
+
+Appends hold a file lock and first cut off whatever an interrupted
+append left behind, so row ``i`` of the metadata always describes row
+``i`` of the matrix. Deleted jobs are recorded in a third file; their
+speakers are hidden from lookups and searches, while voices enrolled
+from them stay.
+"""
+import os
+import json
+import fcntl
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MATRIX_FILE = "embeddings.f32"
+ROWS_FILE = "rows.jsonl"
+DELETED_FILE = "deleted.jsonl"
+LOCK_FILE = ".lock"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize row vectors as float32."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SpeakerIndex:
+    """Append-only, memory-mapped index of speaker embeddings."""
+
+    def __init__(self, directory: str, dim: int):
+        """
+        Initialize the index.
+
+        Args:
+            directory: Directory holding the index files
+            dim: Embedding dimension
+        """
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._rows: List[dict] = []
+        self._pending: List[dict] = []
+        self._rows_offset = 0
+        self._named = np.zeros(0, dtype=bool)
+        self._removed = np.zeros(0, dtype=bool)
+        self._by_job: Dict[str, Dict[str, int]] = {}
+        self._deleted = set()
+        self._deleted_offset = 0
+        self._sizes = None
+        self.refresh()
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.directory, MATRIX_FILE)
+
+    @property
+    def rows_path(self) -> str:
+        return os.path.join(self.directory, ROWS_FILE)
+
+    @property
+    def deleted_path(self) -> str:
+        return os.path.join(self.directory, DELETED_FILE)
+
+    @property
+    def row_bytes(self) -> int:
+        return 4 * self.dim
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextmanager
+    def _lock(self):
+        """Serialize appends from concurrent workers."""
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _size_of(path: str) -> int:
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    @staticmethod
+    def _read_lines(path: str, offset: int):
+        """Read the complete JSON lines of a file from ``offset`` on."""
+        lines = []
+        if os.path.exists(path):
+            with open(path) as f:
+                f.seek(offset)
+                for line in iter(f.readline, ""):
+                    if not line.endswith("\n"):
+                        break
+                    offset = f.tell()
+                    lines.append(json.loads(line))
+        return lines, offset
+
+    def _read_rows(self) -> None:
+        """Read the metadata lines appended since the last read."""
+        rows, self._rows_offset = self._read_lines(self.rows_path, self._rows_offset)
+        self._pending.extend(rows)
+
+    def refresh(self) -> None:
+        """Re-map the index if other processes appended to or deleted from it."""
+        sizes = tuple(self._size_of(path)
+                      for path in (self.matrix_path, self.rows_path, self.deleted_path))
+        if sizes == self._sizes:
+            return
+
+        self._read_rows()
+        deleted, self._deleted_offset = self._read_lines(self.deleted_path, self._deleted_offset)
+        for entry in deleted:
+            self._deleted.add(entry["job_id"])
+            for i in self._by_job.pop(entry["job_id"], {}).values():
+                self._removed[i] = True
+
+        # Only rows whose metadata and vector are both complete are visible
+        count = min(len(self._rows) + len(self._pending), sizes[0] // self.row_bytes)
+        new_rows = self._pending[:count - len(self._rows)]
+        self._pending = self._pending[len(new_rows):]
+        removed = []
+        for i, row in enumerate(new_rows, start=len(self._rows)):
+            unnamed = row.get("name") is None
+            removed.append(unnamed and row["job_id"] in self._deleted)
+            if unnamed and not removed[-1]:
+                self._by_job.setdefault(row["job_id"], {})[row["speaker"]] = i
+        self._rows.extend(new_rows)
+
+        if count:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r",
+                                     shape=(count, self.dim))
+        self._named = np.concatenate([
+            self._named,
+            np.array([row.get("name") is not None for row in new_rows], dtype=bool)
+        ])
+        self._removed = np.concatenate([self._removed, np.array(removed, dtype=bool)])
+        self._sizes = sizes
+
+    def _repair(self) -> None:
+        """
+        Cut off what an interrupted append left behind (call under the lock).
+
+        Vectors are written before their metadata, so a crash leaves extra
+        vectors, or a partial last line, that the next append would
+        otherwise shift its rows against.
+        """
+        self._read_rows()
+        if self._size_of(self.rows_path) > self._rows_offset:
+            os.truncate(self.rows_path, self._rows_offset)
+        stored = (len(self._rows) + len(self._pending)) * self.row_bytes
+        if self._size_of(self.matrix_path) > stored:
+            logger.warning(f"Dropping incomplete speaker index append in {self.directory}")
+            os.truncate(self.matrix_path, stored)
+
+    def add(self, entries: List[dict], embeddings: np.ndarray) -> None:
+        """
+        Append embeddings with their metadata.
+
+        Args:
+            entries: One dict per embedding with ``job_id``, ``speaker``
+                and optionally ``name``
+            embeddings: Matrix of shape (len(entries), dim)
+        """
+        vectors = normalize(embeddings)
+        if vectors.shape != (len(entries), self.dim):
+            raise ValueError(f"Expected {len(entries)} embeddings of dimension {self.dim}")
+
+        with self._lock():
+            self._repair()
+            # Vectors first: a row only becomes visible once both exist
+            with open(self.matrix_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.rows_path, "a") as f:
+                for entry in entries:
+                    f.write(json.dumps({
+                        "job_id": entry.get("job_id"),
+                        "speaker": entry.get("speaker"),
+                        "name": entry.get("name"),
+                    }) + "\n")
+
+        self.refresh()
+
+    def add_job(self, job_id: str, embeddings: Dict[str, list]) -> None:
+        """Store the centroid embedding of every speaker in a job."""
+        if not embeddings:
+            return
+        labels = sorted(embeddings)
+        self.add(
+            [{"job_id": job_id, "speaker": label} for label in labels],
+            np.array([embeddings[label] for label in labels])
+        )
+
+    def remove_jobs(self, job_ids: List[str]) -> None:
+        """
+        Hide the speakers of deleted jobs from every lookup and search.
+
+        Voices enrolled from the jobs' speakers are kept.
+
+        Args:
+            job_ids: IDs of the deleted jobs
+        """
+        if not job_ids:
+            return
+        with self._lock():
+            with open(self.deleted_path, "a") as f:
+                for job_id in job_ids:
+                    f.write(json.dumps({"job_id": job_id}) + "\n")
+
+        self.refresh()
+
+    def enroll(self, name: str, embedding, job_id: Optional[str] = None,
+               speaker: Optional[str] = None) -> None:
+        """Store a named voice that future searches can match against."""
+        self.add([{"job_id": job_id, "speaker": speaker, "name": name}], embedding)
+
+    def get(self, job_id: str, speaker: str) -> Optional[np.ndarray]:
+        """Get the stored embedding of a job's speaker."""
+        return self.get_job(job_id).get(speaker)
+
+    def get_job(self, job_id: str) -> Dict[str, np.ndarray]:
+        """Get the stored embeddings of every speaker in a job."""
+        self.refresh()
+        return {
+            speaker: np.array(self._matrix[i])
+            for speaker, i in self._by_job.get(job_id, {}).items()
+        }
+
+    def search(self, queries, k: int = 5, named_only: bool = False,
+               min_score: float = -1.0) -> List[List[dict]]:
+        """
+        Find the nearest stored speakers by cosine similarity.
+
+        Args:
+            queries: Embeddings of shape (n, dim)
+            k: Number of neighbors per query
+            named_only: Only match enrolled (named) voices
+            min_score: Drop neighbors below this similarity
+
+        Returns:
+            List[List[dict]]: Per query, neighbors with their row metadata
+            and ``score``, best first
+        """
+        self.refresh()
+        queries = normalize(queries)
+        if not len(self._rows):
+            return [[] for _ in queries]
+
+        scores = queries @ np.asarray(self._matrix).T
+        scores[:, self._removed] = -np.inf
+        if named_only:
+            scores[:, ~self._named] = -np.inf
+
+        k = min(k, scores.shape[1])
+        # argpartition keeps this O(rows) per query even for large indexes
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for query_scores, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-query_scores[candidates])]
+            results.append([
+                {**self._rows[i], "score": float(query_scores[i])}
+                for i in ordered
+                if query_scores[i] >= min_score and not self._removed[i]
+            ])
+        return results
+
+    def identify(self, embeddings: Dict[str, list], threshold: float) -> Dict[str, dict]:
+        """
+        Match each speaker of a recording to the closest enrolled voice.
+
+        Args:
+            embeddings: Speaker label -> centroid embedding
+            threshold: Minimum cosine similarity for a match
+
+        Returns:
+            Dict[str, dict]: Speaker label -> ``name`` and ``score`` for
+            the speakers that matched
+        """
+        if not embeddings:
+            return {}
+        labels = sorted(embeddings)
+        matches = self.search(
+            np.array([embeddings[label] for label in labels]),
+            k=1,
+            named_only=True,
+            min_score=threshold
+        )
+        return {
+            label: {"name": hits[0]["name"], "score": hits[0]["score"]}
+            for label, hits in zip(labels, matches)
+            if hits
+        }
+
+
+_index = None
+
+
+def get_speaker_index() -> SpeakerIndex:
+    """Get the process-wide speaker index."""
+    from app.config import settings
+
+    global _index
+    if _index is None:
+        _index = SpeakerIndex(settings.SPEAKER_INDEX_DIR, settings.SPEAKER_EMBEDDING_DIM)
+    return _index
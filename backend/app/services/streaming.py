@@ -0,0 +1,295 @@
+"""
+Live streaming transcription.
+
+Audio frames from a WebSocket are appended to the current utterance. While
+the speaker talks, the utterance is re-decoded every ``partial_interval``
+seconds and a partial hypothesis is pushed back. An energy-based VAD marks
+the end of the utterance after ``endpoint_silence`` seconds of silence (or
+once it reaches ``max_window`` seconds); it is then decoded one last time,
+emitted as final segments and dropped from the buffer.
+
+Decoding runs on a warm, process-wide model per (model, engine).
+"""
+import wave
+import logging
+import threading
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Whisper's input rate; every stream is resampled to it
+SAMPLE_RATE = 16000
+# Energy VAD frame length
+FRAME_SAMPLES = 480  # 30 ms
+# Audio kept before the first speech frame of an utterance
+LEAD_IN = 0.3
+
+ENCODINGS = ("pcm_s16le", "opus")
+
+
+def pcm_to_float(data: bytes) -> np.ndarray:
+    """Convert s16le PCM bytes to float32 samples in [-1, 1]."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def float_to_pcm(samples: np.ndarray) -> bytes:
+    """Convert float32 samples to s16le PCM bytes."""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Resample by linear interpolation (enough for speech recognition)."""
+    if from_rate == to_rate or not len(samples):
+        return samples
+    count = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def speech_frames(samples: np.ndarray, threshold_db: float) -> np.ndarray:
+    """
+    Flag the 30 ms frames whose energy is above a threshold.
+
+    Args:
+        samples: 16 kHz mono float32 samples
+        threshold_db: Frames louder than this (dBFS) count as speech
+
+    Returns:
+        np.ndarray: One bool per frame; a trailing partial frame is included
+    """
+    count = -(-len(samples) // FRAME_SAMPLES)
+    padded = np.zeros(count * FRAME_SAMPLES, dtype=np.float32)
+    padded[:len(samples)] = samples
+    rms = np.sqrt(np.mean(padded.reshape(count, FRAME_SAMPLES) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10)) > threshold_db
+
+
+class OpusDecoder:
+    """Decoder for Opus packets (requires the optional ``opuslib`` package)."""
+
+    # Longest Opus frame
+    MAX_FRAME_MS = 120
+
+    def __init__(self, sample_rate: int):
+        """
+        Initialize the decoder.
+
+        Args:
+            sample_rate: Output rate (8000, 12000, 16000, 24000 or 48000)
+        """
+        import opuslib
+        self.decoder = opuslib.Decoder(sample_rate, 1)
+        self.max_frame = sample_rate * self.MAX_FRAME_MS // 1000
+
+    def decode(self, packet: bytes) -> bytes:
+        """Decode one Opus packet to s16le PCM."""
+        return self.decoder.decode(packet, self.max_frame)
+
+
+class StreamingSession:
+    """Incremental decoder for one live audio stream."""
+
+    def __init__(self,
+                 decode: Callable[[np.ndarray], dict],
+                 sample_rate: int = SAMPLE_RATE,
+                 encoding: str = "pcm_s16le",
+                 recording_path: Optional[str] = None,
+                 partial_interval: Optional[float] = None,
+                 endpoint_silence: Optional[float] = None,
+                 max_window: Optional[float] = None,
+                 silence_db: Optional[float] = None):
+        """
+        Initialize the session.
+
+        Args:
+            decode: Function transcribing 16 kHz float32 samples into a
+                standard transcription result
+            sample_rate: Rate of the incoming audio
+            encoding: ``pcm_s16le`` (mono) or ``opus`` frames
+            recording_path: WAV file the 16 kHz audio is recorded to (optional)
+            partial_interval: Seconds of new audio between partial decodes
+            endpoint_silence: Seconds of silence that end an utterance
+            max_window: Longest utterance decoded at once, in seconds
+            silence_db: Energy threshold (dBFS) of the endpointing VAD
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+        self.decode = decode
+        self.sample_rate = sample_rate
+        self.opus = OpusDecoder(sample_rate) if encoding == "opus" else None
+        self.partial_interval = partial_interval or settings.STREAM_PARTIAL_INTERVAL
+        self.endpoint_silence = endpoint_silence or settings.STREAM_ENDPOINT_SILENCE
+        self.max_window = max_window or settings.STREAM_MAX_WINDOW
+        self.silence_db = settings.STREAM_SILENCE_DB if silence_db is None else silence_db
+
+        self.segments: List[dict] = []
+        self.duration = 0.0
+        self.language = None
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0.0  # Stream time of the buffer's first sample
+        self._since_decode = 0
+        self._trailing_silence = 0.0
+        self._heard_speech = False
+
+        self._recording = None
+        if recording_path:
+            self._recording = wave.open(recording_path, "wb")
+            self._recording.setnchannels(1)
+            self._recording.setsampwidth(2)
+            self._recording.setframerate(SAMPLE_RATE)
+
+    def feed_frame(self, data: bytes) -> List[dict]:
+        """
+        Add one frame of encoded audio.
+
+        Args:
+            data: s16le PCM bytes or one Opus packet
+
+        Returns:
+            List[dict]: Partial or final events to send to the client
+        """
+        if self.opus is not None:
+            data = self.opus.decode(data)
+        samples = resample(pcm_to_float(data), self.sample_rate, SAMPLE_RATE)
+        return self.feed(samples)
+
+    def feed(self, samples: np.ndarray) -> List[dict]:
+        """
+        Add 16 kHz float32 samples.
+
+        Args:
+            samples: New audio
+
+        Returns:
+            List[dict]: Partial or final events to send to the client
+        """
+        if not len(samples):
+            return []
+        if self._recording is not None:
+            self._recording.writeframes(float_to_pcm(samples))
+
+        self.duration += len(samples) / SAMPLE_RATE
+        self._buffer = np.concatenate([self._buffer, samples])
+        self._since_decode += len(samples)
+
+        speech = speech_frames(samples, self.silence_db)
+        if speech.any():
+            last = (np.flatnonzero(speech)[-1] + 1) * FRAME_SAMPLES
+            self._trailing_silence = max(0, len(samples) - last) / SAMPLE_RATE
+            self._heard_speech = True
+        else:
+            self._trailing_silence += len(samples) / SAMPLE_RATE
+
+        if not self._heard_speech:
+            # Nothing to decode yet: keep only a short lead-in
+            keep = int(LEAD_IN * SAMPLE_RATE)
+            if len(self._buffer) > keep:
+                drop = len(self._buffer) - keep
+                self._buffer = self._buffer[drop:]
+                self._offset += drop / SAMPLE_RATE
+            self._since_decode = 0
+            return []
+
+        window_full = len(self._buffer) >= self.max_window * SAMPLE_RATE
+        if self._trailing_silence >= self.endpoint_silence or window_full:
+            return self._finalize()
+
+        if self._since_decode >= self.partial_interval * SAMPLE_RATE:
+            self._since_decode = 0
+            result = self.decode(self._buffer)
+            return [{
+                "type": "partial",
+                "start": self._offset,
+                "end": self._offset + len(self._buffer) / SAMPLE_RATE,
+                "text": result["text"].strip()
+            }]
+
+        return []
+
+    def _finalize(self) -> List[dict]:
+        """Decode the current utterance as final segments and drop it."""
+        events = []
+        length = len(self._buffer) / SAMPLE_RATE
+
+        if self._heard_speech and len(self._buffer):
+            result = self.decode(self._buffer)
+            if result.get("language"):
+                self.language = result["language"]
+            for seg in result["segments"]:
+                segment = {
+                    "start": self._offset + seg["start"],
+                    "end": self._offset + min(seg["end"], length),
+                    "text": seg["text"].strip(),
+                    "confidence": seg.get("confidence")
+                }
+                self.segments.append(segment)
+                events.append({"type": "final", **segment})
+
+        self._offset += length
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._since_decode = 0
+        self._trailing_silence = 0.0
+        self._heard_speech = False
+        return events
+
+    def close(self) -> List[dict]:
+        """
+        End the stream: finalize the pending utterance and the recording.
+
+        Returns:
+            List[dict]: Final events for the last utterance
+        """
+        try:
+            return self._finalize()
+        finally:
+            if self._recording is not None:
+                self._recording.close()
+                self._recording = None
+
+
+# Warm transcribers shared by every stream, one per (model, engine)
+_transcribers = {}
+_locks = {}
+_transcribers_lock = threading.Lock()
+
+
+def get_stream_transcriber(model: str = "base", engine: Optional[str] = None):
+    """Get the process-wide transcriber for live streams."""
+    from app.services.transcriber import Transcriber
+
+    key = (model, engine or settings.TRANSCRIPTION_ENGINE)
+    with _transcribers_lock:
+        if key not in _transcribers:
+            _transcribers[key] = Transcriber(model=key[0], engine=key[1])
+            _locks[key] = threading.Lock()
+        return _transcribers[key]
+
+
+def decode_samples(samples: np.ndarray, model: str = "base",
+                   engine: Optional[str] = None,
+                   language: Optional[str] = None) -> dict:
+    """
+    Transcribe a stream's utterance on the warm model.
+
+    Streams sharing a model take turns, as the models are not safe to run
+    from several threads at once.
+
+    Args:
+        samples: 16 kHz mono float32 samples
+        model: Whisper model to use
+        engine: Transcription engine (optional)
+        language: Language code (optional)
+
+    Returns:
+        dict: Transcription result with text and segments
+    """
+    transcriber = get_stream_transcriber(model, engine)
+    key = (model, engine or settings.TRANSCRIPTION_ENGINE)
+    with _locks.setdefault(key, threading.Lock()):
+        return transcriber.transcribe_samples(samples, language)
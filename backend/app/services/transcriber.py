@@ -1,57 +1,181 @@
 """
 Transcription service using OpenAI Whisper.
+
+The model is run by a pluggable engine: the reference PyTorch ``whisper``
+package, or ``faster-whisper`` (CTranslate2) with int8 quantization for
+CPU-only workers. Every engine returns the same result format.
 """
 import os
 import logging
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
-import whisper
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-class Transcriber:
-    """Service for transcribing audio using Whisper."""
-    
-    def __init__(self, model: str = "base"):
+# Seconds per Whisper timestamp token
+TIMESTAMP_PRECISION = 0.02
+
+
+def tokens_to_segments(tokens: List[int],
+                       timestamp_begin: int,
+                       decode: Callable[[List[int]], str],
+                       duration: float) -> List[dict]:
+    """
+    Split decoded Whisper tokens into timestamped segments.
+
+    Whisper emits ``<|t0|> text <|t1|><|t1|> text <|t2|>``: timestamp
+    tokens open and close each segment.
+
+    Args:
+        tokens: Token ids of one decoded 30s window
+        timestamp_begin: Id of the first timestamp token
+        decode: Function turning text token ids into a string
+        duration: Length of the audio, used to close a trailing segment
+
+    Returns:
+        List[dict]: Segments in the standard format
+    """
+    segments = []
+    start = None
+    text_tokens = []
+
+    def _close(end):
+        segments.append({
+            "start": start,
+            "end": min(end, duration),
+            "text": decode(text_tokens),
+            "confidence": 0.95  # Whisper doesn't provide confidence scores
+        })
+
+    for token in tokens:
+        if token >= timestamp_begin:
+            t = (token - timestamp_begin) * TIMESTAMP_PRECISION
+            if start is not None and text_tokens:
+                _close(t)
+                start, text_tokens = None, []
+            else:
+                start = t
+        else:
+            if start is None:
+                start = segments[-1]["end"] if segments else 0.0
+            text_tokens.append(token)
+
+    if text_tokens:
+        _close(duration)
+
+    return segments
+
+
+class TranscriptionEngine:
+    """Base class for the engines that run Whisper models."""
+
+    name = None
+
+    def __init__(self, model: str = "base", device: str = "cpu"):
         """
-        Initialize the transcriber.
-        
+        Initialize the engine.
+
         Args:
             model: Whisper model to use (base, small, medium, large)
+            device: Device to run on (cpu, cuda)
         """
         self.model_name = model
+        self.device = device
         self.model = None
-        logger.info(f"Initializing Whisper model: {model}")
-    
+
     def _load_model(self):
-        """Load the Whisper model (lazy loading)."""
-        if self.model is None:
-            self.model = whisper.load_model(self.model_name)
-        return self.model
-    
-    def transcribe(self, audio_path: str, language: Optional[str] = None) -> dict:
+        """Load the model (lazy loading)."""
+        raise NotImplementedError
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None,
+                   check_cancelled: Optional[Callable[[], None]] = None) -> dict:
         """
         Transcribe an audio file.
-        
+
         Args:
             audio_path: Path to the audio file
             language: Language code (optional, auto-detected if None)
-        
+            check_cancelled: Called between decoded segments by engines that
+                decode incrementally; raises to abort (optional)
+
+        Returns:
+            dict: Transcription result with text and segments
+        """
+        raise NotImplementedError
+
+    def transcribe_samples(self, samples, language: Optional[str] = None) -> dict:
+        """
+        Transcribe an in-memory waveform.
+
+        Both ``whisper`` and ``faster-whisper`` accept a waveform wherever
+        they accept a path, so this is :meth:`transcribe` on an array.
+
+        Args:
+            samples: 16 kHz mono float32 samples
+            language: Language code (optional, auto-detected if None)
+
         Returns:
             dict: Transcription result with text and segments
         """
+        return self.transcribe(samples, language)
+
+    def detect_language(self, samples) -> Tuple[str, float]:
+        """
+        Detect the spoken language from the first 30s of audio.
+
+        Needs a multilingual model (not a ``.en`` variant).
+
+        Args:
+            samples: 16 kHz mono float32 samples
+
+        Returns:
+            Tuple[str, float]: Language code and its probability
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audio_paths: List[str],
+                         language: Optional[str] = None) -> List[dict]:
+        """
+        Transcribe several short (at most 30s) audio files.
+
+        Engines without batched decoding transcribe the files one by one.
+
+        Args:
+            audio_paths: Paths to the audio files
+            language: Language code shared by the batch (optional)
+
+        Returns:
+            List[dict]: One transcription result per file, in order
+        """
+        return [self.transcribe(path, language) for path in audio_paths]
+
+
+class WhisperEngine(TranscriptionEngine):
+    """Engine backed by the reference PyTorch ``whisper`` package."""
+
+    name = "whisper"
+
+    def _load_model(self):
+        """Load the Whisper model (lazy loading)."""
+        if self.model is None:
+            import whisper
+            self.model = whisper.load_model(self.model_name, device=self.device)
+        return self.model
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None,
+                   check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+        """Transcribe an audio file with the reference implementation."""
+        # model.transcribe has no per-segment hook; callers check between stages
         model = self._load_model()
-        
-        logger.info(f"Transcribing audio file: {audio_path}")
-        
-        # Transcribe the audio
+
         result = model.transcribe(
             audio_path,
             language=language,
             word_timestamps=True
         )
-        
+
         # Convert to standard format
         segments = []
         for seg in result["segments"]:
@@ -61,10 +185,226 @@ class Transcriber:
                 "text": seg["text"],
                 "confidence": 0.95  # Whisper doesn't provide confidence scores
             })
-        
+
         return {
             "text": result["text"],
             "segments": segments,
             "duration": result.get("duration", 0),
             "language": result.get("language", "unknown")
-        }
\ No newline at end of file
+        }
+
+    def detect_language(self, samples) -> Tuple[str, float]:
+        """Detect the language from a single 30s mel window."""
+        import whisper
+
+        model = self._load_model()
+        audio = whisper.pad_or_trim(samples)
+        mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+        _, probs = model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+
+    def transcribe_batch(self, audio_paths: List[str],
+                         language: Optional[str] = None) -> List[dict]:
+        """Decode several short files as one batch of 30s mel windows."""
+        import torch
+        import whisper
+
+        model = self._load_model()
+
+        mels, durations = [], []
+        for path in audio_paths:
+            audio = whisper.load_audio(path)
+            durations.append(len(audio) / whisper.audio.SAMPLE_RATE)
+            audio = whisper.pad_or_trim(audio)
+            mels.append(whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels))
+
+        batch = torch.stack(mels).to(model.device)
+        options = whisper.DecodingOptions(
+            language=language,
+            fp16=model.device.type == "cuda"
+        )
+        decoded = whisper.decode(model, batch, options)
+
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            task="transcribe"
+        )
+
+        results = []
+        for result, duration in zip(decoded, durations):
+            segments = tokens_to_segments(
+                result.tokens,
+                tokenizer.timestamp_begin,
+                tokenizer.decode,
+                duration
+            )
+            results.append({
+                "text": "".join(seg["text"] for seg in segments),
+                "segments": segments,
+                "duration": duration,
+                "language": result.language or "unknown"
+            })
+
+        return results
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """Engine backed by ``faster-whisper`` (CTranslate2) with quantized weights."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model: str = "base", device: str = "cpu",
+                 compute_type: Optional[str] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            model: Whisper model to use (base, small, medium, large)
+            device: Device to run on (cpu, cuda)
+            compute_type: CTranslate2 quantization (int8, int8_float32, float32)
+        """
+        super().__init__(model=model, device=device)
+        self.compute_type = compute_type or settings.WHISPER_COMPUTE_TYPE
+
+    def _load_model(self):
+        """Load the CTranslate2 model (lazy loading)."""
+        if self.model is None:
+            from faster_whisper import WhisperModel
+            self.model = WhisperModel(
+                self.model_name,
+                device=self.device,
+                compute_type=self.compute_type
+            )
+        return self.model
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None,
+                   check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+        """Transcribe an audio file with CTranslate2."""
+        model = self._load_model()
+
+        # Segments are generated lazily; decoding happens while iterating
+        segments_iter, info = model.transcribe(
+            audio_path,
+            language=language,
+            word_timestamps=True
+        )
+
+        segments = []
+        for seg in segments_iter:
+            if check_cancelled is not None:
+                check_cancelled()
+            segments.append({
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "confidence": 0.95  # Same placeholder as the reference engine
+            })
+
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "duration": info.duration,
+            "language": info.language or "unknown"
+        }
+
+    def detect_language(self, samples) -> Tuple[str, float]:
+        """Detect the language with CTranslate2."""
+        model = self._load_model()
+
+        # Segments are decoded lazily, so only language detection runs here
+        _, info = model.transcribe(samples, language=None)
+        return info.language, float(info.language_probability)
+
+
+# Engine name -> engine class
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+class Transcriber:
+    """Service for transcribing audio using Whisper."""
+
+    def __init__(self, model: str = "base", engine: Optional[str] = None):
+        """
+        Initialize the transcriber.
+
+        Args:
+            model: Whisper model to use (base, small, medium, large)
+            engine: Transcription engine (whisper, faster-whisper); defaults
+                to the TRANSCRIPTION_ENGINE setting
+        """
+        engine = engine or settings.TRANSCRIPTION_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown transcription engine: {engine}")
+
+        self.model_name = model
+        self.engine_name = engine
+        self.engine = ENGINES[engine](model=model, device=settings.WHISPER_DEVICE)
+        logger.info(f"Initializing Whisper model: {model} ({engine})")
+
+    def load(self):
+        """Load the model now instead of on first use."""
+        return self.engine._load_model()
+
+    def transcribe(self, audio_path: str, language: Optional[str] = None,
+                   check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+        """
+        Transcribe an audio file.
+
+        Args:
+            audio_path: Path to the audio file
+            language: Language code (optional, auto-detected if None)
+            check_cancelled: Called between decoded segments; raises to
+                abort (optional)
+
+        Returns:
+            dict: Transcription result with text and segments
+        """
+        logger.info(f"Transcribing audio file: {audio_path}")
+
+        return self.engine.transcribe(audio_path, language, check_cancelled=check_cancelled)
+
+    def transcribe_samples(self, samples, language: Optional[str] = None) -> dict:
+        """
+        Transcribe an in-memory waveform.
+
+        Args:
+            samples: 16 kHz mono float32 samples
+            language: Language code (optional, auto-detected if None)
+
+        Returns:
+            dict: Transcription result with text and segments
+        """
+        return self.engine.transcribe_samples(samples, language)
+
+    def detect_language(self, samples) -> Tuple[str, float]:
+        """
+        Detect the spoken language from the first 30s of audio.
+
+        Args:
+            samples: 16 kHz mono float32 samples
+
+        Returns:
+            Tuple[str, float]: Language code and its probability
+        """
+        return self.engine.detect_language(samples)
+
+    def transcribe_batch(self, audio_paths: List[str],
+                         language: Optional[str] = None) -> List[dict]:
+        """
+        Transcribe several short audio files in one batch.
+
+        Args:
+            audio_paths: Paths to the audio files (at most 30s each)
+            language: Language code shared by the batch (optional)
+
+        Returns:
+            List[dict]: One transcription result per file, in order
+        """
+        logger.info(f"Transcribing batch of {len(audio_paths)} files")
+
+        return self.engine.transcribe_batch(audio_paths, language)
@@ -0,0 +1,180 @@
+"""
+Voice activity detection service using pyannote.audio.
+"""
+import os
+import logging
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def merge_regions(regions: List[Tuple[float, float]],
+                  padding: float = 0.0,
+                  min_gap: float = 0.0,
+                  total_duration: float = None) -> List[Tuple[float, float]]:
+    """
+    Pad speech regions and merge the ones separated by short gaps.
+
+    Args:
+        regions: Speech regions as (start, end) in seconds
+        padding: Seconds added on both sides of every region
+        min_gap: Regions closer than this are merged
+        total_duration: Length of the audio, used to clamp padded regions
+
+    Returns:
+        List[Tuple[float, float]]: Sorted, non-overlapping regions
+    """
+    merged = []
+    for start, end in sorted(regions):
+        start = max(0.0, start - padding)
+        end = end + padding
+        if total_duration is not None:
+            end = min(end, total_duration)
+        if end <= start:
+            continue
+        if merged and start - merged[-1][1] <= min_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SpeechMap:
+    """
+    Map between the original timeline and the speech-only timeline.
+
+    The speech-only timeline is the concatenation of ``regions``;
+    timestamps produced on it are mapped back with :meth:`to_original`.
+    """
+
+    def __init__(self, regions: List[Tuple[float, float]], total_duration: float):
+        """
+        Initialize the speech map.
+
+        Args:
+            regions: Sorted, non-overlapping speech regions in original time
+            total_duration: Length of the original audio in seconds
+        """
+        self.regions = list(regions)
+        self.total_duration = total_duration
+
+        # Start of each region on the concatenated timeline
+        self._offsets = []
+        position = 0.0
+        for start, end in self.regions:
+            self._offsets.append(position)
+            position += end - start
+        self.speech_duration = position
+
+    @property
+    def skipped_fraction(self) -> float:
+        """Fraction of the original audio that is not speech."""
+        if not self.total_duration:
+            return 0.0
+        return max(0.0, 1.0 - self.speech_duration / self.total_duration)
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Map a speech-timeline timestamp back to the original timeline.
+
+        Args:
+            t: Timestamp on the concatenated speech timeline
+            is_end: Whether ``t`` ends a segment; a timestamp on a region
+                boundary then maps to the end of the earlier region
+
+        Returns:
+            float: Timestamp on the original timeline
+        """
+        if not self.regions:
+            return t
+        if is_end:
+            index = bisect_left(self._offsets, t) - 1
+        else:
+            index = bisect_right(self._offsets, t) - 1
+        index = min(max(index, 0), len(self.regions) - 1)
+
+        start, end = self.regions[index]
+        return min(start + (t - self._offsets[index]), end)
+
+    def remap_segments(self, segments: List[Dict]) -> List[Dict]:
+        """Return copies of ``segments`` with start/end on the original timeline."""
+        return [
+            {
+                **seg,
+                "start": self.to_original(seg["start"]),
+                "end": self.to_original(seg["end"], is_end=True),
+            }
+            for seg in segments
+        ]
+
+
+class VoiceActivityDetector:
+    """Service for detecting speech regions using pyannote.audio."""
+
+    def __init__(self, model: str = "pyannote/voice-activity-detection"):
+        """
+        Initialize the voice activity detector.
+
+        Args:
+            model: pyannote.audio VAD pipeline to use
+        """
+        self.model_name = model
+        self.pipeline = None
+        logger.info(f"Initializing pyannote.audio VAD model: {model}")
+
+    def _load_pipeline(self):
+        """Load the pyannote.audio pipeline (lazy loading)."""
+        if self.pipeline is None:
+            from pyannote.audio import Pipeline
+            self.pipeline = Pipeline.from_pretrained(
+                self.model_name,
+                use_auth_token=os.getenv("HF_AUTH_TOKEN")
+            )
+        return self.pipeline
+
+    def load(self):
+        """Load the pipeline now instead of on first use."""
+        return self._load_pipeline()
+
+    def detect(self, audio_path: str) -> List[Tuple[float, float]]:
+        """
+        Detect speech regions in an audio file.
+
+        Args:
+            audio_path: Path to the audio file
+
+        Returns:
+            List[Tuple[float, float]]: Speech regions as (start, end)
+        """
+        pipeline = self._load_pipeline()
+
+        logger.info(f"Running voice activity detection on: {audio_path}")
+
+        output = pipeline(audio_path)
+        return [(seg.start, seg.end) for seg in output.get_timeline().support()]
+
+    def build_speech_map(self,
+                         audio_path: str,
+                         total_duration: float,
+                         padding: float = 0.2,
+                         min_gap: float = 0.5) -> SpeechMap:
+        """
+        Detect speech and build the map used to skip non-speech audio.
+
+        Args:
+            audio_path: Path to the audio file
+            total_duration: Length of the audio in seconds
+            padding: Seconds kept around each speech region
+            min_gap: Silences shorter than this are kept
+
+        Returns:
+            SpeechMap: Speech regions and timeline mapping
+        """
+        regions = merge_regions(
+            self.detect(audio_path),
+            padding=padding,
+            min_gap=min_gap,
+            total_duration=total_duration
+        )
+        return SpeechMap(regions, total_duration)
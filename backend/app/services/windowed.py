@@ -0,0 +1,186 @@
+"""
+Windowed decoding of long inputs.
+
+Whisper's ``transcribe(path)`` and pyannote both decode the whole file
+into one float32 array (about 700MB for three hours of 16 kHz audio)
+before they start. Here the audio is decoded once to a raw PCM file that
+is memory-mapped, and transcription and diarization are fed one bounded
+window at a time, so a worker's peak memory depends on the window length
+and not on the length of the input.
+
+Windows are cut at pauses (see :func:`app.utils.audio.plan_windows`) and
+their timestamps are shifted back onto the file's timeline. Diarization
+labels are local to a window, so each window's speakers are linked to the
+speakers seen so far by the cosine similarity of their centroid embeddings.
+"""
+import logging
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utils.audio import CANONICAL_SAMPLE_RATE, pcm_window
+
+logger = logging.getLogger(__name__)
+
+
+def _shift(segments: List[dict], offset: float) -> List[dict]:
+    """Move window-relative segments onto the file's timeline."""
+    return [
+        {**seg, "start": seg["start"] + offset, "end": seg["end"] + offset}
+        for seg in segments
+    ]
+
+
+def transcribe_windowed(transcriber, pcm: np.ndarray, windows: list,
+                        language: Optional[str] = None,
+                        check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Transcribe memory-mapped PCM one window at a time.
+
+    The language detected in the first window is kept for the rest, so a
+    file is never transcribed in a mix of languages.
+
+    Args:
+        transcriber: Transcriber to decode with
+        pcm: 16 kHz mono int16 samples (typically from :func:`open_pcm`)
+        windows: (start, end) sample ranges from :func:`plan_windows`
+        language: Language code (optional, auto-detected if None)
+        check_cancelled: Called before every window (optional)
+
+    Returns:
+        dict: Transcription result with text and segments
+    """
+    segments = []
+    for index, (start, end) in enumerate(windows):
+        if check_cancelled is not None:
+            check_cancelled()
+        logger.info(f"Transcribing window {index + 1}/{len(windows)}")
+
+        result = transcriber.transcribe_samples(pcm_window(pcm, start, end), language)
+        if language is None and result.get("language") not in (None, "unknown"):
+            language = result["language"]
+        segments.extend(_shift(result["segments"], start / CANONICAL_SAMPLE_RATE))
+
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "segments": segments,
+        "duration": len(pcm) / CANONICAL_SAMPLE_RATE,
+        "language": language or "unknown"
+    }
+
+
+def link_speakers(centroids: Dict[str, np.ndarray], labels: List[str],
+                  embeddings: Dict[str, list],
+                  threshold: Optional[float] = None) -> Dict[str, str]:
+    """
+    Map one window's speaker labels onto the file's speakers.
+
+    Pairs are matched greedily, most similar first, and each file speaker
+    takes at most one label per window (pyannote already separated the
+    speakers within the window). Labels with no match above ``threshold``,
+    or no embedding, become new speakers. ``centroids`` is updated in place
+    with the window's embeddings.
+
+    Args:
+        centroids: File speaker label -> sum of its unit window embeddings
+        labels: The window's speaker labels
+        embeddings: The window's label -> centroid embedding
+        threshold: Minimum cosine similarity to link (defaults to settings)
+
+    Returns:
+        Dict[str, str]: Window label -> file speaker label
+    """
+    threshold = settings.SPEAKER_LINK_THRESHOLD if threshold is None else threshold
+
+    def unit(vector):
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    local = {label: np.asarray(embeddings[label], dtype=np.float32)
+             for label in labels if label in embeddings}
+    pairs = sorted(
+        (
+            (float(np.dot(unit(vector), unit(total))), label, speaker)
+            for label, vector in local.items()
+            for speaker, total in centroids.items()
+            if np.linalg.norm(total)
+        ),
+        reverse=True
+    )
+
+    mapping = {}
+    taken = set()
+    for similarity, label, speaker in pairs:
+        if similarity < threshold:
+            break
+        if label not in mapping and speaker not in taken:
+            mapping[label] = speaker
+            taken.add(speaker)
+
+    for label in labels:
+        if label not in mapping:
+            mapping[label] = f"SPEAKER_{len(centroids):02d}"
+            # Speakers without an embedding keep a zero sum and never link
+            centroids[mapping[label]] = 0.0
+
+    for label, vector in local.items():
+        speaker = mapping[label]
+        centroids[speaker] = centroids[speaker] + unit(vector)
+
+    return mapping
+
+
+def diarize_windowed(diarizer, pcm: np.ndarray, windows: list,
+                     return_embeddings: bool = False,
+                     max_speakers: Optional[int] = None,
+                     threshold: Optional[float] = None,
+                     check_cancelled: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Diarize memory-mapped PCM one window at a time.
+
+    A window may hold fewer speakers than the file, so only an upper bound
+    on the speaker count is passed on to each window.
+
+    Args:
+        diarizer: Diarizer to run
+        pcm: 16 kHz mono int16 samples (typically from :func:`open_pcm`)
+        windows: (start, end) sample ranges from :func:`plan_windows`
+        return_embeddings: Also return each speaker's centroid embedding
+        max_speakers: Maximum number of speakers per window (optional)
+        threshold: Minimum cosine similarity to link speakers across windows
+        check_cancelled: Called after each diarization step (optional)
+
+    Returns:
+        dict: Diarization result with speaker segments labelled consistently
+        across windows (and embeddings if requested)
+    """
+    centroids: Dict[str, np.ndarray] = {}
+    segments = []
+    for index, (start, end) in enumerate(windows):
+        logger.info(f"Diarizing window {index + 1}/{len(windows)}")
+        result = diarizer.diarize_samples(
+            pcm_window(pcm, start, end),
+            return_embeddings=True,
+            max_speakers=max_speakers,
+            check_cancelled=check_cancelled
+        )
+
+        labels = list(dict.fromkeys(seg["speaker"] for seg in result["segments"]))
+        mapping = link_speakers(centroids, labels, result.get("embeddings", {}), threshold)
+        for seg in _shift(result["segments"], start / CANONICAL_SAMPLE_RATE):
+            segments.append({**seg, "speaker": mapping[seg["speaker"]]})
+
+    diarization = {
+        "segments": segments,
+        "num_speakers": len(set(seg["speaker"] for seg in segments))
+    }
+
+    if return_embeddings:
+        diarization["embeddings"] = {
+            speaker: [float(x) for x in total / np.linalg.norm(total)]
+            for speaker, total in centroids.items()
+            if np.linalg.norm(total)
+        }
+
+    return diarization
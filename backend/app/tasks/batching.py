@@ -0,0 +1,326 @@
+"""
+Batching worker mode for short transcription jobs.
+
+Short clips (at most one 30s Whisper window) are queued on a Redis list
+instead of Celery. A batching worker claims several of them at once,
+decodes their mel windows as a single batch and fans the results back
+out to each job's rows. Claimed jobs stay on the worker's processing list
+(see :mod:`app.utils.job_queue`) until their results are stored.
+
+Run with:
+    python -m app.tasks.batching
+"""
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SHORT_JOBS_KEY = "echo:short_jobs"
+
+
+def get_redis():
+    """Get a Redis client for the short-job queue and worker caches."""
+    import redis
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def job_payload(job_id: str, file_path: str, filename: str,
+                model: str = "base", language: str = None,
+                engine: str = None, diarize: bool = True,
+                num_speakers: int = None, min_speakers: int = None,
+                max_speakers: int = None) -> str:
+    """
+    Serialize a job for a Redis job queue.
+
+    Args:
+        job_id: The ID of the transcription job
+        file_path: Path to the audio file
+        filename: Original filename
+        model: Whisper model to use
+        language: Language code (optional)
+        engine: Transcription engine (optional)
+        diarize: Whether to run speaker diarization
+        num_speakers: Exact number of speakers (optional)
+        min_speakers: Minimum number of speakers (optional)
+        max_speakers: Maximum number of speakers (optional)
+
+    Returns:
+        str: JSON payload
+    """
+    return json.dumps({
+        "job_id": job_id,
+        "file_path": file_path,
+        "filename": filename,
+        "model": model,
+        "language": language,
+        "engine": engine or settings.TRANSCRIPTION_ENGINE,
+        "diarize": diarize,
+        "num_speakers": num_speakers,
+        "min_speakers": min_speakers,
+        "max_speakers": max_speakers,
+    })
+
+
+def enqueue_short_job(client, job_id: str, file_path: str, filename: str, **options) -> None:
+    """
+    Queue a short job for the batching worker.
+
+    Args:
+        client: Redis client
+        job_id: The ID of the transcription job
+        file_path: Path to the audio file
+        filename: Original filename
+        **options: Job options accepted by :func:`job_payload`
+    """
+    client.rpush(SHORT_JOBS_KEY, job_payload(job_id, file_path, filename, **options))
+
+
+def collect_batch(jobs, max_size: int = None, max_wait: float = None,
+                  block_timeout: int = 5) -> List[dict]:
+    """
+    Claim up to ``max_size`` queued jobs.
+
+    Blocks until one job is available, then keeps collecting until the batch
+    is full or ``max_wait`` seconds have passed since the first job. The
+    jobs stay on the worker's processing list until the batch is stored
+    and acknowledged with ``jobs.ack_all()``.
+
+    Args:
+        jobs: ReliableQueue of short jobs
+        max_size: Maximum batch size (defaults to settings)
+        max_wait: Seconds to wait for the batch to fill (defaults to settings)
+        block_timeout: Seconds to block waiting for the first job
+
+    Returns:
+        List[dict]: Queued job payloads, empty if none arrived
+    """
+    max_size = max_size or settings.BATCH_MAX_SIZE
+    max_wait = settings.BATCH_MAX_WAIT if max_wait is None else max_wait
+
+    raw = jobs.claim(timeout=block_timeout)
+    if raw is None:
+        return []
+
+    batch = [json.loads(raw)]
+    deadline = time.monotonic() + max_wait
+    while len(batch) < max_size:
+        raw = jobs.claim()
+        if raw is not None:
+            batch.append(json.loads(raw))
+        elif time.monotonic() >= deadline:
+            break
+        else:
+            time.sleep(0.01)
+
+    return batch
+
+
+def group_jobs(jobs: List[dict]) -> "OrderedDict":
+    """Group jobs that can share one decode: same model, engine and language."""
+    groups = OrderedDict()
+    for job in jobs:
+        key = (job["model"], job["engine"], job["language"])
+        groups.setdefault(key, []).append(job)
+    return groups
+
+
+def process_batch(jobs: List[dict]) -> dict:
+    """
+    Transcribe a batch of short jobs and store each job's results.
+
+    Each job is first ingested, routed to a ``.en`` model if it has no
+    language and detection finds English, and, with ``VAD_ENABLED``, cut
+    down to its speech, exactly as on the other worker paths; jobs are
+    grouped by the model they were routed to. A failure while decoding
+    a group fails every job in it; a failure in one job's preprocessing,
+    diarization or persistence only fails that job. A job cancelled before
+    its results are committed is discarded.
+
+    Args:
+        jobs: Job payloads from :func:`collect_batch`
+
+    Returns:
+        dict: Number of completed and failed jobs
+    """
+    from app.models import TranscriptionJob
+    from app.services.diarizer import label_single_speaker
+    from app.utils.file_ops import cleanup_temp_files
+    from app.utils.status_store import get_status_store
+    from app.tasks.tasks import (
+        JobCancelled, detect_speech, discard_partial_results, extract_speech, get_session,
+        ingest_audio, save_results, index_speakers, report_status, report_stage,
+        route_language, set_job_status, _get_transcriber, _get_diarizer
+    )
+
+    completed, failed = 0, 0
+    session = get_session()
+
+    def _fail(job):
+        session.rollback()
+        if job is not None:
+            set_job_status(session, job.id, "failed")
+            get_status_store().clear(job.id)
+
+    def _prepare(job, row):
+        """Get a job routed to its model, the path to decode and its speech map."""
+        if not report_status(session, row, "processing", stage="ingest"):
+            raise JobCancelled(row.id)
+        audio_path = job["file_path"]
+        if settings.NORMALIZE_AUDIO:
+            audio_path = ingest_audio(session, row, audio_path)
+        if job["language"] is None and settings.LANGUAGE_DETECTION:
+            report_stage(row, "language")
+            language, model = route_language(session, row, audio_path, job["model"],
+                                             job["engine"])
+            job = dict(job, language=language, model=model)
+        if not settings.VAD_ENABLED:
+            return job, row, audio_path, None
+
+        report_stage(row, "vad")
+        speech_map = detect_speech(row, audio_path)
+        row.skipped_fraction = speech_map.skipped_fraction if speech_map else 0.0
+        session.commit()
+        if speech_map is None:
+            return job, row, audio_path, None
+        return job, row, extract_speech(audio_path, speech_map), speech_map
+
+    try:
+        # Keyed by job ID, so a job claimed twice (requeued by recovery) runs once
+        ready = OrderedDict()
+        for job in jobs:
+            row = session.get(TranscriptionJob, job["job_id"])
+            # Jobs deleted or cancelled while queued are not decoded at all
+            if row is None or row.status == "cancelled" or row.id in ready:
+                continue
+            try:
+                ready[row.id] = _prepare(job, row)
+            except JobCancelled:
+                logger.info(f"Transcription job cancelled: {row.id}")
+                discard_partial_results(session, row)
+            except Exception as e:
+                logger.error(f"Error preparing transcription {job['job_id']}: {str(e)}")
+                _fail(row)
+                failed += 1
+
+        routed = [job for job, _, _, _ in ready.values()]
+        for (model, engine, language), group in group_jobs(routed).items():
+            prepared = [ready[job["job_id"]] for job in group]
+            for _, row, _, _ in prepared:
+                report_stage(row, "transcription")
+
+            try:
+                start = time.perf_counter()
+                transcriber = _get_transcriber(model=model, engine=engine)
+                results = transcriber.transcribe_batch(
+                    [path for _, _, path, _ in prepared], language
+                )
+                # Each job is charged an equal share of the batch decode
+                decode_share = (time.perf_counter() - start) / len(prepared)
+            except Exception as e:
+                logger.error(f"Batch decode failed for {len(prepared)} jobs: {str(e)}")
+                for _, row, _, _ in prepared:
+                    _fail(row)
+                failed += len(prepared)
+                continue
+
+            for (job, row, path, speech_map), result in zip(prepared, results):
+                try:
+                    start = time.perf_counter()
+                    segments = result["segments"]
+                    duration = result["duration"]
+                    if speech_map is not None:
+                        segments = speech_map.remap_segments(segments)
+                        duration = speech_map.total_duration
+
+                    if not job.get("diarize", True):
+                        save_results(session, row, label_single_speaker(segments),
+                                     duration, processing_time=decode_share)
+                        completed += 1
+                        continue
+
+                    report_stage(row, "diarization")
+                    diarizer = _get_diarizer()
+                    diarization = diarizer.diarize(
+                        path,
+                        return_embeddings=settings.SPEAKER_INDEX_ENABLED,
+                        num_speakers=job.get("num_speakers"),
+                        min_speakers=job.get("min_speakers"),
+                        max_speakers=job.get("max_speakers")
+                    )
+                    speakers = diarization["segments"]
+                    if speech_map is not None:
+                        speakers = speech_map.remap_segments(speakers)
+                    aligned = diarizer.align_segments(segments, speakers)
+                    save_results(session, row, aligned, duration,
+                                 processing_time=decode_share + time.perf_counter() - start)
+                    index_speakers(row.id, diarization)
+                    completed += 1
+                except JobCancelled:
+                    logger.info(f"Transcription job cancelled: {row.id}")
+                    discard_partial_results(session, row)
+                except Exception as e:
+                    logger.error(f"Error processing transcription {job['job_id']}: {str(e)}")
+                    _fail(row)
+                    failed += 1
+                finally:
+                    if speech_map is not None:
+                        cleanup_temp_files(path)
+    finally:
+        session.close()
+
+    return {"completed": completed, "failed": failed}
+
+
+def run_batch_worker():
+    """
+    Pull and process batches of short jobs until stopped.
+
+    A batch stays on the worker's processing list until it is stored, so
+    the jobs of a worker that is killed run again on another (or the
+    next) worker; on SIGTERM the current batch is requeued at once.
+    """
+    import signal
+    import sys
+    from app.utils.job_queue import ReliableQueue
+    from app.tasks.tasks import init_db
+    from app.tasks.worker_config import detect_cpu_count, apply_thread_budget
+
+    # A single process owns the whole node's CPUs
+    apply_thread_budget({"threads": detect_cpu_count(),
+                         "interop_threads": settings.WORKER_INTEROP_THREADS})
+    init_db()
+    jobs = ReliableQueue(get_redis(), SHORT_JOBS_KEY)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    logger.info(
+        f"Batching worker started (max size {settings.BATCH_MAX_SIZE}, "
+        f"max wait {settings.BATCH_MAX_WAIT}s)"
+    )
+    jobs.start_heartbeat()
+    try:
+        jobs.recover()
+        while True:
+            batch = collect_batch(jobs)
+            if not batch:
+                jobs.recover()
+                continue
+            start = time.perf_counter()
+            stats = process_batch(batch)
+            jobs.ack_all()
+            logger.info(
+                f"Processed batch of {len(batch)} in {time.perf_counter() - start:.2f}s: {stats}"
+            )
+    finally:
+        # Without a heartbeat, recovery puts an unfinished batch back on the queue
+        jobs.stop_heartbeat()
+        jobs.recover()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_batch_worker()
@@ -3,15 +3,20 @@ Celery configuration for the Transcriber backend.
 """
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, task_postrun
 from dotenv import load_dotenv
 
+from app.config import settings
+from app.tasks.worker_config import get_worker_plan, apply_thread_budget
+from app.tasks.preload import preload_models, log_memory
+
 load_dotenv()
 
 celery_app = Celery(
     "transcriber",
     broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
     backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
-    include=["app.tasks.tasks"]
+    include=["app.tasks.tasks", "app.tasks.webhooks"]
 )
 
 # Celery configuration
@@ -24,4 +29,47 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=3600,  # 1 hour max per task
     task_soft_time_limit=3300,  # 55 minutes warning
-)
\ No newline at end of file
+    task_routes={
+        "app.tasks.webhooks.deliver_webhooks": {"queue": settings.WEBHOOK_QUEUE},
+    },
+    beat_schedule={
+        # Catch webhook retries whose scheduled run was lost
+        "deliver-webhooks": {
+            "task": "app.tasks.webhooks.deliver_webhooks",
+            "schedule": settings.WEBHOOK_SWEEP_INTERVAL,
+        },
+    },
+)
+
+# Split the node's CPUs between prefork children and torch threads
+worker_plan = get_worker_plan()
+
+celery_app.conf.update(
+    worker_concurrency=worker_plan["concurrency"],
+    worker_prefetch_multiplier=1,  # Tasks are long; don't hoard them in one child
+)
+
+
+@worker_init.connect
+def on_worker_init(**kwargs):
+    """Load the models in the parent so prefork children share them copy-on-write."""
+    if settings.PRELOAD_MODELS:
+        preload_models()
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    """Apply the torch thread budget (and optional pinning) in each child."""
+    from billiard.process import current_process
+    from app.utils.database import dispose_engines
+    index = getattr(current_process(), "index", None)
+    apply_thread_budget(worker_plan, index=index)
+    # Never share the parent's pooled database connections across fork
+    dispose_engines()
+    log_memory(f"Worker child {index} started")
+
+
+@task_postrun.connect
+def on_task_postrun_memory(sender=None, **kwargs):
+    """Report how much memory the child holds privately after each task."""
+    log_memory(f"Worker child after {sender.name if sender else 'task'}")
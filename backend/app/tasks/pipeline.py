@@ -0,0 +1,485 @@
+"""
+Pipelined worker mode.
+
+With ``PIPELINE_WORKER=True``, jobs that are not short enough for the
+batching worker are queued on a Redis list instead of Celery. A pipelined
+worker runs each job through three stages connected by bounded queues, so
+the model never waits for the disk and the disk never waits for the model:
+
+- prefetch (background thread): pops jobs, normalizes the upload, runs the
+  VAD pre-pass that decides which audio is decoded, and decodes it into
+  memory (long inputs into raw PCM on disk). At most ``PIPELINE_PREFETCH``
+  decoded jobs wait for inference.
+- inference (main thread): language routing, Whisper and diarization,
+  back to back on the decoded audio.
+- persistence (background thread): alignment, storing the segments,
+  speaker indexing and cleanup, with at most ``PIPELINE_PERSIST_QUEUE``
+  jobs waiting.
+
+Under a steady backlog the inference stage is busy from one job straight
+into the next; the fraction of time it spends busy is logged and returned
+as ``utilization``. Failed jobs are marked failed (``POST /retry`` re-runs
+them on Celery); cancelled jobs are dropped at the next stage boundary.
+
+Jobs are claimed through a :class:`app.utils.job_queue.ReliableQueue` and
+stay on the worker's processing list until their outcome is stored. Jobs
+still in the pipeline when the worker stops are put back on the queue.
+
+Run with:
+    python -m app.tasks.pipeline
+"""
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from collections import Counter
+from typing import Optional
+
+from app.config import settings
+from app.tasks.batching import job_payload
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_JOBS_KEY = "echo:pipeline_jobs"
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def enqueue_pipeline_job(client, job_id: str, file_path: str, filename: str, **options) -> None:
+    """
+    Queue a job for the pipelined worker.
+
+    Args:
+        client: Redis client
+        job_id: The ID of the transcription job
+        file_path: Path to the audio file
+        filename: Original filename
+        **options: Job options accepted by :func:`app.tasks.batching.job_payload`
+    """
+    client.rpush(PIPELINE_JOBS_KEY, job_payload(job_id, file_path, filename, **options))
+
+
+class PipelineJob:
+    """A job moving through the pipeline, with what each stage produced."""
+
+    def __init__(self, payload: dict, raw: Optional[bytes] = None):
+        """
+        Initialize the job from its queue payload.
+
+        Args:
+            payload: Job payload from :func:`enqueue_pipeline_job`
+            raw: The payload as claimed from the queue, used to acknowledge it
+        """
+        self.raw = raw
+        self.job_id = payload["job_id"]
+        self.file_path = payload["file_path"]
+        self.model = payload["model"]
+        self.language = payload["language"]
+        self.engine = payload["engine"]
+        self.diarize = payload.get("diarize", True)
+        self.num_speakers = payload.get("num_speakers")
+        self.min_speakers = payload.get("min_speakers")
+        self.max_speakers = payload.get("max_speakers")
+        # Set by the prefetch stage
+        self.audio_path = None
+        self.speech_map = None
+        self.speech_path = None
+        self.samples = None
+        self.pcm_path = None
+        # Set by the inference stage
+        self.transcript = None
+        self.diarization = None
+        # Seconds of work spent on the job across stages
+        self.work = 0.0
+
+    def cleanup(self) -> None:
+        """Remove the intermediate files and drop the decoded audio."""
+        from app.utils.file_ops import cleanup_temp_files
+
+        self.samples = None
+        if self.pcm_path:
+            cleanup_temp_files(self.pcm_path)
+        if self.speech_path and self.speech_path != self.audio_path:
+            cleanup_temp_files(self.speech_path)
+
+
+def _abandon(session, item: PipelineJob, error: Optional[Exception] = None) -> str:
+    """
+    Stop a job that cannot go on: discard a cancelled job, fail any other.
+
+    Returns:
+        str: ``cancelled``, ``failed`` or ``skipped`` (deleted job)
+    """
+    from app.models import TranscriptionJob
+    from app.utils.status_store import get_status_store
+    from app.tasks.tasks import discard_partial_results, set_job_status
+
+    item.cleanup()
+    session.rollback()
+    job = session.get(TranscriptionJob, item.job_id)
+    if job is None:
+        return "skipped"
+    if job.status == "cancelled":
+        logger.info(f"Transcription job cancelled: {item.job_id}")
+        discard_partial_results(session, job)
+        return "cancelled"
+
+    logger.error(f"Error processing transcription {item.job_id}: {str(error)}")
+    set_job_status(session, item.job_id, "failed")
+    get_status_store().clear(item.job_id)
+    return "failed"
+
+
+def prefetch_job(session, item: PipelineJob) -> Optional[str]:
+    """
+    Get a job's audio ready for inference.
+
+    Args:
+        session: Database session of the prefetch stage
+        item: The job
+
+    Returns:
+        Optional[str]: None if the job is ready, else its outcome
+    """
+    from app.models import TranscriptionJob
+    from app.utils.audio import decode_to_pcm, load_audio
+    from app.tasks.tasks import (
+        JobCancelled, cancellation_check, detect_speech, extract_speech, ingest_audio,
+        needs_windowed_decode, report_stage, report_status
+    )
+
+    started = time.perf_counter()
+    check_cancelled = cancellation_check(session, item.job_id)
+    try:
+        job = session.get(TranscriptionJob, item.job_id)
+        if job is None:
+            return "skipped"
+        check_cancelled(force=True)
+        if not report_status(session, job, "processing", stage="ingest"):
+            raise JobCancelled(item.job_id)
+
+        item.audio_path = item.file_path
+        if settings.NORMALIZE_AUDIO:
+            item.audio_path = ingest_audio(session, job, item.file_path)
+
+        item.speech_path = item.audio_path
+        if settings.VAD_ENABLED:
+            report_stage(job, "vad")
+            item.speech_map = detect_speech(job, item.audio_path)
+            job.skipped_fraction = item.speech_map.skipped_fraction if item.speech_map else 0.0
+            session.commit()
+            if item.speech_map:
+                item.speech_path = extract_speech(item.audio_path, item.speech_map)
+
+        # Long inputs stay on disk and are decoded window by window
+        if needs_windowed_decode(job, item.speech_path, item.speech_map):
+            pcm_path = os.path.splitext(item.speech_path)[0] + ".pcm"
+            item.pcm_path = decode_to_pcm(item.speech_path, pcm_path)
+        else:
+            item.samples = load_audio(item.speech_path)
+        return None
+    except Exception as e:
+        return _abandon(session, item, e)
+    finally:
+        item.work += time.perf_counter() - started
+
+
+def infer_job(session, item: PipelineJob) -> Optional[str]:
+    """
+    Transcribe and diarize a prefetched job.
+
+    Args:
+        session: Database session of the inference stage
+        item: The job, with its audio decoded
+
+    Returns:
+        Optional[str]: None if the job goes on to persistence, else its outcome
+    """
+    from app.models import TranscriptionJob
+    from app.utils.audio import CANONICAL_SAMPLE_RATE, open_pcm, plan_windows
+    from app.services.windowed import diarize_windowed, transcribe_windowed
+    from app.tasks.tasks import (
+        cancellation_check, report_stage, route_language, _get_diarizer, _get_transcriber
+    )
+
+    started = time.perf_counter()
+    check_cancelled = cancellation_check(session, item.job_id)
+    try:
+        job = session.get(TranscriptionJob, item.job_id)
+        if job is None:
+            item.cleanup()
+            return "skipped"
+        check_cancelled(force=True)
+
+        language, model = item.language, item.model
+        if language is None and settings.LANGUAGE_DETECTION:
+            report_stage(job, "language")
+            language, model = route_language(session, job, item.audio_path, model, item.engine)
+
+        report_stage(job, "transcription")
+        transcriber = _get_transcriber(model=model, engine=item.engine)
+        pcm = open_pcm(item.pcm_path) if item.pcm_path else None
+        if pcm is not None:
+            item.transcript = transcribe_windowed(
+                transcriber,
+                pcm,
+                plan_windows(pcm, settings.TRANSCRIBE_WINDOW, settings.WINDOW_CUT_SEARCH),
+                language,
+                check_cancelled=check_cancelled
+            )
+        else:
+            item.transcript = transcriber.transcribe_samples(item.samples, language)
+            if not item.transcript.get("duration"):
+                item.transcript["duration"] = len(item.samples) / CANONICAL_SAMPLE_RATE
+        check_cancelled(force=True)
+
+        if not item.diarize:
+            item.diarization = {"segments": [], "num_speakers": 1}
+        elif pcm is not None:
+            report_stage(job, "diarization")
+            item.diarization = diarize_windowed(
+                _get_diarizer(),
+                pcm,
+                plan_windows(pcm, settings.DIARIZE_WINDOW, settings.WINDOW_CUT_SEARCH),
+                return_embeddings=settings.SPEAKER_INDEX_ENABLED,
+                max_speakers=item.max_speakers or item.num_speakers,
+                check_cancelled=check_cancelled
+            )
+        else:
+            report_stage(job, "diarization")
+            item.diarization = _get_diarizer().diarize_samples(
+                item.samples,
+                return_embeddings=settings.SPEAKER_INDEX_ENABLED,
+                num_speakers=item.num_speakers,
+                min_speakers=item.min_speakers,
+                max_speakers=item.max_speakers,
+                check_cancelled=check_cancelled
+            )
+        check_cancelled(force=True)
+
+        # The decoded audio is not needed past inference
+        item.samples = None
+        return None
+    except Exception as e:
+        return _abandon(session, item, e)
+    finally:
+        item.work += time.perf_counter() - started
+
+
+def persist_job(session, item: PipelineJob) -> str:
+    """
+    Align a job's transcript with its speakers and store the results.
+
+    Args:
+        session: Database session of the persistence stage
+        item: The job, with its transcript and diarization
+
+    Returns:
+        str: The job's outcome
+    """
+    from app.models import TranscriptionJob
+    from app.services.diarizer import label_single_speaker
+    from app.tasks.tasks import (
+        cancellation_check, index_speakers, report_stage, save_results, _get_diarizer
+    )
+
+    started = time.perf_counter()
+    try:
+        job = session.get(TranscriptionJob, item.job_id)
+        if job is None:
+            item.cleanup()
+            return "skipped"
+        cancellation_check(session, item.job_id)(force=True)
+
+        report_stage(job, "alignment")
+        transcript_segments = item.transcript["segments"]
+        diarization_segments = item.diarization["segments"]
+        if item.speech_map is not None:
+            transcript_segments = item.speech_map.remap_segments(transcript_segments)
+            diarization_segments = item.speech_map.remap_segments(diarization_segments)
+        if item.diarize:
+            aligned_segments = _get_diarizer().align_segments(
+                transcript_segments, diarization_segments
+            )
+        else:
+            aligned_segments = label_single_speaker(transcript_segments)
+
+        if item.speech_map is not None:
+            duration = item.speech_map.total_duration
+        else:
+            duration = item.transcript.get("duration", 0)
+
+        report_stage(job, "saving")
+        save_results(session, job, aligned_segments, duration,
+                     processing_time=item.work + time.perf_counter() - started)
+        index_speakers(item.job_id, item.diarization)
+        item.cleanup()
+        logger.info(f"Transcription job completed: {item.job_id}")
+        return "completed"
+    except Exception as e:
+        return _abandon(session, item, e)
+
+
+class PipelineWorker:
+    """Runs jobs from the pipeline queue through prefetch, inference and persistence."""
+
+    def __init__(self, client, prefetch: Optional[int] = None,
+                 persist_queue: Optional[int] = None, block_timeout: int = 5):
+        """
+        Initialize the worker.
+
+        Args:
+            client: Redis client
+            prefetch: Decoded jobs that may wait for inference (defaults to settings)
+            persist_queue: Inferred jobs that may wait for persistence
+                (defaults to settings)
+            block_timeout: Seconds to block waiting for a job
+        """
+        from app.utils.job_queue import ReliableQueue
+
+        self.client = client
+        self.jobs = ReliableQueue(client, PIPELINE_JOBS_KEY)
+        self.block_timeout = block_timeout
+        prefetch = max(prefetch or settings.PIPELINE_PREFETCH, 1)
+        persist_queue = max(persist_queue or settings.PIPELINE_PERSIST_QUEUE, 1)
+        self.prefetched = queue.Queue(maxsize=prefetch)
+        self.persisting = queue.Queue(maxsize=persist_queue)
+        self.stop = threading.Event()
+        self.outcomes = Counter()
+        self._outcomes_lock = threading.Lock()
+
+    def _finish(self, item: PipelineJob, outcome: str) -> None:
+        """Count a job's outcome and drop it from the processing list."""
+        with self._outcomes_lock:
+            self.outcomes[outcome] += 1
+        self.jobs.ack(item.raw)
+
+    def _prefetch(self, max_jobs: Optional[int]) -> None:
+        """Prefetch stage: pop and decode jobs until stopped."""
+        from app.tasks.tasks import get_session
+
+        session = get_session()
+        popped = 0
+        try:
+            while not self.stop.is_set() and (max_jobs is None or popped < max_jobs):
+                raw = self.jobs.claim(timeout=self.block_timeout)
+                if raw is None:
+                    self.jobs.recover()
+                    continue
+                popped += 1
+                item = PipelineJob(json.loads(raw), raw)
+                outcome = prefetch_job(session, item)
+                if outcome is None:
+                    # Blocks while PIPELINE_PREFETCH decoded jobs are waiting
+                    self.prefetched.put(item)
+                else:
+                    self._finish(item, outcome)
+        except Exception as e:
+            logger.error(f"Prefetch stage stopped: {str(e)}")
+        finally:
+            session.close()
+            self.prefetched.put(_DONE)
+
+    def _persist(self) -> None:
+        """Persistence stage: store inferred jobs until the end marker."""
+        from app.tasks.tasks import get_session
+
+        session = get_session()
+        try:
+            while (item := self.persisting.get()) is not _DONE:
+                self._finish(item, persist_job(session, item))
+        finally:
+            session.close()
+
+    def run(self, max_jobs: Optional[int] = None) -> dict:
+        """
+        Process jobs until stopped, or until ``max_jobs`` have been popped.
+
+        Inference runs on the calling thread. Jobs claimed by stopped
+        workers are requeued on start and whenever the queue is empty; jobs
+        not yet inferred when this worker stops are put back on the queue.
+
+        Returns:
+            dict: Jobs per outcome and the fraction of time the inference
+            stage was busy since the first job arrived
+        """
+        from app.tasks.tasks import get_session
+
+        prefetcher = threading.Thread(target=self._prefetch, args=(max_jobs,),
+                                      name="pipeline-prefetch", daemon=True)
+        persister = threading.Thread(target=self._persist, name="pipeline-persist", daemon=True)
+        self.jobs.start_heartbeat()
+        self.jobs.recover()
+        prefetcher.start()
+        persister.start()
+
+        session = get_session()
+        busy, first, inferred = 0.0, None, 0
+        item = None
+        try:
+            while (item := self.prefetched.get()) is not _DONE:
+                start = time.perf_counter()
+                first = first or start
+                outcome = infer_job(session, item)
+                busy += time.perf_counter() - start
+                if outcome is None:
+                    # Blocks while PIPELINE_PERSIST_QUEUE jobs are waiting
+                    self.persisting.put(item)
+                else:
+                    self._finish(item, outcome)
+                item = None
+                inferred += 1
+                if inferred % 10 == 0:
+                    utilization = busy / (time.perf_counter() - first)
+                    logger.info(f"Inference utilization {utilization:.0%}")
+        finally:
+            self.stop.set()
+            # The job being inferred, if inference was interrupted
+            unfinished = [item] if item is not None and item is not _DONE else []
+            # Unblock the prefetch stage if inference stopped early
+            while item is not _DONE:
+                item = self.prefetched.get()
+                if item is not _DONE:
+                    unfinished.append(item)
+            # Released newest first, so they are back on the queue in order
+            for pending in reversed(unfinished):
+                pending.cleanup()
+                self.jobs.release(pending.raw)
+            self.persisting.put(_DONE)
+            persister.join()
+            prefetcher.join()
+            session.close()
+            self.jobs.stop_heartbeat()
+
+        elapsed = time.perf_counter() - first if first else 0.0
+        return {**self.outcomes, "utilization": busy / elapsed if elapsed else 0.0}
+
+
+def run_pipeline_worker():
+    """Pull and process jobs through the pipeline until stopped."""
+    import signal
+    import sys
+    from app.tasks.batching import get_redis
+    from app.tasks.tasks import init_db
+    from app.tasks.worker_config import detect_cpu_count, apply_thread_budget
+
+    # A single process owns the whole node's CPUs
+    apply_thread_budget({"threads": detect_cpu_count(),
+                         "interop_threads": settings.WORKER_INTEROP_THREADS})
+    init_db()
+    # Let the worker put its unfinished jobs back on the queue
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    logger.info(
+        f"Pipelined worker started (prefetch {settings.PIPELINE_PREFETCH}, "
+        f"persist queue {settings.PIPELINE_PERSIST_QUEUE})"
+    )
+    PipelineWorker(get_redis()).run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_pipeline_worker()
@@ -0,0 +1,157 @@
+"""
+Copy-on-write model sharing across prefork worker children.
+
+With ``PRELOAD_MODELS`` on, the Celery parent loads the Whisper and
+pyannote weights before forking its pool. Children inherit the pages and
+only copy the ones they write to. To keep those writes away from the
+weights, modules are switched to inference mode (no autograd state) and
+every object alive after loading is moved to the garbage collector's
+permanent generation, so collections in the children never touch the
+headers of the parent's objects.
+
+Per-child memory is reported from ``/proc/self/smaps_rollup``: ``private``
+is what a child costs on top of the shared weights.
+"""
+import gc
+import logging
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SMAPS_ROLLUP = "/proc/{pid}/smaps_rollup"
+
+# smaps_rollup field -> reported key
+MEMORY_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def parse_smaps_rollup(text: str) -> dict:
+    """
+    Parse ``smaps_rollup`` into byte counts.
+
+    Args:
+        text: Contents of ``/proc/<pid>/smaps_rollup``
+
+    Returns:
+        dict: ``rss``, ``pss``, shared and private counts, plus ``shared``
+        and ``private`` totals, in bytes
+    """
+    stats = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(":") in MEMORY_FIELDS:
+            stats[MEMORY_FIELDS[parts[0].rstrip(":")]] = int(parts[1]) * 1024
+    stats["shared"] = stats.get("shared_clean", 0) + stats.get("shared_dirty", 0)
+    stats["private"] = stats.get("private_clean", 0) + stats.get("private_dirty", 0)
+    return stats
+
+
+def read_memory_stats(pid="self") -> Optional[dict]:
+    """Get a process's memory breakdown, or None where /proc is unavailable."""
+    try:
+        with open(SMAPS_ROLLUP.format(pid=pid)) as f:
+            return parse_smaps_rollup(f.read())
+    except OSError:
+        return None
+
+
+def log_memory(label: str) -> Optional[dict]:
+    """Log this process's memory breakdown."""
+    stats = read_memory_stats()
+    if stats is not None:
+        mb = 1024 * 1024
+        logger.info(
+            f"{label}: rss {stats['rss'] / mb:.0f}MB, pss {stats['pss'] / mb:.0f}MB, "
+            f"shared {stats['shared'] / mb:.0f}MB, private {stats['private'] / mb:.0f}MB"
+        )
+    return stats
+
+
+def freeze_modules(obj, depth: int = 3) -> int:
+    """
+    Put every torch module reachable from ``obj`` into inference mode.
+
+    pyannote pipelines keep their models a few attributes deep, so the
+    search follows instance attributes up to ``depth`` levels.
+
+    Args:
+        obj: Model or pipeline
+        depth: How many attribute levels to search
+
+    Returns:
+        int: Number of modules frozen
+    """
+    try:
+        import torch
+    except ImportError:
+        return 0
+
+    if isinstance(obj, torch.nn.Module):
+        obj.eval()
+        obj.requires_grad_(False)
+        return 1
+    if depth == 0 or not hasattr(obj, "__dict__"):
+        return 0
+    return sum(freeze_modules(value, depth - 1) for value in vars(obj).values())
+
+
+def preload_models() -> list:
+    """
+    Load the worker's models in the current (parent) process.
+
+    Loads the default Whisper model, plus the diarization, VAD and
+    language-detection models when those stages are on (with the default
+    model's ``.en`` variant that English audio is routed to), into the task
+    module's lazy-load caches, so forked children find them already loaded.
+    CTranslate2 starts native threads when it loads a model, which is not
+    safe across fork, so faster-whisper models are left to the children.
+
+    Returns:
+        list: Names of the preloaded models
+    """
+    from app.tasks import tasks
+    from app.services.language import english_variant
+
+    if settings.WHISPER_DEVICE != "cpu":
+        logger.warning("Not preloading models: CUDA contexts cannot be shared across fork")
+        return []
+
+    log_memory("Worker parent before preload")
+    loaded = []
+
+    if settings.TRANSCRIPTION_ENGINE == "whisper":
+        models = [settings.WHISPER_MODEL]
+        if settings.LANGUAGE_DETECTION:
+            models.append(settings.LANGUAGE_DETECTION_MODEL)
+            if english_variant(settings.WHISPER_MODEL):
+                models.append(english_variant(settings.WHISPER_MODEL))
+        for model in dict.fromkeys(models):
+            freeze_modules(tasks._get_transcriber(model=model).load())
+            loaded.append(f"whisper:{model}")
+    else:
+        logger.info(f"Not preloading {settings.TRANSCRIPTION_ENGINE} models (unsafe across fork)")
+
+    diarizer = tasks._get_diarizer()
+    freeze_modules(diarizer.load())
+    loaded.append(diarizer.model_name)
+
+    if settings.VAD_ENABLED:
+        vad = tasks._get_vad()
+        freeze_modules(vad.load())
+        loaded.append(vad.model_name)
+
+    # Keep collections in the children off the parent's objects
+    gc.collect()
+    gc.freeze()
+
+    log_memory("Worker parent after preload")
+    logger.info(f"Preloaded models for copy-on-write sharing: {', '.join(loaded)}")
+    return loaded
@@ -3,13 +3,16 @@ Celery tasks for transcription and speaker diarization.
 """
 import os
 import uuid
+import time
+import shutil
 import tempfile
+import subprocess
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from celery import current_task
+from celery.signals import task_prerun, task_postrun
 
 try:
     import torch
@@ -19,22 +22,33 @@ except ImportError:
 
 from app.config import settings
 from app.models import TranscriptionJob, Segment, Base
-from app.utils.file_ops import get_database_engine
+from app.utils.file_ops import get_database_engine, cleanup_temp_files
+from app.utils.checkpoints import get_checkpoint_store
+from app.utils.status_store import get_status_store
+from app.utils.stats import (
+    record_completion, record_deletion, record_status_change, recompute_statistics
+)
+from app.utils.segments import compact_turns, longest_span
+from app.utils.webhooks import queue_webhook
 from app.tasks.celery_app import celery_app
+from app.tasks.webhooks import notify_webhooks
+from app.services.diarizer import label_single_speaker
 
 logger = logging.getLogger(__name__)
 
 # Lazy imports for heavy dependencies (torch, Whisper, etc.)
-_transcriber = None
+_transcribers = {}
 _diarizer = None
+_vad = None
 
-def _get_transcriber(model: str = "base"):
-    """Lazy load Transcriber."""
-    global _transcriber
-    if _transcriber is None:
+def _get_transcriber(model: str = "base", engine: Optional[str] = None):
+    """Lazy load Transcriber, one per (model, engine)."""
+    engine = engine or settings.TRANSCRIPTION_ENGINE
+    key = (model, engine)
+    if key not in _transcribers:
         from app.services.transcriber import Transcriber
-        _transcriber = Transcriber(model=model)
-    return _transcriber
+        _transcribers[key] = Transcriber(model=model, engine=engine)
+    return _transcribers[key]
 
 def _get_diarizer():
     """Lazy load Diarizer."""
@@ -44,11 +58,20 @@ def _get_diarizer():
         _diarizer = Diarizer()
     return _diarizer
 
+def _get_vad():
+    """Lazy load VoiceActivityDetector."""
+    global _vad
+    if _vad is None:
+        from app.services.vad import VoiceActivityDetector
+        _vad = VoiceActivityDetector(model=settings.VAD_MODEL)
+    return _vad
+
 def _reset_services():
     """Reset lazy-loaded services (useful for testing)."""
-    global _transcriber, _diarizer
-    _transcriber = None
+    global _diarizer, _vad
+    _transcribers.clear()
     _diarizer = None
+    _vad = None
 
 
 def get_session():
@@ -59,96 +82,685 @@ def get_session():
     return SessionLocal()
 
 
+class JobCancelled(Exception):
+    """Raised inside a task once its job has been cancelled."""
+
+
+# Stages reported to the hot status store, in the order they run
+PIPELINE_STAGES = (
+    "ingest", "language", "vad", "transcription", "diarization", "alignment", "saving"
+)
+
+
+def set_job_status(session, job_id: str, status: str) -> bool:
+    """
+    Set a job's status unless it has been cancelled.
+    
+    The write is an UPDATE conditional on the status just read, so a
+    worker can never overwrite a cancellation that lands while it is
+    running, and the status counters move in the same commit.
+    
+    Args:
+        session: Database session
+        job_id: The ID of the transcription job
+        status: New status
+    
+    Returns:
+        bool: False if the job was cancelled (or does not exist)
+    """
+    while True:
+        current = session.query(TranscriptionJob.status).filter(
+            TranscriptionJob.id == job_id
+        ).scalar()
+        if current is None or current == "cancelled":
+            session.rollback()
+            return False
+        
+        updated = session.query(TranscriptionJob).filter(
+            TranscriptionJob.id == job_id,
+            TranscriptionJob.status == current
+        ).update({"status": status}, synchronize_session=False)
+        if updated:
+            record_status_change(session, current, status)
+            notify = status == "failed" and queue_webhook(
+                session, session.get(TranscriptionJob, job_id), status
+            )
+            session.commit()
+            if notify:
+                notify_webhooks()
+            return True
+        # The status changed under us; read it again
+        session.rollback()
+
+
+def report_status(session, job, status: str, stage: Optional[str] = None) -> bool:
+    """
+    Publish a non-terminal status of a job to the hot status store.
+    
+    Polls are answered from the store, so the database only sees the
+    job's terminal transition. When the store is unavailable the status
+    is written to the database instead.
+    
+    Args:
+        session: Database session
+        job: The TranscriptionJob being processed
+        status: New status (queued, processing or retrying)
+        stage: Pipeline stage the job is entering (optional)
+    
+    Returns:
+        bool: False if the database fallback found the job cancelled
+    """
+    fields = {}
+    if stage is not None:
+        fields.update(stage=stage, progress=stage_progress(stage))
+    
+    if get_status_store().publish(job, status, **fields):
+        return True
+    return set_job_status(session, job.id, status)
+
+
+def stage_progress(stage: str) -> float:
+    """Get the fraction of the pipeline done when ``stage`` starts."""
+    return round(PIPELINE_STAGES.index(stage) / len(PIPELINE_STAGES), 2)
+
+
+def report_stage(job, stage: str) -> None:
+    """
+    Publish the pipeline stage a running job is entering.
+    
+    Args:
+        job: The TranscriptionJob being processed (None is ignored)
+        stage: One of ``PIPELINE_STAGES``
+    """
+    if job is not None:
+        get_status_store().update(job.id, stage=stage, progress=stage_progress(stage))
+
+
+def cancellation_check(session, job_id: str, interval: Optional[float] = None):
+    """
+    Build a callback that raises JobCancelled once the job is cancelled
+    or deleted.
+    
+    The callback is cheap to call often (between decoded segments or
+    pipeline steps): it reads the job's status at most every ``interval``
+    seconds, unless called with ``force=True`` at stage boundaries.
+    
+    Args:
+        session: Database session
+        job_id: The ID of the transcription job
+        interval: Minimum seconds between database reads (defaults to settings)
+    
+    Returns:
+        Callable: ``check(force=False)``
+    """
+    interval = settings.CANCEL_CHECK_INTERVAL if interval is None else interval
+    last_check = float("-inf")
+    
+    def check(force: bool = False):
+        nonlocal last_check
+        now = time.monotonic()
+        if not force and now - last_check < interval:
+            return
+        last_check = now
+        
+        status = session.query(TranscriptionJob.status).filter(
+            TranscriptionJob.id == job_id
+        ).scalar()
+        # End the read transaction so it never holds up the cancelling writer
+        session.commit()
+        if status is None or status == "cancelled":
+            raise JobCancelled(job_id)
+    
+    return check
+
+
+def discard_partial_results(session, job):
+    """
+    Remove everything a cancelled job produced so far.
+    
+    Checkpoints and stored segments are dropped. The canonical copy is
+    removed only while the original upload still exists, so the job can
+    be retried later.
+    
+    Args:
+        session: Database session
+        job: The cancelled (or deleted) TranscriptionJob
+    """
+    session.rollback()
+    session.query(Segment).filter(Segment.job_id == job.id).delete(synchronize_session=False)
+    get_checkpoint_store().clear(job.id)
+    
+    if session.get(TranscriptionJob, job.id) is None:
+        # Deleted while running: its files went with the row
+        session.commit()
+        get_status_store().clear(job.id)
+        return
+    
+    normalized = job.audio_path and job.audio_path != job.original_path
+    if normalized and job.original_path and os.path.exists(job.original_path):
+        cleanup_temp_files(job.audio_path)
+        job.audio_path = None
+    session.commit()
+    get_status_store().clear(job.id)
+
+
+def ingest_audio(session, job, file_path: str) -> str:
+    """
+    Transcode an upload into the canonical 16 kHz mono format.
+    
+    Records the original's metadata on the job and optionally discards
+    the original upload.
+    
+    Args:
+        session: Database session
+        job: The TranscriptionJob being processed
+        file_path: Path to the uploaded file
+    
+    Returns:
+        str: Path to the audio file the pipeline should decode
+    """
+    from app.utils.audio import probe_audio, normalize_audio
+    
+    if job is not None and job.audio_path and os.path.exists(job.audio_path):
+        return job.audio_path
+    
+    metadata = probe_audio(file_path)
+    audio_path = normalize_audio(file_path)
+    
+    if not settings.KEEP_ORIGINAL_UPLOAD:
+        cleanup_temp_files(file_path)
+    
+    if job is not None:
+        job.audio_path = audio_path
+        job.source_metadata = metadata
+        session.commit()
+    
+    return audio_path
+
+
+def route_language(session, job, audio_path: str, model: str,
+                   engine: Optional[str] = None):
+    """
+    Detect the language of a job without one and pick its model.
+    
+    Confident English goes to the ``.en`` variant of the requested model.
+    The detected language is recorded on the job. Detection failures are
+    logged and leave the job on the multilingual model.
+    
+    Args:
+        session: Database session
+        job: The TranscriptionJob being processed
+        audio_path: Path to the audio file
+        model: Requested Whisper model
+        engine: Transcription engine (optional)
+    
+    Returns:
+        tuple: Language to decode with (None if not confident) and model
+    """
+    from app.services.language import detect_language, choose_model
+    from app.tasks.batching import get_redis
+    
+    try:
+        detection = detect_language(
+            audio_path,
+            _get_transcriber(model=settings.LANGUAGE_DETECTION_MODEL, engine=engine),
+            cache=get_redis()
+        )
+    except Exception as e:
+        logger.warning(f"Language detection failed, using {model}: {str(e)}")
+        return None, model
+    
+    language, probability = detection["language"], detection["probability"]
+    routed_model = choose_model(model, language, probability)
+    if routed_model != model:
+        logger.info(f"Routing English audio to {routed_model}")
+    
+    if job is not None:
+        job.language = language
+        job.language_probability = probability
+        job.model = routed_model
+        session.commit()
+        get_status_store().update(job.id, language=language)
+    
+    confident = probability >= settings.LANGUAGE_ROUTE_THRESHOLD
+    return (language if confident else None), routed_model
+
+
+def detect_speech(job, audio_path: str):
+    """
+    Run the VAD pre-pass over an audio file.
+    
+    Args:
+        job: The TranscriptionJob being processed
+        audio_path: Path to the audio file
+    
+    Returns:
+        SpeechMap: Speech regions of the file, or None when too little
+        audio would be skipped
+    """
+    from app.utils.audio import probe_audio
+    
+    if job is not None and job.source_metadata:
+        metadata = job.source_metadata
+    else:
+        metadata = probe_audio(audio_path)
+    total_duration = metadata.get("duration") or 0.0
+    
+    speech_map = _get_vad().build_speech_map(
+        audio_path,
+        total_duration,
+        padding=settings.VAD_PADDING,
+        min_gap=settings.VAD_MIN_GAP
+    )
+    
+    if not speech_map.regions or speech_map.skipped_fraction < settings.VAD_MIN_SKIP:
+        return None
+    
+    logger.info(f"VAD skipping {speech_map.skipped_fraction:.1%} of {total_duration:.1f}s")
+    return speech_map
+
+
+def extract_speech(audio_path: str, speech_map) -> str:
+    """
+    Cut non-speech audio out of a file.
+    
+    Args:
+        audio_path: Path to the audio file
+        speech_map: SpeechMap from :func:`detect_speech`
+    
+    Returns:
+        str: Path of the speech-only file
+    """
+    from app.utils.audio import extract_regions
+    
+    speech_path = os.path.splitext(audio_path)[0] + ".speech.wav"
+    return extract_regions(audio_path, speech_map.regions, speech_path)
+
+
+def needs_windowed_decode(job, audio_path: str, speech_map=None) -> bool:
+    """
+    Check whether a job's audio is long enough to decode window by window.
+    
+    Args:
+        job: The TranscriptionJob being processed
+        audio_path: Path to the audio file the pipeline decodes
+        speech_map: SpeechMap when only the speech is decoded (optional)
+    
+    Returns:
+        bool: True if the audio is at least ``WINDOWED_MIN_DURATION`` long
+    """
+    from app.utils.audio import probe_audio
+    
+    if not settings.WINDOWED_MIN_DURATION:
+        return False
+    
+    if speech_map is not None:
+        duration = speech_map.speech_duration
+    elif job is not None and job.source_metadata:
+        duration = job.source_metadata.get("duration")
+    else:
+        # Unprobeable files take the regular path, which reports the error
+        try:
+            duration = probe_audio(audio_path)["duration"]
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            return False
+    
+    return duration is not None and duration >= settings.WINDOWED_MIN_DURATION
+
+
+def save_results(session, job, aligned_segments: list, duration: float,
+                 processing_time: Optional[float] = None) -> int:
+    """
+    Store aligned segments and mark the job completed in one commit.
+    
+    The job's hot status is dropped, so polls read the completed row, and
+    the job is added to the statistics counters in the same commit. With
+    ``TURN_COMPACTION`` set, adjacent same-speaker segments are stored as
+    one turn row each.
+    
+    Args:
+        session: Database session
+        job: The TranscriptionJob being processed
+        aligned_segments: Segments with text and speaker labels
+        duration: Audio duration in seconds
+        processing_time: Wall-clock seconds spent processing (optional)
+    
+    Returns:
+        int: Number of distinct speakers
+    
+    Raises:
+        JobCancelled: If the job was cancelled (or deleted) before the commit;
+            nothing is stored
+    """
+    speakers = len(set(seg["speaker"] for seg in aligned_segments))
+    if settings.TURN_COMPACTION:
+        aligned_segments = compact_turns(
+            aligned_segments, settings.TURN_MAX_GAP, settings.TURN_MAX_DURATION
+        )
+    
+    # Drop rows left by an earlier attempt so retries never duplicate segments
+    session.query(Segment).filter(Segment.job_id == job.id).delete(synchronize_session=False)
+    
+    for seg in aligned_segments:
+        session.add(Segment(
+            job_id=job.id,
+            start_time=seg["start"],
+            end_time=seg["end"],
+            text=seg["text"],
+            speaker=seg["speaker"],
+            confidence=seg["confidence"],
+            boundaries=seg.get("boundaries")
+        ))
+    
+    # Complete the job only from the status just read, like set_job_status,
+    # so a cancellation committed since the last check is never overwritten
+    while True:
+        previous = session.query(TranscriptionJob.status).filter(
+            TranscriptionJob.id == job.id
+        ).scalar()
+        if previous is None or previous == "cancelled":
+            session.rollback()
+            raise JobCancelled(job.id)
+        claimed = session.query(TranscriptionJob).filter(
+            TranscriptionJob.id == job.id,
+            TranscriptionJob.status == previous
+        ).update({"status": "completed"}, synchronize_session=False)
+        if claimed:
+            break
+    resaved = previous == "completed"
+    if resaved:
+        # A retry after the results were saved: replace the earlier counts
+        record_deletion(session, [job])
+        previous = None
+    job.completed_at = datetime.utcnow()
+    job.status = "completed"
+    job.duration = duration
+    job.speakers_detected = speakers
+    job.max_segment_span = longest_span(aligned_segments)
+    job.processing_time = processing_time
+    record_completion(session, job, previous)
+    # The completion webhook is stored with the results; it was already sent on a re-save
+    notify = not resaved and queue_webhook(session, job, "completed")
+    session.commit()
+    get_status_store().clear(job.id)
+    if notify:
+        notify_webhooks()
+    
+    return speakers
+
+
+def index_speakers(job_id: str, diarization_result: dict):
+    """
+    Store a job's speaker centroid embeddings in the speaker index.
+    
+    Indexing failures are logged and never fail the job.
+    
+    Args:
+        job_id: The ID of the transcription job
+        diarization_result: Output of Diarizer.diarize
+    """
+    embeddings = diarization_result.get("embeddings")
+    if not embeddings:
+        return
+    
+    try:
+        from app.services.speaker_index import get_speaker_index
+        get_speaker_index().add_job(job_id, embeddings)
+    except Exception as e:
+        logger.warning(f"Could not index speakers for {job_id}: {str(e)}")
+
+
+def unindex_speakers(job_ids: list):
+    """
+    Hide the speakers of deleted jobs from the speaker index.
+    
+    Failures are logged and never fail the deletion.
+    
+    Args:
+        job_ids: IDs of the deleted jobs
+    """
+    if not settings.SPEAKER_INDEX_ENABLED or not job_ids:
+        return
+    
+    try:
+        from app.services.speaker_index import get_speaker_index
+        get_speaker_index().remove_jobs(job_ids)
+    except Exception as e:
+        logger.warning(f"Could not remove {len(job_ids)} jobs from the speaker index: {str(e)}")
+
+
 def init_db():
     """Initialize database tables."""
     engine = get_database_engine()
     Base.metadata.create_all(bind=engine)
 
 
-@current_task.task_prerun.connect
+@task_prerun.connect
 def on_task_prerun(sender=None, task_id=None, task=None, **kwargs):
     """Initialize db connection before task runs."""
     init_db()
 
 
-@current_task.task_postrun.connect
+@task_postrun.connect
 def on_task_postrun(sender=None, task_id=None, task=None, retval=None, **kwargs):
     """Close db connection after task runs."""
     pass
 
 
-@celery_app.task(bind=True)
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(JobCancelled,),
+    max_retries=settings.TASK_MAX_RETRIES,
+    retry_backoff=settings.TASK_RETRY_BACKOFF,
+    retry_backoff_max=settings.TASK_RETRY_BACKOFF_MAX,
+    retry_jitter=True
+)
 def process_transcription(self, job_id: str, file_path: str, filename: str, 
-                          model: str = "base", language: Optional[str] = None):
+                          model: str = "base", language: Optional[str] = None,
+                          engine: Optional[str] = None, diarize: bool = True,
+                          num_speakers: Optional[int] = None,
+                          min_speakers: Optional[int] = None,
+                          max_speakers: Optional[int] = None):
     """
     Celery task to process audio transcription with speaker diarization.
     
+    Every stage checkpoints its output, and failures are retried with
+    exponential backoff. A retry resumes after the last completed stage.
+    A cancelled job stops at the next stage boundary (or decoded segment /
+    diarization step) and its partial results are discarded. Long inputs
+    are decoded in bounded windows of memory-mapped PCM.
+    
     Args:
         job_id: The ID of the transcription job
         file_path: Path to the audio file
         filename: Original filename
         model: Whisper model to use (base, small, medium, large)
         language: Language code (optional)
+        engine: Transcription engine (optional, defaults to settings)
+        diarize: Whether to run speaker diarization
+        num_speakers: Exact number of speakers (optional)
+        min_speakers: Minimum number of speakers (optional)
+        max_speakers: Maximum number of speakers (optional)
     
     Returns:
         dict: Processing results
     """
+    from app.services.vad import SpeechMap
+    
     logger.info(f"Starting transcription job: {job_id}")
     
     session = get_session()
+    checkpoints = get_checkpoint_store()
+    job = None
+    started = time.perf_counter()
+    
+    check_cancelled = cancellation_check(session, job_id)
     
     try:
-        # Update job status
+        # Publish the running status, unless the job was cancelled or
+        # deleted while queued
         job = session.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
-        if job:
-            job.status = "processing"
-            session.commit()
+        if job is None:
+            raise JobCancelled(job_id)
+        check_cancelled(force=True)
+        if not report_status(session, job, "processing", stage="ingest"):
+            raise JobCancelled(job_id)
         
-        # Initialize services using lazy loading
-        transcriber = _get_transcriber(model=model)
-        diarizer = _get_diarizer()
+        # Step 0: Normalize the upload to compact 16 kHz mono audio
+        audio_path = file_path
+        if settings.NORMALIZE_AUDIO:
+            logger.info("Normalizing upload to 16 kHz mono")
+            audio_path = ingest_audio(session, job, file_path)
         
-        # Step 1: Transcribe with Whisper
-        logger.info(f"Transcribing with Whisper model: {model}")
-        transcript_result = transcriber.transcribe(file_path, language)
+        # Step 0a: Detect the language and route English to a .en model
+        if language is None and settings.LANGUAGE_DETECTION:
+            logger.info("Detecting language")
+            report_stage(job, "language")
+            language, model = route_language(session, job, audio_path, model, engine)
         
-        # Step 2: Run speaker diarization
-        logger.info("Running speaker diarization")
-        diarization_result = diarizer.diarize(file_path)
+        # Step 0b: Find the speech regions worth decoding
+        speech_map = None
+        if settings.VAD_ENABLED:
+            vad = checkpoints.load(job_id, "vad")
+            if vad is None:
+                logger.info("Running voice activity detection")
+                report_stage(job, "vad")
+                speech_map = detect_speech(job, audio_path)
+                checkpoints.save(job_id, "vad", {
+                    "regions": speech_map.regions if speech_map else [],
+                    "total_duration": speech_map.total_duration if speech_map else None
+                })
+            elif vad["regions"]:
+                speech_map = SpeechMap([tuple(r) for r in vad["regions"]], vad["total_duration"])
+            if job is not None:
+                job.skipped_fraction = speech_map.skipped_fraction if speech_map else 0.0
         
-        # Step 3: Align diarization with transcription
-        logger.info("Aligning transcription with speaker labels")
-        aligned_segments = diarizer.align_segments(
-            transcript_result["segments"],
-            diarization_result
-        )
-        
-        # Calculate duration
-        duration = transcript_result.get("duration", 0)
+        check_cancelled(force=True)
         
-        # Count speakers
-        speakers = len(set(seg["speaker"] for seg in aligned_segments))
+        # Transcript and diarization are checkpointed on the speech-only timeline
+        transcript_result = checkpoints.load(job_id, "transcript")
+        if diarize:
+            diarization_result = checkpoints.load(job_id, "diarization")
+        else:
+            diarization_result = {"segments": [], "num_speakers": 1}
         
-        # Store results in database
-        job.completed_at = datetime.utcnow()
-        job.status = "completed"
-        job.duration = duration
-        job.speakers_detected = speakers
-        session.commit()
+        if transcript_result is None or diarization_result is None:
+            speech_path = extract_speech(audio_path, speech_map) if speech_map else audio_path
+            pcm_path = None
+            try:
+                # Long inputs are decoded in bounded windows of memory-mapped PCM
+                if needs_windowed_decode(job, speech_path, speech_map):
+                    from app.utils.audio import decode_to_pcm, open_pcm, plan_windows
+                    from app.services.windowed import transcribe_windowed, diarize_windowed
+                    
+                    logger.info("Decoding long input window by window")
+                    pcm_path = decode_to_pcm(speech_path, os.path.splitext(speech_path)[0] + ".pcm")
+                    pcm = open_pcm(pcm_path)
+                
+                # Step 1: Transcribe with Whisper
+                if transcript_result is None:
+                    report_stage(job, "transcription")
+                    transcriber = _get_transcriber(model=model, engine=engine)
+                    logger.info(
+                        f"Transcribing with Whisper model: {model} ({transcriber.engine_name})"
+                    )
+                    if pcm_path:
+                        transcript_result = transcribe_windowed(
+                            transcriber,
+                            pcm,
+                            plan_windows(
+                                pcm, settings.TRANSCRIBE_WINDOW, settings.WINDOW_CUT_SEARCH
+                            ),
+                            language,
+                            check_cancelled=check_cancelled
+                        )
+                    else:
+                        transcript_result = transcriber.transcribe(
+                            speech_path, language, check_cancelled=check_cancelled
+                        )
+                    # Never checkpoint a transcript cut short by a cancellation
+                    check_cancelled(force=True)
+                    checkpoints.save(job_id, "transcript", transcript_result)
+                else:
+                    logger.info("Resuming from transcript checkpoint")
+                
+                # Step 2: Run speaker diarization
+                if diarization_result is None:
+                    logger.info("Running speaker diarization")
+                    report_stage(job, "diarization")
+                    if pcm_path:
+                        # Per-window speaker counts can only be bounded from above
+                        diarization_result = diarize_windowed(
+                            _get_diarizer(),
+                            pcm,
+                            plan_windows(pcm, settings.DIARIZE_WINDOW, settings.WINDOW_CUT_SEARCH),
+                            return_embeddings=settings.SPEAKER_INDEX_ENABLED,
+                            max_speakers=max_speakers or num_speakers,
+                            check_cancelled=check_cancelled
+                        )
+                    else:
+                        diarization_result = _get_diarizer().diarize(
+                            speech_path,
+                            return_embeddings=settings.SPEAKER_INDEX_ENABLED,
+                            num_speakers=num_speakers,
+                            min_speakers=min_speakers,
+                            max_speakers=max_speakers,
+                            check_cancelled=check_cancelled
+                        )
+                    check_cancelled(force=True)
+                    checkpoints.save(job_id, "diarization", diarization_result)
+            finally:
+                if pcm_path:
+                    cleanup_temp_files(pcm_path)
+                if speech_path != audio_path:
+                    cleanup_temp_files(speech_path)
+        else:
+            logger.info("Resuming from transcript and diarization checkpoints")
         
-        # Store segments
-        for seg in aligned_segments:
-            segment = Segment(
-                job_id=job_id,
-                start_time=seg["start"],
-                end_time=seg["end"],
-                text=seg["text"],
-                speaker=seg["speaker"],
-                confidence=seg["confidence"]
-            )
-            session.add(segment)
+        # Step 3: Align diarization with transcription
+        alignment = checkpoints.load(job_id, "alignment")
+        if alignment is None:
+            report_stage(job, "alignment")
+            transcript_segments = transcript_result["segments"]
+            diarization_segments = diarization_result["segments"]
+            
+            # Map speech-only timestamps back to the original timeline
+            if speech_map is not None:
+                transcript_segments = speech_map.remap_segments(transcript_segments)
+                diarization_segments = speech_map.remap_segments(diarization_segments)
+            
+            if diarize:
+                logger.info("Aligning transcription with speaker labels")
+                aligned_segments = _get_diarizer().align_segments(
+                    transcript_segments,
+                    diarization_segments
+                )
+            else:
+                aligned_segments = label_single_speaker(transcript_segments)
+            
+            # Calculate duration
+            if speech_map is not None:
+                duration = speech_map.total_duration
+            else:
+                duration = transcript_result.get("duration", 0)
+            
+            checkpoints.save(job_id, "alignment", {
+                "segments": aligned_segments,
+                "duration": duration
+            })
+        else:
+            logger.info("Resuming from alignment checkpoint")
+            aligned_segments = alignment["segments"]
+            duration = alignment["duration"]
         
-        session.commit()
+        # Store results in database
+        check_cancelled(force=True)
+        report_stage(job, "saving")
+        speakers = save_results(session, job, aligned_segments, duration,
+                                processing_time=time.perf_counter() - started)
+        index_speakers(job_id, diarization_result)
+        checkpoints.clear(job_id)
         
         logger.info(f"Transcription job completed: {job_id}")
         
@@ -162,13 +774,24 @@ def process_transcription(self, job_id: str, file_path: str, filename: str,
             "duration": duration
         }
         
+    except JobCancelled:
+        logger.info(f"Transcription job cancelled: {job_id}")
+        if job:
+            discard_partial_results(session, job)
+        return {"job_id": job_id, "status": "cancelled", "filename": filename}
+        
     except Exception as e:
         logger.error(f"Error processing transcription {job_id}: {str(e)}")
         
-        # Update job status to failed
+        # Autoretry re-queues the task until max_retries is reached
+        will_retry = not self.request.called_directly and self.request.retries < self.max_retries
         if job:
-            job.status = "failed"
-            session.commit()
+            session.rollback()
+            if will_retry:
+                report_status(session, job, "retrying")
+            else:
+                set_job_status(session, job_id, "failed")
+                get_status_store().clear(job_id)
         
         raise
     
@@ -192,13 +815,18 @@ def delete_job(job_id: str):
             # Delete associated segments
             session.query(Segment).filter(Segment.job_id == job_id).delete()
             
-            # Delete the job
+            # Delete the job and take it out of the statistics
+            record_deletion(session, [job])
             session.delete(job)
             session.commit()
             
-            # Delete the file
-            if os.path.exists(job.original_path):
-                os.remove(job.original_path)
+            # Delete the upload, its canonical copy and any checkpoints
+            for path in (job.original_path, job.audio_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+            get_checkpoint_store().clear(job_id)
+            get_status_store().clear(job_id)
+            unindex_speakers([job_id])
                 
         return {"status": "deleted", "job_id": job_id}
         
@@ -207,4 +835,52 @@ def delete_job(job_id: str):
         session.rollback()
         raise
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+@celery_app.task
+def reclaim_files(paths: list):
+    """
+    Celery task to remove files left behind by deleted jobs.
+    
+    Args:
+        paths: File paths (or checkpoint directories) to remove from disk
+    
+    Returns:
+        dict: Number of files removed
+    """
+    removed = 0
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        elif os.path.exists(path):
+            cleanup_temp_files(path)
+            removed += 1
+    
+    return {"status": "reclaimed", "files": removed}
+
+
+@celery_app.task
+def recompute_stats():
+    """
+    Celery task to rebuild the statistics counters from the job table.
+    
+    Counters are maintained incrementally; this repairs them after manual
+    database edits or anything else that bypassed the application.
+    
+    Returns:
+        dict: Number of counters written
+    """
+    session = get_session()
+    
+    try:
+        counters = recompute_statistics(session)
+        session.commit()
+        logger.info(f"Recomputed {counters} statistics counters")
+        return {"status": "recomputed", "counters": counters}
+    except Exception as e:
+        logger.error(f"Error recomputing statistics: {str(e)}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,67 @@
+"""
+Celery tasks delivering completion webhooks.
+
+They are routed to ``WEBHOOK_QUEUE``, so slow receivers never hold up
+transcription workers. Run a worker for the queue with:
+    celery -A app.tasks.celery_app worker -Q webhooks
+"""
+import logging
+
+from app.config import settings
+from app.tasks.celery_app import celery_app
+from app.utils.webhooks import batch_body, claim_batch, post_batch, record_attempt
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def deliver_webhooks():
+    """
+    Celery task to send every due webhook event, batched per URL.
+
+    Failed batches are due again after their backoff; another delivery run
+    is scheduled for the earliest of them. Beat also runs this task every
+    ``WEBHOOK_SWEEP_INTERVAL`` seconds, so nothing is stranded if a
+    scheduled run is lost.
+
+    Returns:
+        dict: Number of events delivered and of events to be retried
+    """
+    from app.tasks.tasks import get_session
+
+    session = get_session()
+    delivered, retrying, next_run = 0, 0, None
+
+    try:
+        while deliveries := claim_batch(session):
+            url = deliveries[0].callback_url
+            status_code, error = post_batch(url, batch_body(deliveries))
+            delay = record_attempt(session, deliveries, status_code, error)
+            if error is None:
+                delivered += len(deliveries)
+            else:
+                logger.warning(f"Webhook batch of {len(deliveries)} to {url} failed: {error}")
+            if delay is not None:
+                retrying += len(deliveries)
+                next_run = delay if next_run is None else min(next_run, delay)
+    finally:
+        session.close()
+
+    if next_run is not None:
+        deliver_webhooks.apply_async(countdown=next_run)
+
+    return {"delivered": delivered, "retrying": retrying}
+
+
+def notify_webhooks():
+    """
+    Schedule delivery of newly staged webhook events.
+
+    The run starts ``WEBHOOK_BATCH_WAIT`` seconds later, so events of jobs
+    finishing together go out in one request. Dispatch failures are
+    logged and never fail the job; the beat sweep picks the events up.
+    """
+    try:
+        deliver_webhooks.apply_async(countdown=settings.WEBHOOK_BATCH_WAIT)
+    except Exception as e:
+        logger.warning(f"Could not schedule webhook delivery: {str(e)}")
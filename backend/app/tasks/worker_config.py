@@ -0,0 +1,174 @@
+"""
+CPU-topology-aware worker configuration.
+
+Prefork children each run their own torch thread pools. Left alone, every
+child sizes its pools to the whole machine, so N children on N cores run
+N*N threads. This module detects the CPUs actually available to the worker
+(affinity mask and cgroup quota) and splits them between process
+concurrency and per-child torch threads.
+"""
+import os
+import math
+import logging
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def read_cgroup_cpu_limit(root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """
+    Read the CPU quota of the current cgroup.
+
+    Supports cgroup v2 (``cpu.max``) and v1 (``cpu.cfs_quota_us`` and
+    ``cpu.cfs_period_us``).
+
+    Args:
+        root: Mount point of the cgroup filesystem
+
+    Returns:
+        Optional[float]: Number of CPUs allowed by the quota, or None if
+        there is no quota
+    """
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read().strip())
+        with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read().strip())
+        if quota <= 0 or period <= 0:
+            return None
+        return quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> list:
+    """Get the CPU ids this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def detect_cpu_count(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """
+    Get the number of CPUs the worker can actually use.
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        int: Usable CPUs, the smaller of the affinity mask and cgroup quota
+    """
+    cpus = len(available_cpus())
+    quota = read_cgroup_cpu_limit(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return max(1, cpus)
+
+
+def plan_workers(cpus: int,
+                 concurrency: int = 0,
+                 threads_per_child: int = 0) -> dict:
+    """
+    Split CPUs between prefork children and per-child torch threads.
+
+    Args:
+        cpus: Number of usable CPUs
+        concurrency: Fixed number of children (0 to derive it)
+        threads_per_child: Fixed intra-op threads per child (0 to derive it)
+
+    Returns:
+        dict: ``concurrency``, ``threads`` (intra-op) and ``interop_threads``
+    """
+    if concurrency and threads_per_child:
+        pass
+    elif concurrency:
+        threads_per_child = max(1, cpus // concurrency)
+    else:
+        threads_per_child = threads_per_child or min(cpus, settings.WORKER_DEFAULT_THREADS)
+        concurrency = max(1, cpus // threads_per_child)
+
+    return {
+        "concurrency": concurrency,
+        "threads": threads_per_child,
+        "interop_threads": settings.WORKER_INTEROP_THREADS,
+    }
+
+
+def get_worker_plan() -> dict:
+    """Get the worker plan for this node from settings and CPU detection."""
+    cpus = detect_cpu_count()
+    plan = plan_workers(
+        cpus,
+        concurrency=settings.WORKER_CONCURRENCY,
+        threads_per_child=settings.WORKER_THREADS_PER_CHILD
+    )
+    plan["cpus"] = cpus
+    return plan
+
+
+def child_cpu_set(index: int, threads: int, cpus: Optional[list] = None) -> list:
+    """
+    Get the CPUs a child should be pinned to.
+
+    Children get consecutive, disjoint blocks of ``threads`` CPUs, wrapping
+    around when there are more children than blocks.
+
+    Args:
+        index: Index of the prefork child (0-based)
+        threads: Intra-op threads per child
+        cpus: CPU ids to choose from (defaults to the affinity mask)
+
+    Returns:
+        list: CPU ids for the child
+    """
+    cpus = cpus if cpus is not None else available_cpus()
+    blocks = max(1, len(cpus) // threads)
+    start = (index % blocks) * threads
+    return cpus[start:start + threads] or cpus
+
+
+def apply_thread_budget(plan: dict, index: Optional[int] = None) -> None:
+    """
+    Apply the per-child thread budget inside a worker child.
+
+    Args:
+        plan: Worker plan from :func:`get_worker_plan`
+        index: Index of the prefork child, used for CPU pinning
+    """
+    threads = plan["threads"]
+
+    # Native libraries read these when they start their own pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    if settings.WORKER_PIN_CPUS and index is not None and hasattr(os, "sched_setaffinity"):
+        cpu_set = child_cpu_set(index, threads)
+        os.sched_setaffinity(0, cpu_set)
+        logger.info(f"Pinned worker child {index} to CPUs {cpu_set}")
+
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(plan["interop_threads"])
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work
+        logger.warning("torch inter-op threads already initialized; keeping default")
+
+    logger.info(
+        f"Worker child {index}: {threads} intra-op / {plan['interop_threads']} inter-op threads"
+    )
@@ -0,0 +1,429 @@
+"""
+Audio ingest utilities for the Transcriber backend.
+
+Uploads are transcoded with ffmpeg into a compact canonical format
+(16 kHz mono), which is all Whisper and pyannote.audio consume.
+"""
+import os
+import mmap
+import json
+import wave
+import tempfile
+import subprocess
+import logging
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_SAMPLE_RATE = 16000
+CANONICAL_CHANNELS = 1
+
+# Extra bytes around a window whose mapped pages are released with it
+PCM_RELEASE_MARGIN = 2 * 1024 * 1024
+
+# Canonical format -> (ffmpeg codec, file extension)
+CANONICAL_FORMATS = {
+    "flac": ("flac", ".flac"),
+    "opus": ("libopus", ".ogg"),
+}
+
+
+def parse_probe_output(probe: dict) -> dict:
+    """
+    Extract the metadata we record from ffprobe's JSON output.
+
+    Args:
+        probe: Parsed output of ``ffprobe -of json``
+
+    Returns:
+        dict: Container format, codec, sample rate, channels, duration and size
+    """
+    fmt = probe.get("format", {})
+    audio = next(
+        (s for s in probe.get("streams", []) if s.get("codec_type") == "audio"),
+        {}
+    )
+
+    def _number(value, cast):
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "format": fmt.get("format_name"),
+        "codec": audio.get("codec_name"),
+        "sample_rate": _number(audio.get("sample_rate"), int),
+        "channels": _number(audio.get("channels"), int),
+        "duration": _number(fmt.get("duration"), float),
+        "size": _number(fmt.get("size"), int),
+        "has_video": any(
+            s.get("codec_type") == "video" for s in probe.get("streams", [])
+        ),
+    }
+
+
+def probe_audio(path: str) -> dict:
+    """
+    Read media metadata with ffprobe.
+
+    Args:
+        path: Path to the media file
+
+    Returns:
+        dict: Metadata as returned by :func:`parse_probe_output`
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_entries",
+        "format=format_name,duration,size:stream=codec_type,codec_name,sample_rate,channels",
+        "-of", "json",
+        path
+    ]
+    result = subprocess.run(command, capture_output=True, check=True)
+    return parse_probe_output(json.loads(result.stdout or b"{}"))
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """Get the duration of a media file in seconds, or None if it cannot be read."""
+    try:
+        return probe_audio(path)["duration"]
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def canonical_path(src: str, fmt: str, dest_dir: Optional[str] = None) -> str:
+    """Get the path of the canonical copy of ``src``."""
+    _, ext = CANONICAL_FORMATS[fmt]
+    stem = os.path.splitext(os.path.basename(src))[0]
+    return os.path.join(dest_dir or os.path.dirname(src), f"{stem}.16k{ext}")
+
+
+def build_normalize_command(src: str, dest: str, fmt: str) -> list:
+    """Build the ffmpeg command that transcodes ``src`` into ``dest``."""
+    codec, _ = CANONICAL_FORMATS[fmt]
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        "-i", src,
+        "-vn",
+        "-ac", str(CANONICAL_CHANNELS),
+        "-ar", str(CANONICAL_SAMPLE_RATE),
+        "-c:a", codec,
+    ]
+    if fmt == "opus":
+        command += ["-b:a", settings.NORMALIZE_OPUS_BITRATE, "-application", "voip"]
+    return command + [dest]
+
+
+def normalize_audio(src: str, fmt: Optional[str] = None,
+                    dest_dir: Optional[str] = None) -> str:
+    """
+    Transcode a media file into the canonical 16 kHz mono format.
+
+    Args:
+        src: Path to the uploaded media file
+        fmt: Canonical format, ``flac`` or ``opus`` (defaults to settings)
+        dest_dir: Directory for the canonical file (defaults to ``src``'s)
+
+    Returns:
+        str: Path to the canonical audio file
+    """
+    fmt = fmt or settings.NORMALIZE_FORMAT
+    if fmt not in CANONICAL_FORMATS:
+        raise ValueError(f"Unsupported canonical format: {fmt}")
+
+    dest = canonical_path(src, fmt, dest_dir)
+    logger.info(f"Normalizing {src} to {dest}")
+
+    try:
+        subprocess.run(build_normalize_command(src, dest, fmt), capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        if os.path.exists(dest):
+            os.remove(dest)
+        raise RuntimeError(f"ffmpeg failed for {src}: {e.stderr.decode(errors='replace')}") from e
+
+    return dest
+
+
+def copy_pcm_regions(stream, regions: list, out, chunk_size: int = 1 << 20) -> int:
+    """
+    Copy the given time regions of a 16 kHz mono s16le stream to ``out``.
+
+    Args:
+        stream: Readable binary stream of PCM samples
+        regions: Sorted, non-overlapping (start, end) regions in seconds
+        out: Object with a ``writeframes`` method (e.g. a ``wave`` writer)
+        chunk_size: Bytes read from ``stream`` at a time
+
+    Returns:
+        int: Number of bytes written
+    """
+    sample_width = 2  # s16le
+    bounds = [
+        (int(start * CANONICAL_SAMPLE_RATE) * sample_width,
+         int(end * CANONICAL_SAMPLE_RATE) * sample_width)
+        for start, end in regions
+    ]
+
+    position = 0
+    index = 0
+    written = 0
+    while index < len(bounds):
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        chunk_end = position + len(chunk)
+
+        # Copy every region overlapping this chunk
+        while index < len(bounds) and bounds[index][0] < chunk_end:
+            start, end = bounds[index]
+            lo = max(start, position) - position
+            hi = min(end, chunk_end) - position
+            if hi > lo:
+                out.writeframes(chunk[lo:hi])
+                written += hi - lo
+            if end > chunk_end:
+                break
+            index += 1
+
+        position = chunk_end
+
+    return written
+
+
+def build_extract_command(src: str, seconds: Optional[float] = None) -> list:
+    """Build the ffmpeg command that decodes ``src`` to 16 kHz mono s16le on stdout."""
+    command = ["ffmpeg", "-nostdin", "-v", "error", "-i", src]
+    if seconds is not None:
+        command += ["-t", str(seconds)]
+    command += [
+        "-f", "s16le", "-ac", str(CANONICAL_CHANNELS),
+        "-ar", str(CANONICAL_SAMPLE_RATE),
+        "-"
+    ]
+    return command
+
+
+def extract_regions(src: str, regions: list, dest: str) -> str:
+    """
+    Write only the given time regions of ``src`` to a 16 kHz mono WAV file.
+
+    The audio is decoded by ffmpeg and streamed through, so memory use does
+    not depend on the length of the input. Decoding stops at the end of
+    the last region.
+
+    Args:
+        src: Path to the audio file
+        regions: Sorted, non-overlapping (start, end) regions in seconds
+        dest: Path of the WAV file to write
+
+    Returns:
+        str: Path to the written WAV file
+
+    Raises:
+        RuntimeError: If ffmpeg fails; no file is left at ``dest``
+    """
+    command = build_extract_command(src, regions[-1][1] if regions else 0)
+
+    # A file, not a pipe, so ffmpeg never blocks on a full stderr buffer
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            with wave.open(dest, "wb") as out:
+                out.setnchannels(CANONICAL_CHANNELS)
+                out.setsampwidth(2)
+                out.setframerate(CANONICAL_SAMPLE_RATE)
+                copy_pcm_regions(process.stdout, regions, out)
+            # Let ffmpeg run to its end, so its exit status reports any failure
+            while process.stdout.read(1 << 20):
+                pass
+        except BaseException:
+            process.kill()
+            if os.path.exists(dest):
+                os.remove(dest)
+            raise
+        finally:
+            process.stdout.close()
+            process.wait()
+
+        if process.returncode != 0:
+            if os.path.exists(dest):
+                os.remove(dest)
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg failed for {src}: {stderr.read().decode(errors='replace')}")
+
+    return dest
+
+
+def load_audio(src: str, seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Decode an audio file to 16 kHz mono samples in memory.
+
+    Args:
+        src: Path to the audio file
+        seconds: Only decode this much of the beginning (optional)
+
+    Returns:
+        np.ndarray: float32 samples in [-1, 1]
+    """
+    command = ["ffmpeg", "-nostdin", "-v", "error"]
+    if seconds is not None:
+        command += ["-t", str(seconds)]
+    command += [
+        "-i", src,
+        "-vn",
+        "-f", "s16le", "-ac", str(CANONICAL_CHANNELS),
+        "-ar", str(CANONICAL_SAMPLE_RATE),
+        "-"
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg failed for {src}: {e.stderr.decode(errors='replace')}") from e
+
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def load_audio_head(src: str, seconds: float = 30.0) -> np.ndarray:
+    """
+    Decode the beginning of an audio file to 16 kHz mono samples.
+
+    Only the first ``seconds`` of input are read, however long the file.
+
+    Args:
+        src: Path to the audio file
+        seconds: Length of audio to decode
+
+    Returns:
+        np.ndarray: float32 samples in [-1, 1]
+    """
+    return load_audio(src, seconds)
+
+
+def decode_to_pcm(src: str, dest: str) -> str:
+    """
+    Decode an audio file to raw 16 kHz mono s16le PCM on disk.
+
+    ffmpeg writes straight to ``dest``, so nothing is held in memory; the
+    file is then read window by window through :func:`open_pcm`.
+
+    Args:
+        src: Path to the audio file
+        dest: Path of the raw PCM file to write
+
+    Returns:
+        str: Path to the PCM file
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-v", "error", "-y",
+        "-i", src,
+        "-vn",
+        "-f", "s16le", "-ac", str(CANONICAL_CHANNELS),
+        "-ar", str(CANONICAL_SAMPLE_RATE),
+        dest
+    ]
+    try:
+        subprocess.run(command, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        if os.path.exists(dest):
+            os.remove(dest)
+        raise RuntimeError(f"ffmpeg failed for {src}: {e.stderr.decode(errors='replace')}") from e
+
+    return dest
+
+
+def open_pcm(path: str) -> np.ndarray:
+    """
+    Memory-map a raw 16 kHz mono s16le PCM file.
+
+    Pages are read from disk only when a window is sliced out, and
+    :func:`pcm_window` hands them back once the window is copied, so the
+    mapping never accumulates in the worker's resident memory.
+
+    Returns:
+        np.ndarray: Read-only int16 samples (empty for an empty file)
+    """
+    if os.path.getsize(path) < 2:
+        return np.zeros(0, dtype="<i2")
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return np.frombuffer(mapped, dtype="<i2", count=len(mapped) // 2)
+
+
+def release_pcm(pcm: np.ndarray, start: int, end: int) -> None:
+    """
+    Drop the resident pages of samples ``start:end`` of a mapped PCM array.
+
+    The data stays in the file (and usually the page cache); it is only
+    read back if sliced again. Arrays not from :func:`open_pcm` are ignored.
+    """
+    mapped = getattr(pcm.base, "obj", None)
+    if not isinstance(mapped, mmap.mmap) or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    # The kernel maps whole folios around a fault, beyond the slice itself
+    first = max(0, start * pcm.itemsize - PCM_RELEASE_MARGIN) // mmap.PAGESIZE * mmap.PAGESIZE
+    last = min(len(mapped), end * pcm.itemsize + PCM_RELEASE_MARGIN)
+    if last > first:
+        mapped.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+
+def pcm_window(pcm: np.ndarray, start: int, end: int) -> np.ndarray:
+    """
+    Copy samples ``start:end`` of a PCM array out as float32 in [-1, 1].
+
+    The window's mapped pages are released once copied.
+    """
+    samples = pcm[start:end].astype(np.float32) / 32768.0
+    release_pcm(pcm, start, end)
+    return samples
+
+
+def plan_windows(pcm: np.ndarray, window: float, search: float = 5.0,
+                 frame: int = 480) -> list:
+    """
+    Split PCM samples into consecutive windows of at most ``window`` seconds.
+
+    Each cut is placed at the quietest 30 ms frame of the last ``search``
+    seconds before the window limit, so it falls between words rather
+    than through one.
+
+    Args:
+        pcm: 16 kHz mono samples (int16 or float)
+        window: Longest window, in seconds
+        search: Stretch before each limit searched for a pause, in seconds
+        frame: Frame length (samples) the energy is measured over
+
+    Returns:
+        list: (start, end) sample ranges covering all of ``pcm``
+    """
+    size = int(window * CANONICAL_SAMPLE_RATE)
+    search_size = min(int(search * CANONICAL_SAMPLE_RATE), size // 2)
+    total = len(pcm)
+
+    windows = []
+    start = 0
+    while start < total:
+        limit = start + size
+        if limit >= total:
+            windows.append((start, total))
+            break
+
+        end = limit
+        frames = search_size // frame
+        if frames:
+            lo = limit - frames * frame
+            region = pcm[lo:limit].astype(np.float32)
+            energy = np.mean(region.reshape(frames, frame) ** 2, axis=1)
+            end = lo + int(np.argmin(energy)) * frame + frame // 2
+            release_pcm(pcm, lo, limit)
+
+        windows.append((start, end))
+        start = end
+
+    return windows
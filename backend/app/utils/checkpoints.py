@@ -0,0 +1,102 @@
+"""
+Durable per-stage checkpoints for transcription jobs.
+
+Each pipeline stage (VAD, transcript, diarization, alignment) writes its
+output to ``{CHECKPOINT_DIR}/{job_id}/{stage}.json`` once it finishes. A
+retried job loads the stages that already completed instead of running
+them again, so a cheap downstream failure never repeats Whisper.
+"""
+import os
+import json
+import shutil
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages, in the order they run
+STAGES = ("vad", "transcript", "diarization", "alignment")
+
+
+class CheckpointStore:
+    """Stage outputs stored as JSON files keyed by job id and stage."""
+
+    def __init__(self, directory: str):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding one subdirectory per job
+        """
+        self.directory = directory
+
+    def job_dir(self, job_id: str) -> str:
+        """Get the directory holding a job's checkpoints."""
+        return os.path.join(self.directory, job_id)
+
+    def path(self, job_id: str, stage: str) -> str:
+        """Get the checkpoint file of a job's stage."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        return os.path.join(self.job_dir(job_id), f"{stage}.json")
+
+    def save(self, job_id: str, stage: str, data) -> None:
+        """
+        Store a stage's output.
+
+        The file is written next to its final name and renamed into place,
+        so a crash mid-write never leaves a truncated checkpoint.
+
+        Args:
+            job_id: The ID of the transcription job
+            stage: Pipeline stage name
+            data: JSON-serializable stage output
+        """
+        path = self.path(job_id, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str, stage: str) -> Optional[dict]:
+        """
+        Load a stage's output.
+
+        Args:
+            job_id: The ID of the transcription job
+            stage: Pipeline stage name
+
+        Returns:
+            Optional[dict]: The stored output, or None if the stage has
+            not completed
+        """
+        path = self.path(job_id, stage)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring unreadable checkpoint: {path}")
+            return None
+
+    def clear(self, job_id: str) -> None:
+        """Remove every checkpoint of a job."""
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+
+_store = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the process-wide checkpoint store."""
+    from app.config import settings
+
+    global _store
+    if _store is None or _store.directory != settings.CHECKPOINT_DIR:
+        _store = CheckpointStore(settings.CHECKPOINT_DIR)
+    return _store
@@ -0,0 +1,177 @@
+"""
+Response compression with gzip/brotli negotiation.
+
+``CompressionMiddleware`` compresses HTTP responses with the best encoding
+the client accepts: brotli when the optional ``brotli`` package is
+installed, gzip otherwise. Unlike Starlette's ``GZipMiddleware``, every
+chunk of a streamed response is flushed through the compressor as it is
+sent, so NDJSON lines reach the client as soon as they are produced.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+def parse_accept_encoding(value: str) -> dict:
+    """
+    Parse an ``Accept-Encoding`` header into quality values.
+
+    Args:
+        value: Header value, e.g. ``"br;q=1.0, gzip;q=0.8, *;q=0"``
+
+    Returns:
+        dict: Quality per lower-cased coding
+    """
+    qualities = {}
+    for item in value.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, number = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding for an ``Accept-Encoding`` header.
+
+    Returns:
+        Optional[str]: ``"br"``, ``"gzip"`` or None for no compression
+    """
+    qualities = parse_accept_encoding(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    supported = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _Compressor:
+    """Incremental compressor that can flush after every chunk."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk, flushing it out if ``flush`` is set."""
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last chunk and end the stream."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with the negotiated encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            minimum_size: Complete responses smaller than this are sent as is
+            gzip_level: zlib compression level (1-9)
+            brotli_quality: brotli quality (0-11)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = None
+        start: Message = {}
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal compressor, start, passthrough
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk decides the headers
+                start = message
+                passthrough = "content-encoding" in Headers(raw=message["headers"])
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if passthrough:
+                if start:
+                    await send(start)
+                    start = {}
+                await send(message)
+                return
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    start = {}
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+                start = {}
+
+            if more_body:
+                body = compressor.compress(body, flush=True)
+            else:
+                body = compressor.finish(body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
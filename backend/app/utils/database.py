@@ -0,0 +1,170 @@
+"""
+Dialect-aware database engines for the Transcriber backend.
+
+SQLite (the default) gets thread-safe connections, a busy timeout and
+WAL journaling, so the API can read while a worker writes. Server
+databases (PostgreSQL) get a sized connection pool with pre-ping, so
+connections dropped by the server or a proxy are replaced transparently.
+
+Engines are cached per URL and process. With ``DATABASE_READ_URL`` set,
+read-only request handlers use a second engine pointed at a replica.
+"""
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+
+# Async driver per dialect
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+_engines = {}
+_async_engines = {}
+
+
+def normalize_database_url(url: str) -> str:
+    """Accept the ``postgres://`` scheme some hosting providers hand out."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def is_sqlite(url: str) -> bool:
+    """Check whether a database URL points at SQLite."""
+    return make_url(normalize_database_url(url)).get_backend_name() == "sqlite"
+
+
+def get_async_database_url(url: str) -> str:
+    """Get the async driver variant of a database URL."""
+    url = normalize_database_url(url)
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Get the ``create_engine`` options for a database URL.
+
+    Args:
+        url: Database URL
+        is_async: Options for the async driver
+
+    Returns:
+        dict: Keyword arguments for ``create_engine`` / ``create_async_engine``
+    """
+    if is_sqlite(url):
+        if is_async:
+            # aiosqlite: wait on the worker's write lock instead of failing
+            return {"connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT}}
+        return {"connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT
+        }}
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Configure a new SQLite connection (WAL journaling and busy timeout)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT * 1000)}")
+        if settings.SQLITE_JOURNAL_MODE:
+            cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        if settings.SQLITE_JOURNAL_MODE.upper() == "WAL":
+            # Safe with WAL: a power loss can only drop the last commits
+            cursor.execute("PRAGMA synchronous = NORMAL")
+    finally:
+        cursor.close()
+
+
+def _create_engine(url: str, is_async: bool):
+    """Create an engine with the options and hooks of its dialect."""
+    url = normalize_database_url(url)
+    if is_async:
+        engine = create_async_engine(get_async_database_url(url), **engine_options(url, True))
+        sync_engine = engine.sync_engine
+    else:
+        engine = create_engine(url, **engine_options(url))
+        sync_engine = engine
+
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def get_database_engine(url: Optional[str] = None):
+    """
+    Get the (cached) synchronous engine used by workers.
+
+    Args:
+        url: Database URL (defaults to ``DATABASE_URL``)
+    """
+    url = url or settings.DATABASE_URL
+    engine = _engines.get(url)
+    if engine is None:
+        engine = _engines[url] = _create_engine(url, is_async=False)
+    return engine
+
+
+def get_session():
+    """Get database session."""
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_database_engine())
+    return SessionLocal()
+
+
+def get_async_engine(read_only: bool = False):
+    """
+    Get the (cached) async engine for the request path.
+
+    Args:
+        read_only: Use the read replica (``DATABASE_READ_URL``) if one is set
+    """
+    url = (read_only and settings.DATABASE_READ_URL) or settings.DATABASE_URL
+    engine = _async_engines.get(url)
+    if engine is None:
+        engine = _async_engines[url] = _create_engine(url, is_async=True)
+    return engine
+
+
+def get_async_session(read_only: bool = False) -> AsyncSession:
+    """
+    Get async database session.
+
+    Args:
+        read_only: Bind the session to the read replica if one is set
+    """
+    SessionLocal = async_sessionmaker(
+        get_async_engine(read_only),
+        autoflush=False,
+        expire_on_commit=False
+    )
+    return SessionLocal()
+
+
+def dispose_engines() -> None:
+    """
+    Drop pooled connections inherited from a parent process.
+
+    Called in each forked worker child, so children never share a
+    connection the parent opened; the parent's connections stay open.
+    """
+    for engine in _engines.values():
+        engine.dispose(close=False)
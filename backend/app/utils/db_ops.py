@@ -0,0 +1,113 @@
+"""
+Database operation utilities for the Transcriber backend.
+"""
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.models import TranscriptionJob, Segment
+from app.utils.checkpoints import get_checkpoint_store
+from app.utils.stats import record_deletion
+
+
+def chunked(items: list, size: int) -> List[list]:
+    """Split a list into consecutive chunks of at most ``size`` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def delete_jobs_bulk(session,
+                     job_ids: Optional[List[str]] = None,
+                     status: Optional[str] = None,
+                     older_than: Optional[datetime] = None,
+                     batch_size: Optional[int] = None
+                     ) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Delete every job matching the given criteria with set-based statements.
+
+    Matching ids are selected in batches and removed with
+    ``DELETE ... WHERE job_id IN (...)``, committing once per batch, so no
+    ORM objects are loaded and the write lock is released between batches.
+    Each batch's jobs leave the statistics counters in the same commit.
+
+    Args:
+        session: Database session
+        job_ids: Explicit job IDs to delete (optional)
+        status: Only delete jobs with this status (optional)
+        older_than: Only delete jobs created before this time (optional)
+        batch_size: Number of jobs per DELETE statement
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: IDs of the deleted jobs, the
+        file paths (and checkpoint directories) that still need to be
+        reclaimed from disk, and the Celery task IDs of deleted jobs that
+        had not finished, which still need to be revoked
+    """
+    batch_size = batch_size or settings.BULK_DELETE_BATCH_SIZE
+    checkpoints = get_checkpoint_store()
+
+    filters = []
+    if status is not None:
+        filters.append(TranscriptionJob.status == status)
+    if older_than is not None:
+        filters.append(TranscriptionJob.created_at < older_than)
+
+    if job_ids is not None:
+        # Explicit ids: each chunk is checked against the filters once
+        id_batches = chunked(list(dict.fromkeys(job_ids)), batch_size)
+    else:
+        id_batches = None
+
+    deleted: List[str] = []
+    paths: List[str] = []
+    task_ids: List[str] = []
+
+    while True:
+        query = select(
+            TranscriptionJob.id,
+            TranscriptionJob.original_path,
+            TranscriptionJob.audio_path,
+            TranscriptionJob.status,
+            TranscriptionJob.model,
+            TranscriptionJob.duration,
+            TranscriptionJob.processing_time,
+            TranscriptionJob.speakers_detected,
+            TranscriptionJob.task_id
+        ).where(*filters)
+        if id_batches is not None:
+            if not id_batches:
+                break
+            query = query.where(TranscriptionJob.id.in_(id_batches.pop(0)))
+        else:
+            query = query.limit(batch_size)
+
+        rows = session.execute(query).all()
+        if not rows:
+            if id_batches is None:
+                break
+            continue
+
+        ids = [row.id for row in rows]
+        session.execute(
+            delete(Segment).where(Segment.job_id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        session.execute(
+            delete(TranscriptionJob).where(TranscriptionJob.id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        record_deletion(session, rows)
+        session.commit()
+
+        deleted.extend(ids)
+        for row in rows:
+            paths.extend(path for path in (row.original_path, row.audio_path) if path)
+            # Only jobs that failed mid-pipeline still hold checkpoints; the
+            # reclamation task skips missing paths, so nothing is stat'ed here
+            paths.append(checkpoints.job_dir(row.id))
+            # Running jobs are stored as queued until they finish
+            if row.status == "queued" and row.task_id:
+                task_ids.append(row.task_id)
+
+    return deleted, paths, task_ids
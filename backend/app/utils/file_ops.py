@@ -4,25 +4,19 @@ File operations utilities for the Transcriber backend.
 import os
 import uuid
 import shutil
+import hashlib
 from pathlib import Path
 from typing import Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 from app.config import settings
-
-
-def get_database_engine():
-    """Get database engine."""
-    return create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
-
-
-def get_session():
-    """Get database session."""
-    engine = get_database_engine()
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
+# Engine and session factories live in app.utils.database
+from app.utils.database import (  # noqa: F401
+    get_database_engine,
+    get_session,
+    get_async_database_url,
+    get_async_engine,
+    get_async_session,
+)
 
 
 def generate_job_id() -> str:
@@ -85,4 +79,12 @@ def cleanup_temp_files(file_path: str):
         try:
             os.remove(file_path)
         except Exception as e:
-            print(f"Error removing file {file_path}: {e}")
\ No newline at end of file
+            print(f"Error removing file {file_path}: {e}")
+
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash a file's contents without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
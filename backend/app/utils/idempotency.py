@@ -0,0 +1,83 @@
+"""
+Idempotent upload submission.
+
+A client may send an ``Idempotency-Key`` header with an upload. The key
+is stored in the ``idempotencykey`` table together with a fingerprint of
+the request (a SHA-256 over the uploaded bytes and the job parameters)
+and the id of the job it created, in the same commit as the job itself.
+The primary key on the key makes concurrent retries race on that commit,
+so exactly one of them creates a job.
+
+Keys are remembered for ``IDEMPOTENCY_KEY_TTL`` seconds; expired keys are
+ignored and purged whenever a new key is stored.
+"""
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.models import IdempotencyKey
+
+# Longest key accepted in the Idempotency-Key header
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def request_fingerprint(content_digest: str, params: dict) -> str:
+    """
+    Fingerprint an upload request.
+
+    Args:
+        content_digest: Hex SHA-256 of the uploaded bytes
+        params: Job parameters sent with the upload
+
+    Returns:
+        str: Hex SHA-256 over the content digest and the parameters
+    """
+    payload = json.dumps({"content": content_digest, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def find_idempotency_key(db, key: str) -> Optional[IdempotencyKey]:
+    """
+    Get a stored, unexpired idempotency key.
+
+    Args:
+        db: Async database session
+        key: The client's Idempotency-Key
+
+    Returns:
+        Optional[IdempotencyKey]: The stored key, or None
+    """
+    return (await db.scalars(
+        select(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.utcnow()
+        )
+    )).first()
+
+
+async def add_idempotency_key(db, key: str, request_hash: str, job_id: str) -> None:
+    """
+    Stage a key for the job created by its request (nothing is committed).
+
+    Expired keys, including an expired row for the same key, are purged
+    first so the insert only conflicts with a live key.
+
+    Args:
+        db: Async database session the job is created in
+        key: The client's Idempotency-Key
+        request_hash: Fingerprint from :func:`request_fingerprint`
+        job_id: The ID of the created job
+    """
+    now = datetime.utcnow()
+    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash=request_hash,
+        job_id=job_id,
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    ))
@@ -0,0 +1,134 @@
+"""
+Reliable Redis job queues for the batching and pipelined workers.
+
+A worker claims a job by atomically moving it from the queue onto its own
+processing list (``BLMOVE``), and removes it from there only once the
+job's outcome is stored (``LREM``), so a job is never only in a worker's
+memory. While running, a worker refreshes a heartbeat key every third of
+``QUEUE_HEARTBEAT_TTL``. Workers starting up or waiting for jobs put the
+processing lists of workers whose heartbeat has expired back at the head
+of the queue, so the jobs of a crashed or killed worker run again.
+
+Requires Redis 6.2 or newer.
+"""
+import os
+import socket
+import logging
+import threading
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROCESSING_INFIX = ":processing:"
+HEARTBEAT_INFIX = ":worker:"
+
+
+def default_worker_id() -> str:
+    """Get an ID unique to this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ReliableQueue:
+    """A Redis list whose claimed jobs are kept until acknowledged."""
+
+    def __init__(self, client, key: str, worker_id: Optional[str] = None,
+                 heartbeat_ttl: Optional[int] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            client: Redis client
+            key: Redis key of the queue's list
+            worker_id: ID of the claiming worker (defaults to host and PID)
+            heartbeat_ttl: Seconds the worker's heartbeat lives (defaults to settings)
+        """
+        self.client = client
+        self.key = key
+        self.worker_id = worker_id or default_worker_id()
+        self.heartbeat_ttl = heartbeat_ttl or settings.QUEUE_HEARTBEAT_TTL
+        self.processing_key = self.key + PROCESSING_INFIX + self.worker_id
+        self.heartbeat_key = self.key + HEARTBEAT_INFIX + self.worker_id
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def claim(self, timeout: float = 0) -> Optional[bytes]:
+        """
+        Move the next job onto this worker's processing list.
+
+        Args:
+            timeout: Seconds to block for a job; 0 returns at once
+
+        Returns:
+            Optional[bytes]: The job's payload, None if the queue stayed empty
+        """
+        if timeout:
+            return self.client.blmove(self.key, self.processing_key, timeout, "LEFT", "RIGHT")
+        return self.client.lmove(self.key, self.processing_key, "LEFT", "RIGHT")
+
+    def ack(self, raw: bytes) -> None:
+        """Drop a finished job from the processing list."""
+        self.client.lrem(self.processing_key, 1, raw)
+
+    def ack_all(self) -> None:
+        """Drop every job on the processing list."""
+        self.client.delete(self.processing_key)
+
+    def release(self, raw: bytes) -> None:
+        """Put an unfinished job back at the head of the queue."""
+        # Pushed before it is dropped, so a crash in between duplicates it
+        # instead of losing it
+        self.client.lpush(self.key, raw)
+        self.ack(raw)
+
+    def beat(self) -> None:
+        """Refresh this worker's heartbeat."""
+        self.client.set(self.heartbeat_key, b"1", ex=self.heartbeat_ttl)
+
+    def start_heartbeat(self) -> None:
+        """Refresh the heartbeat from a background thread until stopped."""
+        self.beat()
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(self.heartbeat_ttl / 3):
+                try:
+                    self.beat()
+                except Exception as e:
+                    logger.warning(f"Queue heartbeat failed: {str(e)}")
+
+        self._heartbeat = threading.Thread(target=run, name="queue-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def stop_heartbeat(self) -> None:
+        """Stop the heartbeat and drop its key."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        try:
+            self.client.delete(self.heartbeat_key)
+        except Exception as e:
+            logger.warning(f"Could not drop queue heartbeat: {str(e)}")
+
+    def recover(self) -> int:
+        """
+        Requeue the jobs claimed by workers whose heartbeat has expired.
+
+        Returns:
+            int: Number of jobs put back on the queue
+        """
+        prefix = self.key + PROCESSING_INFIX
+        moved = 0
+        for key in self.client.scan_iter(match=prefix + "*"):
+            key = key.decode() if isinstance(key, bytes) else key
+            worker_id = key[len(prefix):]
+            if self.client.exists(self.key + HEARTBEAT_INFIX + worker_id):
+                continue
+            # Newest first onto the head keeps the jobs in their original order
+            while self.client.lmove(key, self.key, "RIGHT", "LEFT") is not None:
+                moved += 1
+        if moved:
+            logger.warning(f"Requeued {moved} jobs of stopped workers on {self.key}")
+        return moved
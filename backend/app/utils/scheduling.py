@@ -0,0 +1,210 @@
+"""
+Deadline-aware admission of new jobs.
+
+A job may carry a deadline, given directly or through an SLA class
+(``SLA_CLASSES``). When it is submitted, the scheduler estimates when it
+would finish:
+
+- its own processing time is its audio duration times the real-time
+  factor of its model, measured from the ``processing_seconds`` and
+  ``timed_audio_seconds`` counters once the model has
+  ``SCHEDULER_MIN_HISTORY`` seconds of timed audio, else taken from
+  ``MODEL_REAL_TIME_FACTORS``, scaled by ``SCHEDULER_SAFETY_MARGIN``
+- the queue wait is the processing estimate stored on every unfinished
+  job (``estimated_processing``, summed over the status index, already
+  scaled by the margin) spread over ``SCHEDULER_WORKER_SLOTS``
+
+If the requested model would miss the deadline, the most accurate faster
+model that meets it is used instead; if none does, the job is rejected.
+The decision is stored on the job as ``schedule_decision``.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import JobStatistic, TranscriptionJob
+
+# Whisper sizes from slowest to fastest
+MODEL_SPEED_ORDER = ("large", "medium", "small", "base", "tiny")
+
+# Jobs whose estimated processing is still ahead of the workers
+UNFINISHED_STATUSES = ("queued", "processing", "retrying")
+
+
+def parse_mapping(value: str) -> Dict[str, float]:
+    """
+    Parse a ``name=number,...`` setting.
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    mapping = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, number = entry.partition("=")
+        mapping[name.strip()] = float(number)
+    return mapping
+
+
+def resolve_deadline(deadline: Optional[datetime], sla_class: Optional[str],
+                     now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Get the deadline of a new job as a naive UTC timestamp.
+
+    Args:
+        deadline: Deadline sent by the client (naive values are UTC)
+        sla_class: Name of an SLA class
+        now: Submission time (defaults to now)
+
+    Returns:
+        Optional[datetime]: The deadline, or None for a job without one
+
+    Raises:
+        ValueError: For an unknown SLA class or both options at once
+    """
+    if deadline is not None and sla_class is not None:
+        raise ValueError("deadline cannot be combined with sla")
+    if deadline is not None:
+        if deadline.tzinfo is not None:
+            deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+        return deadline
+    if sla_class is not None:
+        classes = parse_mapping(settings.SLA_CLASSES)
+        if sla_class not in classes:
+            raise ValueError(f"Unknown SLA class. Supported classes: {', '.join(classes)}")
+        return (now or datetime.utcnow()) + timedelta(seconds=classes[sla_class])
+    return None
+
+
+def model_size(model: str) -> Optional[str]:
+    """Get the Whisper size of a model name (``small.en`` and ``large-v3`` included)."""
+    base = model.split(".")[0]
+    for size in MODEL_SPEED_ORDER:
+        if base == size or base.startswith(f"{size}-"):
+            return size
+    return None
+
+
+def faster_models(model: str) -> List[str]:
+    """
+    Get a model followed by every faster size, most accurate first.
+
+    English-only models are downgraded to English-only models.
+    """
+    size = model_size(model)
+    if size is None:
+        return [model]
+    suffix = ".en" if model.endswith(".en") else ""
+    smaller = MODEL_SPEED_ORDER[MODEL_SPEED_ORDER.index(size) + 1:]
+    return [model] + [f"{name}{suffix}" for name in smaller]
+
+
+def real_time_factors(session) -> Dict[str, float]:
+    """
+    Get the processing seconds per audio second of each model.
+
+    Measured averages replace the configured defaults once a model has
+    ``SCHEDULER_MIN_HISTORY`` seconds of timed audio.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Dict[str, float]: Real-time factors keyed by model name or size
+    """
+    factors = parse_mapping(settings.MODEL_REAL_TIME_FACTORS)
+    measured = {}
+    for metric, model, value in session.execute(
+        select(JobStatistic.metric, JobStatistic.key, JobStatistic.value)
+        .where(JobStatistic.metric.in_(("processing_seconds", "timed_audio_seconds")))
+    ):
+        measured.setdefault(model, {})[metric] = value
+    for model, values in measured.items():
+        audio = values.get("timed_audio_seconds", 0.0)
+        if model and audio >= settings.SCHEDULER_MIN_HISTORY:
+            factors[model] = values.get("processing_seconds", 0.0) / audio
+    return factors
+
+
+def model_factor(factors: Dict[str, float], model: str) -> float:
+    """
+    Get a model's real-time factor, by name, then by size.
+
+    Models with no factor at all are assumed as slow as the slowest one.
+    """
+    if model in factors:
+        return factors[model]
+    size = model_size(model)
+    if size in factors:
+        return factors[size]
+    return max(factors.values(), default=1.0)
+
+
+def queue_wait(session) -> float:
+    """Estimate the seconds until the workers get through the unfinished jobs."""
+    backlog = session.scalar(
+        select(func.coalesce(func.sum(TranscriptionJob.estimated_processing), 0.0))
+        .where(TranscriptionJob.status.in_(UNFINISHED_STATUSES))
+    )
+    return backlog / max(settings.SCHEDULER_WORKER_SLOTS, 1)
+
+
+def plan_job(session, model: str, duration: Optional[float],
+             deadline: Optional[datetime] = None, allow_downgrade: bool = True,
+             now: Optional[datetime] = None) -> dict:
+    """
+    Decide which model a new job runs with, or that it is rejected.
+
+    Args:
+        session: Database session
+        model: Requested model
+        duration: Audio duration in seconds (None if unknown)
+        deadline: Naive UTC deadline (optional)
+        allow_downgrade: Whether a faster model may replace ``model``
+        now: Submission time (defaults to now)
+
+    Returns:
+        dict: ``action`` (accepted, downgraded or rejected), the requested
+        and chosen ``model``, the ``deadline`` and ``estimated_completion``
+        (ISO timestamps), and the ``queue_wait`` and
+        ``processing_estimate`` in seconds; the processing estimate is
+        None when the duration is unknown
+    """
+    now = now or datetime.utcnow()
+    factors = real_time_factors(session)
+    margin = settings.SCHEDULER_SAFETY_MARGIN
+    # Stored estimates already include the margin
+    wait = queue_wait(session)
+
+    def estimate(candidate):
+        return None if duration is None else duration * model_factor(factors, candidate) * margin
+
+    def completion(candidate):
+        return now + timedelta(seconds=wait + (estimate(candidate) or 0.0))
+
+    decision = {
+        "action": "accepted",
+        "requested_model": model,
+        "model": model,
+        "deadline": deadline.isoformat() if deadline else None,
+        "queue_wait": wait,
+        "processing_estimate": estimate(model),
+        "estimated_completion": completion(model).isoformat()
+    }
+    if deadline is None or completion(model) <= deadline:
+        return decision
+
+    candidates = faster_models(model)[1:] if allow_downgrade and duration is not None else []
+    for candidate in candidates:
+        if completion(candidate) <= deadline:
+            decision.update(
+                action="downgraded",
+                model=candidate,
+                processing_estimate=estimate(candidate),
+                estimated_completion=completion(candidate).isoformat()
+            )
+            return decision
+
+    decision["action"] = "rejected"
+    return decision
@@ -0,0 +1,200 @@
+"""
+Time-window queries over a job's segments, and speaker-turn compaction.
+
+Segments are read in ``(start_time, id)`` order through the
+``(job_id, start_time)`` index and paginated with an opaque keyset
+cursor. A window's index range starts at most the job's
+``max_segment_span`` before it, so any page of a long transcript costs
+the same to fetch.
+
+With ``TURN_COMPACTION`` set, adjacent segments of one speaker are stored
+as a single turn row. The original segments survive in the turn's
+``boundaries``: a flat array of ``start ms, end ms, text offset`` triples
+relative to the turn's start and text, from which :func:`expand_turn`
+rebuilds them.
+"""
+import json
+import base64
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from app.models import Segment
+
+# Media type of the streaming response: one JSON object per line
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(segment: Segment) -> str:
+    """Get the cursor that continues after a segment."""
+    raw = json.dumps([segment.start_time, segment.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decode a cursor from :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        start, segment_id = json.loads(raw)
+        return float(start), int(segment_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def segment_window_query(job_id: str,
+                         start: Optional[float] = None,
+                         end: Optional[float] = None,
+                         speaker: Optional[str] = None,
+                         after: Optional[Tuple[float, int]] = None,
+                         max_span: Optional[float] = None):
+    """
+    Build the query for a job's segments overlapping a time window.
+
+    Segments may overlap (a long segment or speaker turn can span shorter
+    ones starting after it), so the last segment to start before the
+    window is not necessarily the first to reach into it. A segment
+    overlapping ``start`` starts at most ``max_span`` seconds before it,
+    which bounds the index range from below; without it (jobs stored
+    before the span was recorded) the range starts at the job's first
+    segment.
+
+    Args:
+        job_id: The ID of the transcription job
+        start: Window start in seconds (optional)
+        end: Window end in seconds (optional)
+        speaker: Only segments of this speaker (optional)
+        after: ``(start_time, id)`` of the last segment already returned
+        max_span: The job's ``max_segment_span`` (optional)
+
+    Returns:
+        Select: Segments in ``(start_time, id)`` order
+    """
+    query = select(Segment).where(Segment.job_id == job_id)
+    if start is not None:
+        query = query.where(Segment.end_time > start)
+        if max_span is not None:
+            query = query.where(Segment.start_time >= start - max_span)
+    if end is not None:
+        query = query.where(Segment.start_time < end)
+    if speaker is not None:
+        query = query.where(Segment.speaker == speaker)
+    if after is not None:
+        after_start, after_id = after
+        query = query.where(or_(
+            Segment.start_time > after_start,
+            and_(Segment.start_time == after_start, Segment.id > after_id)
+        ))
+    return query.order_by(Segment.start_time, Segment.id)
+
+
+def segment_to_dict(segment: Segment) -> dict:
+    """Serialize a segment the way job results list them (turns keep their boundaries)."""
+    result = {
+        "start": segment.start_time,
+        "end": segment.end_time,
+        "text": segment.text,
+        "speaker": segment.speaker,
+        "confidence": segment.confidence
+    }
+    if segment.boundaries:
+        result["boundaries"] = segment.boundaries
+    return result
+
+
+def longest_span(segments: List[dict]) -> float:
+    """Get the seconds spanned by the longest of some segments (0 if none)."""
+    return max((seg["end"] - seg["start"] for seg in segments), default=0.0)
+
+
+def compact_turns(segments: List[dict], max_gap: float, max_duration: float) -> List[dict]:
+    """
+    Merge adjacent same-speaker segments into speaker turns.
+
+    A segment joins the current turn if it has the same speaker, starts at
+    most ``max_gap`` seconds after the turn ends and keeps the turn within
+    ``max_duration`` seconds. A turn's confidence is the duration-weighted
+    mean of its segments'; turns of one segment are kept as they are.
+
+    Args:
+        segments: Aligned segments in time order
+        max_gap: Longest silence inside a turn, in seconds
+        max_duration: Longest turn, in seconds
+
+    Returns:
+        List[dict]: Turns, with ``boundaries`` on those merging segments
+    """
+    groups = []
+    for seg in segments:
+        group = groups[-1] if groups else None
+        if group and all((
+            seg["speaker"] == group[0]["speaker"],
+            seg["start"] - group[-1]["end"] <= max_gap,
+            seg["end"] - group[0]["start"] <= max_duration
+        )):
+            group.append(seg)
+        else:
+            groups.append([seg])
+
+    turns = []
+    for group in groups:
+        if len(group) == 1:
+            turns.append(group[0])
+            continue
+        start = group[0]["start"]
+        texts, boundaries, offset = [], [], 0
+        for seg in group:
+            text = seg["text"].strip()
+            boundaries += [
+                round((seg["start"] - start) * 1000), round((seg["end"] - start) * 1000), offset
+            ]
+            texts.append(text)
+            offset += len(text) + 1
+        weights = [max(seg["end"] - seg["start"], 0.0) for seg in group]
+        total = sum(weights)
+        confidence = (
+            sum(w * seg["confidence"] for w, seg in zip(weights, group)) / total if total
+            else sum(seg["confidence"] for seg in group) / len(group)
+        )
+        turns.append({
+            "start": start,
+            "end": max(seg["end"] for seg in group),
+            "text": " ".join(texts),
+            "speaker": group[0]["speaker"],
+            "confidence": confidence,
+            "boundaries": boundaries
+        })
+    return turns
+
+
+def expand_turn(turn: dict) -> List[dict]:
+    """
+    Rebuild the original segments of a serialized turn.
+
+    Segments take the turn's speaker and confidence; a row without
+    ``boundaries`` is returned as its only segment.
+
+    Args:
+        turn: A segment as serialized by :func:`segment_to_dict`
+
+    Returns:
+        List[dict]: The segments, without ``boundaries``
+    """
+    boundaries = turn.get("boundaries")
+    base = {key: value for key, value in turn.items() if key != "boundaries"}
+    if not boundaries:
+        return [base]
+    offsets = boundaries[2::3] + [len(turn["text"]) + 1]
+    return [
+        {
+            **base,
+            "start": round(turn["start"] + boundaries[i] / 1000, 3),
+            "end": round(turn["start"] + boundaries[i + 1] / 1000, 3),
+            "text": turn["text"][offsets[i // 3]:offsets[i // 3 + 1] - 1]
+        }
+        for i in range(0, len(boundaries), 3)
+    ]
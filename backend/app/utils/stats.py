@@ -0,0 +1,223 @@
+"""
+Incrementally maintained job statistics.
+
+The aggregates behind ``GET /stats`` live in the ``jobstatistic`` table,
+one row per (metric, key) counter:
+
+- ``status``: jobs per stored status
+- ``completed``: completed jobs per model
+- ``audio_seconds``: audio duration of completed jobs per model
+- ``processing_seconds`` / ``timed_audio_seconds``: processing time per
+  model and the audio duration of the jobs it was measured for, giving
+  the average real-time factor
+- ``speakers``: completed jobs per detected speaker count
+
+Status transitions, completions and deletions adjust the counters in the
+same transaction as the job rows they change, so reading them costs a
+few rows however many jobs exist. :func:`recompute_statistics` rebuilds
+them from the job table should they ever drift.
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.models import JobStatistic, TranscriptionJob
+
+
+def completion_deltas(job, sign: int = 1) -> Counter:
+    """
+    Get the counter changes a completed job contributes.
+
+    Args:
+        job: A completed TranscriptionJob (or a row with the same fields)
+        sign: 1 when the job completes, -1 when it is deleted
+
+    Returns:
+        Counter: Deltas keyed by (metric, key)
+    """
+    model = job.model or ""
+    duration = job.duration or 0.0
+    deltas = Counter({
+        ("completed", model): sign,
+        ("audio_seconds", model): sign * duration,
+        ("speakers", str(job.speakers_detected or 0)): sign,
+    })
+    if job.processing_time is not None:
+        deltas[("processing_seconds", model)] += sign * job.processing_time
+        deltas[("timed_audio_seconds", model)] += sign * duration
+    return deltas
+
+
+def apply_deltas(session, deltas: Counter) -> None:
+    """
+    Add deltas to their counters, creating missing ones.
+
+    Each counter is changed with a single upsert that adds to the stored
+    value, so concurrent transactions never lose each other's increments.
+    Nothing is committed.
+
+    Args:
+        session: Database session
+        deltas: Deltas keyed by (metric, key)
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    for (metric, key), delta in deltas.items():
+        if not delta:
+            continue
+        statement = insert(JobStatistic).values(metric=metric, key=key, value=delta)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[JobStatistic.metric, JobStatistic.key],
+            set_={"value": JobStatistic.value + statement.excluded.value}
+        ))
+
+
+def record_status_change(session, previous: Optional[str], status: Optional[str]) -> None:
+    """
+    Move one job between status counters (None for creation or deletion).
+
+    Args:
+        session: Database session the status change is written in
+        previous: Status the job had, or None for a new job
+        status: Status the job gets, or None for a deleted job
+    """
+    deltas = Counter()
+    if previous is not None:
+        deltas[("status", previous)] -= 1
+    if status is not None:
+        deltas[("status", status)] += 1
+    apply_deltas(session, deltas)
+
+
+def record_completion(session, job, previous: Optional[str]) -> None:
+    """
+    Count a job that was just marked completed.
+
+    Args:
+        session: Database session the completion is written in
+        job: The completed TranscriptionJob
+        previous: Status the job had before
+    """
+    deltas = completion_deltas(job)
+    if previous is not None:
+        deltas[("status", previous)] -= 1
+    deltas[("status", "completed")] += 1
+    apply_deltas(session, deltas)
+
+
+def record_deletion(session, jobs: Iterable) -> None:
+    """
+    Remove deleted jobs from every counter.
+
+    Args:
+        session: Database session the deletion is written in
+        jobs: Deleted jobs (or rows with status, model, duration,
+            processing_time and speakers_detected)
+    """
+    deltas = Counter()
+    for job in jobs:
+        deltas[("status", job.status)] -= 1
+        if job.status == "completed":
+            deltas.update(completion_deltas(job, sign=-1))
+    apply_deltas(session, deltas)
+
+
+def recompute_statistics(session) -> int:
+    """
+    Rebuild every counter from the job table (nothing is committed).
+
+    Args:
+        session: Database session
+
+    Returns:
+        int: Number of counters written
+    """
+    deltas = Counter()
+    for status, count in session.execute(
+        select(TranscriptionJob.status, func.count()).group_by(TranscriptionJob.status)
+    ):
+        deltas[("status", status)] = count
+
+    completed = TranscriptionJob.status == "completed"
+    audio_seconds = func.coalesce(func.sum(TranscriptionJob.duration), 0.0)
+    for model, count, audio in session.execute(
+        select(TranscriptionJob.model, func.count(), audio_seconds)
+        .where(completed)
+        .group_by(TranscriptionJob.model)
+    ):
+        deltas[("completed", model or "")] = count
+        deltas[("audio_seconds", model or "")] = audio
+
+    for model, processing, audio in session.execute(
+        select(TranscriptionJob.model, func.sum(TranscriptionJob.processing_time),
+               func.coalesce(func.sum(TranscriptionJob.duration), 0.0))
+        .where(completed, TranscriptionJob.processing_time.is_not(None))
+        .group_by(TranscriptionJob.model)
+    ):
+        deltas[("processing_seconds", model or "")] = processing
+        deltas[("timed_audio_seconds", model or "")] = audio
+
+    for speakers, count in session.execute(
+        select(TranscriptionJob.speakers_detected, func.count())
+        .where(completed)
+        .group_by(TranscriptionJob.speakers_detected)
+    ):
+        deltas[("speakers", str(speakers or 0))] += count
+
+    session.execute(delete(JobStatistic))
+    session.add_all(
+        JobStatistic(metric=metric, key=key, value=value)
+        for (metric, key), value in deltas.items()
+        if value
+    )
+    return sum(1 for value in deltas.values() if value)
+
+
+def summarize_statistics(counters: Iterable) -> dict:
+    """
+    Build the stats response from the stored counters.
+
+    Args:
+        counters: JobStatistic rows
+
+    Returns:
+        dict: Jobs per status, audio hours, per-model totals with their
+        average real-time factor, and the speaker-count distribution
+    """
+    values = {}
+    for counter in counters:
+        values.setdefault(counter.metric, {})[counter.key] = counter.value
+
+    statuses = sorted(values.get("status", {}).items())
+    jobs = {status: int(count) for status, count in statuses if count}
+    audio = values.get("audio_seconds", {})
+    processing = values.get("processing_seconds", {})
+    timed_audio = values.get("timed_audio_seconds", {})
+
+    models = {}
+    for model, count in sorted(values.get("completed", {}).items()):
+        if not count:
+            continue
+        models[model] = {
+            "jobs": int(count),
+            "audio_hours": audio.get(model, 0.0) / 3600,
+            "real_time_factor": (processing.get(model, 0.0) / timed_audio[model]
+                                 if timed_audio.get(model) else None)
+        }
+
+    return {
+        "total_jobs": sum(jobs.values()),
+        "jobs": jobs,
+        "audio_hours": sum(audio.values()) / 3600,
+        "models": models,
+        "speakers": {
+            speakers: int(count)
+            for speakers, count in sorted(values.get("speakers", {}).items(),
+                                          key=lambda item: int(item[0]))
+            if count
+        }
+    }
@@ -0,0 +1,168 @@
+"""
+Hot job-status store for the polling read path.
+
+While a job is queued or running, its status, pipeline stage and progress
+live in a Redis hash (``echo:job_status:{job_id}``) with a TTL, refreshed
+on every write. Workers update it instead of committing to the database,
+and the status route serves non-terminal jobs from it, so polling never
+contends with the worker's writes. Terminal transitions (completed,
+failed, cancelled) are committed to the database and drop the hash.
+
+Every method logs Redis errors and reports failure instead of raising;
+callers fall back to the database.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_KEY_PREFIX = "echo:job_status:"
+
+# States after which a job's row in the database is authoritative
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "rejected")
+
+# States a job's database row can be in; running jobs stay queued there
+STORED_STATUSES = ("queued",) + TERMINAL_STATUSES
+
+# Fields a hash needs to answer a status poll on its own
+STATUS_FIELDS = ("status", "filename", "language", "created_at")
+
+
+def format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Format a UTC timestamp the way naive database timestamps serialize."""
+    if value is None:
+        return None
+    return value.replace(tzinfo=None).isoformat()
+
+
+class JobStatusStore:
+    """Per-job status hashes with a TTL."""
+
+    def __init__(self, client, ttl: int):
+        """
+        Initialize the store.
+
+        Args:
+            client: Redis client, or None to disable the store
+            ttl: Seconds a job's hash outlives its last update
+        """
+        self.client = client
+        self.ttl = ttl
+
+    def key(self, job_id: str) -> str:
+        """Get the Redis key of a job's hash."""
+        return STATUS_KEY_PREFIX + job_id
+
+    def update(self, job_id: str, **fields) -> bool:
+        """
+        Set fields of a job's hash and refresh its TTL.
+
+        Args:
+            job_id: The ID of the transcription job
+            **fields: JSON-serializable values, e.g. status, stage, progress
+
+        Returns:
+            bool: False if the store is disabled or unavailable
+        """
+        if self.client is None:
+            return False
+        try:
+            key = self.key(job_id)
+            self.client.hset(key, mapping={
+                name: json.dumps(value) for name, value in fields.items()
+            })
+            self.client.expire(key, self.ttl)
+            return True
+        except Exception as e:
+            logger.warning(f"Job status store unavailable: {str(e)}")
+            return False
+
+    def publish(self, job, status: str, **fields) -> bool:
+        """
+        Write everything a status poll needs for a queued or running job.
+
+        Args:
+            job: The TranscriptionJob
+            status: Its current (non-terminal) status
+            **fields: Extra fields, e.g. stage and progress
+
+        Returns:
+            bool: False if the store is disabled or unavailable
+        """
+        return self.update(
+            job.id,
+            status=status,
+            filename=job.filename,
+            language=job.language,
+            created_at=format_timestamp(job.created_at),
+            **fields
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Get a job's hash.
+
+        Returns:
+            Optional[dict]: The stored fields, or None if the job has no
+            hash or the store is disabled or unavailable
+        """
+        if self.client is None:
+            return None
+        try:
+            fields = self.client.hgetall(self.key(job_id))
+        except Exception as e:
+            logger.warning(f"Job status store unavailable: {str(e)}")
+            return None
+        if not fields:
+            return None
+        return {
+            (name.decode() if isinstance(name, bytes) else name): json.loads(value)
+            for name, value in fields.items()
+        }
+
+    def get_live(self, job_id: str) -> Optional[dict]:
+        """
+        Get a job's hash if it can answer a status poll.
+
+        Returns:
+            Optional[dict]: The stored fields for a queued or running job
+            with every field in ``STATUS_FIELDS``, else None
+        """
+        fields = self.get(job_id)
+        if fields is None or any(name not in fields for name in STATUS_FIELDS):
+            return None
+        if fields["status"] in TERMINAL_STATUSES:
+            return None
+        return fields
+
+    def clear(self, *job_ids: str) -> None:
+        """Drop the hashes of jobs that reached a terminal state."""
+        if self.client is None or not job_ids:
+            return
+        try:
+            self.client.delete(*(self.key(job_id) for job_id in job_ids))
+        except Exception as e:
+            logger.warning(f"Job status store unavailable: {str(e)}")
+
+
+_store = None
+
+
+def get_status_store() -> JobStatusStore:
+    """Get the process-wide job-status store."""
+    from app.config import settings
+
+    global _store
+    if _store is None:
+        client = None
+        if settings.JOB_STATUS_STORE:
+            from app.tasks.batching import get_redis
+            try:
+                client = get_redis()
+            except Exception as e:
+                # e.g. REDIS_URL defaulting to a non-Redis broker URL
+                logger.warning(f"Job status store disabled: {str(e)}")
+        _store = JobStatusStore(client, settings.JOB_STATUS_TTL)
+    return _store
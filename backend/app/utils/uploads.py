@@ -0,0 +1,140 @@
+"""
+Resumable, parallel chunked uploads.
+
+An upload session preallocates one file of the announced size under
+``UPLOAD_DIR/partial``. Chunks may arrive at any offset, in any order and
+concurrently; each is written straight to its place in that file and
+recorded as a byte range once it is complete, so an interrupted chunk is
+simply sent again. When the ranges cover the whole file, finalizing moves
+it into ``UPLOAD_DIR`` as the job's upload, without copying or re-reading
+the data.
+
+Sessions expire ``UPLOAD_SESSION_TTL`` seconds after their last chunk;
+:func:`purge_expired_uploads` drops them and returns their files for
+reclamation. New sessions are refused while the unfinished ones already
+reserve ``UPLOAD_MAX_RESERVED`` bytes (see :func:`reserved_bytes`).
+"""
+import os
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Tuple
+
+import anyio
+from sqlalchemy import delete, func, select
+
+from app.config import settings
+from app.models import UploadChunk, UploadSession
+
+
+def partial_dir() -> str:
+    """Get the directory holding the files of unfinished uploads."""
+    return os.path.join(settings.UPLOAD_DIR, "partial")
+
+
+def preallocate(path: str, size: int) -> None:
+    """
+    Create a file of ``size`` bytes for chunks to be written into.
+
+    Disk space is reserved up front where the filesystem supports it, so
+    a full disk fails the session's creation, not its last chunk.
+    """
+    with open(path, "wb") as f:
+        if size == 0:
+            return
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except (AttributeError, OSError):
+            f.truncate(size)
+
+
+def reserved_bytes(session) -> int:
+    """Get the bytes preallocated by upload sessions not finalized yet."""
+    return session.scalar(
+        select(func.coalesce(func.sum(UploadSession.size), 0))
+        .where(UploadSession.job_id.is_(None))
+    )
+
+
+def merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Merge overlapping and adjacent ``(start, end)`` byte ranges.
+
+    Returns:
+        List[Tuple[int, int]]: Disjoint half-open ranges in order
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(received: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+    """Get the byte ranges of ``[0, size)`` not covered by merged ranges."""
+    missing, position = [], 0
+    for start, end in received:
+        if start > position:
+            missing.append((position, start))
+        position = max(position, end)
+    if position < size:
+        missing.append((position, size))
+    return missing
+
+
+async def write_chunk(path: str, offset: int, chunks: AsyncIterator[bytes], limit: int) -> int:
+    """
+    Write a streamed chunk into an upload's file at ``offset``.
+
+    Args:
+        path: The session's preallocated file
+        offset: Byte offset of the chunk
+        chunks: The request body
+        limit: Most bytes the chunk may hold
+
+    Returns:
+        int: Number of bytes written
+
+    Raises:
+        ValueError: If the body holds more than ``limit`` bytes
+    """
+    written = 0
+    async with await anyio.open_file(path, "r+b") as f:
+        await f.seek(offset)
+        async for data in chunks:
+            if written + len(data) > limit:
+                raise ValueError(f"Chunk exceeds {limit} bytes")
+            await f.write(data)
+            written += len(data)
+    return written
+
+
+def purge_expired_uploads(session) -> List[str]:
+    """
+    Delete upload sessions past their expiry and commit.
+
+    Args:
+        session: Database session
+
+    Returns:
+        List[str]: Files of unfinished sessions that need to be reclaimed
+    """
+    expired = session.execute(
+        select(UploadSession.id, UploadSession.path, UploadSession.job_id)
+        .where(UploadSession.expires_at <= datetime.utcnow())
+    ).all()
+    if not expired:
+        return []
+
+    ids = [row.id for row in expired]
+    session.execute(
+        delete(UploadChunk).where(UploadChunk.upload_id.in_(ids)),
+        execution_options={"synchronize_session": False}
+    )
+    session.execute(
+        delete(UploadSession).where(UploadSession.id.in_(ids)),
+        execution_options={"synchronize_session": False}
+    )
+    session.commit()
+    # A finalized session's file already belongs to its job
+    return [row.path for row in expired if row.job_id is None]
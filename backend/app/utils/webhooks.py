@@ -0,0 +1,358 @@
+"""
+Completion webhooks.
+
+A job submitted with a ``callback_url`` (or by a client with a default
+one) gets a ``webhookdelivery`` row when it completes or fails, in the
+same commit as its terminal status. The row holds the event payload, so
+retries send exactly what was captured.
+
+Deliveries are sent from the ``WEBHOOK_QUEUE`` Celery queue. Due events
+for the same URL are claimed together and POSTed as one batch of up to
+``WEBHOOK_BATCH_SIZE`` events::
+
+    {"events": [{"id": 12, "type": "job.completed", "created_at": ...,
+                 "data": {"job_id": ..., "result_url": ...}}],
+     "sent_at": "..."}
+
+Any 2xx response marks the batch delivered. Anything else is retried
+with exponential backoff (``WEBHOOK_RETRY_BACKOFF`` seconds, doubled per
+attempt, capped at ``WEBHOOK_RETRY_BACKOFF_MAX``) until
+``WEBHOOK_MAX_ATTEMPTS`` attempts have failed. Delivery is at least
+once: receivers should ignore event ids they have already seen.
+
+With ``WEBHOOK_SECRET`` set, requests carry an ``X-Echo-Signature:
+t=<unix time>,v1=<hex>`` header, the HMAC-SHA256 of ``"<t>.<body>"``;
+:func:`verify_signature` checks it.
+
+Callback hosts must resolve to public addresses only, both when the URL
+is submitted and before each request, and redirects are not followed, so
+webhooks cannot be pointed at the service's own network. Hosts listed in
+``WEBHOOK_ALLOWED_HOSTS`` are exempt.
+"""
+import hmac
+import json
+import time
+import uuid
+import socket
+import hashlib
+import logging
+import ipaddress
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.models import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Echo-Signature"
+
+# Event type sent for each terminal status that triggers a webhook
+WEBHOOK_EVENTS = {"completed": "job.completed", "failed": "job.failed"}
+
+
+def allowed_hosts() -> set:
+    """Get the callback hosts exempt from the public-address check."""
+    hosts = settings.WEBHOOK_ALLOWED_HOSTS.split(",")
+    return {host.strip().lower() for host in hosts if host.strip()}
+
+
+def check_public_host(host: str, port: Optional[int] = None) -> None:
+    """
+    Check that a host resolves to public addresses only.
+
+    Raises:
+        ValueError: If it does not resolve, or any of its addresses is
+            loopback, private, link-local or otherwise not global
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"callback_url host {host} cannot be resolved")
+    for info in infos:
+        # Drop the zone of scoped IPv6 addresses
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"callback_url host {host} resolves to a non-public address")
+
+
+def check_callback_url(url: str) -> str:
+    """
+    Validate a callback URL (resolving its host, which may block).
+
+    Raises:
+        ValueError: Unless it is an absolute http(s) URL whose host is
+            allowed or resolves to public addresses only
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http or https URL")
+    if parsed.hostname.lower() not in allowed_hosts():
+        check_public_host(parsed.hostname, parsed.port)
+    return url
+
+
+def sign_payload(body: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """
+    Sign a request body.
+
+    Args:
+        body: The exact bytes sent
+        secret: Shared secret
+        timestamp: Unix time of the signature (defaults to now)
+
+    Returns:
+        str: Value of the ``X-Echo-Signature`` header
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(body: bytes, header: str, secret: str,
+                     tolerance: float = 300, now: Optional[float] = None) -> bool:
+    """
+    Check an ``X-Echo-Signature`` header against a received body.
+
+    Args:
+        body: The raw request body
+        header: The header's value
+        secret: Shared secret
+        tolerance: Largest accepted age of the signature in seconds
+        now: Current Unix time (defaults to now)
+
+    Returns:
+        bool: True if the signature matches and is recent enough
+    """
+    try:
+        fields = dict(part.split("=", 1) for part in header.split(","))
+        timestamp = int(fields["t"])
+    except (KeyError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > tolerance:
+        return False
+    expected = sign_payload(body, secret, timestamp)
+    return hmac.compare_digest(expected, f"t={timestamp},v1={fields.get('v1', '')}")
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.replace(tzinfo=None).isoformat() if value else None
+
+
+def event_payload(job, status: str) -> dict:
+    """
+    Build the summary of a finished job sent in its webhook.
+
+    Args:
+        job: The TranscriptionJob
+        status: The job's terminal status
+
+    Returns:
+        dict: Job summary with a link to its full result
+    """
+    payload = {
+        "job_id": job.id,
+        "status": status,
+        "filename": job.filename,
+        "model": job.model,
+        "language": job.language,
+        "created_at": _timestamp(job.created_at),
+        "completed_at": _timestamp(job.completed_at),
+        "result_url": f"{settings.PUBLIC_BASE_URL.rstrip('/')}/api/v1/jobs/{job.id}"
+    }
+    if status == "completed":
+        payload.update(duration=job.duration, speakers=job.speakers_detected)
+    else:
+        payload["error"] = "Transcription failed"
+    return payload
+
+
+def queue_webhook(session, job, status: str) -> bool:
+    """
+    Stage the webhook event of a job that just finished (nothing is committed).
+
+    Args:
+        session: Database session the terminal status is written in
+        job: The TranscriptionJob (None is ignored)
+        status: The job's terminal status
+
+    Returns:
+        bool: True if an event was staged
+    """
+    if job is None or not job.callback_url or status not in WEBHOOK_EVENTS:
+        return False
+    session.add(WebhookDelivery(
+        job_id=job.id,
+        callback_url=job.callback_url,
+        event=WEBHOOK_EVENTS[status],
+        payload=event_payload(job, status),
+        status="pending",
+        attempts=0,
+        created_at=datetime.utcnow(),
+        next_attempt_at=datetime.utcnow()
+    ))
+    return True
+
+
+def retry_delay(attempts: int) -> float:
+    """Get the seconds to wait after the ``attempts``-th failed attempt."""
+    delay = settings.WEBHOOK_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return min(delay, settings.WEBHOOK_RETRY_BACKOFF_MAX)
+
+
+def claim_batch(session, now: Optional[datetime] = None) -> List[WebhookDelivery]:
+    """
+    Claim the next batch of due events, all for one URL, and commit.
+
+    Claimed events are leased for a little longer than a request may take,
+    so concurrent senders never claim the same event twice.
+
+    Args:
+        session: Database session
+        now: Current time (defaults to now)
+
+    Returns:
+        List[WebhookDelivery]: Up to ``WEBHOOK_BATCH_SIZE`` events, oldest first
+    """
+    now = now or datetime.utcnow()
+    due = (WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)
+    first = session.scalars(
+        select(WebhookDelivery).where(*due)
+        .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+        .limit(1)
+    ).first()
+    if first is None:
+        session.commit()
+        return []
+
+    ids = session.scalars(
+        select(WebhookDelivery.id)
+        .where(*due, WebhookDelivery.callback_url == first.callback_url)
+        .order_by(WebhookDelivery.next_attempt_at, WebhookDelivery.id)
+        .limit(settings.WEBHOOK_BATCH_SIZE)
+    ).all()
+    token = uuid.uuid4().hex
+    session.execute(
+        update(WebhookDelivery)
+        .where(WebhookDelivery.id.in_(ids), *due)
+        .values(claim=token, next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_TIMEOUT + 30))
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return session.scalars(
+        select(WebhookDelivery).where(WebhookDelivery.claim == token).order_by(WebhookDelivery.id)
+    ).all()
+
+
+def batch_body(deliveries: List[WebhookDelivery], now: Optional[datetime] = None) -> bytes:
+    """Serialize a batch of events as a request body."""
+    return json.dumps({
+        "events": [
+            {
+                "id": delivery.id,
+                "type": delivery.event,
+                "created_at": _timestamp(delivery.created_at),
+                "data": delivery.payload
+            }
+            for delivery in deliveries
+        ],
+        "sent_at": _timestamp(now or datetime.utcnow())
+    }).encode()
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as errors instead of following them."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def post_batch(url: str, body: bytes) -> Tuple[Optional[int], Optional[str]]:
+    """
+    POST a batch to its callback URL.
+
+    The URL is checked again first, since its host may resolve elsewhere
+    than when it was submitted.
+
+    Returns:
+        Tuple[Optional[int], Optional[str]]: Response status (None if no
+        response arrived) and an error message (None on a 2xx response)
+    """
+    try:
+        check_callback_url(url)
+    except ValueError as e:
+        return None, str(e)
+    headers = {"Content-Type": "application/json", "User-Agent": "Echo-Webhooks"}
+    if settings.WEBHOOK_SECRET:
+        headers[SIGNATURE_HEADER] = sign_payload(body, settings.WEBHOOK_SECRET)
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with _opener.open(request, timeout=settings.WEBHOOK_TIMEOUT) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        return e.code, f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return None, str(getattr(e, "reason", e))
+    if 200 <= status < 300:
+        return status, None
+    return status, f"HTTP {status}"
+
+
+def record_attempt(session, deliveries: List[WebhookDelivery], status_code: Optional[int],
+                   error: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Record the outcome of sending a batch and commit.
+
+    Args:
+        session: Database session
+        deliveries: The batch's events
+        status_code: Response status, if any
+        error: Error message, None if delivered
+        now: Time of the attempt (defaults to now)
+
+    Returns:
+        Optional[float]: Seconds until the batch is due again, None if it
+        was delivered or has run out of attempts
+    """
+    now = now or datetime.utcnow()
+    delay = None
+    for delivery in deliveries:
+        delivery.attempts += 1
+        delivery.last_status_code = status_code
+        delivery.last_error = error
+        delivery.claim = None
+        if error is None:
+            delivery.status = "delivered"
+            delivery.delivered_at = now
+        elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = "failed"
+            logger.warning(f"Giving up on webhook {delivery.id} for job {delivery.job_id}: {error}")
+        else:
+            wait = retry_delay(delivery.attempts)
+            delivery.next_attempt_at = now + timedelta(seconds=wait)
+            delay = wait if delay is None else min(delay, wait)
+    session.commit()
+    return delay
+
+
+def delivery_status(delivery: Optional[WebhookDelivery]) -> Optional[dict]:
+    """Summarize a job's latest webhook delivery for its status response."""
+    if delivery is None:
+        return None
+    return {
+        "event": delivery.event,
+        "status": delivery.status,
+        "attempts": delivery.attempts,
+        "last_status_code": delivery.last_status_code,
+        "last_error": delivery.last_error,
+        "delivered_at": delivery.delivered_at
+    }
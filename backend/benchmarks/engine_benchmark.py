@@ -0,0 +1,99 @@
+"""
+Benchmark transcription engines on the same audio.
+
+Each engine runs in its own process so that its peak RSS is measured in
+isolation. Reports load time, transcription time, real-time factor
+(processing time / audio duration) and peak RSS.
+
+Usage:
+    python -m benchmarks.engine_benchmark audio.wav --model base \
+        --engines whisper faster-whisper --compute-types int8 int8_float32
+"""
+import time
+import argparse
+import resource
+import multiprocessing
+
+
+def _run_engine(audio_path: str, model: str, engine: str,
+                compute_type: str, queue) -> None:
+    """Transcribe once in a child process and report the measurements."""
+    from app.services.transcriber import ENGINES, FasterWhisperEngine
+
+    kwargs = {"model": model}
+    if ENGINES[engine] is FasterWhisperEngine and compute_type:
+        kwargs["compute_type"] = compute_type
+    instance = ENGINES[engine](**kwargs)
+
+    start = time.perf_counter()
+    instance._load_model()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = instance.transcribe(audio_path)
+    elapsed = time.perf_counter() - start
+
+    queue.put({
+        "load_s": load_time,
+        "transcribe_s": elapsed,
+        "duration_s": result.get("duration") or 0.0,
+        "segments": len(result["segments"]),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def benchmark(audio_path: str, model: str, engine: str, compute_type: str = None) -> dict:
+    """
+    Benchmark one engine configuration in a fresh process.
+
+    Args:
+        audio_path: Path to the audio file
+        model: Whisper model to use
+        engine: Engine name
+        compute_type: faster-whisper quantization (optional)
+
+    Returns:
+        dict: Measurements for the run
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(
+        target=_run_engine, args=(audio_path, model, engine, compute_type, queue)
+    )
+    process.start()
+    stats = queue.get()
+    process.join()
+    return stats
+
+
+def main():
+    """Parse arguments and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--engines", nargs="+", default=["whisper", "faster-whisper"])
+    parser.add_argument("--compute-types", nargs="+", default=["int8"])
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Audio duration in seconds, if the engine does not report it")
+    args = parser.parse_args()
+
+    runs = []
+    for engine in args.engines:
+        compute_types = args.compute_types if engine == "faster-whisper" else [None]
+        for compute_type in compute_types:
+            runs.append((engine, compute_type))
+
+    print(f"{'engine':<16}{'compute':<14}{'load s':>8}{'RTF':>8}{'peak RSS MB':>13}")
+    for engine, compute_type in runs:
+        stats = benchmark(args.audio, args.model, engine, compute_type)
+        duration = args.duration or stats["duration_s"]
+        rtf = stats["transcribe_s"] / duration if duration else float("nan")
+        print(
+            f"{engine:<16}{compute_type or 'fp32':<14}{stats['load_s']:>8.1f}"
+            f"{rtf:>8.3f}{stats['peak_rss_mb']:>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
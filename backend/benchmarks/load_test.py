@@ -0,0 +1,112 @@
+"""
+Load test for the API request path.
+
+Fires concurrent uploads and status polls at a running server and reports
+latency percentiles, to check that a single uvicorn worker serves polls
+while uploads are in flight.
+
+Usage:
+    uvicorn app.main:app --workers 1
+    python -m benchmarks.load_test --url http://localhost:8000 --uploads 20 --polls 200
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+
+def percentile(values: list, pct: float) -> float:
+    """Get the given percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _timed(latencies: list, request):
+    """Await a request and record its latency."""
+    start = time.perf_counter()
+    response = await request
+    latencies.append(time.perf_counter() - start)
+    return response
+
+
+async def run(url: str, uploads: int, polls: int, upload_size: int) -> dict:
+    """
+    Run the load test.
+
+    Args:
+        url: Base URL of the server
+        uploads: Number of concurrent uploads
+        polls: Number of concurrent status polls
+        upload_size: Size of each upload in bytes
+
+    Returns:
+        dict: Latency statistics per request kind
+    """
+    payload = b"\0" * upload_size
+    upload_latencies, poll_latencies = [], []
+
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        # Create one job to poll
+        seed = await client.post(
+            "/api/v1/transcribe", files={"file": ("seed.wav", payload, "audio/wav")}
+        )
+        job_id = seed.json()["job_id"]
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                _timed(upload_latencies, client.post(
+                    "/api/v1/transcribe",
+                    files={"file": (f"load{i}.wav", payload, "audio/wav")}
+                ))
+                for i in range(uploads)
+            ],
+            *[
+                _timed(poll_latencies, client.get(f"/api/v1/jobs/{job_id}"))
+                for _ in range(polls)
+            ]
+        )
+        elapsed = time.perf_counter() - start
+
+    def _summary(latencies):
+        return {
+            "count": len(latencies),
+            "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+    return {
+        "elapsed_s": elapsed,
+        "uploads": _summary(upload_latencies),
+        "polls": _summary(poll_latencies),
+    }
+
+
+def main():
+    """Parse arguments and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=200)
+    parser.add_argument("--upload-size", type=int, default=5 * 1024 * 1024)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.uploads, args.polls, args.upload_size))
+
+    print(f"Elapsed: {results['elapsed_s']:.2f}s")
+    for kind in ("uploads", "polls"):
+        stats = results[kind]
+        print(
+            f"{kind:>8}: n={stats['count']} mean={stats['mean_ms']:.1f}ms "
+            f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measure peak worker memory against input length, whole-file vs windowed.
+
+For every ``--minutes`` length, a fresh process decodes the audio either
+as one float32 array (what ``transcribe(path)`` does) or window by window
+from memory-mapped PCM, and reports its peak RSS. Windowed peaks should
+stay flat as the input grows; whole-file peaks grow by ~4MB per minute.
+
+Without ``--model`` only the audio path is measured (decode, float
+conversion, a spectrogram-sized buffer per window). With ``--model`` each
+window is really transcribed with Whisper, so model memory is included.
+
+Usage:
+    python -m benchmarks.peak_memory --minutes 10 60 180 [--audio audio.wav] [--model base]
+"""
+import os
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+from app.utils.audio import CANONICAL_SAMPLE_RATE, decode_to_pcm, open_pcm, pcm_window, plan_windows
+
+MB = 1024 * 1024
+
+
+class _NullTranscriber:
+    """Stand-in allocating what Whisper allocates per input, minus the model."""
+
+    def transcribe_samples(self, samples, language=None):
+        # Log-mel input: 80 bins per 10 ms hop
+        mel = np.empty((80, len(samples) // 160 + 1), dtype=np.float32)
+        mel[:] = np.abs(samples[:mel.shape[1]]).max()
+        return {"text": "", "segments": [], "language": language or "en"}
+
+
+def write_pcm(path: str, minutes: float, source: str = None) -> None:
+    """Write ``minutes`` of 16 kHz s16le PCM, looping ``source`` or noise."""
+    total = int(minutes * 60 * CANONICAL_SAMPLE_RATE)
+    if source:
+        loop = np.fromfile(source, dtype="<i2")
+    else:
+        noise = np.random.default_rng(0).standard_normal(60 * CANONICAL_SAMPLE_RATE)
+        loop = (noise * 3000).astype("<i2")
+
+    with open(path, "wb") as f:
+        written = 0
+        while written < total:
+            chunk = loop[:total - written]
+            f.write(chunk.tobytes())
+            written += len(chunk)
+
+
+def _run(mode: str, pcm_path: str, model: str, window: float, queue) -> None:
+    """Decode the PCM file once and report peak RSS and wall time."""
+    from app.services.windowed import transcribe_windowed
+
+    if model:
+        from app.services.transcriber import Transcriber
+        transcriber = Transcriber(model=model, engine="whisper")
+        transcriber.load()
+    else:
+        transcriber = _NullTranscriber()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    start = time.perf_counter()
+    pcm = open_pcm(pcm_path)
+    if mode == "windowed":
+        transcribe_windowed(transcriber, pcm, plan_windows(pcm, window))
+    else:
+        transcriber.transcribe_samples(pcm_window(pcm, 0, len(pcm)))
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    queue.put((peak, peak - baseline, elapsed))
+
+
+def measure(mode: str, pcm_path: str, model: str, window: float) -> tuple:
+    """
+    Run one measurement in a fresh process, so peaks never carry over.
+
+    Returns:
+        tuple: Peak RSS, peak above the loaded-model baseline (bytes), seconds
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, pcm_path, model, window, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    """Parse arguments and print peak memory per length and mode."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 60, 180])
+    parser.add_argument("--audio", default=None, help="Loop this file instead of noise")
+    parser.add_argument("--model", default=None, help="Transcribe with this Whisper model")
+    parser.add_argument("--window", type=float, default=300, help="Window length in seconds")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="peak_memory_")
+    try:
+        source = None
+        if args.audio:
+            source = decode_to_pcm(args.audio, os.path.join(workdir, "source.pcm"))
+
+        print(f"{'minutes':>8}{'mode':>10}{'peak MB':>10}{'above model MB':>16}{'seconds':>9}")
+        for minutes in args.minutes:
+            pcm_path = os.path.join(workdir, "input.pcm")
+            write_pcm(pcm_path, minutes, source)
+            for mode in ("full", "windowed"):
+                peak, above, elapsed = measure(mode, pcm_path, args.model, args.window)
+                print(f"{minutes:>8g}{mode:>10}{peak / MB:>10.0f}"
+                      f"{above / MB:>16.0f}{elapsed:>9.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure per-child memory with and without copy-on-write model sharing.
+
+Forks ``--children`` processes the way the Celery prefork pool does. In
+``preload`` mode the parent loads and freezes the Whisper model first; in
+``per-child`` mode every child loads its own copy. Each child optionally
+transcribes the audio, then reports its memory while all children are
+alive, so PSS splits the shared pages between them.
+
+Usage:
+    python -m benchmarks.shared_weights --model base --children 4 [--audio audio.wav]
+"""
+import gc
+import argparse
+import multiprocessing
+
+from app.tasks.preload import freeze_modules, read_memory_stats
+
+MB = 1024 * 1024
+
+
+def _child(index: int, preloaded, model: str, audio_path: str, barrier, queue) -> None:
+    """Run one child and report its memory once every child is loaded."""
+    from app.services.transcriber import Transcriber
+
+    transcriber = preloaded or Transcriber(model=model, engine="whisper")
+    transcriber.load()
+    if audio_path:
+        transcriber.transcribe(audio_path)
+
+    barrier.wait()
+    queue.put((index, read_memory_stats()))
+    barrier.wait()  # Stay alive until every child has measured
+
+
+def run_mode(preload: bool, model: str, children: int, audio_path: str) -> list:
+    """
+    Fork the children for one mode and collect their memory stats.
+
+    Returns:
+        list: (child index, memory stats) per child
+    """
+    from app.services.transcriber import Transcriber
+
+    ctx = multiprocessing.get_context("fork")
+    preloaded = None
+    if preload:
+        preloaded = Transcriber(model=model, engine="whisper")
+        freeze_modules(preloaded.load())
+        gc.collect()
+        gc.freeze()
+
+    barrier = ctx.Barrier(children)
+    queue = ctx.Queue()
+    processes = [
+        ctx.Process(target=_child, args=(i, preloaded, model, audio_path, barrier, queue))
+        for i in range(children)
+    ]
+    for process in processes:
+        process.start()
+    stats = sorted(queue.get() for _ in processes)
+    for process in processes:
+        process.join()
+
+    if preload:
+        gc.unfreeze()
+    return stats
+
+
+def main():
+    """Parse arguments and print per-child memory for both modes."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--audio", default=None, help="Transcribe this file in every child")
+    args = parser.parse_args()
+
+    print(f"{'mode':>10}{'child':>7}{'rss MB':>9}{'pss MB':>9}{'private MB':>12}")
+    for preload in (False, True):
+        mode = "preload" if preload else "per-child"
+        stats = run_mode(preload, args.model, args.children, args.audio)
+        for index, child in stats:
+            print(
+                f"{mode:>10}{index:>7}{child['rss'] / MB:>9.0f}"
+                f"{child['pss'] / MB:>9.0f}{child['private'] / MB:>12.0f}"
+            )
+        total_pss = sum(child["pss"] for _, child in stats) / MB
+        mean_private = sum(child["private"] for _, child in stats) / len(stats) / MB
+        print(f"{mode:>10} total pss {total_pss:.0f}MB, "
+              f"mean private per child {mean_private:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
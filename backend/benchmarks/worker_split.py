@@ -0,0 +1,98 @@
+"""
+Find the throughput-optimal split between worker processes and torch threads.
+
+For every (concurrency, threads) split of the detected CPUs, starts that
+many processes with that thread budget, has each transcribe the same audio
+``--jobs`` times after a warm-up run, and reports jobs per minute.
+
+Usage:
+    python -m benchmarks.worker_split audio.wav --model base --jobs 3
+"""
+import time
+import argparse
+import multiprocessing
+
+from app.tasks.worker_config import detect_cpu_count, apply_thread_budget
+
+
+def _worker(index: int, plan: dict, audio_path: str, model: str, engine: str,
+            jobs: int, barrier, queue) -> None:
+    """Transcribe the audio ``jobs`` times under the given thread budget."""
+    apply_thread_budget(plan, index=index)
+
+    from app.services.transcriber import Transcriber
+    transcriber = Transcriber(model=model, engine=engine)
+    transcriber.transcribe(audio_path)  # Warm-up: load weights, JIT, caches
+
+    barrier.wait()
+    start = time.perf_counter()
+    for _ in range(jobs):
+        transcriber.transcribe(audio_path)
+    queue.put((start, time.perf_counter()))
+
+
+def candidate_splits(cpus: int) -> list:
+    """Get the (concurrency, threads) splits that use every CPU."""
+    return [(cpus // threads, threads) for threads in range(1, cpus + 1) if cpus % threads == 0]
+
+
+def run_split(concurrency: int, threads: int, audio_path: str, model: str,
+              engine: str, jobs: int) -> float:
+    """
+    Measure throughput for one split.
+
+    Returns:
+        float: Completed jobs per minute
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(concurrency)
+    queue = ctx.Queue()
+    plan = {"concurrency": concurrency, "threads": threads, "interop_threads": 1}
+
+    processes = [
+        ctx.Process(
+            target=_worker,
+            args=(i, plan, audio_path, model, engine, jobs, barrier, queue)
+        )
+        for i in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+    spans = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    wall = max(end for _, end in spans) - min(start for start, _ in spans)
+    return concurrency * jobs / wall * 60
+
+
+def main():
+    """Parse arguments and print throughput per split."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--engine", default=None)
+    parser.add_argument("--jobs", type=int, default=3, help="Jobs per process")
+    parser.add_argument("--cpus", type=int, default=None, help="Override detected CPUs")
+    args = parser.parse_args()
+
+    cpus = args.cpus or detect_cpu_count()
+    print(f"CPUs: {cpus}")
+    print(f"{'concurrency':>12}{'threads':>9}{'jobs/min':>10}")
+
+    results = []
+    for concurrency, threads in candidate_splits(cpus):
+        throughput = run_split(concurrency, threads, args.audio, args.model,
+                               args.engine, args.jobs)
+        results.append((throughput, concurrency, threads))
+        print(f"{concurrency:>12}{threads:>9}{throughput:>10.2f}")
+
+    best, concurrency, threads = max(results)
+    print(
+        f"Best: WORKER_CONCURRENCY={concurrency} WORKER_THREADS_PER_CHILD={threads} "
+        f"({best:.2f} jobs/min)"
+    )
+
+
+if __name__ == "__main__":
+    main()
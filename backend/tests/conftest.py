@@ -1,8 +1,13 @@
 """Pytest configuration and fixtures for backend tests."""
 import os
+import fnmatch
 import pytest
 import tempfile
 
+# Keep Celery off the network: queued tasks go to an in-memory broker
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+
 _original_get_session = None
 
 
@@ -17,12 +22,14 @@ def setup_test_settings():
     # Store original values
     original_url = app.config.settings.DATABASE_URL
     
-    # Create a temporary database file for all tests
+    # Create a temporary database file for all tests, unless a server
+    # database is given (e.g. a throwaway PostgreSQL instance)
     temp_db = os.path.join(tempfile.gettempdir(), "transcriber_test.db")
     
     # Patch settings with test values - direct attribute assignment
-    app.config.settings.DATABASE_URL = f"sqlite:///{temp_db}"
+    app.config.settings.DATABASE_URL = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{temp_db}"
     app.config.settings.UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "transcriber_test_uploads")
+    app.config.settings.MAX_UPLOAD_SIZE = 16 * 1024 * 1024
     
     # Create test database engine
     engine = get_database_engine()
@@ -58,9 +65,11 @@ def test_client():
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
     
+    from app.utils.database import engine_options
+    
     engine = create_engine(
         app.config.settings.DATABASE_URL,
-        connect_args={"check_same_thread": False}
+        **engine_options(app.config.settings.DATABASE_URL)
     )
     
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -102,9 +111,11 @@ def db_session():
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
     
+    from app.utils.database import engine_options
+    
     engine = create_engine(
         app.config.settings.DATABASE_URL,
-        connect_args={"check_same_thread": False}
+        **engine_options(app.config.settings.DATABASE_URL)
     )
     
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -112,4 +123,153 @@ def db_session():
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+class FakeRedis:
+    """Minimal in-process stand-in for the Redis commands the app uses."""
+
+    def __init__(self):
+        self.lists = {}
+        self.values = {}
+        self.hashes = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        self.expiry[key] = ex
+        return True
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        items = self.hashes.setdefault(key, {})
+        updates = dict(mapping or {})
+        if field is not None:
+            updates[field] = value
+        for name, item in updates.items():
+            items[name.encode()] = item.encode() if isinstance(item, str) else item
+        return len(updates)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+        return key in self.values or key in self.hashes or key in self.lists
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            for store in (self.values, self.hashes, self.lists):
+                if store.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+    def rpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items.extend(v.encode() if isinstance(v, str) else v for v in values)
+        return len(items)
+
+    def lpop(self, key):
+        items = self.lists.get(key)
+        return items.pop(0) if items else None
+
+    def blpop(self, key, timeout=0):
+        value = self.lpop(key)
+        return (key.encode(), value) if value is not None else None
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def lpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, value.encode() if isinstance(value, str) else value)
+        return len(items)
+
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        value = value.encode() if isinstance(value, str) else value
+        removed = 0
+        while value in items and (count == 0 or removed < count):
+            items.remove(value)
+            removed += 1
+        if not items:
+            self.lists.pop(key, None)
+        return removed
+
+    def lmove(self, src, dst, wherefrom="LEFT", whereto="RIGHT"):
+        items = self.lists.get(src)
+        if not items:
+            return None
+        value = items.pop(0 if wherefrom == "LEFT" else -1)
+        if not items:
+            self.lists.pop(src)
+        target = self.lists.setdefault(dst, [])
+        target.insert(0 if whereto == "LEFT" else len(target), value)
+        return value
+
+    def blmove(self, src, dst, timeout, wherefrom="LEFT", whereto="RIGHT"):
+        return self.lmove(src, dst, wherefrom, whereto)
+
+    def exists(self, *keys):
+        return sum(key in self.values or key in self.hashes or key in self.lists for key in keys)
+
+    def scan_iter(self, match="*"):
+        keys = list(self.values) + list(self.hashes) + list(self.lists)
+        return iter([key.encode() for key in keys if fnmatch.fnmatchcase(key, match)])
+
+
+class FakeTask:
+    """Stand-in for a Celery task that records its calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def delay(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+    def apply_async(self, args=(), kwargs=None, **options):
+        self.calls.append((tuple(args), kwargs or {}))
+
+
+@pytest.fixture(scope="function")
+def fake_tasks(monkeypatch):
+    """Keep routes from queueing real Celery tasks and record what they queue."""
+    import app.api.v1.routes as routes_module
+
+    fakes = {"transcribe": FakeTask(), "reclaim": FakeTask(), "revoked": []}
+    monkeypatch.setattr(routes_module, "_process_transcription", fakes["transcribe"])
+    monkeypatch.setattr(routes_module, "_reclaim_files", fakes["reclaim"])
+    monkeypatch.setattr(routes_module, "_revoke_task", fakes["revoked"].append)
+    return fakes
+
+
+@pytest.fixture(scope="function")
+def empty_db(db_session):
+    """Start from no jobs and no counters."""
+    from app.models import JobStatistic, Segment, TranscriptionJob
+
+    db_session.query(Segment).delete()
+    db_session.query(TranscriptionJob).delete()
+    db_session.query(JobStatistic).delete()
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture(scope="function")
+def fake_redis():
+    """Create an in-process Redis stand-in."""
+    return FakeRedis()
+
+
+@pytest.fixture(autouse=True)
+def status_store(monkeypatch):
+    """Back the hot job-status store with a Redis stand-in in every test."""
+    import app.utils.status_store as status_store_module
+    from app.config import settings
+
+    store = status_store_module.JobStatusStore(FakeRedis(), settings.JOB_STATUS_TTL)
+    monkeypatch.setattr(status_store_module, "_store", store)
+    return store
@@ -0,0 +1,121 @@
+"""Tests for audio ingest utilities."""
+import sys
+import wave
+
+import pytest
+
+from app.utils.audio import (
+    parse_probe_output,
+    canonical_path,
+    build_normalize_command,
+    extract_regions,
+    normalize_audio,
+)
+
+
+class TestParseProbeOutput:
+    """Tests for parse_probe_output function."""
+
+    def test_extracts_audio_stream_metadata(self):
+        """Should pick the audio stream and convert numeric fields."""
+        probe = {
+            "format": {"format_name": "mov,mp4,m4a", "duration": "12.5", "size": "1048576"},
+            "streams": [
+                {"codec_type": "video", "codec_name": "h264"},
+                {"codec_type": "audio", "codec_name": "aac",
+                 "sample_rate": "48000", "channels": 2},
+            ],
+        }
+
+        metadata = parse_probe_output(probe)
+
+        assert metadata["format"] == "mov,mp4,m4a"
+        assert metadata["codec"] == "aac"
+        assert metadata["sample_rate"] == 48000
+        assert metadata["channels"] == 2
+        assert metadata["duration"] == 12.5
+        assert metadata["size"] == 1048576
+        assert metadata["has_video"] is True
+
+    def test_handles_missing_fields(self):
+        """Should return None for fields ffprobe did not report."""
+        metadata = parse_probe_output({})
+
+        assert metadata["codec"] is None
+        assert metadata["duration"] is None
+        assert metadata["has_video"] is False
+
+
+class TestBuildNormalizeCommand:
+    """Tests for build_normalize_command function."""
+
+    def test_resamples_to_16k_mono(self):
+        """Should drop video and resample to 16 kHz mono."""
+        command = build_normalize_command("in.mp4", "out.flac", "flac")
+
+        assert command[0] == "ffmpeg"
+        assert "-vn" in command
+        assert command[command.index("-ar") + 1] == "16000"
+        assert command[command.index("-ac") + 1] == "1"
+        assert command[command.index("-c:a") + 1] == "flac"
+        assert command[-1] == "out.flac"
+
+    def test_opus_sets_bitrate(self):
+        """Should set a bitrate for Opus output."""
+        command = build_normalize_command("in.wav", "out.ogg", "opus")
+
+        assert command[command.index("-c:a") + 1] == "libopus"
+        assert "-b:a" in command
+
+
+class TestCanonicalPath:
+    """Tests for canonical_path function."""
+
+    def test_does_not_collide_with_flac_upload(self):
+        """Canonical copy of a FLAC upload should get its own name."""
+        assert canonical_path("/tmp/job_a.flac", "flac") == "/tmp/job_a.16k.flac"
+
+    def test_uses_destination_directory(self):
+        """Should place the file in the given directory."""
+        assert canonical_path("/tmp/job_a.mp4", "opus", "/data") == "/data/job_a.16k.ogg"
+
+
+class TestNormalizeAudio:
+    """Tests for normalize_audio function."""
+
+    def test_rejects_unknown_format(self):
+        """Should raise for unsupported canonical formats."""
+        with pytest.raises(ValueError):
+            normalize_audio("/tmp/in.wav", fmt="mp3")
+
+
+class TestExtractRegions:
+    """Tests for extract_regions function."""
+
+    def _decoder(self, monkeypatch, script):
+        """Replace ffmpeg with a Python script writing to stdout."""
+        import app.utils.audio as audio_module
+        command = [sys.executable, "-c", script]
+        monkeypatch.setattr(audio_module, "build_extract_command", lambda src, seconds: command)
+
+    def test_writes_only_the_regions(self, tmp_path, monkeypatch):
+        """Should keep the requested regions of the decoded samples."""
+        self._decoder(monkeypatch, "import sys; sys.stdout.buffer.write(bytes(64000))")
+        dest = str(tmp_path / "speech.wav")
+
+        extract_regions("in.flac", [(0.5, 1.0), (1.5, 1.75)], dest)
+
+        with wave.open(dest) as f:
+            assert f.getnframes() == 8000 + 4000
+
+    def test_decode_failure_raises(self, tmp_path, monkeypatch):
+        """A failing decode should raise with its error, not leave a short file."""
+        self._decoder(monkeypatch, (
+            "import sys; sys.stdout.buffer.write(bytes(1000)); "
+            "sys.stderr.write('Invalid data found'); sys.exit(1)"
+        ))
+        dest = tmp_path / "speech.wav"
+
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            extract_regions("in.flac", [(0.0, 1.0)], str(dest))
+        assert not dest.exists()
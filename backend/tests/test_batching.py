@@ -0,0 +1,222 @@
+"""Tests for the short-job batching worker."""
+import pytest
+
+from app.config import settings
+
+from app.models import TranscriptionJob, Segment
+from app.services.transcriber import tokens_to_segments
+from app.tasks.batching import (
+    SHORT_JOBS_KEY,
+    enqueue_short_job,
+    collect_batch,
+    group_jobs,
+    process_batch,
+)
+from app.utils.job_queue import ReliableQueue
+
+
+class TestTokensToSegments:
+    """Tests for tokens_to_segments function."""
+
+    TS = 1000  # Fake timestamp_begin
+
+    def _decode(self, tokens):
+        return "".join(chr(t) for t in tokens)
+
+    def test_splits_on_timestamp_pairs(self):
+        """Should open and close segments on timestamp tokens."""
+        tokens = [self.TS, ord("a"), self.TS + 50, self.TS + 50, ord("b"), self.TS + 100]
+
+        segments = tokens_to_segments(tokens, self.TS, self._decode, duration=5.0)
+
+        assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+            (0.0, 1.0, "a"), (1.0, 2.0, "b")
+        ]
+
+    def test_closes_trailing_segment_at_duration(self):
+        """A segment without a closing timestamp should end at the audio end."""
+        tokens = [self.TS, ord("a"), ord("b")]
+
+        segments = tokens_to_segments(tokens, self.TS, self._decode, duration=3.2)
+
+        assert segments == [{"start": 0.0, "end": 3.2, "text": "ab", "confidence": 0.95}]
+
+
+class TestCollectBatch:
+    """Tests for collect_batch function."""
+
+    def test_collects_up_to_max_size(self, fake_redis):
+        """Should stop at max_size and leave the rest queued."""
+        for i in range(5):
+            enqueue_short_job(fake_redis, f"job-{i}", f"/tmp/{i}.wav", f"{i}.wav")
+
+        batch = collect_batch(ReliableQueue(fake_redis, SHORT_JOBS_KEY), max_size=3, max_wait=0)
+
+        assert [job["job_id"] for job in batch] == ["job-0", "job-1", "job-2"]
+        assert fake_redis.llen(SHORT_JOBS_KEY) == 2
+
+    def test_returns_empty_when_idle(self, fake_redis):
+        """Should return no jobs when nothing is queued."""
+        jobs = ReliableQueue(fake_redis, SHORT_JOBS_KEY)
+
+        assert collect_batch(jobs, max_size=3, max_wait=0) == []
+
+    def test_claimed_jobs_are_kept_until_acked(self, fake_redis):
+        """A claimed batch stays on the worker's processing list until acknowledged."""
+        for i in range(2):
+            enqueue_short_job(fake_redis, f"job-{i}", f"/tmp/{i}.wav", f"{i}.wav")
+        jobs = ReliableQueue(fake_redis, SHORT_JOBS_KEY, worker_id="w1")
+
+        collect_batch(jobs, max_size=3, max_wait=0)
+
+        assert fake_redis.llen(jobs.processing_key) == 2
+        jobs.ack_all()
+        assert fake_redis.llen(jobs.processing_key) == 0
+
+    def test_jobs_of_a_dead_worker_are_requeued(self, fake_redis):
+        """Recovery puts the batch of a worker without a heartbeat back in order."""
+        for i in range(3):
+            enqueue_short_job(fake_redis, f"job-{i}", f"/tmp/{i}.wav", f"{i}.wav")
+        dead = ReliableQueue(fake_redis, SHORT_JOBS_KEY, worker_id="dead")
+        alive = ReliableQueue(fake_redis, SHORT_JOBS_KEY, worker_id="alive")
+        alive.beat()
+        collect_batch(dead, max_size=2, max_wait=0)
+        collect_batch(alive, max_size=1, max_wait=0)
+
+        assert alive.recover() == 2
+
+        batch = collect_batch(alive, max_size=3, max_wait=0)
+        assert [job["job_id"] for job in batch] == ["job-0", "job-1"]
+        assert fake_redis.llen(dead.processing_key) == 0
+        assert fake_redis.llen(alive.processing_key) == 3
+
+    def test_groups_by_model_engine_and_language(self):
+        """Jobs that cannot share a decode should be grouped apart."""
+        jobs = [
+            {"job_id": "a", "model": "base", "engine": "whisper", "language": None},
+            {"job_id": "b", "model": "base", "engine": "whisper", "language": "en"},
+            {"job_id": "c", "model": "base", "engine": "whisper", "language": None},
+        ]
+
+        groups = group_jobs(jobs)
+
+        assert [[j["job_id"] for j in g] for g in groups.values()] == [["a", "c"], ["b"]]
+
+
+class _FakeTranscriber:
+    """Transcriber stand-in that records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def transcribe_batch(self, paths, language=None):
+        self.batches.append(list(paths))
+        return [
+            {"text": path, "duration": 2.0,
+             "segments": [{"start": 0.0, "end": 2.0, "text": path, "confidence": 0.95}]}
+            for path in paths
+        ]
+
+
+class _FakeDiarizer:
+    """Diarizer stand-in with a single speaker."""
+
+    def diarize(self, path, **kwargs):
+        return {"segments": [{"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00"}]}
+
+    def align_segments(self, transcript, diarization):
+        return [{**seg, "speaker": "SPEAKER_00"} for seg in transcript]
+
+
+class TestProcessBatch:
+    """Tests for process_batch function."""
+
+    def test_fans_results_out_to_each_job(self, db_session, monkeypatch):
+        """Should decode once and store each job's segments."""
+        import app.tasks.tasks as tasks_module
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        transcriber = _FakeTranscriber()
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: _FakeDiarizer())
+
+        jobs = []
+        for i in range(3):
+            job_id = f"short-job-{i}"
+            db_session.add(TranscriptionJob(id=job_id, filename=f"{i}.wav"))
+            jobs.append({"job_id": job_id, "file_path": f"/tmp/{i}.wav", "filename": f"{i}.wav",
+                         "model": "base", "engine": "whisper", "language": None})
+        db_session.commit()
+
+        stats = process_batch(jobs)
+
+        assert stats == {"completed": 3, "failed": 0}
+        assert transcriber.batches == [["/tmp/0.wav", "/tmp/1.wav", "/tmp/2.wav"]]
+        db_session.expire_all()
+        for job in jobs:
+            row = db_session.get(TranscriptionJob, job["job_id"])
+            assert row.status == "completed"
+            assert db_session.query(Segment).filter(Segment.job_id == row.id).count() == 1
+
+    def test_runs_ingest_and_vad_before_decoding(self, db_session, monkeypatch):
+        """Jobs are normalized and cut to their speech like on the other workers."""
+        import app.tasks.tasks as tasks_module
+        from app.services.vad import SpeechMap
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", True)
+        monkeypatch.setattr(settings, "VAD_ENABLED", True)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        transcriber = _FakeTranscriber()
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: _FakeDiarizer())
+        monkeypatch.setattr(tasks_module, "ingest_audio",
+                            lambda session, job, path: path.replace(".mp3", ".wav"))
+        speech_map = SpeechMap([(5.0, 7.0)], total_duration=10.0)
+        monkeypatch.setattr(tasks_module, "detect_speech", lambda job, path: speech_map)
+        monkeypatch.setattr(tasks_module, "extract_speech",
+                            lambda path, speech_map: path.replace(".wav", ".speech.wav"))
+
+        db_session.add(TranscriptionJob(id="short-vad", filename="a.mp3"))
+        db_session.commit()
+        job = {"job_id": "short-vad", "file_path": "/tmp/short-vad.mp3", "filename": "a.mp3",
+               "model": "base", "engine": "whisper", "language": None, "diarize": False}
+
+        assert process_batch([job]) == {"completed": 1, "failed": 0}
+
+        assert transcriber.batches == [["/tmp/short-vad.speech.wav"]]
+        db_session.expire_all()
+        row = db_session.get(TranscriptionJob, "short-vad")
+        assert row.duration == 10.0 and row.skipped_fraction == pytest.approx(0.8)
+        segment = db_session.query(Segment).filter(Segment.job_id == row.id).one()
+        assert (segment.start_time, segment.end_time) == (5.0, 7.0)
+
+    def test_routes_language_before_grouping(self, db_session, monkeypatch):
+        """Jobs without a language are grouped under the model they are routed to."""
+        import app.tasks.tasks as tasks_module
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "VAD_ENABLED", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", True)
+        transcribers = {}
+
+        def get_transcriber(model=None, engine=None):
+            return transcribers.setdefault(model, _FakeTranscriber())
+
+        def route_language(session, job, audio_path, model, engine=None):
+            if "english" in audio_path:
+                return "en", f"{model}.en"
+            return None, model
+
+        monkeypatch.setattr(tasks_module, "_get_transcriber", get_transcriber)
+        monkeypatch.setattr(tasks_module, "route_language", route_language)
+        jobs = []
+        for job_id, language in (("short-en", None), ("short-any", None), ("short-de", "de")):
+            db_session.add(TranscriptionJob(id=job_id, filename="a.wav"))
+            name = "english" if job_id == "short-en" else job_id
+            jobs.append({"job_id": job_id, "file_path": f"/tmp/{name}.wav", "filename": "a.wav",
+                         "model": "base", "engine": "whisper", "language": language,
+                         "diarize": False})
+        db_session.commit()
+
+        assert process_batch(jobs) == {"completed": 3, "failed": 0}
+
+        assert transcribers["base.en"].batches == [["/tmp/english.wav"]]
+        assert transcribers["base"].batches == [["/tmp/short-any.wav"], ["/tmp/short-de.wav"]]
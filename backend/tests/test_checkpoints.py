@@ -0,0 +1,199 @@
+"""Tests for stage checkpoints and resumed transcription jobs."""
+import pytest
+
+from app.config import settings
+from app.models import TranscriptionJob, Segment
+from app.utils.checkpoints import CheckpointStore
+
+
+class TestCheckpointStore:
+    """Tests for CheckpointStore."""
+
+    def test_save_then_load(self, tmp_path):
+        """Should round-trip a stage's output."""
+        store = CheckpointStore(str(tmp_path))
+
+        store.save("job-1", "transcript", {"text": "hi", "segments": []})
+
+        assert store.load("job-1", "transcript") == {"text": "hi", "segments": []}
+        assert store.load("job-1", "diarization") is None
+
+    def test_clear_removes_every_stage(self, tmp_path):
+        """Should remove all of a job's checkpoints."""
+        store = CheckpointStore(str(tmp_path))
+        store.save("job-1", "transcript", {})
+        store.save("job-1", "alignment", {})
+
+        store.clear("job-1")
+
+        assert store.load("job-1", "transcript") is None
+        assert store.load("job-1", "alignment") is None
+
+    def test_ignores_truncated_checkpoint(self, tmp_path):
+        """An unreadable file should count as a missing checkpoint."""
+        store = CheckpointStore(str(tmp_path))
+        store.save("job-1", "transcript", {})
+        with open(store.path("job-1", "transcript"), "w") as f:
+            f.write('{"text": ')
+
+        assert store.load("job-1", "transcript") is None
+
+    def test_rejects_unknown_stage(self, tmp_path):
+        """Should refuse stage names outside the pipeline."""
+        with pytest.raises(ValueError):
+            CheckpointStore(str(tmp_path)).save("job-1", "bogus", {})
+
+
+class _CountingTranscriber:
+    """Transcriber stand-in that counts decodes."""
+
+    engine_name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, path, language=None, **kwargs):
+        self.calls += 1
+        return {"text": "hello", "duration": 2.0,
+                "segments": [{"start": 0.0, "end": 2.0, "text": "hello", "confidence": 0.95}]}
+
+
+class _FlakyDiarizer:
+    """Diarizer stand-in that fails a given number of times."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def diarize(self, path, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("pyannote exploded")
+        return {"segments": [{"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00"}],
+                "num_speakers": 1}
+
+    def align_segments(self, transcript, diarization):
+        return [{**seg, "speaker": "SPEAKER_00"} for seg in transcript]
+
+
+class TestResumeFromCheckpoint:
+    """Tests for process_transcription resuming after a failure."""
+
+    def test_retry_skips_completed_transcription(self, db_session, tmp_path, monkeypatch):
+        """A diarization failure should not make the retry decode again."""
+        import app.tasks.tasks as tasks_module
+        transcriber = _CountingTranscriber()
+        diarizer = _FlakyDiarizer(failures=1)
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: diarizer)
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        monkeypatch.setattr(settings, "CHECKPOINT_DIR", str(tmp_path))
+
+        db_session.add(TranscriptionJob(id="resume-job", filename="a.wav"))
+        db_session.commit()
+        task = tasks_module.process_transcription
+
+        with pytest.raises(RuntimeError):
+            task.run("resume-job", "/tmp/a.wav", "a.wav")
+
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "resume-job").status == "failed"
+        assert (tmp_path / "resume-job" / "transcript.json").exists()
+
+        result = task.run("resume-job", "/tmp/a.wav", "a.wav")
+
+        assert result["status"] == "completed"
+        assert transcriber.calls == 1
+        assert diarizer.calls == 2
+        assert not (tmp_path / "resume-job").exists()
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "resume-job").status == "completed"
+        assert db_session.query(Segment).filter(Segment.job_id == "resume-job").count() == 1
+
+
+class TestCancellation:
+    """Tests for process_transcription stopping on cancellation."""
+
+    @pytest.fixture
+    def pipeline(self, tmp_path, monkeypatch):
+        """Run the task without ingest and with checkpoints in a temp dir."""
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        monkeypatch.setattr(settings, "CHECKPOINT_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "CANCEL_CHECK_INTERVAL", 0)
+
+    def test_cancelled_before_start_does_nothing(self, db_session, pipeline, monkeypatch):
+        """A job cancelled while queued should never be decoded."""
+        import app.tasks.tasks as tasks_module
+        transcriber = _CountingTranscriber()
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+        db_session.add(TranscriptionJob(id="cancel-early", filename="a.wav", status="cancelled"))
+        db_session.commit()
+
+        result = tasks_module.process_transcription.run("cancel-early", "/tmp/a.wav", "a.wav")
+
+        assert result["status"] == "cancelled"
+        assert transcriber.calls == 0
+
+    def test_deleted_job_does_nothing(self, db_session, pipeline, monkeypatch):
+        """A task whose job was deleted while queued should never decode it."""
+        import app.tasks.tasks as tasks_module
+        transcriber = _CountingTranscriber()
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+
+        result = tasks_module.process_transcription.run("cancel-deleted", "/tmp/a.wav", "a.wav")
+
+        assert result["status"] == "cancelled"
+        assert transcriber.calls == 0
+
+    def test_stops_at_next_stage_and_discards_checkpoints(self, db_session, tmp_path,
+                                                          pipeline, monkeypatch):
+        """Cancelling mid-diarization should stop the job and drop its checkpoints."""
+        import app.tasks.tasks as tasks_module
+
+        class _CancellingDiarizer(_FlakyDiarizer):
+            def diarize(self, path, check_cancelled=None, **kwargs):
+                db_session.get(TranscriptionJob, "cancel-mid").status = "cancelled"
+                db_session.commit()
+                check_cancelled()
+                return super().diarize(path, **kwargs)
+
+        monkeypatch.setattr(tasks_module, "_get_transcriber",
+                            lambda **kwargs: _CountingTranscriber())
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: _CancellingDiarizer(failures=0))
+        db_session.add(TranscriptionJob(id="cancel-mid", filename="a.wav"))
+        db_session.commit()
+
+        result = tasks_module.process_transcription.run("cancel-mid", "/tmp/a.wav", "a.wav")
+
+        assert result["status"] == "cancelled"
+        assert not (tmp_path / "cancel-mid").exists()
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "cancel-mid").status == "cancelled"
+        assert db_session.query(Segment).filter(Segment.job_id == "cancel-mid").count() == 0
+
+    def test_cancel_after_last_check_is_not_overwritten(self, db_session, pipeline, monkeypatch):
+        """A cancel committed just before the results are saved should win."""
+        import app.tasks.tasks as tasks_module
+        report_stage = tasks_module.report_stage
+
+        def cancel_on_save(job, stage):
+            if stage == "saving":
+                db_session.get(TranscriptionJob, "cancel-late").status = "cancelled"
+                db_session.commit()
+            report_stage(job, stage)
+
+        monkeypatch.setattr(tasks_module, "report_stage", cancel_on_save)
+        monkeypatch.setattr(tasks_module, "_get_transcriber",
+                            lambda **kwargs: _CountingTranscriber())
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: _FlakyDiarizer(failures=0))
+        db_session.add(TranscriptionJob(id="cancel-late", filename="a.wav"))
+        db_session.commit()
+
+        result = tasks_module.process_transcription.run("cancel-late", "/tmp/a.wav", "a.wav")
+
+        assert result["status"] == "cancelled"
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "cancel-late").status == "cancelled"
+        assert db_session.query(Segment).filter(Segment.job_id == "cancel-late").count() == 0
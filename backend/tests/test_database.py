@@ -0,0 +1,162 @@
+"""Tests for the dialect-aware database engine layer."""
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.utils.database as database
+from app.config import settings
+from app.models import Base, TranscriptionJob
+from app.utils.database import (
+    engine_options,
+    get_async_database_url,
+    get_async_engine,
+    get_database_engine,
+    is_sqlite,
+    normalize_database_url,
+)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL or is_sqlite(TEST_DATABASE_URL),
+    reason="set TEST_DATABASE_URL to a PostgreSQL database"
+)
+
+
+@pytest.fixture
+def fresh_engines(monkeypatch):
+    """Isolate the engine caches, disposing engines a test created."""
+    engines, async_engines = {}, {}
+    monkeypatch.setattr(database, "_engines", engines)
+    monkeypatch.setattr(database, "_async_engines", async_engines)
+    yield
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, fresh_engines):
+    """An empty SQLite "replica" that read-only handlers are routed to."""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(settings, "DATABASE_READ_URL", url)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestDatabaseUrls:
+    """Tests for URL helpers."""
+
+    def test_normalizes_postgres_scheme(self):
+        """Should accept the postgres:// scheme."""
+        assert normalize_database_url("postgres://u:p@db/echo") == "postgresql://u:p@db/echo"
+
+    def test_async_driver_per_dialect(self):
+        """Should pick aiosqlite for SQLite and asyncpg for PostgreSQL."""
+        assert get_async_database_url("sqlite:///./a.db") == "sqlite+aiosqlite:///./a.db"
+        url = get_async_database_url("postgresql+psycopg2://u:p@db:5432/echo")
+        assert url == "postgresql+asyncpg://u:p@db:5432/echo"
+        url = get_async_database_url("postgres://u:p@db/echo")
+        assert url == "postgresql+asyncpg://u:p@db/echo"
+
+
+class TestEngineOptions:
+    """Tests for per-dialect engine options."""
+
+    def test_sqlite_options(self):
+        """SQLite should get thread-safe connections and no pool sizing."""
+        options = engine_options("sqlite:///./a.db")
+
+        assert options["connect_args"]["check_same_thread"] is False
+        assert "pool_size" not in options
+
+    def test_postgres_options(self, monkeypatch):
+        """PostgreSQL should get a sized, pre-pinged pool and no SQLite arguments."""
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+
+        options = engine_options("postgresql://u:p@db/echo")
+
+        assert options["pool_size"] == 7
+        assert options["pool_pre_ping"] is True
+        assert "connect_args" not in options
+
+    def test_sqlite_pragmas_applied(self, tmp_path, fresh_engines):
+        """New SQLite connections should use WAL journaling and a busy timeout."""
+        engine = get_database_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            busy_timeout = conn.execute(text("PRAGMA busy_timeout")).scalar()
+            assert busy_timeout == settings.SQLITE_BUSY_TIMEOUT * 1000
+
+    def test_engines_cached_per_url(self, tmp_path, fresh_engines):
+        """Should build one engine per URL."""
+        url = f"sqlite:///{tmp_path / 'cached.db'}"
+
+        assert get_database_engine(url) is get_database_engine(url)
+        other = f"sqlite:///{tmp_path / 'other.db'}"
+        assert get_database_engine(url) is not get_database_engine(other)
+
+
+class TestReadRouting:
+    """Tests for routing read-only handlers to DATABASE_READ_URL."""
+
+    def test_read_only_engine_uses_replica(self, replica):
+        """Read-only sessions should bind to the replica, writes to the primary."""
+        assert str(get_async_engine(read_only=True).url).endswith("replica.db")
+        assert str(get_async_engine().url) == get_async_database_url(settings.DATABASE_URL)
+
+    def test_without_replica_reads_use_primary(self, fresh_engines, monkeypatch):
+        """Without a replica URL, read-only sessions should share the primary engine."""
+        monkeypatch.setattr(settings, "DATABASE_READ_URL", "")
+
+        assert get_async_engine(read_only=True) is get_async_engine()
+
+    def test_history_reads_replica(self, test_client, replica):
+        """History should list what the replica holds."""
+        replica.add(TranscriptionJob(id="replica-only", filename="r.wav", status="completed"))
+        replica.commit()
+
+        jobs = test_client.get("/api/v1/history").json()["jobs"]
+
+        assert [job["job_id"] for job in jobs] == ["replica-only"]
+
+    def test_job_status_falls_back_to_primary(self, test_client, db_session, replica):
+        """A job the replica has not caught up with should be read from the primary."""
+        db_session.add(TranscriptionJob(id="primary-only", filename="p.wav", status="completed"))
+        db_session.commit()
+
+        response = test_client.get("/api/v1/jobs/primary-only")
+
+        assert response.status_code == 200
+        assert response.json()["result"]["segments"] == []
+        assert test_client.get("/api/v1/jobs/nowhere").status_code == 404
+
+
+@requires_postgres
+class TestPostgres:
+    """Tests against a real PostgreSQL server (TEST_DATABASE_URL)."""
+
+    def test_pooled_engine(self, fresh_engines):
+        """Should connect through a sized, pre-pinged pool."""
+        engine = get_database_engine(TEST_DATABASE_URL)
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert engine.pool._pre_ping is True
+
+    def test_server_default_diarize(self, db_session):
+        """Rows inserted without diarize should default to true server-side."""
+        db_session.execute(text(
+            "INSERT INTO transcriptionjob (id, filename, status) "
+            "VALUES ('pg-default', 'a.wav', 'queued')"
+        ))
+        db_session.commit()
+
+        assert db_session.get(TranscriptionJob, "pg-default").diarize is True
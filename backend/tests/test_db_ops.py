@@ -0,0 +1,41 @@
+"""Tests for database operation utilities."""
+from app.models import TranscriptionJob
+from app.utils.checkpoints import get_checkpoint_store
+from app.utils.db_ops import chunked, delete_jobs_bulk
+
+
+class TestChunked:
+    """Tests for chunked function."""
+
+    def test_splits_into_chunks(self):
+        """Should split a list into chunks of the given size."""
+        assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+    def test_empty_list(self):
+        """Should return no chunks for an empty list."""
+        assert chunked([], 3) == []
+
+
+class TestDeleteJobsBulk:
+    """Tests for delete_jobs_bulk function."""
+
+    def test_deletes_across_batches(self, db_session):
+        """Should delete every matching job when it spans several batches."""
+        for i in range(7):
+            db_session.add(TranscriptionJob(
+                id=f"batch-job-{i}",
+                original_path=f"/tmp/batch-job-{i}.mp3",
+                status="batch-test"
+            ))
+        db_session.commit()
+
+        deleted, paths, task_ids = delete_jobs_bulk(db_session, status="batch-test", batch_size=3)
+
+        assert sorted(deleted) == sorted(f"batch-job-{i}" for i in range(7))
+        store = get_checkpoint_store()
+        expected = [f"/tmp/batch-job-{i}.mp3" for i in range(7)]
+        expected.extend(store.job_dir(f"batch-job-{i}") for i in range(7))
+        assert sorted(paths) == sorted(expected)
+        assert task_ids == []
+        assert db_session.query(TranscriptionJob).filter(
+            TranscriptionJob.status == "batch-test").count() == 0
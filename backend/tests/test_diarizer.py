@@ -0,0 +1,76 @@
+"""Tests for the speaker diarization service."""
+from types import SimpleNamespace
+
+from app.services.diarizer import Diarizer, label_single_speaker
+
+
+class _FakeAnnotation:
+    """Stand-in for a pyannote Annotation with two speaker turns."""
+
+    def itertracks(self, yield_label=False):
+        yield SimpleNamespace(start=0.0, end=2.0), None, "SPEAKER_00"
+        yield SimpleNamespace(start=2.0, end=4.0), None, "SPEAKER_01"
+
+
+class _FakePipeline:
+    """Stand-in for a pyannote pipeline that records its arguments."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, audio_path, **kwargs):
+        self.calls.append(kwargs)
+        return _FakeAnnotation()
+
+
+class TestDiarize:
+    """Tests for Diarizer.diarize."""
+
+    def test_passes_speaker_hints(self):
+        """Should forward only the speaker-count hints that were given."""
+        diarizer = Diarizer()
+        diarizer.pipeline = _FakePipeline()
+
+        result = diarizer.diarize("audio.wav", num_speakers=2)
+
+        assert diarizer.pipeline.calls == [{"num_speakers": 2}]
+        assert result["num_speakers"] == 2
+
+    def test_unconstrained_by_default(self):
+        """Should call the pipeline without hints by default."""
+        diarizer = Diarizer()
+        diarizer.pipeline = _FakePipeline()
+
+        diarizer.diarize("audio.wav")
+
+        assert diarizer.pipeline.calls == [{}]
+
+
+class TestAlignSegments:
+    """Tests for Diarizer.align_segments."""
+
+    def test_assigns_speaker_with_most_overlap(self):
+        """Each segment should get the speaker it overlaps most."""
+        diarization = [
+            {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00"},
+            {"start": 2.0, "end": 4.0, "speaker": "SPEAKER_01"},
+        ]
+        transcript = [
+            {"start": 0.0, "end": 1.5, "text": "hi"},
+            {"start": 1.8, "end": 3.9, "text": "hello"},
+        ]
+
+        aligned = Diarizer().align_segments(transcript, diarization)
+
+        assert [seg["speaker"] for seg in aligned] == ["SPEAKER_00", "SPEAKER_01"]
+
+
+class TestLabelSingleSpeaker:
+    """Tests for label_single_speaker function."""
+
+    def test_labels_every_segment(self):
+        """Should label all segments with the default speaker."""
+        aligned = label_single_speaker([{"start": 0.0, "end": 1.0, "text": "hi"}])
+
+        assert aligned == [{"start": 0.0, "end": 1.0, "text": "hi",
+                            "speaker": "SPEAKER_00", "confidence": 0.95}]
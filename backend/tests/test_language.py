@@ -0,0 +1,99 @@
+"""Tests for the language-detection pre-pass."""
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models import TranscriptionJob
+from app.services.language import (
+    LANGUAGE_CACHE_PREFIX,
+    choose_model,
+    detect_language,
+    english_variant,
+)
+
+
+class _FakeDetector:
+    """Transcriber stand-in with a fixed detection result."""
+
+    def __init__(self, language="en", probability=0.97):
+        self.result = (language, probability)
+        self.calls = 0
+
+    def detect_language(self, samples):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def audio_file(tmp_path, monkeypatch):
+    """An audio file whose head is decoded without ffmpeg."""
+    import app.services.language as language_module
+    monkeypatch.setattr(language_module, "load_audio_head",
+                        lambda path, seconds: np.zeros(16000, dtype=np.float32))
+    path = tmp_path / "talk.flac"
+    path.write_bytes(b"fLaC" + b"\0" * 64)
+    return str(path)
+
+
+class TestChooseModel:
+    """Tests for model routing."""
+
+    def test_routes_confident_english_to_en_variant(self):
+        """Confident English should use the .en checkpoint."""
+        assert choose_model("small", "en", 0.95, threshold=0.8) == "small.en"
+
+    def test_keeps_model_when_unsure_or_not_english(self):
+        """Low confidence or other languages should keep the requested model."""
+        assert choose_model("small", "en", 0.6, threshold=0.8) == "small"
+        assert choose_model("small", "de", 0.99, threshold=0.8) == "small"
+
+    def test_large_has_no_english_variant(self):
+        """Models without a .en checkpoint should be left alone."""
+        assert english_variant("large-v3") is None
+        assert choose_model("large-v3", "en", 0.99, threshold=0.8) == "large-v3"
+
+
+class TestDetectLanguage:
+    """Tests for detect_language function."""
+
+    def test_caches_by_content_hash(self, audio_file, fake_redis):
+        """A second detection on the same audio should come from the cache."""
+        detector = _FakeDetector()
+
+        first = detect_language(audio_file, detector, cache=fake_redis)
+        second = detect_language(audio_file, detector, cache=fake_redis)
+
+        assert first == second == {"language": "en", "probability": 0.97}
+        assert detector.calls == 1
+        key = next(iter(fake_redis.values))
+        assert key.startswith(LANGUAGE_CACHE_PREFIX)
+        assert fake_redis.expiry[key] == settings.LANGUAGE_CACHE_TTL
+
+    def test_works_without_cache(self, audio_file):
+        """Detection should not require a cache."""
+        assert detect_language(audio_file, _FakeDetector("fr", 0.9)) == {
+            "language": "fr", "probability": 0.9
+        }
+
+
+class TestRouteLanguage:
+    """Tests for route_language in the transcription task."""
+
+    def test_records_language_and_routed_model(self, db_session, audio_file,
+                                               fake_redis, monkeypatch):
+        """The job should record the detection and the model it was routed to."""
+        import app.tasks.batching as batching_module
+        import app.tasks.tasks as tasks_module
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: _FakeDetector())
+        monkeypatch.setattr(batching_module, "get_redis", lambda: fake_redis)
+        job = TranscriptionJob(id="language-job", filename="talk.flac", model="base")
+        db_session.add(job)
+        db_session.commit()
+
+        language, model = tasks_module.route_language(db_session, job, audio_file, "base")
+
+        assert (language, model) == ("en", "base.en")
+        db_session.expire_all()
+        job = db_session.get(TranscriptionJob, "language-job")
+        assert (job.language, job.model) == ("en", "base.en")
+        assert job.language_probability == pytest.approx(0.97)
@@ -0,0 +1,214 @@
+"""Tests for the pipelined worker mode."""
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models import Segment, TranscriptionJob
+from app.tasks.pipeline import PIPELINE_JOBS_KEY, PipelineWorker, enqueue_pipeline_job
+
+
+class _Stages:
+    """Fake decode, transcription and diarization that record their overlap."""
+
+    def __init__(self, decode_time=0.0, infer_time=0.0, fail=(), interrupt=()):
+        self.decode_time = decode_time
+        self.infer_time = infer_time
+        self.fail = set(fail)
+        self.interrupt = set(interrupt)
+        self.events = []
+        self.decoded = 0
+        self.inferring = 0
+        self.max_waiting = 0
+        self.lock = threading.Lock()
+
+    def load_audio(self, path, seconds=None):
+        time.sleep(self.decode_time)
+        with self.lock:
+            self.decoded += 1
+            self.max_waiting = max(self.max_waiting, self.decoded - self.inferring)
+            self.events.append(("decoded", path, time.perf_counter()))
+            marker = self.decoded
+        return np.full(32000, marker, dtype=np.float32)
+
+    def transcribe_samples(self, samples, language=None):
+        with self.lock:
+            self.inferring += 1
+            self.events.append(("infer", int(samples[0]), time.perf_counter()))
+        time.sleep(self.infer_time)
+        if int(samples[0]) in self.fail:
+            raise RuntimeError("decoder crashed")
+        if int(samples[0]) in self.interrupt:
+            raise KeyboardInterrupt
+        segments = [{"start": 0.0, "end": 2.0, "text": "hello", "confidence": 0.9}]
+        return {"text": "hello", "segments": segments}
+
+    def diarize_samples(self, samples, **kwargs):
+        segments = [{"start": 0.0, "end": 2.0, "speaker": "SPEAKER_00"}]
+        return {"segments": segments, "num_speakers": 1}
+
+    def align_segments(self, transcript, diarization):
+        return [{**seg, "speaker": "SPEAKER_00"} for seg in transcript]
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Route the worker's decode and models to fakes and skip the optional passes."""
+    import app.tasks.tasks as tasks_module
+    import app.utils.audio as audio_module
+
+    fake = _Stages()
+    monkeypatch.setattr(audio_module, "load_audio", fake.load_audio)
+    monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: fake)
+    monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: fake)
+    for name, value in (("NORMALIZE_AUDIO", False), ("VAD_ENABLED", False),
+                        ("LANGUAGE_DETECTION", False), ("WINDOWED_MIN_DURATION", 0)):
+        monkeypatch.setattr(settings, name, value)
+    return fake
+
+
+def _queue_jobs(db_session, client, count, prefix="pipe"):
+    ids = []
+    for i in range(count):
+        job_id = f"{prefix}-{i}"
+        db_session.query(Segment).filter(Segment.job_id == job_id).delete()
+        db_session.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).delete()
+        db_session.add(TranscriptionJob(id=job_id, filename=f"{i}.wav"))
+        enqueue_pipeline_job(client, job_id, f"/tmp/{job_id}.wav", f"{i}.wav", model="base")
+        ids.append(job_id)
+    db_session.commit()
+    return ids
+
+
+class TestPipelineWorker:
+    """Tests for PipelineWorker."""
+
+    def test_processes_and_stores_jobs(self, db_session, fake_redis, stages):
+        """Every job should come out completed with its segments and timing."""
+        ids = _queue_jobs(db_session, fake_redis, 3)
+
+        worker = PipelineWorker(fake_redis, block_timeout=0)
+        stats = worker.run(max_jobs=3)
+
+        assert stats["completed"] == 3
+        assert fake_redis.llen(PIPELINE_JOBS_KEY) == 0
+        assert fake_redis.llen(worker.jobs.processing_key) == 0
+        db_session.expire_all()
+        for job_id in ids:
+            job = db_session.get(TranscriptionJob, job_id)
+            assert job.status == "completed"
+            assert job.duration == 2.0
+            assert job.processing_time > 0
+            assert db_session.query(Segment).filter(Segment.job_id == job_id).count() == 1
+
+    def test_decode_overlaps_inference(self, db_session, fake_redis, stages):
+        """The next job should be decoded while the current one is inferred."""
+        stages.decode_time, stages.infer_time = 0.05, 0.1
+        _queue_jobs(db_session, fake_redis, 4)
+
+        stats = PipelineWorker(fake_redis, block_timeout=0).run(max_jobs=4)
+
+        infer_starts = [at for kind, _, at in stages.events if kind == "infer"]
+        decode_ends = [at for kind, _, at in stages.events if kind == "decoded"]
+        # Job 1 was ready before job 0's inference finished
+        assert decode_ends[1] < infer_starts[0] + stages.infer_time
+        # Inference never waited on a decode after the first one
+        assert all(b - a < stages.infer_time + 0.04 for a, b in zip(infer_starts, infer_starts[1:]))
+        assert stats["utilization"] > 0.8
+
+    def test_prefetch_is_bounded(self, db_session, fake_redis, stages):
+        """With slow inference, decoding should run at most the prefetch depth ahead."""
+        stages.infer_time = 0.03
+        _queue_jobs(db_session, fake_redis, 8)
+
+        PipelineWorker(fake_redis, prefetch=1, block_timeout=0).run(max_jobs=8)
+
+        # One job queued, one waiting to be queued and one just taken by inference
+        assert stages.max_waiting <= 3
+
+    def test_failure_only_fails_that_job(self, db_session, fake_redis, stages):
+        """A failed inference should fail its job and let the others complete."""
+        ids = _queue_jobs(db_session, fake_redis, 3)
+        stages.fail = {2}  # the second job decoded
+
+        stats = PipelineWorker(fake_redis, block_timeout=0).run(max_jobs=3)
+
+        assert stats["completed"] == 2 and stats["failed"] == 1
+        db_session.expire_all()
+        assert [db_session.get(TranscriptionJob, job_id).status for job_id in ids] == [
+            "completed", "failed", "completed"
+        ]
+
+    def test_cancelled_jobs_are_not_decoded(self, db_session, fake_redis, stages):
+        """A job cancelled while queued should be dropped before its decode."""
+        ids = _queue_jobs(db_session, fake_redis, 2)
+        db_session.get(TranscriptionJob, ids[0]).status = "cancelled"
+        db_session.commit()
+
+        stats = PipelineWorker(fake_redis, block_timeout=0).run(max_jobs=2)
+
+        assert stats["cancelled"] == 1 and stats["completed"] == 1
+        decoded = [path for kind, path, _ in stages.events if kind == "decoded"]
+        assert decoded == [f"/tmp/{ids[1]}.wav"]
+
+    def test_stopped_worker_requeues_unfinished_jobs(self, db_session, fake_redis, stages):
+        """Jobs still in the pipeline when the worker stops go back on the queue in order."""
+        ids = _queue_jobs(db_session, fake_redis, 3)
+        stages.interrupt = {2}  # stop while inferring the second job
+        worker = PipelineWorker(fake_redis, prefetch=1, block_timeout=0)
+
+        with pytest.raises(KeyboardInterrupt):
+            worker.run(max_jobs=3)
+
+        queued = [json.loads(fake_redis.lpop(PIPELINE_JOBS_KEY))["job_id"] for _ in range(2)]
+        assert queued == ids[1:]
+        assert fake_redis.llen(worker.jobs.processing_key) == 0
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, ids[0]).status == "completed"
+
+    def test_jobs_of_a_dead_worker_are_recovered(self, db_session, fake_redis, stages):
+        """Jobs claimed by a worker without a heartbeat are run on start."""
+        from app.utils.job_queue import ReliableQueue
+
+        ids = _queue_jobs(db_session, fake_redis, 2)
+        dead = ReliableQueue(fake_redis, PIPELINE_JOBS_KEY, worker_id="dead")
+        dead.claim()
+
+        stats = PipelineWorker(fake_redis, block_timeout=0).run(max_jobs=2)
+
+        assert stats["completed"] == 2
+        assert fake_redis.llen(dead.processing_key) == 0
+        db_session.expire_all()
+        assert {db_session.get(TranscriptionJob, job_id).status for job_id in ids} == {"completed"}
+
+
+class TestPipelineRouting:
+    """Tests for sending uploads to the pipelined worker."""
+
+    def test_upload_is_queued_for_the_pipeline(self, test_client, fake_redis, monkeypatch):
+        """With PIPELINE_WORKER set, uploads should skip Celery."""
+        import app.api.v1.routes as routes_module
+        import app.tasks.batching as batching_module
+
+        class _NoCelery:
+            def apply_async(self, *args, **kwargs):
+                raise AssertionError("queued on Celery")
+
+        monkeypatch.setattr(settings, "PIPELINE_WORKER", True)
+        monkeypatch.setattr(batching_module, "get_redis", lambda: fake_redis)
+        monkeypatch.setattr(routes_module, "_process_transcription", _NoCelery())
+
+        response = test_client.post(
+            "/api/v1/transcribe",
+            params={"model": "small", "diarize": False},
+            files={"file": ("talk.wav", b"RIFF" + b"\x00" * 100, "audio/wav")}
+        )
+
+        assert response.status_code == 200
+        assert fake_redis.llen(PIPELINE_JOBS_KEY) == 1
+        payload = json.loads(fake_redis.lpop(PIPELINE_JOBS_KEY))
+        assert payload["job_id"] == response.json()["job_id"]
+        assert payload["model"] == "small" and payload["diarize"] is False
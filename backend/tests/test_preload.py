@@ -0,0 +1,112 @@
+"""Tests for copy-on-write model preloading."""
+import gc
+
+import pytest
+
+from app.config import settings
+from app.tasks.preload import parse_smaps_rollup, read_memory_stats, preload_models
+
+SMAPS = """55d0c0000000-7ffd00000000 ---p 00000000 00:00 0                          [rollup]
+Rss:              524288 kB
+Pss:              262144 kB
+Shared_Clean:     409600 kB
+Shared_Dirty:       8192 kB
+Private_Clean:      4096 kB
+Private_Dirty:    102400 kB
+Referenced:       524288 kB
+"""
+
+
+class TestMemoryStats:
+    """Tests for the smaps_rollup parser."""
+
+    def test_parses_shared_and_private(self):
+        """Should report bytes, with shared and private totals."""
+        stats = parse_smaps_rollup(SMAPS)
+
+        assert stats["rss"] == 512 * 1024 * 1024
+        assert stats["pss"] == 256 * 1024 * 1024
+        assert stats["shared"] == (409600 + 8192) * 1024
+        assert stats["private"] == (4096 + 102400) * 1024
+
+    def test_reads_own_process(self):
+        """Should read this process's stats where /proc is available."""
+        stats = read_memory_stats()
+        if stats is None:
+            pytest.skip("/proc/self/smaps_rollup is not available")
+
+        assert stats["rss"] >= stats["private"] > 0
+
+
+class _FakeModel:
+    """Service stand-in that records loads."""
+
+    def __init__(self, name):
+        self.model_name = name
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return object()
+
+
+class TestPreloadModels:
+    """Tests for preload_models function."""
+
+    @pytest.fixture
+    def services(self, monkeypatch):
+        """Replace the task module's lazy loaders with fakes."""
+        import app.tasks.tasks as tasks_module
+        transcribers = {}
+        diarizer = _FakeModel("pyannote/speaker-diarization")
+
+        def get_transcriber(model="base", engine=None):
+            return transcribers.setdefault(model, _FakeModel(model))
+
+        monkeypatch.setattr(tasks_module, "_get_transcriber", get_transcriber)
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: diarizer)
+        monkeypatch.setattr(settings, "TRANSCRIPTION_ENGINE", "whisper")
+        monkeypatch.setattr(settings, "WHISPER_DEVICE", "cpu")
+        yield transcribers, diarizer
+        gc.unfreeze()
+
+    def test_loads_whisper_and_pyannote(self, services, monkeypatch):
+        """Should load the default and language-detection models and the diarizer."""
+        transcribers, diarizer = services
+        monkeypatch.setattr(settings, "WHISPER_MODEL", "small")
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", True)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION_MODEL", "tiny")
+
+        loaded = preload_models()
+
+        assert loaded == [
+            "whisper:small", "whisper:tiny", "whisper:small.en", "pyannote/speaker-diarization"
+        ]
+        assert transcribers["small"].loads == 1
+        assert diarizer.loads == 1
+
+    def test_skips_missing_english_variant(self, services, monkeypatch):
+        """Models without an English-only checkpoint should not get one loaded."""
+        monkeypatch.setattr(settings, "WHISPER_MODEL", "large-v3")
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", True)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION_MODEL", "tiny")
+
+        loaded = preload_models()
+
+        assert loaded == ["whisper:large-v3", "whisper:tiny", "pyannote/speaker-diarization"]
+
+    def test_skips_faster_whisper(self, services, monkeypatch):
+        """CTranslate2 models should be left to the children."""
+        transcribers, _ = services
+        monkeypatch.setattr(settings, "TRANSCRIPTION_ENGINE", "faster-whisper")
+
+        loaded = preload_models()
+
+        assert transcribers == {}
+        assert loaded == ["pyannote/speaker-diarization"]
+
+    def test_skips_gpu_workers(self, services, monkeypatch):
+        """Nothing should be preloaded on CUDA."""
+        monkeypatch.setattr(settings, "WHISPER_DEVICE", "cuda")
+
+        assert preload_models() == []
@@ -1,4 +1,6 @@
 """Tests for API routes (mocked tests)."""
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
@@ -72,6 +74,35 @@ class TestGetJobStatus:
 
         assert response.status_code == 404
 
+    def test_running_job_served_from_status_store(self, test_client, db_session, status_store):
+        """Should answer with the live stage while the row still says queued."""
+        from app.models import TranscriptionJob
+        job = TranscriptionJob(id="hot-job", filename="a.wav")
+        db_session.add(job)
+        db_session.commit()
+        status_store.publish(job, "processing", stage="diarization", progress=0.57)
+
+        data = test_client.get("/api/v1/jobs/hot-job").json()
+
+        assert data["status"] == "processing"
+        assert data["stage"] == "diarization"
+        assert data["progress"] == 0.57
+        assert data["filename"] == "a.wav"
+
+    def test_terminal_entry_falls_back_to_database(self, test_client, db_session, status_store):
+        """A finished job should be read from the database."""
+        from app.models import TranscriptionJob
+        job = TranscriptionJob(id="done-job", filename="a.wav", status="failed")
+        db_session.add(job)
+        db_session.commit()
+        status_store.publish(job, "processing")
+        status_store.update("done-job", status="failed")
+
+        data = test_client.get("/api/v1/jobs/done-job").json()
+
+        assert data["status"] == "failed"
+        assert data["error"] == "Transcription failed"
+
 
 class TestGetHistory:
     """Tests for the history endpoint."""
@@ -92,6 +123,21 @@ class TestGetHistory:
 
         assert response.status_code == 200
 
+    def test_history_shows_live_status(self, test_client, db_session, status_store):
+        """Unfinished jobs should be listed with their live status."""
+        from datetime import datetime, timezone
+        from app.models import TranscriptionJob
+        job = TranscriptionJob(id="history-hot", filename="a.wav",
+                               created_at=datetime(2100, 1, 1, tzinfo=timezone.utc))
+        db_session.add(job)
+        db_session.commit()
+        status_store.publish(job, "processing")
+
+        jobs = test_client.get("/api/v1/history?limit=1").json()["jobs"]
+
+        assert jobs[0]["job_id"] == "history-hot"
+        assert jobs[0]["status"] == "processing"
+
 
 class TestDeleteJob:
     """Tests for the delete job endpoint."""
@@ -100,4 +146,450 @@ class TestDeleteJob:
         """Should return 404 for non-existent job."""
         response = test_client.delete("/api/v1/jobs/nonexistent-job-id")
 
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+@pytest.fixture
+def transcribe_task(fake_tasks):
+    """The recording stand-in for the transcription task."""
+    return fake_tasks["transcribe"]
+
+
+@pytest.fixture
+def reclaim_task(fake_tasks):
+    """The recording stand-in for the reclamation task."""
+    return fake_tasks["reclaim"]
+
+
+class TestBulkDeleteJobs:
+    """Tests for the bulk delete endpoint."""
+
+    def _add_job(self, db_session, job_id, status="completed", created_at=None):
+        from datetime import datetime, timezone
+        from app.models import TranscriptionJob, Segment
+        job = TranscriptionJob(
+            id=job_id,
+            filename="a.mp3",
+            original_path=f"/tmp/{job_id}.mp3",
+            status=status,
+            created_at=created_at or datetime.now(timezone.utc)
+        )
+        db_session.add(job)
+        db_session.add(Segment(job_id=job_id, start_time=0.0, end_time=1.0,
+                               text="hi", speaker="SPEAKER_00", confidence=0.95))
+        db_session.commit()
+
+    def test_requires_a_selection(self, test_client, reclaim_task):
+        """Should refuse to delete without ids or a filter."""
+        response = test_client.delete("/api/v1/jobs")
+
+        assert response.status_code == 400
+
+    def test_deletes_by_ids(self, test_client, db_session, reclaim_task):
+        """Should delete the given jobs and queue their files."""
+        from app.models import TranscriptionJob, Segment
+        self._add_job(db_session, "bulk-ids-1")
+        self._add_job(db_session, "bulk-ids-2")
+
+        response = test_client.delete(
+            "/api/v1/jobs", params={"ids": ["bulk-ids-1", "bulk-ids-2", "missing"]}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["deleted"] == 2
+        # Each job's upload and its (possibly absent) checkpoint directory
+        assert response.json()["files_queued"] == 4
+        assert len(reclaim_task.calls) == 1
+        db_session.expire_all()
+        assert db_session.query(TranscriptionJob).filter(
+            TranscriptionJob.id.in_(["bulk-ids-1", "bulk-ids-2"])).count() == 0
+        assert db_session.query(Segment).filter(
+            Segment.job_id.in_(["bulk-ids-1", "bulk-ids-2"])).count() == 0
+
+    def test_deletes_by_status_and_age(self, test_client, db_session, reclaim_task):
+        """Should only delete jobs matching both filters."""
+        from datetime import datetime
+        from app.models import TranscriptionJob
+        old = datetime(2000, 1, 1)
+        self._add_job(db_session, "bulk-old-failed", status="failed", created_at=old)
+        self._add_job(db_session, "bulk-old-done", status="completed", created_at=old)
+        self._add_job(db_session, "bulk-new-failed", status="failed")
+
+        response = test_client.delete(
+            "/api/v1/jobs", params={"status": "failed", "older_than": "2001-01-01T00:00:00"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["deleted"] == 1
+        db_session.expire_all()
+        remaining = {job.id for job in db_session.query(TranscriptionJob).all()}
+        assert "bulk-old-failed" not in remaining
+        assert {"bulk-old-done", "bulk-new-failed"} <= remaining
+
+    def test_clears_hot_status(self, test_client, db_session, reclaim_task, status_store):
+        """A deleted queued job should no longer be served from the status store."""
+        from app.models import TranscriptionJob
+        self._add_job(db_session, "bulk-queued", status="queued")
+        job = db_session.get(TranscriptionJob, "bulk-queued")
+        status_store.publish(job, "processing")
+
+        response = test_client.delete("/api/v1/jobs", params={"ids": ["bulk-queued"]})
+
+        assert response.json()["deleted"] == 1
+        assert status_store.get("bulk-queued") is None
+        assert test_client.get("/api/v1/jobs/bulk-queued").status_code == 404
+
+    def test_revokes_unfinished_tasks(self, test_client, db_session, fake_tasks):
+        """Queued and running jobs should have their tasks revoked, finished ones not."""
+        from app.models import TranscriptionJob
+        self._add_job(db_session, "bulk-revoke-queued", status="queued")
+        self._add_job(db_session, "bulk-revoke-done")
+        for job_id in ("bulk-revoke-queued", "bulk-revoke-done"):
+            db_session.get(TranscriptionJob, job_id).task_id = f"task-{job_id}"
+        db_session.commit()
+
+        response = test_client.delete(
+            "/api/v1/jobs", params={"ids": ["bulk-revoke-queued", "bulk-revoke-done"]}
+        )
+
+        assert response.json()["deleted"] == 2
+        assert fake_tasks["revoked"] == ["task-bulk-revoke-queued"]
+
+    def test_rejects_statuses_that_are_never_stored(self, test_client, reclaim_task):
+        """Running statuses only live in the status store and cannot be selected."""
+        response = test_client.delete("/api/v1/jobs", params={"status": "processing"})
+
+        assert response.status_code == 400
+        assert reclaim_task.calls == []
+
+
+class TestTranscribeUpload:
+    """Tests for the upload endpoint."""
+
+    def test_upload_creates_queued_job(self, test_client, transcribe_task):
+        """Should store the upload, create the job and queue it."""
+        response = test_client.post(
+            "/api/v1/transcribe",
+            files={"file": ("clip.wav", b"RIFF" + b"\0" * 1024, "audio/wav")}
+        )
+
+        assert response.status_code == 200
+        job_id = response.json()["job_id"]
+        assert len(transcribe_task.calls) == 1
+        args, _ = transcribe_task.calls[0]
+        assert args[0] == job_id
+        assert os.path.getsize(args[1]) == 1028
+
+        status = test_client.get(f"/api/v1/jobs/{job_id}")
+        assert status.json()["status"] == "queued"
+        assert status.json()["filename"] == "clip.wav"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_uploads_and_polls(self, test_client, transcribe_task):
+        """Uploads and status polls should be served concurrently on one loop."""
+        import asyncio
+        import httpx
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            uploads = [
+                client.post(
+                    "/api/v1/transcribe",
+                    files={"file": (f"clip{i}.wav", b"\0" * (256 * 1024), "audio/wav")}
+                )
+                for i in range(10)
+            ]
+            polls = [client.get("/api/v1/history") for _ in range(20)]
+            responses = await asyncio.gather(*uploads, *polls)
+
+        assert all(r.status_code == 200 for r in responses)
+        assert len(transcribe_task.calls) == 10
+
+
+class TestIdempotentUpload:
+    """Tests for uploads with an Idempotency-Key."""
+
+    def _upload(self, client, key, content=b"RIFF" + b"\0" * 1024, **params):
+        return client.post(
+            "/api/v1/transcribe",
+            params=params,
+            files={"file": ("clip.wav", content, "audio/wav")},
+            headers={"Idempotency-Key": key}
+        )
+
+    def test_retry_returns_original_job(self, test_client, transcribe_task):
+        """A retry with the same key and payload should not create or queue a job."""
+        first = self._upload(test_client, "key-retry")
+        second = self._upload(test_client, "key-retry")
+
+        assert second.status_code == 200
+        assert second.json()["job_id"] == first.json()["job_id"]
+        assert second.json()["status"] == "queued"
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert len(transcribe_task.calls) == 1
+        uploads = [name for name in os.listdir(settings.UPLOAD_DIR)
+                   if name.startswith(first.json()["job_id"])]
+        assert len(uploads) == 1
+
+    def test_key_reused_with_different_payload(self, test_client, transcribe_task):
+        """Another file or other parameters under the same key should be rejected."""
+        self._upload(test_client, "key-reused")
+
+        other_file = b"RIFF" + b"\1" * 1024
+        assert self._upload(test_client, "key-reused", content=other_file).status_code == 422
+        assert self._upload(test_client, "key-reused", model="small").status_code == 422
+        assert len(transcribe_task.calls) == 1
+
+    def test_expired_key_creates_new_job(self, test_client, transcribe_task, monkeypatch):
+        """A key past its TTL should be forgotten."""
+        monkeypatch.setattr(settings, "IDEMPOTENCY_KEY_TTL", 0)
+
+        first = self._upload(test_client, "key-expired")
+        second = self._upload(test_client, "key-expired")
+
+        assert second.json()["job_id"] != first.json()["job_id"]
+        assert len(transcribe_task.calls) == 2
+
+    def test_concurrent_retry_loses_race(self, test_client, transcribe_task, monkeypatch):
+        """A request beaten to the commit should return the winner's job."""
+        import app.api.v1.routes as routes_module
+        first = self._upload(test_client, "key-race")
+        find = routes_module.find_idempotency_key
+        calls = []
+
+        async def find_after_upload(db, key):
+            # The first lookup happens before the other request committed
+            calls.append(key)
+            return None if len(calls) == 1 else await find(db, key)
+
+        monkeypatch.setattr(routes_module, "find_idempotency_key", find_after_upload)
+        uploads = set(os.listdir(settings.UPLOAD_DIR))
+        second = self._upload(test_client, "key-race")
+
+        assert second.status_code == 200
+        assert second.json()["job_id"] == first.json()["job_id"]
+        assert len(transcribe_task.calls) == 1
+        # The loser's copy of the upload is removed
+        assert set(os.listdir(settings.UPLOAD_DIR)) == uploads
+
+
+class TestSpeakerRoutes:
+    """Tests for the speaker identification endpoints."""
+
+    @pytest.fixture
+    def speaker_index(self, tmp_path, monkeypatch):
+        """Enable a fresh speaker index for the test."""
+        import app.services.speaker_index as index_module
+        monkeypatch.setattr(settings, "SPEAKER_INDEX_ENABLED", True)
+        index = index_module.SpeakerIndex(str(tmp_path / "index"), dim=4)
+        monkeypatch.setattr(index_module, "_index", index)
+        return index
+
+    def test_disabled_index_returns_404(self, test_client):
+        """Should 404 when the speaker index is disabled."""
+        response = test_client.get("/api/v1/jobs/some-job/speakers")
+
+        assert response.status_code == 404
+
+    def test_enroll_then_identify(self, test_client, speaker_index):
+        """An enrolled voice should label the matching speaker in another job."""
+        speaker_index.add_job("job-a", {"SPEAKER_00": [1, 0, 0, 0]})
+        speaker_index.add_job("job-b", {"SPEAKER_00": [0, 1, 0, 0], "SPEAKER_01": [0.9, 0.1, 0, 0]})
+
+        response = test_client.post(
+            "/api/v1/speakers/enroll",
+            json={"name": "Alice", "job_id": "job-a", "speaker": "SPEAKER_00"}
+        )
+        assert response.status_code == 200
+
+        response = test_client.get("/api/v1/jobs/job-b/speakers")
+
+        assert response.status_code == 200
+        speakers = {s["speaker"]: s["name"] for s in response.json()["speakers"]}
+        assert speakers == {"SPEAKER_00": None, "SPEAKER_01": "Alice"}
+
+    def test_search_excludes_query_speaker(self, test_client, speaker_index):
+        """Search should return other recordings' speakers, not the query itself."""
+        speaker_index.add_job("job-a", {"SPEAKER_00": [1, 0, 0, 0]})
+        speaker_index.add_job("job-b", {"SPEAKER_00": [1, 0.1, 0, 0]})
+
+        response = test_client.get(
+            "/api/v1/speakers/search", params={"job_id": "job-a", "speaker": "SPEAKER_00", "k": 5}
+        )
+
+        assert response.status_code == 200
+        assert [hit["job_id"] for hit in response.json()["results"]] == ["job-b"]
+
+    def test_search_bounds_k(self, test_client, speaker_index):
+        """Result counts outside 1 to 100 should be refused before searching."""
+        speaker_index.add_job("job-a", {"SPEAKER_00": [1, 0, 0, 0]})
+        params = {"job_id": "job-a", "speaker": "SPEAKER_00"}
+
+        for k in (-5, 0, 101):
+            response = test_client.get("/api/v1/speakers/search", params={**params, "k": k})
+            assert response.status_code == 422
+
+    def test_deleted_jobs_leave_search(self, test_client, db_session, speaker_index, fake_tasks):
+        """Bulk-deleted jobs' speakers are no longer found."""
+        from app.models import TranscriptionJob
+        for job_id in ("job-a", "job-b"):
+            db_session.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).delete()
+            db_session.add(TranscriptionJob(id=job_id, filename="a.wav", status="completed"))
+        db_session.commit()
+        speaker_index.add_job("job-a", {"SPEAKER_00": [1, 0, 0, 0]})
+        speaker_index.add_job("job-b", {"SPEAKER_00": [1, 0.1, 0, 0]})
+
+        assert test_client.delete("/api/v1/jobs", params={"ids": ["job-a"]}).json()["deleted"] == 1
+
+        response = test_client.get(
+            "/api/v1/speakers/search", params={"job_id": "job-b", "speaker": "SPEAKER_00"}
+        )
+        assert response.json()["results"] == []
+        assert test_client.get("/api/v1/jobs/job-a/speakers").status_code == 404
+
+
+class TestDiarizationOptions:
+    """Tests for the upload's diarization options."""
+
+    def test_passes_options_to_task(self, test_client, transcribe_task):
+        """Should queue the job with the requested diarization options."""
+        response = test_client.post(
+            "/api/v1/transcribe",
+            params={"diarize": "false", "num_speakers": 1},
+            files={"file": ("memo.wav", b"\0" * 64, "audio/wav")}
+        )
+
+        assert response.status_code == 200
+        _, kwargs = transcribe_task.calls[0]
+        assert kwargs["diarize"] is False
+        assert kwargs["num_speakers"] == 1
+
+    def test_rejects_conflicting_hints(self, test_client, transcribe_task):
+        """num_speakers should not be combined with a range."""
+        response = test_client.post(
+            "/api/v1/transcribe",
+            params={"num_speakers": 2, "max_speakers": 3},
+            files={"file": ("call.wav", b"\0" * 64, "audio/wav")}
+        )
+
+        assert response.status_code == 400
+        assert transcribe_task.calls == []
+
+    def test_rejects_inverted_range(self, test_client, transcribe_task):
+        """min_speakers should not exceed max_speakers."""
+        response = test_client.post(
+            "/api/v1/transcribe",
+            params={"min_speakers": 4, "max_speakers": 2},
+            files={"file": ("call.wav", b"\0" * 64, "audio/wav")}
+        )
+
+        assert response.status_code == 400
+
+
+class TestRetryJob:
+    """Tests for the job retry endpoint."""
+
+    def test_requeues_failed_job_with_its_options(self, test_client, db_session, transcribe_task):
+        """Should re-queue a failed job with the options it was uploaded with."""
+        from app.models import TranscriptionJob
+        db_session.add(TranscriptionJob(
+            id="retry-failed", filename="talk.wav", original_path="/tmp/talk.wav",
+            status="failed", model="small", diarize=False, max_speakers=3
+        ))
+        db_session.commit()
+
+        response = test_client.post("/api/v1/jobs/retry-failed/retry")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        args, kwargs = transcribe_task.calls[0]
+        assert args[:4] == ("retry-failed", "/tmp/talk.wav", "talk.wav", "small")
+        assert kwargs["diarize"] is False
+        assert kwargs["max_speakers"] == 3
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "retry-failed").status == "queued"
+
+    def test_rejects_job_that_has_not_failed(self, test_client, db_session, transcribe_task):
+        """Should 409 for jobs that are not failed."""
+        from app.models import TranscriptionJob
+        db_session.add(TranscriptionJob(id="retry-done", filename="a.wav", status="completed"))
+        db_session.commit()
+
+        response = test_client.post("/api/v1/jobs/retry-done/retry")
+
+        assert response.status_code == 409
+        assert transcribe_task.calls == []
+
+    def test_unknown_job_returns_404(self, test_client, transcribe_task):
+        """Should 404 for a job that does not exist."""
+        response = test_client.post("/api/v1/jobs/no-such-job/retry")
+
+        assert response.status_code == 404
+
+
+class TestCancelJob:
+    """Tests for the job cancellation endpoint."""
+
+    @pytest.fixture
+    def revoked(self, fake_tasks):
+        """Record revoked task ids instead of broadcasting to workers."""
+        return fake_tasks["revoked"]
+
+    def test_cancels_queued_job(self, test_client, db_session, revoked):
+        """Should mark the job cancelled and revoke its task."""
+        from app.models import TranscriptionJob
+        db_session.add(TranscriptionJob(id="cancel-queued", filename="a.wav", task_id="task-1"))
+        db_session.commit()
+
+        response = test_client.post("/api/v1/jobs/cancel-queued/cancel")
+
+        assert response.status_code == 200
+        assert revoked == ["task-1"]
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "cancel-queued").status == "cancelled"
+
+    def test_cancels_running_job_from_status_store(self, test_client, db_session,
+                                                   status_store, revoked):
+        """A job running per the status store should keep its files for the worker."""
+        import app.api.v1.routes as routes_module
+        from app.models import TranscriptionJob
+        job = TranscriptionJob(id="cancel-running", filename="a.wav", task_id="task-4")
+        db_session.add(job)
+        db_session.commit()
+        status_store.publish(job, "processing", stage="transcription")
+
+        response = test_client.post("/api/v1/jobs/cancel-running/cancel")
+
+        assert response.status_code == 200
+        assert routes_module._reclaim_files.calls == []
+        assert status_store.get("cancel-running") is None
+        assert test_client.get("/api/v1/jobs/cancel-running").json()["status"] == "cancelled"
+
+    def test_rejects_finished_job(self, test_client, db_session, revoked):
+        """Should 409 for a job that already completed."""
+        from app.models import TranscriptionJob
+        db_session.add(TranscriptionJob(id="cancel-done", filename="a.wav", status="completed",
+                                        task_id="task-2"))
+        db_session.commit()
+
+        response = test_client.post("/api/v1/jobs/cancel-done/cancel")
+
+        assert response.status_code == 409
+        assert revoked == []
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "cancel-done").status == "completed"
+
+    def test_cancelled_job_can_be_retried(self, test_client, db_session, revoked,
+                                          transcribe_task):
+        """A retried cancelled job should be queued under a new task id."""
+        from app.models import TranscriptionJob
+        db_session.add(TranscriptionJob(id="cancel-retry", filename="a.wav", task_id="task-3"))
+        db_session.commit()
+
+        test_client.post("/api/v1/jobs/cancel-retry/cancel")
+        response = test_client.post("/api/v1/jobs/cancel-retry/retry")
+
+        assert response.status_code == 200
+        assert len(transcribe_task.calls) == 1
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "cancel-retry").task_id != "task-3"
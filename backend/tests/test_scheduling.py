@@ -0,0 +1,201 @@
+"""Tests for deadline-aware scheduling of new jobs."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.models import JobStatistic, Segment, TranscriptionJob
+from app.utils.scheduling import (
+    faster_models, model_size, plan_job, real_time_factors, resolve_deadline
+)
+from app.utils.stats import record_status_change
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def rtf(monkeypatch):
+    """Use round real-time factors and no safety margin."""
+    monkeypatch.setattr(settings, "MODEL_REAL_TIME_FACTORS",
+                        "tiny=0.1,base=0.2,small=0.5,medium=1,large=2")
+    monkeypatch.setattr(settings, "SCHEDULER_SAFETY_MARGIN", 1.0)
+    monkeypatch.setattr(settings, "SCHEDULER_WORKER_SLOTS", 2)
+
+
+def _queue(session, job_id, seconds, status="queued"):
+    session.add(TranscriptionJob(id=job_id, filename="a.wav", status=status,
+                                 estimated_processing=seconds))
+    record_status_change(session, None, status)
+    session.commit()
+
+
+class TestPlanning:
+    """Tests for the scheduler's estimates and decisions."""
+
+    def test_models(self):
+        """Downgrades keep English-only models English-only."""
+        assert model_size("large-v3") == "large"
+        assert model_size("small.en") == "small"
+        assert faster_models("medium") == ["medium", "small", "base", "tiny"]
+        assert faster_models("base.en") == ["base.en", "tiny.en"]
+        assert faster_models("custom") == ["custom"]
+
+    def test_resolve_deadline(self, monkeypatch):
+        """SLA classes are relative to submission; aware deadlines become naive UTC."""
+        monkeypatch.setattr(settings, "SLA_CLASSES", "interactive=600")
+
+        assert resolve_deadline(None, "interactive", now=NOW) == NOW + timedelta(minutes=10)
+        aware = datetime(2026, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+        assert resolve_deadline(aware, None) == NOW
+        assert resolve_deadline(None, None) is None
+        with pytest.raises(ValueError):
+            resolve_deadline(None, "platinum")
+        with pytest.raises(ValueError):
+            resolve_deadline(NOW, "interactive")
+
+    def test_measured_factors_replace_defaults(self, empty_db, rtf, monkeypatch):
+        """A model's history counts once it covers enough audio."""
+        monkeypatch.setattr(settings, "SCHEDULER_MIN_HISTORY", 100)
+        empty_db.add_all([
+            JobStatistic(metric="processing_seconds", key="small", value=300),
+            JobStatistic(metric="timed_audio_seconds", key="small", value=1000),
+            JobStatistic(metric="processing_seconds", key="medium", value=50),
+            JobStatistic(metric="timed_audio_seconds", key="medium", value=10),
+        ])
+        empty_db.commit()
+
+        factors = real_time_factors(empty_db)
+
+        assert factors["small"] == pytest.approx(0.3)
+        assert factors["medium"] == 1
+
+    def test_accepts_when_deadline_is_met(self, empty_db, rtf):
+        """The backlog is shared by the worker slots."""
+        _queue(empty_db, "a", 400)
+        _queue(empty_db, "b", 200, status="processing")
+        _queue(empty_db, "done", 10000, status="completed")
+
+        decision = plan_job(empty_db, "medium", 100, NOW + timedelta(seconds=400), now=NOW)
+
+        assert decision["action"] == "accepted"
+        assert decision["queue_wait"] == 300
+        assert decision["processing_estimate"] == 100
+        assert decision["estimated_completion"] == (NOW + timedelta(seconds=400)).isoformat()
+
+    def test_margin_is_applied_once(self, empty_db, rtf, monkeypatch):
+        """Queued estimates already carry the margin; only the new job's is scaled."""
+        monkeypatch.setattr(settings, "SCHEDULER_SAFETY_MARGIN", 1.5)
+        _queue(empty_db, "a", 300)
+
+        decision = plan_job(empty_db, "medium", 100, now=NOW)
+
+        assert decision["queue_wait"] == 150
+        assert decision["processing_estimate"] == 150
+        assert decision["estimated_completion"] == (NOW + timedelta(seconds=300)).isoformat()
+
+    def test_downgrades_to_most_accurate_model_that_fits(self, empty_db, rtf):
+        """Under load, the slowest model still meeting the deadline is chosen."""
+        _queue(empty_db, "a", 600)
+
+        decision = plan_job(empty_db, "large", 600, NOW + timedelta(seconds=500), now=NOW)
+
+        assert decision["action"] == "downgraded"
+        assert decision["requested_model"] == "large"
+        assert decision["model"] == "base"
+        assert decision["processing_estimate"] == 120
+
+    def test_rejects_when_no_model_fits(self, empty_db, rtf):
+        """A deadline inside the queue wait cannot be met by any model."""
+        _queue(empty_db, "a", 2000)
+
+        decision = plan_job(empty_db, "large", 60, NOW + timedelta(seconds=500), now=NOW)
+        assert decision["action"] == "rejected"
+        assert plan_job(empty_db, "large", 60, NOW + timedelta(seconds=1100), now=NOW,
+                        allow_downgrade=False)["action"] == "rejected"
+
+    def test_unknown_duration_counts_only_the_queue(self, empty_db, rtf):
+        """Without a duration the job is judged on the queue wait alone."""
+        decision = plan_job(empty_db, "large", None, NOW + timedelta(seconds=10), now=NOW)
+
+        assert decision["action"] == "accepted"
+        assert decision["processing_estimate"] is None
+
+
+class TestDeadlineRoutes:
+    """Tests for deadlines on job submission."""
+
+    @pytest.fixture
+    def tasks(self, fake_tasks, monkeypatch):
+        """Record queued tasks and report a ten-minute recording."""
+        import app.api.v1.routes as routes_module
+        monkeypatch.setattr(routes_module, "audio_duration", lambda path: 600.0)
+        return fake_tasks["transcribe"]
+
+    def _upload(self, client, headers=None, **params):
+        return client.post("/api/v1/transcribe", params=params, headers=headers,
+                           files={"file": ("talk.wav", b"RIFF" + b"\x00" * 100, "audio/wav")})
+
+    def test_downgrade_is_queued_and_recorded(self, test_client, empty_db, rtf, tasks):
+        """The downgraded model is queued and the decision stored on the job."""
+        _queue(empty_db, "backlog", 600)
+        deadline = (datetime.utcnow() + timedelta(seconds=500)).isoformat()
+
+        response = self._upload(test_client, model="large", deadline=deadline)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["model"] == "base"
+        assert body["schedule"]["action"] == "downgraded"
+        job = empty_db.get(TranscriptionJob, body["job_id"])
+        assert job.model == "base"
+        assert job.estimated_processing == 120
+        assert tasks.calls[0][0][3] == "base"
+        status = test_client.get(f"/api/v1/jobs/{body['job_id']}").json()
+        assert status["status"] == "queued"
+
+    def test_rejection_is_recorded(self, test_client, empty_db, rtf, tasks):
+        """A job that cannot make its SLA is refused, kept as rejected and not queued."""
+        _queue(empty_db, "backlog", 10000)
+
+        response = self._upload(test_client, model="small", sla="interactive")
+
+        assert response.status_code == 422
+        detail = response.json()["detail"]
+        assert detail["schedule"]["action"] == "rejected"
+        assert tasks.calls == []
+        job = empty_db.get(TranscriptionJob, detail["job_id"])
+        assert job.status == "rejected"
+        assert job.sla_class == "interactive"
+        assert job.original_path is None
+        status = test_client.get(f"/api/v1/jobs/{job.id}").json()
+        assert status["schedule"]["action"] == "rejected"
+        assert test_client.get("/api/v1/stats").json()["jobs"]["rejected"] == 1
+
+    def test_rejection_is_replayed(self, test_client, empty_db, rtf, tasks):
+        """A retry of a rejected upload gets the same refusal, even once capacity frees up."""
+        _queue(empty_db, "backlog", 10000)
+        headers = {"Idempotency-Key": "key-rejected"}
+        first = self._upload(test_client, headers=headers, model="small", sla="interactive")
+        empty_db.query(TranscriptionJob).filter_by(id="backlog").delete()
+        empty_db.commit()
+
+        retry = self._upload(test_client, headers=headers, model="small", sla="interactive")
+
+        assert first.status_code == retry.status_code == 422
+        assert retry.json()["detail"]["job_id"] == first.json()["detail"]["job_id"]
+        assert empty_db.query(TranscriptionJob).count() == 1
+        assert tasks.calls == []
+
+    def test_jobs_without_deadline_feed_the_backlog(self, test_client, empty_db, rtf, tasks):
+        """Every job's estimate is stored; only deadline jobs get a decision."""
+        body = self._upload(test_client, model="small").json()
+
+        job = empty_db.get(TranscriptionJob, body["job_id"])
+        assert job.estimated_processing == 300
+        assert job.schedule_decision is None
+        assert "schedule" not in body
+
+    def test_bad_deadline_options(self, test_client, empty_db, tasks):
+        """Unknown SLA classes and conflicting options are refused."""
+        assert self._upload(test_client, sla="platinum").status_code == 400
+        assert self._upload(test_client, sla="batch", deadline=NOW.isoformat()).status_code == 400
@@ -0,0 +1,312 @@
+"""Tests for the time-window segment query API, turn compaction and response compression."""
+import gzip
+import json
+import zlib
+
+import pytest
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.config import settings
+from app.models import Segment, TranscriptionJob
+from app.utils.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+from app.utils.segments import compact_turns, decode_cursor, expand_turn, segment_window_query
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+@pytest.fixture
+def long_job(db_session):
+    """A completed job with 2000 five-second segments, alternating speakers."""
+    db_session.query(Segment).filter(Segment.job_id == "segments-job").delete()
+    db_session.query(TranscriptionJob).filter(TranscriptionJob.id == "segments-job").delete()
+    db_session.add(TranscriptionJob(id="segments-job", filename="long.wav", status="completed",
+                                    max_segment_span=5.0))
+    db_session.add_all(
+        Segment(job_id="segments-job", start_time=i * 5.0, end_time=i * 5.0 + 5.0,
+                text=f"segment number {i} of a long recording", speaker=f"SPEAKER_0{i % 2}",
+                confidence=0.9)
+        for i in range(2000)
+    )
+    db_session.commit()
+    return "segments-job"
+
+
+def _url(job_id):
+    return f"/api/v1/jobs/{job_id}/segments"
+
+
+class TestSegmentWindow:
+    """Tests for GET /jobs/{job_id}/segments."""
+
+    def test_window_includes_segment_under_playhead(self, test_client, long_job):
+        """Segments overlapping the window, including one starting before it."""
+        data = test_client.get(_url(long_job), params={"from": 102.5, "to": 115}).json()
+
+        assert [seg["start"] for seg in data["segments"]] == [100.0, 105.0, 110.0]
+        assert data["next_cursor"] is None
+
+    def test_window_includes_long_overlapping_segment(self, test_client, db_session, long_job):
+        """A long segment starting before shorter ones should still reach into the window."""
+        db_session.add(Segment(job_id=long_job, start_time=90.0, end_time=130.0,
+                               text="a long aside", speaker="SPEAKER_02", confidence=0.9))
+        db_session.get(TranscriptionJob, long_job).max_segment_span = 40.0
+        db_session.commit()
+
+        data = test_client.get(_url(long_job), params={"from": 122, "to": 124}).json()
+        assert [seg["start"] for seg in data["segments"]] == [90.0, 120.0]
+
+        params = {"from": 122, "to": 124, "speaker": "SPEAKER_02"}
+        data = test_client.get(_url(long_job), params=params).json()
+        assert [seg["start"] for seg in data["segments"]] == [90.0]
+
+    def test_speaker_filter(self, test_client, long_job):
+        """Should only return the requested speaker's segments."""
+        params = {"from": 0, "to": 50, "speaker": "SPEAKER_01"}
+        data = test_client.get(_url(long_job), params=params).json()
+
+        assert [seg["start"] for seg in data["segments"]] == [5.0, 15.0, 25.0, 35.0, 45.0]
+
+    def test_cursor_pages_through_window(self, test_client, long_job):
+        """Following next_cursor should visit every segment exactly once."""
+        starts, cursor = [], None
+        while True:
+            params = {"from": 1000, "to": 1500, "limit": 30}
+            if cursor:
+                params["cursor"] = cursor
+            data = test_client.get(_url(long_job), params=params).json()
+            starts += [seg["start"] for seg in data["segments"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert starts == [i * 5.0 for i in range(200, 300)]
+
+    def test_page_is_kilobytes(self, test_client, long_job):
+        """A page around the playhead should stay small however long the job is."""
+        page = test_client.get(_url(long_job), params={"from": 5000, "to": 5060})
+        full = test_client.get(f"/api/v1/jobs/{long_job}")
+
+        assert len(page.content) < 4 * 1024
+        assert len(full.content) > 100 * len(page.content)
+
+    def test_errors(self, test_client, db_session, long_job):
+        """Unknown jobs, unfinished jobs and bad arguments should be rejected."""
+        db_session.merge(TranscriptionJob(id="segments-queued", filename="a.wav", status="queued"))
+        db_session.commit()
+
+        assert test_client.get(_url("missing")).status_code == 404
+        assert test_client.get(_url("segments-queued")).status_code == 409
+        assert test_client.get(_url(long_job), params={"cursor": "not-a-cursor"}).status_code == 400
+        assert test_client.get(_url(long_job), params={"from": 10, "to": 5}).status_code == 400
+        assert test_client.get(_url(long_job), params={"limit": 100000}).status_code == 422
+
+    def test_ndjson_stream(self, test_client, long_job):
+        """Streaming should send one segment per line across internal pages."""
+        response = test_client.get(_url(long_job), headers=NDJSON)
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2000
+        assert lines[-1]["start"] == 9995.0
+
+    def test_ndjson_limit_ends_with_cursor(self, test_client, long_job):
+        """A limited stream should end with the cursor of the rest."""
+        params = {"from": 0, "to": 100, "limit": 5}
+        response = test_client.get(_url(long_job), params=params, headers=NDJSON)
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["start"] for line in lines[:5]] == [0.0, 5.0, 10.0, 15.0, 20.0]
+        assert decode_cursor(lines[5]["next_cursor"])[0] == 20.0
+
+    def test_gzip_negotiated(self, test_client, long_job):
+        """Large responses should be gzip-compressed when the client accepts it."""
+        response = test_client.get(_url(long_job), params={"limit": 500},
+                                   headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(response.content) / 4
+        assert len(response.json()["segments"]) == 500
+
+    def test_query_uses_index(self, db_session):
+        """The window query should be served from the (job_id, start_time) index."""
+        query = segment_window_query("segments-job", 100.0, 200.0, max_span=5.0)
+        compiled = query.compile(compile_kwargs={"literal_binds": True})
+
+        rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        plan = " ".join(str(row[-1]) for row in rows)
+
+        assert "ix_segment_job_id_start_time" in plan
+        # The range is bounded on both sides, not read from the job's start
+        assert "start_time>? AND start_time<?" in plan
+        assert "SCAN segment" not in plan
+
+
+def _interview(count=60, turn=10):
+    """Two-second segments with half-second pauses, changing speaker every ``turn`` segments."""
+    return [
+        {"start": i * 2.5, "end": i * 2.5 + 2.0, "text": f" answer part {i} goes on a while",
+         "speaker": f"SPEAKER_0{(i // turn) % 2}", "confidence": 0.8 + (i % 3) * 0.05}
+        for i in range(count)
+    ]
+
+
+class TestTurnCompaction:
+    """Tests for storing speaker turns instead of segments."""
+
+    def test_merges_within_limits(self):
+        """Turns break on a speaker change, a long pause or the length limit."""
+        segments = _interview(6, turn=3)
+        segments[2]["start"] += 5
+        segments[2]["end"] += 5
+
+        turns = compact_turns(segments, max_gap=1.0, max_duration=60)
+        assert [(t["start"], t["end"]) for t in turns] == [(0.0, 4.5), (10.0, 12.0), (7.5, 14.5)]
+        assert turns[1] is segments[2] and "boundaries" not in turns[1]
+
+        turns = compact_turns(_interview(6, turn=6), max_gap=1.0, max_duration=7)
+        assert [len(t["boundaries"]) // 3 for t in turns] == [3, 3]
+
+    def test_expand_restores_segments(self):
+        """A turn's boundaries give back each segment's times and text."""
+        segments = _interview(4, turn=4)
+
+        turn, = compact_turns(segments, max_gap=1.0, max_duration=60)
+
+        assert turn["text"].startswith("answer part 0 goes on a while answer part 1")
+        assert turn["boundaries"][:6] == [0, 2000, 0, 2500, 4500, 30]
+        assert turn["confidence"] == pytest.approx(sum(s["confidence"] for s in segments) / 4)
+        assert [(s["start"], s["end"], s["text"]) for s in expand_turn(turn)] == [
+            (s["start"], s["end"], s["text"].strip()) for s in segments
+        ]
+
+    def test_stored_and_served_as_turns(self, test_client, db_session, monkeypatch):
+        """Compacted jobs store far fewer rows and list far smaller segments."""
+        from app.tasks.tasks import save_results
+
+        sizes = {}
+        for compact in (False, True):
+            job_id = f"turns-{compact}"
+            db_session.query(Segment).filter(Segment.job_id == job_id).delete()
+            db_session.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).delete()
+            job = TranscriptionJob(id=job_id, filename="interview.wav", status="processing")
+            db_session.add(job)
+            db_session.commit()
+            monkeypatch.setattr(settings, "TURN_COMPACTION", compact)
+
+            save_results(db_session, job, _interview(), duration=150.0)
+
+            rows = db_session.query(Segment).filter(Segment.job_id == job_id).count()
+            assert rows == (6 if compact else 60)
+            assert job.speakers_detected == 2
+            result = test_client.get(f"/api/v1/jobs/{job_id}").json()["result"]
+            sizes[compact] = len(json.dumps(result["segments"]))
+
+        assert sizes[True] * 2 < sizes[False]
+
+        plain = test_client.get("/api/v1/jobs/turns-False").json()["result"]
+        expanded = test_client.get("/api/v1/jobs/turns-True", params={"expand": True})
+        expanded = expanded.json()["result"]
+        assert expanded["text"].split() == plain["text"].split()
+        assert [(s["start"], s["end"], s["text"], s["speaker"]) for s in expanded["segments"]] == [
+            (s["start"], s["end"], s["text"].strip(), s["speaker"]) for s in plain["segments"]
+        ]
+
+    def test_window_expands_only_overlapping_segments(self, test_client, db_session, monkeypatch):
+        """Expanded windows drop the parts of a turn outside the window."""
+        from app.tasks.tasks import save_results
+
+        db_session.query(Segment).filter(Segment.job_id == "turns-window").delete()
+        db_session.query(TranscriptionJob).filter(TranscriptionJob.id == "turns-window").delete()
+        job = TranscriptionJob(id="turns-window", filename="interview.wav", status="processing")
+        db_session.add(job)
+        db_session.commit()
+        monkeypatch.setattr(settings, "TURN_COMPACTION", True)
+        save_results(db_session, job, _interview(), duration=150.0)
+        assert job.max_segment_span == 24.5
+
+        params = {"from": 6, "to": 11}
+        turns = test_client.get(_url("turns-window"), params=params).json()["segments"]
+        parts = test_client.get(_url("turns-window"), params={**params, "expand": True})
+        parts = parts.json()["segments"]
+
+        assert [(t["start"], t["end"]) for t in turns] == [(0.0, 24.5)]
+        assert [s["start"] for s in parts] == [5.0, 7.5, 10.0]
+        assert "boundaries" not in parts[0]
+
+
+def _app(endpoint):
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+class TestCompression:
+    """Tests for CompressionMiddleware."""
+
+    def test_parse_accept_encoding(self):
+        """Should read quality values, defaulting to 1."""
+        assert parse_accept_encoding("gzip;q=0.5, br, identity;q=0") == {
+            "gzip": 0.5, "br": 1.0, "identity": 0.0
+        }
+
+    def test_choose_encoding(self, monkeypatch):
+        """Should prefer brotli when available and honour q=0."""
+        import app.utils.compression as compression
+
+        monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+        assert choose_encoding("gzip, br") == "br"
+        assert choose_encoding("gzip, br;q=0") == "gzip"
+        monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+        assert choose_encoding("br") is None
+        assert choose_encoding("*") == "gzip"
+        assert choose_encoding("") is None
+
+    def test_small_responses_untouched(self):
+        """Responses under the minimum size should not be compressed."""
+        client = _app(lambda request: PlainTextResponse("short"))
+
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text == "short"
+
+    def test_streamed_chunks_are_flushed(self):
+        """Every streamed chunk should be decodable as soon as it is sent."""
+        import asyncio
+
+        async def lines():
+            for i in range(3):
+                yield json.dumps({"line": i}) + "\n"
+
+        middleware = CompressionMiddleware(
+            StreamingResponse(lines(), media_type="application/x-ndjson"), minimum_size=100
+        )
+        scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(middleware(scope, receive, send))
+
+        assert (b"content-encoding", b"gzip") in sent[0]["headers"]
+        decoder = zlib.decompressobj(31)
+        decoded = [decoder.decompress(message["body"]) for message in sent[1:]]
+        assert decoded[:3] == [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+        assert decoder.eof
+
+    def test_complete_gzip_body(self):
+        """A complete response should be one valid gzip member."""
+        client = _app(lambda request: PlainTextResponse("x" * 1000))
+
+        with client.stream("GET", "/", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert gzip.decompress(raw) == b"x" * 1000
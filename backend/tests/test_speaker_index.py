@@ -0,0 +1,101 @@
+"""Tests for the speaker-embedding index."""
+import numpy as np
+import pytest
+
+from app.services.speaker_index import SpeakerIndex
+
+
+def _unit(dim, i):
+    """Basis vector i of the given dimension."""
+    v = np.zeros(dim, dtype=np.float32)
+    v[i] = 1.0
+    return v
+
+
+class TestSpeakerIndex:
+    """Tests for SpeakerIndex."""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        """Empty 8-dimensional index."""
+        return SpeakerIndex(str(tmp_path / "index"), dim=8)
+
+    def test_add_job_and_get(self, index):
+        """Should store and return a job's speaker embeddings."""
+        index.add_job("job-1", {"SPEAKER_00": _unit(8, 0) * 3, "SPEAKER_01": _unit(8, 1)})
+
+        assert len(index) == 2
+        assert set(index.get_job("job-1")) == {"SPEAKER_00", "SPEAKER_01"}
+        np.testing.assert_allclose(index.get("job-1", "SPEAKER_00"), _unit(8, 0))
+
+    def test_search_orders_by_cosine(self, index):
+        """Should return the nearest speakers best first."""
+        index.add_job("job-1", {"SPEAKER_00": _unit(8, 0)})
+        index.add_job("job-2", {"SPEAKER_00": _unit(8, 0) + 0.5 * _unit(8, 1)})
+        index.add_job("job-3", {"SPEAKER_00": _unit(8, 2)})
+
+        hits = index.search(_unit(8, 0), k=2)[0]
+
+        assert [hit["job_id"] for hit in hits] == ["job-1", "job-2"]
+        assert hits[0]["score"] == pytest.approx(1.0)
+
+    def test_identify_matches_enrolled_voices(self, index):
+        """Should relabel speakers whose closest enrolled voice is above threshold."""
+        index.add_job("job-1", {"SPEAKER_00": _unit(8, 0)})
+        index.enroll("Alice", index.get("job-1", "SPEAKER_00"), "job-1", "SPEAKER_00")
+
+        matches = index.identify(
+            {"SPEAKER_00": _unit(8, 0) + 0.1 * _unit(8, 3), "SPEAKER_01": _unit(8, 5)},
+            threshold=0.7
+        )
+
+        assert set(matches) == {"SPEAKER_00"}
+        assert matches["SPEAKER_00"]["name"] == "Alice"
+
+    def test_sees_appends_from_other_processes(self, tmp_path):
+        """A reader should pick up rows appended through another instance."""
+        reader = SpeakerIndex(str(tmp_path / "shared"), dim=8)
+        writer = SpeakerIndex(str(tmp_path / "shared"), dim=8)
+
+        writer.add_job("job-1", {"SPEAKER_00": _unit(8, 4)})
+
+        assert reader.get("job-1", "SPEAKER_00") is not None
+
+    def test_rejects_wrong_dimension(self, index):
+        """Should refuse embeddings of the wrong size."""
+        with pytest.raises(ValueError):
+            index.add_job("job-1", {"SPEAKER_00": np.ones(4)})
+
+    def test_interrupted_append_does_not_shift_rows(self, tmp_path):
+        """Vectors and partial rows left by a crashed append are dropped by the next one."""
+        index = SpeakerIndex(str(tmp_path / "crashed"), dim=8)
+        index.add_job("job-1", {"SPEAKER_00": _unit(8, 0)})
+        # A writer died after its vectors, midway through its metadata
+        with open(index.matrix_path, "ab") as f:
+            f.write(np.stack([_unit(8, 6), _unit(8, 7)]).tobytes())
+        with open(index.rows_path, "a") as f:
+            f.write('{"job_id": "lost", "speak')
+
+        index.add_job("job-2", {"SPEAKER_00": _unit(8, 2)})
+
+        reader = SpeakerIndex(str(tmp_path / "crashed"), dim=8)
+        assert len(reader) == 2
+        np.testing.assert_allclose(reader.get("job-2", "SPEAKER_00"), _unit(8, 2))
+        np.testing.assert_allclose(index.get("job-1", "SPEAKER_00"), _unit(8, 0))
+
+    def test_removed_jobs_are_hidden(self, tmp_path):
+        """Speakers of deleted jobs leave lookups and searches; enrolled voices stay."""
+        index = SpeakerIndex(str(tmp_path / "shared"), dim=8)
+        reader = SpeakerIndex(str(tmp_path / "shared"), dim=8)
+        index.add_job("job-1", {"SPEAKER_00": _unit(8, 0)})
+        index.add_job("job-2", {"SPEAKER_00": _unit(8, 0) + 0.5 * _unit(8, 1)})
+        index.enroll("Alice", index.get("job-1", "SPEAKER_00"), "job-1", "SPEAKER_00")
+
+        index.remove_jobs(["job-1"])
+
+        for view in (index, reader):
+            assert view.get_job("job-1") == {}
+            hits = view.search(_unit(8, 0), k=3)[0]
+            assert [(hit["job_id"], hit["name"]) for hit in hits] == [
+                ("job-1", "Alice"), ("job-2", None)
+            ]
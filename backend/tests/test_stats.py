@@ -0,0 +1,156 @@
+"""Tests for the incrementally maintained job statistics."""
+import pytest
+
+from app.models import JobStatistic, Segment, TranscriptionJob
+from app.utils.stats import record_status_change, recompute_statistics, summarize_statistics
+
+
+def _rows(session):
+    """Get the non-zero counters, keyed by (metric, key)."""
+    return {
+        (row.metric, row.key): pytest.approx(row.value)
+        for row in session.query(JobStatistic).all()
+        if row.value
+    }
+
+
+def _counters(session):
+    """Get the stored non-zero counters, keyed by (metric, key)."""
+    session.expire_all()
+    return _rows(session)
+
+
+def _recomputed(session):
+    """Get the counters rebuilt from scratch, leaving the stored ones alone."""
+    recompute_statistics(session)
+    session.flush()
+    counters = _rows(session)
+    session.rollback()
+    return counters
+
+
+def _upload(test_client, name="clip.wav"):
+    response = test_client.post(
+        "/api/v1/transcribe",
+        files={"file": (name, b"RIFF" + b"\0" * 1024, "audio/wav")}
+    )
+    assert response.status_code == 200
+    return response.json()["job_id"]
+
+
+class TestJobStatistics:
+    """Tests for counters kept by uploads, workers and deletions."""
+
+    def test_job_lifecycle(self, test_client, empty_db, fake_tasks):
+        """Counters should follow a job from upload to deletion."""
+        from app.tasks.tasks import delete_job, save_results, set_job_status
+
+        job_id = _upload(test_client)
+        assert _counters(empty_db) == {("status", "queued"): 1}
+
+        assert set_job_status(empty_db, job_id, "processing")
+        job = empty_db.get(TranscriptionJob, job_id)
+        segments = [
+            {"start": 0.0, "end": 60.0, "text": "a", "speaker": "SPEAKER_00", "confidence": 0.9},
+            {"start": 60.0, "end": 120.0, "text": "b", "speaker": "SPEAKER_01", "confidence": 0.9},
+        ]
+        save_results(empty_db, job, segments, 120.0, processing_time=30.0)
+
+        assert _counters(empty_db) == _recomputed(empty_db)
+        stats = test_client.get("/api/v1/stats").json()
+        assert stats["jobs"] == {"completed": 1}
+        assert stats["total_jobs"] == 1
+        assert stats["audio_hours"] == pytest.approx(120.0 / 3600)
+        assert stats["models"]["base"]["real_time_factor"] == pytest.approx(0.25)
+        assert stats["speakers"] == {"2": 1}
+
+        delete_job.run(job_id)
+
+        assert _counters(empty_db) == {}
+
+    def test_saving_twice_counts_once(self, empty_db):
+        """A retry that saves results again should replace the earlier counts."""
+        from app.tasks.tasks import save_results
+
+        job = TranscriptionJob(id="stats-twice", filename="a.wav")
+        empty_db.add(job)
+        record_status_change(empty_db, None, "queued")
+        empty_db.commit()
+        segment = {"start": 0.0, "end": 1.0, "text": "a", "speaker": "SPEAKER_00",
+                   "confidence": 0.9}
+
+        save_results(empty_db, job, [segment], 10.0, processing_time=2.0)
+        save_results(empty_db, job, [segment], 10.0, processing_time=1.0)
+
+        counters = _counters(empty_db)
+        assert counters[("completed", "base")] == 1
+        assert counters[("processing_seconds", "base")] == 1.0
+        assert counters == _recomputed(empty_db)
+
+    def test_cancel_and_retry(self, test_client, empty_db, fake_tasks):
+        """Cancelling and retrying should move the job between statuses."""
+        job_id = _upload(test_client)
+
+        assert test_client.post(f"/api/v1/jobs/{job_id}/cancel").status_code == 200
+        assert _counters(empty_db) == {("status", "cancelled"): 1}
+
+        assert test_client.post(f"/api/v1/jobs/{job_id}/retry").status_code == 200
+        assert _counters(empty_db) == {("status", "queued"): 1}
+
+    def test_bulk_delete(self, test_client, empty_db, fake_tasks):
+        """Bulk deletion should take every deleted job out of the counters."""
+        for name in ("a.wav", "b.wav", "c.wav"):
+            _upload(test_client, name)
+
+        response = test_client.delete("/api/v1/jobs", params={"status": "queued"})
+
+        assert response.json()["deleted"] == 3
+        assert _counters(empty_db) == {}
+
+    def test_recompute_repairs_counters(self, empty_db):
+        """The repair task should rebuild counters for rows written around them."""
+        from app.tasks.tasks import recompute_stats
+
+        empty_db.add_all([
+            TranscriptionJob(id="stats-1", filename="a.wav", status="completed", model="small",
+                             duration=3600.0, processing_time=900.0, speakers_detected=2),
+            TranscriptionJob(id="stats-2", filename="b.wav", status="completed", model="small",
+                             duration=1800.0, speakers_detected=1),
+            TranscriptionJob(id="stats-3", filename="c.wav", status="failed"),
+        ])
+        empty_db.add(JobStatistic(metric="status", key="queued", value=5))
+        empty_db.commit()
+
+        assert recompute_stats.run()["status"] == "recomputed"
+
+        stats = summarize_statistics(empty_db.query(JobStatistic).all())
+        assert stats["jobs"] == {"completed": 2, "failed": 1}
+        assert stats["audio_hours"] == pytest.approx(1.5)
+        assert stats["models"]["small"] == {
+            "jobs": 2, "audio_hours": pytest.approx(1.5), "real_time_factor": pytest.approx(0.25)
+        }
+        assert stats["speakers"] == {"1": 1, "2": 1}
+
+
+class TestSummarizeStatistics:
+    """Tests for building the stats response."""
+
+    def test_empty(self):
+        """No counters should give zero totals."""
+        assert summarize_statistics([]) == {
+            "total_jobs": 0, "jobs": {}, "audio_hours": 0.0, "models": {}, "speakers": {}
+        }
+
+    def test_untimed_model_has_no_real_time_factor(self):
+        """A model without measured processing time should report no RTF."""
+        counters = [
+            JobStatistic(metric="completed", key="base", value=1),
+            JobStatistic(metric="audio_seconds", key="base", value=60.0),
+            JobStatistic(metric="speakers", key="10", value=1),
+            JobStatistic(metric="speakers", key="2", value=3),
+        ]
+
+        stats = summarize_statistics(counters)
+
+        assert stats["models"]["base"]["real_time_factor"] is None
+        assert list(stats["speakers"]) == ["2", "10"]
@@ -0,0 +1,139 @@
+"""Tests for the hot job-status store."""
+from datetime import datetime, timezone
+
+from app.models import TranscriptionJob
+from app.utils.status_store import JobStatusStore, STATUS_KEY_PREFIX
+
+
+class _BrokenRedis:
+    """Redis client whose every command fails."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("connection refused")
+        return fail
+
+
+def _job(job_id="job-1"):
+    return TranscriptionJob(id=job_id, filename="a.wav", language="en",
+                            created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+
+
+class TestJobStatusStore:
+    """Tests for JobStatusStore."""
+
+    def test_publish_then_get(self, fake_redis):
+        """Should round-trip typed fields and set the TTL."""
+        store = JobStatusStore(fake_redis, ttl=60)
+
+        assert store.publish(_job(), "processing", stage="vad", progress=0.29)
+
+        assert store.get("job-1") == {
+            "status": "processing",
+            "filename": "a.wav",
+            "language": "en",
+            "created_at": "2026-01-02T03:04:05",
+            "stage": "vad",
+            "progress": 0.29
+        }
+        assert fake_redis.expiry[STATUS_KEY_PREFIX + "job-1"] == 60
+
+    def test_update_merges_fields(self, fake_redis):
+        """Should keep fields that an update does not set."""
+        store = JobStatusStore(fake_redis, ttl=60)
+        store.publish(_job(), "processing", stage="vad")
+
+        store.update("job-1", stage="transcription")
+
+        assert store.get("job-1")["status"] == "processing"
+        assert store.get("job-1")["stage"] == "transcription"
+
+    def test_get_live_skips_terminal_and_partial_entries(self, fake_redis):
+        """Only complete entries of unfinished jobs should answer polls."""
+        store = JobStatusStore(fake_redis, ttl=60)
+        store.publish(_job("running"), "processing")
+        store.publish(_job("done"), "completed")
+        store.update("partial", stage="alignment")
+
+        assert store.get_live("running")["status"] == "processing"
+        assert store.get_live("done") is None
+        assert store.get_live("partial") is None
+        assert store.get_live("missing") is None
+
+    def test_clear(self, fake_redis):
+        """Should drop a job's entry."""
+        store = JobStatusStore(fake_redis, ttl=60)
+        store.publish(_job(), "queued")
+
+        store.clear("job-1")
+
+        assert store.get("job-1") is None
+
+    def test_unavailable_redis_reports_failure(self):
+        """Redis errors should be reported, never raised."""
+        store = JobStatusStore(_BrokenRedis(), ttl=60)
+
+        assert store.publish(_job(), "processing") is False
+        assert store.get("job-1") is None
+        store.clear("job-1")
+
+    def test_disabled_store(self):
+        """A store without a client should do nothing."""
+        store = JobStatusStore(None, ttl=60)
+
+        assert store.update("job-1", status="queued") is False
+        assert store.get_live("job-1") is None
+
+
+class TestWorkerStatus:
+    """Tests for process_transcription reporting to the status store."""
+
+    def test_only_terminal_status_reaches_database(self, db_session, status_store,
+                                                   tmp_path, monkeypatch):
+        """Running stages should go to the store, completion to the database."""
+        import app.tasks.tasks as tasks_module
+        from app.config import settings
+        seen = {}
+
+        class _Transcriber:
+            engine_name = "fake"
+
+            def transcribe(self, path, language=None, **kwargs):
+                seen["live"] = status_store.get_live("worker-job")
+                db_session.expire_all()
+                seen["row"] = db_session.get(TranscriptionJob, "worker-job").status
+                return {"text": "hi", "duration": 1.0,
+                        "segments": [{"start": 0.0, "end": 1.0, "text": "hi", "confidence": 0.9}]}
+
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: _Transcriber())
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        monkeypatch.setattr(settings, "CHECKPOINT_DIR", str(tmp_path))
+        db_session.add(TranscriptionJob(id="worker-job", filename="a.wav", diarize=False))
+        db_session.commit()
+
+        result = tasks_module.process_transcription.run(
+            "worker-job", "/tmp/a.wav", "a.wav", diarize=False
+        )
+
+        assert result["status"] == "completed"
+        assert seen["row"] == "queued"
+        assert seen["live"]["status"] == "processing"
+        assert seen["live"]["stage"] == "transcription"
+        assert status_store.get("worker-job") is None
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "worker-job").status == "completed"
+
+    def test_falls_back_to_database_without_store(self, db_session, monkeypatch):
+        """Without the store, a running status should be written to the row."""
+        import app.utils.status_store as status_store_module
+        from app.tasks.tasks import report_status
+        monkeypatch.setattr(status_store_module, "_store", JobStatusStore(None, ttl=60))
+        job = TranscriptionJob(id="fallback-job", filename="a.wav")
+        db_session.add(job)
+        db_session.commit()
+
+        assert report_status(db_session, job, "processing")
+
+        db_session.expire_all()
+        assert db_session.get(TranscriptionJob, "fallback-job").status == "processing"
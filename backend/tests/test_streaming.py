@@ -0,0 +1,171 @@
+"""Tests for live streaming transcription."""
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from app.models import JobStatistic, TranscriptionJob, Segment
+from app.services.streaming import (
+    SAMPLE_RATE,
+    StreamingSession,
+    float_to_pcm,
+    resample,
+    speech_frames,
+)
+
+
+def _utterances(*parts):
+    """Build a waveform from (kind, seconds) parts: tone or silence."""
+    chunks = []
+    for kind, seconds in parts:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        if kind == "tone":
+            chunks.append((0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+        else:
+            chunks.append(np.zeros(len(t), dtype=np.float32))
+    return np.concatenate(chunks)
+
+
+def _wav_bytes(samples):
+    """Encode samples as a 16 kHz mono WAV file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(float_to_pcm(samples))
+    return buffer.getvalue()
+
+
+class _FakeTranscriber:
+    """Transcriber stand-in that reports how much audio it was given."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe_samples(self, samples, language=None):
+        self.calls += 1
+        duration = len(samples) / SAMPLE_RATE
+        text = f" {duration:.1f}s of speech"
+        return {"text": text, "language": "en", "duration": duration,
+                "segments": [{"start": 0.0, "end": duration, "text": text, "confidence": 0.9}]}
+
+
+class TestHelpers:
+    """Tests for the streaming audio helpers."""
+
+    def test_speech_frames_flags_loud_frames(self):
+        """Tone frames should count as speech and silent frames should not."""
+        flags = speech_frames(_utterances(("silence", 0.09), ("tone", 0.09)), threshold_db=-40)
+
+        assert flags.tolist() == [False, False, False, True, True, True]
+
+    def test_resample_changes_length(self):
+        """48 kHz audio should come out at a third of the samples."""
+        assert len(resample(np.zeros(4800, dtype=np.float32), 48000, SAMPLE_RATE)) == 1600
+
+
+class TestStreamingSession:
+    """Tests for StreamingSession."""
+
+    def test_endpoints_on_silence(self):
+        """Each utterance followed by silence should become one final segment."""
+        transcriber = _FakeTranscriber()
+        session = StreamingSession(lambda s: transcriber.transcribe_samples(s),
+                                   partial_interval=0.5, endpoint_silence=0.6)
+        audio = _utterances(("silence", 0.5), ("tone", 1.5), ("silence", 1.0),
+                            ("tone", 1.0), ("silence", 0.2))
+
+        events = []
+        for i in range(0, len(audio), 1600):
+            events.extend(session.feed(audio[i:i + 1600]))
+        events.extend(session.close())
+
+        finals = [e for e in events if e["type"] == "final"]
+        assert len(finals) == 2
+        assert any(e["type"] == "partial" for e in events)
+        # Leading silence is dropped, but timestamps stay on the stream timeline
+        assert 0.1 < finals[0]["start"] < 0.5
+        assert finals[1]["start"] >= finals[0]["end"]
+        assert session.duration == pytest.approx(4.2)
+
+    def test_silence_is_never_decoded(self):
+        """A silent stream should not reach the model."""
+        transcriber = _FakeTranscriber()
+        session = StreamingSession(lambda s: transcriber.transcribe_samples(s))
+
+        session.feed(np.zeros(SAMPLE_RATE * 3, dtype=np.float32))
+
+        assert session.close() == []
+        assert transcriber.calls == 0
+
+
+class TestStreamEndpoint:
+    """Tests for the /api/v1/stream WebSocket."""
+
+    def test_streams_wav_and_persists_job(self, test_client, db_session, monkeypatch):
+        """A WAV fed frame by frame should yield captions and a stored job."""
+        import app.services.streaming as streaming_module
+        monkeypatch.setattr(streaming_module, "get_stream_transcriber",
+                            lambda model, engine: _FakeTranscriber())
+
+        wav = _wav_bytes(_utterances(("tone", 1.2), ("silence", 0.8), ("tone", 0.8)))
+        with wave.open(io.BytesIO(wav)) as f:
+            pcm = f.readframes(f.getnframes())
+
+        events = []
+        with test_client.websocket_connect("/api/v1/stream?filename=call.wav") as ws:
+            frame = 3200  # 100 ms of s16le
+            for i in range(0, len(pcm), frame):
+                ws.send_bytes(pcm[i:i + frame])
+            ws.send_json({"type": "stop"})
+            while True:
+                event = ws.receive_json()
+                events.append(event)
+                if event["type"] == "done":
+                    break
+
+        finals = [e for e in events if e["type"] == "final"]
+        assert len(finals) == 2
+        job_id = events[-1]["job_id"]
+        job = db_session.get(TranscriptionJob, job_id)
+        assert job.status == "completed"
+        assert job.filename == "call.wav"
+        assert job.language == "en"
+        assert job.duration == pytest.approx(2.8)
+        segments = db_session.query(Segment).filter(Segment.job_id == job_id).all()
+        assert [s.text for s in segments] == [e["text"] for e in finals]
+
+    def test_streamed_job_is_counted(self, test_client, empty_db, monkeypatch):
+        """A stored stream should be added to the job statistics like any completed job."""
+        import app.services.streaming as streaming_module
+        from app.utils.stats import recompute_statistics
+        monkeypatch.setattr(streaming_module, "get_stream_transcriber",
+                            lambda model, engine: _FakeTranscriber())
+
+        with test_client.websocket_connect("/api/v1/stream") as ws:
+            ws.send_bytes(float_to_pcm(_utterances(("tone", 1.0), ("silence", 0.8))))
+            ws.send_json({"type": "stop"})
+            while ws.receive_json()["type"] != "done":
+                pass
+
+        def counters():
+            rows = empty_db.query(JobStatistic).all()
+            return {(row.metric, row.key): pytest.approx(row.value) for row in rows if row.value}
+
+        empty_db.expire_all()
+        stored = counters()
+        assert stored[("status", "completed")] == 1
+        recompute_statistics(empty_db)
+        empty_db.flush()
+        assert counters() == stored
+        empty_db.rollback()
+
+    def test_rejects_unknown_encoding(self, test_client):
+        """Should refuse the connection for an unsupported encoding."""
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect):
+            with test_client.websocket_connect("/api/v1/stream?encoding=mp3") as ws:
+                ws.receive_json()
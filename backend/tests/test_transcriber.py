@@ -0,0 +1,79 @@
+"""Tests for the transcription service and its engines."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.transcriber import (
+    Transcriber,
+    WhisperEngine,
+    FasterWhisperEngine,
+)
+
+
+class _FakeWhisperModel:
+    """Stand-in for a reference Whisper model."""
+
+    def transcribe(self, audio_path, language=None, word_timestamps=False):
+        return {
+            "text": " Hello there.",
+            "segments": [{"start": 0.0, "end": 1.5, "text": " Hello there."}],
+            "language": "en",
+        }
+
+
+class _FakeFasterWhisperModel:
+    """Stand-in for a faster-whisper model."""
+
+    def transcribe(self, audio_path, language=None, word_timestamps=False):
+        segments = iter([
+            SimpleNamespace(start=0.0, end=1.5, text=" Hello"),
+            SimpleNamespace(start=1.5, end=2.0, text=" there."),
+        ])
+        return segments, SimpleNamespace(duration=2.0, language="en")
+
+
+class TestTranscriber:
+    """Tests for Transcriber."""
+
+    def test_rejects_unknown_engine(self):
+        """Should raise for an unknown engine name."""
+        with pytest.raises(ValueError):
+            Transcriber(engine="nope")
+
+    def test_selects_engine(self):
+        """Should build the requested engine."""
+        transcriber = Transcriber(model="small", engine="faster-whisper")
+
+        assert isinstance(transcriber.engine, FasterWhisperEngine)
+        assert transcriber.engine.model_name == "small"
+
+
+class TestEngineOutputFormat:
+    """Both engines should return the same result format."""
+
+    @pytest.mark.parametrize("engine_cls,fake", [
+        (WhisperEngine, _FakeWhisperModel),
+        (FasterWhisperEngine, _FakeFasterWhisperModel),
+    ])
+    def test_same_result_keys(self, engine_cls, fake):
+        """Should return text, segments, duration and language."""
+        engine = engine_cls(model="base")
+        engine.model = fake()
+
+        result = engine.transcribe("audio.wav")
+
+        assert set(result) == {"text", "segments", "duration", "language"}
+        assert result["language"] == "en"
+        for seg in result["segments"]:
+            assert set(seg) == {"start", "end", "text", "confidence"}
+
+    def test_faster_whisper_joins_text(self):
+        """Should build the full text and duration from the generator output."""
+        engine = FasterWhisperEngine(model="base")
+        engine.model = _FakeFasterWhisperModel()
+
+        result = engine.transcribe("audio.wav")
+
+        assert result["text"] == " Hello there."
+        assert result["duration"] == 2.0
+        assert len(result["segments"]) == 2
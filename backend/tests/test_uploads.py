@@ -0,0 +1,182 @@
+"""Tests for resumable, parallel chunked uploads."""
+import os
+
+import pytest
+
+from app.config import settings
+from app.main import app
+from app.models import TranscriptionJob, UploadSession
+from app.utils.uploads import merge_ranges, missing_ranges
+
+
+CONTENT = bytes(range(256)) * 400  # 102400 bytes
+CHUNK = 16 * 1024
+
+
+def _create(client, size=len(CONTENT), filename="talk.wav"):
+    response = client.post("/api/v1/uploads", json={"filename": filename, "size": size})
+    assert response.status_code == 200
+    return response.json()["upload_id"]
+
+
+def _put(client, upload_id, offset, data):
+    return client.put(f"/api/v1/uploads/{upload_id}", content=data,
+                      headers={"Upload-Offset": str(offset)})
+
+
+class TestRanges:
+    """Tests for byte-range bookkeeping."""
+
+    def test_merge_ranges(self):
+        """Overlapping and adjacent ranges should merge."""
+        ranges = [(10, 20), (0, 5), (5, 8), (15, 30), (40, 50)]
+
+        assert merge_ranges(ranges) == [(0, 8), (10, 30), (40, 50)]
+
+    def test_missing_ranges(self):
+        """Gaps before, between and after received ranges should be reported."""
+        assert missing_ranges([(10, 20), (30, 40)], 50) == [(0, 10), (20, 30), (40, 50)]
+        assert missing_ranges([(0, 50)], 50) == []
+
+
+class TestResumableUpload:
+    """Tests for the /uploads endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_parallel_out_of_order_chunks(self, test_client, db_session, fake_tasks):
+        """Chunks sent concurrently in any order should assemble into the job's upload."""
+        import asyncio
+        import httpx
+
+        upload_id = _create(test_client)
+        offsets = list(range(0, len(CONTENT), CHUNK))[::-1]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.put(f"/api/v1/uploads/{upload_id}", content=CONTENT[offset:offset + CHUNK],
+                           headers={"Upload-Offset": str(offset)})
+                for offset in offsets
+            ))
+        assert all(r.status_code == 200 for r in responses)
+
+        status = test_client.get(f"/api/v1/uploads/{upload_id}").json()
+        assert status["received"] == [[0, len(CONTENT)]]
+        assert status["offset"] == len(CONTENT)
+
+        response = test_client.post(f"/api/v1/uploads/{upload_id}/complete",
+                                    params={"model": "small"})
+
+        assert response.status_code == 200
+        job = db_session.get(TranscriptionJob, response.json()["job_id"])
+        assert job.model == "small"
+        assert job.filename == "talk.wav"
+        with open(job.original_path, "rb") as f:
+            assert f.read() == CONTENT
+        assert not os.path.exists(db_session.get(UploadSession, upload_id).path)
+        assert fake_tasks["transcribe"].calls[0][0][1] == job.original_path
+
+    def test_resume_after_dropped_chunk(self, test_client, fake_tasks):
+        """Missing ranges should be reported and refused until they are sent."""
+        upload_id = _create(test_client)
+        for offset in range(0, len(CONTENT), CHUNK):
+            if offset != CHUNK:
+                chunk = CONTENT[offset:offset + CHUNK]
+                assert _put(test_client, upload_id, offset, chunk).status_code == 200
+
+        status = test_client.get(f"/api/v1/uploads/{upload_id}").json()
+        assert status["missing"] == [[CHUNK, 2 * CHUNK]]
+        assert status["offset"] == CHUNK
+        incomplete = test_client.post(f"/api/v1/uploads/{upload_id}/complete")
+        assert incomplete.status_code == 409
+        assert incomplete.json()["detail"]["missing"] == [[CHUNK, 2 * CHUNK]]
+
+        _put(test_client, upload_id, CHUNK, CONTENT[CHUNK:2 * CHUNK])
+
+        assert test_client.post(f"/api/v1/uploads/{upload_id}/complete").status_code == 200
+        assert len(fake_tasks["transcribe"].calls) == 1
+
+    def test_complete_twice_returns_same_job(self, test_client, fake_tasks):
+        """Finalizing again should not create a second job."""
+        upload_id = _create(test_client, size=4)
+        _put(test_client, upload_id, 0, b"RIFF")
+
+        first = test_client.post(f"/api/v1/uploads/{upload_id}/complete").json()
+        second = test_client.post(f"/api/v1/uploads/{upload_id}/complete").json()
+
+        assert second["job_id"] == first["job_id"]
+        assert len(fake_tasks["transcribe"].calls) == 1
+        assert _put(test_client, upload_id, 0, b"RIFF").status_code == 409
+
+    def test_rejects_bad_chunks_and_sessions(self, test_client, fake_tasks):
+        """Oversized chunks, bad offsets and bad sessions should be refused."""
+        upload_id = _create(test_client, size=10)
+
+        assert _put(test_client, upload_id, 5, b"x" * 6).status_code == 413
+        assert _put(test_client, upload_id, 10, b"x").status_code == 416
+        assert _put(test_client, upload_id, 0, b"").status_code == 400
+        assert _put(test_client, "missing", 0, b"x").status_code == 404
+        bad_format = test_client.post("/api/v1/uploads", json={"filename": "a.txt", "size": 10})
+        assert bad_format.status_code == 400
+        too_big = test_client.post("/api/v1/uploads",
+                                   json={"filename": "a.wav", "size": settings.MAX_UPLOAD_SIZE + 1})
+        assert too_big.status_code == 413
+
+    def test_unfinished_uploads_cap_reserved_space(self, test_client, db_session, fake_tasks,
+                                                   monkeypatch):
+        """New sessions are refused while unfinished ones reserve too much space."""
+        db_session.query(UploadSession).filter(UploadSession.job_id.is_(None)).delete()
+        db_session.commit()
+        monkeypatch.setattr(settings, "UPLOAD_MAX_RESERVED", 2 * len(CONTENT))
+        first = _create(test_client)
+        _create(test_client)
+
+        refused = test_client.post("/api/v1/uploads", json={"filename": "a.wav", "size": 1})
+        assert refused.status_code == 503
+
+        test_client.delete(f"/api/v1/uploads/{first}")
+        _create(test_client)
+
+    def test_chunk_landing_after_completion_is_refused(self, test_client, db_session, fake_tasks,
+                                                       monkeypatch):
+        """A chunk finishing after the upload was finalized is not recorded."""
+        import app.utils.uploads as uploads_module
+        from app.models import UploadChunk
+        upload_id = _create(test_client, size=4)
+        _put(test_client, upload_id, 0, b"RIFF")
+        write_chunk = uploads_module.write_chunk
+
+        async def finalize_meanwhile(path, offset, chunks, limit):
+            length = await write_chunk(path, offset, chunks, limit)
+            db_session.get(UploadSession, upload_id).job_id = "finalized-meanwhile"
+            db_session.commit()
+            return length
+
+        monkeypatch.setattr(uploads_module, "write_chunk", finalize_meanwhile)
+
+        assert _put(test_client, upload_id, 0, b"RIFF").status_code == 409
+        assert db_session.query(UploadChunk).filter(UploadChunk.upload_id == upload_id).count() == 1
+
+    def test_expired_sessions_are_purged(self, test_client, db_session, fake_tasks, monkeypatch):
+        """Incomplete sessions past their TTL should vanish and their files be reclaimed."""
+        monkeypatch.setattr(settings, "UPLOAD_SESSION_TTL", 0)
+        stale = _create(test_client)
+        stale_path = db_session.get(UploadSession, stale).path
+
+        assert test_client.get(f"/api/v1/uploads/{stale}").status_code == 404
+        _create(test_client)
+
+        db_session.expire_all()
+        assert db_session.get(UploadSession, stale) is None
+        assert [stale_path] in [args[0] for args, _ in fake_tasks["reclaim"].calls]
+
+    def test_abort(self, test_client, db_session, fake_tasks):
+        """Aborting should delete the session and its file."""
+        upload_id = _create(test_client)
+        path = db_session.get(UploadSession, upload_id).path
+        _put(test_client, upload_id, 0, CONTENT[:CHUNK])
+
+        assert test_client.delete(f"/api/v1/uploads/{upload_id}").status_code == 200
+
+        assert not os.path.exists(path)
+        assert test_client.get(f"/api/v1/uploads/{upload_id}").status_code == 404
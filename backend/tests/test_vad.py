@@ -0,0 +1,76 @@
+"""Tests for the voice activity detection helpers."""
+import io
+import wave
+
+import pytest
+
+from app.services.vad import merge_regions, SpeechMap
+from app.utils.audio import copy_pcm_regions
+
+
+class TestMergeRegions:
+    """Tests for merge_regions function."""
+
+    def test_pads_and_clamps(self):
+        """Should pad regions and clamp them to the audio bounds."""
+        assert merge_regions([(0.1, 1.0), (9.0, 9.9)], padding=0.2, total_duration=10.0) == [
+            (0.0, 1.2), (8.8, 10.0)
+        ]
+
+    def test_merges_short_gaps(self):
+        """Should merge regions separated by less than min_gap."""
+        assert merge_regions([(0.0, 1.0), (1.3, 2.0), (5.0, 6.0)], min_gap=0.5) == [
+            (0.0, 2.0), (5.0, 6.0)
+        ]
+
+
+class TestSpeechMap:
+    """Tests for SpeechMap."""
+
+    @pytest.fixture
+    def speech_map(self):
+        """Two speech regions of 2s each within 20s of audio."""
+        return SpeechMap([(3.0, 5.0), (10.0, 12.0)], total_duration=20.0)
+
+    def test_skipped_fraction(self, speech_map):
+        """Should report the share of audio outside speech regions."""
+        assert speech_map.speech_duration == 4.0
+        assert speech_map.skipped_fraction == pytest.approx(0.8)
+
+    def test_maps_timestamps_back(self, speech_map):
+        """Should shift timestamps into the matching original region."""
+        assert speech_map.to_original(0.5) == 3.5
+        assert speech_map.to_original(2.5) == 10.5
+
+    def test_boundary_depends_on_side(self, speech_map):
+        """A boundary maps to the next region's start or the previous region's end."""
+        assert speech_map.to_original(2.0) == 10.0
+        assert speech_map.to_original(2.0, is_end=True) == 5.0
+
+    def test_remap_segments_keeps_other_fields(self, speech_map):
+        """Should remap start/end and keep the remaining keys."""
+        segments = speech_map.remap_segments([{"start": 1.0, "end": 3.0, "text": "hi"}])
+
+        assert segments == [{"start": 4.0, "end": 11.0, "text": "hi"}]
+
+
+class TestCopyPcmRegions:
+    """Tests for copy_pcm_regions function."""
+
+    def test_copies_only_requested_regions(self):
+        """Should write the samples of each region across chunk boundaries."""
+        # 1 second of 16 kHz s16le in four 0.25s blocks filled with the block index
+        pcm = b"".join(bytes([i, i]) * 4000 for i in range(4))
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(16000)
+            written = copy_pcm_regions(io.BytesIO(pcm), [(0.0, 0.25), (0.5, 0.75)], out,
+                                       chunk_size=3000)
+
+        assert written == 16000
+        buffer.seek(0)
+        with wave.open(buffer, "rb") as result:
+            frames = result.readframes(result.getnframes())
+        assert frames == bytes([0, 0]) * 4000 + bytes([2, 2]) * 4000
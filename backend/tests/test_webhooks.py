@@ -0,0 +1,318 @@
+"""Tests for completion webhooks."""
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.config import settings
+from app.models import ClientWebhook, TranscriptionJob, WebhookDelivery
+from app.utils.webhooks import (
+    SIGNATURE_HEADER, check_callback_url, retry_delay, sign_payload, verify_signature
+)
+
+
+class _Receiver:
+    """Local HTTP endpoint that records webhook requests and answers with queued statuses."""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                receiver.requests.append((dict(self.headers), body))
+                status = receiver.statuses.pop(0) if receiver.statuses else 200
+                self.send_response(status)
+                if 300 <= status < 400:
+                    self.send_header("Location", receiver.url + "/moved")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hooks"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def events(self, index=0):
+        return json.loads(self.requests[index][1])["events"]
+
+
+@pytest.fixture
+def receiver():
+    """Run a webhook receiver for the test."""
+    receiver = _Receiver()
+    receiver.thread.start()
+    yield receiver
+    receiver.server.shutdown()
+    receiver.server.server_close()
+
+
+@pytest.fixture
+def deliveries(db_session, monkeypatch):
+    """Start without deliveries, sign requests and record the options of scheduled runs."""
+    import app.tasks.webhooks as webhooks_module
+
+    db_session.query(WebhookDelivery).delete()
+    db_session.commit()
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", "s3cret")
+    # The local receiver and the test domains never resolve to public addresses
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", "127.0.0.1, acme.test,beta.test")
+    scheduled = []
+    monkeypatch.setattr(webhooks_module.deliver_webhooks, "apply_async",
+                        lambda **options: scheduled.append(options))
+    return scheduled
+
+
+def _finish(db_session, job_id, callback_url, status="completed"):
+    """Create a job with a webhook and take it through a terminal status."""
+    from app.tasks.tasks import save_results, set_job_status
+
+    db_session.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).delete()
+    job = TranscriptionJob(id=job_id, filename=f"{job_id}.wav", status="processing",
+                           model="base", callback_url=callback_url)
+    db_session.add(job)
+    db_session.commit()
+    if status == "completed":
+        segments = [{"start": 0.0, "end": 1.5, "text": "hi", "speaker": "SPEAKER_00",
+                     "confidence": 0.9}]
+        save_results(db_session, job, segments, duration=1.5)
+    else:
+        set_job_status(db_session, job_id, status)
+
+
+def _deliver():
+    from app.tasks.webhooks import deliver_webhooks
+    return deliver_webhooks.run()
+
+
+def _rows(db_session):
+    db_session.expire_all()
+    return db_session.query(WebhookDelivery).order_by(WebhookDelivery.id).all()
+
+
+class TestSignatures:
+    """Tests for request signing."""
+
+    def test_round_trip(self):
+        """A signature verifies only for its body, secret and time window."""
+        body = b'{"events": []}'
+        header = sign_payload(body, "key", timestamp=1000)
+
+        assert verify_signature(body, header, "key", now=1010)
+        assert not verify_signature(body + b" ", header, "key", now=1010)
+        assert not verify_signature(body, header, "other", now=1010)
+        assert not verify_signature(body, header, "key", now=2000)
+        assert not verify_signature(body, "garbage", "key", now=1010)
+
+    def test_backoff_doubles_up_to_the_cap(self, monkeypatch):
+        """Each failed attempt doubles the wait until the cap."""
+        monkeypatch.setattr(settings, "WEBHOOK_RETRY_BACKOFF", 10)
+        monkeypatch.setattr(settings, "WEBHOOK_RETRY_BACKOFF_MAX", 60)
+
+        assert [retry_delay(n) for n in range(1, 6)] == [10, 20, 40, 60, 60]
+
+
+class TestCallbackUrls:
+    """Tests for callback URL validation."""
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1/hooks",
+        "http://localhost:8000/hooks",
+        "http://10.1.2.3/hooks",
+        "https://192.168.0.10/hooks",
+        "http://169.254.169.254/latest/meta-data",
+        "http://[::1]/hooks",
+        "http://[::ffff:127.0.0.1]/hooks",
+        "http://0.0.0.0/hooks",
+    ])
+    def test_refuses_non_public_hosts(self, url, monkeypatch):
+        """Loopback, private and link-local hosts cannot receive webhooks."""
+        monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", "")
+
+        with pytest.raises(ValueError):
+            check_callback_url(url)
+
+    def test_accepts_public_and_allowed_hosts(self, monkeypatch):
+        """Public addresses pass; allowed hosts pass wherever they resolve."""
+        monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", "hooks.internal")
+
+        assert check_callback_url("https://93.184.216.34/hooks")
+        assert check_callback_url("http://HOOKS.internal:9000/x")
+
+
+class TestDelivery:
+    """Tests for sending webhook events."""
+
+    def test_completed_job_is_delivered_signed(self, test_client, db_session, receiver, deliveries):
+        """Completion stages an event, schedules a run and the run POSTs it."""
+        _finish(db_session, "hook-1", receiver.url)
+
+        assert len(deliveries) == 1
+        assert deliveries[0]["countdown"] == settings.WEBHOOK_BATCH_WAIT
+        assert _deliver() == {"delivered": 1, "retrying": 0}
+
+        headers, body = receiver.requests[0]
+        assert verify_signature(body, headers[SIGNATURE_HEADER], "s3cret")
+        event = receiver.events()[0]
+        assert event["type"] == "job.completed"
+        assert event["data"]["job_id"] == "hook-1"
+        assert event["data"]["duration"] == 1.5
+        assert event["data"]["result_url"].endswith("/api/v1/jobs/hook-1")
+        row = _rows(db_session)[0]
+        assert row.status == "delivered" and row.attempts == 1 and row.last_status_code == 200
+        webhook = test_client.get("/api/v1/jobs/hook-1").json()["webhook"]
+        assert webhook["callback_url"] == receiver.url
+        assert webhook["delivery"]["status"] == "delivered"
+
+    def test_jobs_finishing_together_share_a_request(self, db_session, receiver, deliveries):
+        """Due events for one URL are batched into a single POST."""
+        for i in range(3):
+            _finish(db_session, f"hook-batch-{i}", receiver.url)
+
+        _deliver()
+
+        assert len(receiver.requests) == 1
+        job_ids = [event["data"]["job_id"] for event in receiver.events()]
+        assert job_ids == [f"hook-batch-{i}" for i in range(3)]
+
+    def test_batches_are_capped(self, db_session, receiver, deliveries, monkeypatch):
+        """Batches never exceed WEBHOOK_BATCH_SIZE events."""
+        monkeypatch.setattr(settings, "WEBHOOK_BATCH_SIZE", 2)
+        for i in range(3):
+            _finish(db_session, f"hook-cap-{i}", receiver.url)
+
+        assert _deliver()["delivered"] == 3
+        assert [len(receiver.events(i)) for i in range(len(receiver.requests))] == [2, 1]
+
+    def test_failed_request_is_retried_with_backoff(self, db_session, receiver, deliveries):
+        """A non-2xx answer schedules a retry after the backoff; the retry delivers."""
+        receiver.statuses = [500]
+        _finish(db_session, "hook-retry", receiver.url)
+
+        assert _deliver() == {"delivered": 0, "retrying": 1}
+        assert deliveries[-1]["countdown"] == settings.WEBHOOK_RETRY_BACKOFF
+        row = _rows(db_session)[0]
+        assert row.status == "pending" and row.attempts == 1 and row.last_status_code == 500
+        assert row.next_attempt_at > datetime.utcnow()
+
+        # Not due yet
+        assert _deliver() == {"delivered": 0, "retrying": 0}
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        assert _deliver()["delivered"] == 1
+        row = _rows(db_session)[0]
+        assert row.status == "delivered" and row.attempts == 2
+        assert len(receiver.requests) == 2
+
+    def test_gives_up_after_max_attempts(self, db_session, receiver, deliveries, monkeypatch):
+        """Delivery stops as failed once every attempt has been used."""
+        monkeypatch.setattr(settings, "WEBHOOK_MAX_ATTEMPTS", 2)
+        monkeypatch.setattr(settings, "WEBHOOK_RETRY_BACKOFF", 0)
+        receiver.statuses = [503, 503, 200]
+        _finish(db_session, "hook-dead", receiver.url)
+
+        _deliver()
+        _deliver()
+
+        row = _rows(db_session)[0]
+        assert row.status == "failed" and row.attempts == 2
+        assert len(receiver.requests) == 2
+
+    def test_unreachable_receiver_is_retried(self, db_session, deliveries):
+        """A connection error counts as a failed attempt without a status code."""
+        _finish(db_session, "hook-down", "http://127.0.0.1:9/hooks")
+
+        assert _deliver()["retrying"] == 1
+        row = _rows(db_session)[0]
+        assert row.last_status_code is None and row.last_error
+
+    def test_redirects_are_not_followed(self, db_session, receiver, deliveries):
+        """A redirect counts as a failed attempt instead of being followed."""
+        receiver.statuses = [307]
+        _finish(db_session, "hook-redirect", receiver.url)
+
+        assert _deliver()["retrying"] == 1
+        assert len(receiver.requests) == 1
+        assert _rows(db_session)[0].last_status_code == 307
+
+    def test_host_no_longer_allowed_is_not_sent(self, db_session, receiver, deliveries,
+                                                monkeypatch):
+        """The URL is checked again before each request."""
+        _finish(db_session, "hook-private", receiver.url)
+        monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", "")
+
+        assert _deliver()["retrying"] == 1
+        assert receiver.requests == []
+        assert "non-public" in _rows(db_session)[0].last_error
+
+    def test_failed_job_sends_failure_event(self, db_session, receiver, deliveries):
+        """A job that fails is reported as job.failed."""
+        _finish(db_session, "hook-fail", receiver.url, status="failed")
+
+        _deliver()
+
+        event = receiver.events()[0]
+        assert event["type"] == "job.failed"
+        assert event["data"]["status"] == "failed"
+
+    def test_jobs_without_webhook_stage_nothing(self, db_session, deliveries):
+        """Only jobs with a callback URL get events."""
+        _finish(db_session, "hook-none", None)
+
+        assert _rows(db_session) == [] and deliveries == []
+
+
+class TestWebhookRoutes:
+    """Tests for callback URLs on job submission."""
+
+    @pytest.fixture
+    def tasks(self, fake_tasks):
+        """Record queued transcription tasks."""
+        return fake_tasks["transcribe"]
+
+    def _upload(self, client, headers=None, **params):
+        return client.post("/api/v1/transcribe", params=params, headers=headers or {},
+                           files={"file": ("talk.wav", b"RIFF" + b"\x00" * 100, "audio/wav")})
+
+    def test_callback_url_is_stored(self, test_client, db_session, tasks, deliveries):
+        """An explicit callback URL wins over the client default and shows in the status."""
+        test_client.put("/api/v1/clients/acme/webhook",
+                        json={"callback_url": "https://acme.test/default"})
+
+        job_id = self._upload(test_client, headers={"X-Client-Id": "acme"},
+                              callback_url="https://acme.test/explicit").json()["job_id"]
+
+        job = db_session.get(TranscriptionJob, job_id)
+        assert job.client_id == "acme" and job.callback_url == "https://acme.test/explicit"
+
+    def test_client_default_applies(self, test_client, db_session, tasks, deliveries):
+        """Without a callback URL, the client's default is used."""
+        response = test_client.put("/api/v1/clients/beta/webhook",
+                                   json={"callback_url": "https://beta.test/hook"})
+        assert response.status_code == 200
+        webhook = test_client.get("/api/v1/clients/beta/webhook").json()
+        assert webhook["callback_url"] == "https://beta.test/hook"
+
+        job_id = self._upload(test_client, headers={"X-Client-Id": "beta"}).json()["job_id"]
+
+        assert db_session.get(TranscriptionJob, job_id).callback_url == "https://beta.test/hook"
+        assert test_client.delete("/api/v1/clients/beta/webhook").status_code == 200
+        assert test_client.get("/api/v1/clients/beta/webhook").status_code == 404
+        assert db_session.get(ClientWebhook, "beta") is None
+
+    def test_invalid_callback_url_is_refused(self, test_client, tasks, deliveries):
+        """Callback URLs must be absolute http(s) URLs of public hosts."""
+        assert self._upload(test_client, callback_url="ftp://x/y").status_code == 400
+        assert self._upload(test_client, callback_url="/relative").status_code == 400
+        metadata = "http://169.254.169.254/latest/meta-data"
+        assert self._upload(test_client, callback_url=metadata).status_code == 400
+        for url in ("nope", "http://10.0.0.1/hooks"):
+            response = test_client.put("/api/v1/clients/c/webhook", json={"callback_url": url})
+            assert response.status_code == 400
+        assert tasks.calls == []
@@ -0,0 +1,328 @@
+"""Tests for windowed decoding of long inputs."""
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.utils.audio import open_pcm, pcm_window, plan_windows
+from app.services.windowed import transcribe_windowed, link_speakers, diarize_windowed
+
+RATE = 16000
+
+
+@pytest.fixture
+def pcm_file(tmp_path):
+    """Write ten minutes of s16le tone, silent for 0.8s every 10s."""
+    path = tmp_path / "audio.pcm"
+    second = (np.sin(np.arange(RATE) * 0.05) * 8000).astype("<i2")
+    with open(path, "wb") as f:
+        for index in range(600):
+            chunk = second.copy()
+            if index % 10 == 7:
+                chunk[int(0.2 * RATE):] = 0
+            f.write(chunk.tobytes())
+    return str(path)
+
+
+class _FakeTranscriber:
+    """Transcriber stand-in emitting one segment per window."""
+
+    def __init__(self, language="en"):
+        self.calls = []
+        self.language = language
+
+    def transcribe_samples(self, samples, language=None):
+        self.calls.append((len(samples), language))
+        duration = len(samples) / RATE
+        return {
+            "text": " window",
+            "segments": [
+                {"start": 0.5, "end": duration - 0.5, "text": " window", "confidence": 0.9}
+            ],
+            "language": self.language
+        }
+
+
+class _FakeDiarizer:
+    """Diarizer stand-in alternating two voices with fixed embeddings."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.calls = []
+
+    def diarize_samples(self, samples, **kwargs):
+        self.calls.append(kwargs)
+        half = len(samples) / RATE / 2
+        window = len(self.calls) - 1
+        # Local labels are swapped in odd windows, as pyannote may do
+        labels = ("SPEAKER_00", "SPEAKER_01")
+        first, second = labels if window % 2 == 0 else labels[::-1]
+        return {
+            "segments": [
+                {"start": 0.0, "end": half, "speaker": first},
+                {"start": half, "end": 2 * half, "speaker": second},
+            ],
+            "num_speakers": 2,
+            "embeddings": {first: self.embeddings["alice"], second: self.embeddings["bob"]}
+        }
+
+
+class TestPlanWindows:
+    """Tests for plan_windows function."""
+
+    def test_covers_audio_without_gaps(self, pcm_file):
+        """Should tile the audio with windows no longer than the limit."""
+        pcm = open_pcm(pcm_file)
+
+        windows = plan_windows(pcm, window=60, search=5)
+
+        assert windows[0][0] == 0
+        assert windows[-1][1] == len(pcm)
+        assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+        assert all(end - start <= 60 * RATE for start, end in windows)
+
+    def test_cuts_at_pauses(self, pcm_file):
+        """Should cut inside the silent stretches."""
+        pcm = open_pcm(pcm_file)
+
+        windows = plan_windows(pcm, window=45, search=8)
+
+        assert len(windows) > 10
+        for _, end in windows[:-1]:
+            assert not pcm[end - 100:end + 100].any()
+
+    def test_short_audio_is_one_window(self):
+        """Should not split audio shorter than a window."""
+        pcm = np.zeros(RATE * 3, dtype="<i2")
+
+        assert plan_windows(pcm, window=60) == [(0, RATE * 3)]
+
+    def test_empty_audio(self, tmp_path):
+        """Should plan no windows for empty audio."""
+        path = tmp_path / "empty.pcm"
+        path.write_bytes(b"")
+
+        assert plan_windows(open_pcm(str(path)), window=60) == []
+
+
+class TestTranscribeWindowed:
+    """Tests for transcribe_windowed function."""
+
+    def test_shifts_segments_onto_file_timeline(self, pcm_file):
+        """Should offset each window's segments by the window start."""
+        pcm = open_pcm(pcm_file)
+        windows = plan_windows(pcm, window=120)
+
+        result = transcribe_windowed(_FakeTranscriber(), pcm, windows)
+
+        assert len(result["segments"]) == len(windows)
+        for (start, _), seg in zip(windows, result["segments"]):
+            assert seg["start"] == pytest.approx(start / RATE + 0.5)
+        assert result["duration"] == pytest.approx(600)
+        assert result["text"] == " window" * len(windows)
+
+    def test_keeps_first_detected_language(self, pcm_file):
+        """Should decode later windows in the first window's language."""
+        pcm = open_pcm(pcm_file)
+        transcriber = _FakeTranscriber(language="de")
+
+        result = transcribe_windowed(transcriber, pcm, plan_windows(pcm, window=120))
+
+        assert transcriber.calls[0][1] is None
+        assert all(language == "de" for _, language in transcriber.calls[1:])
+        assert result["language"] == "de"
+
+    def test_checks_cancellation_per_window(self, pcm_file):
+        """Should stop before decoding the next window."""
+        pcm = open_pcm(pcm_file)
+        transcriber = _FakeTranscriber()
+        checks = []
+
+        def check_cancelled():
+            checks.append(1)
+            if len(checks) == 2:
+                raise RuntimeError("cancelled")
+
+        with pytest.raises(RuntimeError):
+            transcribe_windowed(transcriber, pcm, plan_windows(pcm, window=120),
+                                check_cancelled=check_cancelled)
+
+        assert len(transcriber.calls) == 1
+
+    def test_peak_memory_does_not_grow_with_length(self, tmp_path):
+        """Should keep peak allocations bounded by the window, not the file."""
+        peaks = []
+        for minutes in (5, 20):
+            path = tmp_path / f"{minutes}.pcm"
+            np.zeros(minutes * 60 * RATE, dtype="<i2").tofile(path)
+            pcm = open_pcm(str(path))
+            windows = plan_windows(pcm, window=30, search=1)
+
+            tracemalloc.start()
+            transcribe_windowed(_FakeTranscriber(), pcm, windows)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del pcm
+
+        # One 30s float32 window is ~1.9MB; the whole 20 minutes would be 77MB
+        assert peaks[1] < 8 * 1024 * 1024
+        assert peaks[1] < peaks[0] * 2
+
+
+class TestLinkSpeakers:
+    """Tests for link_speakers function."""
+
+    def test_links_by_embedding_similarity(self):
+        """Should map a window's labels to the closest known speakers."""
+        centroids = {"SPEAKER_00": np.array([1.0, 0.0]), "SPEAKER_01": np.array([0.0, 1.0])}
+
+        mapping = link_speakers(
+            centroids, ["SPEAKER_00", "SPEAKER_01"],
+            {"SPEAKER_00": [0.1, 0.9], "SPEAKER_01": [0.9, 0.2]},
+            threshold=0.5
+        )
+
+        assert mapping == {"SPEAKER_00": "SPEAKER_01", "SPEAKER_01": "SPEAKER_00"}
+
+    def test_unmatched_speaker_is_new(self):
+        """Should add speakers below the threshold as new ones."""
+        centroids = {"SPEAKER_00": np.array([1.0, 0.0])}
+
+        mapping = link_speakers(
+            centroids, ["SPEAKER_00"], {"SPEAKER_00": [0.0, 1.0]}, threshold=0.5
+        )
+
+        assert mapping == {"SPEAKER_00": "SPEAKER_01"}
+        assert set(centroids) == {"SPEAKER_00", "SPEAKER_01"}
+
+    def test_two_labels_never_share_a_speaker(self):
+        """Should link at most one label per known speaker in a window."""
+        centroids = {"SPEAKER_00": np.array([1.0, 0.0])}
+
+        mapping = link_speakers(
+            centroids, ["SPEAKER_00", "SPEAKER_01"],
+            {"SPEAKER_00": [1.0, 0.1], "SPEAKER_01": [1.0, 0.0]},
+            threshold=0.5
+        )
+
+        assert mapping["SPEAKER_01"] == "SPEAKER_00"
+        assert mapping["SPEAKER_00"] == "SPEAKER_01"
+
+    def test_speaker_without_embedding_gets_unique_label(self):
+        """Should never reuse the label of a speaker without an embedding."""
+        centroids = {}
+
+        first = link_speakers(centroids, ["SPEAKER_00"], {}, threshold=0.5)
+        second = link_speakers(centroids, ["SPEAKER_00"], {"SPEAKER_00": [1.0, 0.0]}, threshold=0.5)
+
+        assert first == {"SPEAKER_00": "SPEAKER_00"}
+        assert second == {"SPEAKER_00": "SPEAKER_01"}
+
+
+class TestDiarizeWindowed:
+    """Tests for diarize_windowed function."""
+
+    def test_labels_are_consistent_across_windows(self, pcm_file):
+        """Should give a voice the same label in every window."""
+        pcm = open_pcm(pcm_file)
+        windows = plan_windows(pcm, window=120)
+        diarizer = _FakeDiarizer({"alice": [1.0, 0.0, 0.1], "bob": [0.0, 1.0, 0.1]})
+
+        result = diarize_windowed(diarizer, pcm, windows, return_embeddings=True,
+                                  max_speakers=3, threshold=0.6)
+
+        assert result["num_speakers"] == 2
+        speakers = [seg["speaker"] for seg in result["segments"]]
+        assert speakers == ["SPEAKER_00", "SPEAKER_01"] * len(windows)
+        assert result["segments"][2]["start"] == pytest.approx(windows[1][0] / RATE)
+        assert set(result["embeddings"]) == {"SPEAKER_00", "SPEAKER_01"}
+        assert all(call["max_speakers"] == 3 for call in diarizer.calls)
+
+
+def _resident_file_kb():
+    """Get this process's resident file-backed memory, if /proc has it."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssFile:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def test_windows_release_mapped_pages(tmp_path):
+    """Should not leave copied windows resident in the mapping."""
+    path = tmp_path / "audio.pcm"
+    np.ones(20 * 60 * RATE, dtype="<i2").tofile(path)
+    pcm = open_pcm(str(path))
+    before = _resident_file_kb()
+    if before is None:
+        pytest.skip("/proc/self/status has no RssFile")
+
+    for start, end in plan_windows(pcm, window=60):
+        pcm_window(pcm, start, end)
+
+    # The whole file is 37.5MB
+    assert _resident_file_kb() - before < 8 * 1024
+
+
+def test_pcm_window_scales_to_float():
+    """Should convert int16 samples to float32 in [-1, 1]."""
+    pcm = np.array([0, 16384, -32768], dtype="<i2")
+
+    samples = pcm_window(pcm, 0, 3)
+
+    assert samples.dtype == np.float32
+    assert samples.tolist() == [0.0, 0.5, -1.0]
+
+
+class TestWindowedJob:
+    """Tests for process_transcription taking the windowed path."""
+
+    def test_long_job_is_decoded_in_windows(self, db_session, pcm_file, tmp_path, monkeypatch):
+        """Should feed both stages window by window and remove the PCM file."""
+        import shutil
+        import app.utils.audio as audio_module
+        import app.tasks.tasks as tasks_module
+        from app.models import TranscriptionJob
+
+        transcriber = _FakeTranscriber()
+        transcriber.engine_name = "fake"
+        diarizer = _FakeDiarizer({"alice": [1.0, 0.0], "bob": [0.0, 1.0]})
+        diarizer.align_segments = lambda transcript, diarization: [
+            {**seg, "speaker": "SPEAKER_00"} for seg in transcript
+        ]
+        decoded = []
+
+        def fake_decode_to_pcm(src, dest):
+            decoded.append(dest)
+            shutil.copy(pcm_file, dest)
+            return dest
+
+        monkeypatch.setattr(tasks_module, "_get_transcriber", lambda **kwargs: transcriber)
+        monkeypatch.setattr(tasks_module, "_get_diarizer", lambda: diarizer)
+        monkeypatch.setattr(audio_module, "decode_to_pcm", fake_decode_to_pcm)
+        monkeypatch.setattr(settings, "NORMALIZE_AUDIO", False)
+        monkeypatch.setattr(settings, "LANGUAGE_DETECTION", False)
+        monkeypatch.setattr(settings, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+        monkeypatch.setattr(settings, "WINDOWED_MIN_DURATION", 300)
+        monkeypatch.setattr(settings, "TRANSCRIBE_WINDOW", 120)
+        monkeypatch.setattr(settings, "DIARIZE_WINDOW", 300)
+
+        db_session.add(TranscriptionJob(id="long-job", filename="a.wav",
+                                        source_metadata={"duration": 600.0}))
+        db_session.commit()
+
+        result = tasks_module.process_transcription.run(
+            "long-job", str(tmp_path / "a.wav"), "a.wav"
+        )
+
+        assert result["status"] == "completed"
+        assert len(transcriber.calls) >= 5
+        assert all(length <= 120 * RATE for length, _ in transcriber.calls)
+        assert len(diarizer.calls) >= 2
+        assert result["duration"] == pytest.approx(600)
+        assert decoded and not any(os.path.exists(path) for path in decoded)
@@ -0,0 +1,74 @@
+"""Tests for CPU-topology-aware worker configuration."""
+import os
+
+from app.tasks.worker_config import (
+    read_cgroup_cpu_limit,
+    plan_workers,
+    child_cpu_set,
+)
+
+
+class TestReadCgroupCpuLimit:
+    """Tests for read_cgroup_cpu_limit function."""
+
+    def test_cgroup_v2_quota(self, tmp_path):
+        """Should read the quota from cpu.max."""
+        (tmp_path / "cpu.max").write_text("400000 100000\n")
+        assert read_cgroup_cpu_limit(str(tmp_path)) == 4.0
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        """Should return None when cpu.max has no quota."""
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert read_cgroup_cpu_limit(str(tmp_path)) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        """Should fall back to the cgroup v1 CFS files."""
+        os.makedirs(tmp_path / "cpu")
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        assert read_cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+    def test_no_cgroup_files(self, tmp_path):
+        """Should return None when no cgroup files exist."""
+        assert read_cgroup_cpu_limit(str(tmp_path)) is None
+
+
+class TestPlanWorkers:
+    """Tests for plan_workers function."""
+
+    def test_derives_concurrency_from_threads(self):
+        """32 CPUs at 4 threads per child should give 8 children."""
+        plan = plan_workers(32, threads_per_child=4)
+        assert plan["concurrency"] == 8
+        assert plan["threads"] == 4
+
+    def test_derives_threads_from_concurrency(self):
+        """Fixed concurrency should share the CPUs between children."""
+        plan = plan_workers(32, concurrency=16)
+        assert plan["threads"] == 2
+
+    def test_small_machine(self):
+        """Should never plan zero children or threads."""
+        plan = plan_workers(1)
+        assert plan["concurrency"] == 1
+        assert plan["threads"] == 1
+
+    def test_never_oversubscribes(self):
+        """Children times threads should not exceed the CPUs by default."""
+        for cpus in range(1, 65):
+            plan = plan_workers(cpus)
+            assert plan["concurrency"] * plan["threads"] <= cpus
+
+
+class TestChildCpuSet:
+    """Tests for child_cpu_set function."""
+
+    def test_disjoint_blocks(self):
+        """Children should get disjoint CPU blocks."""
+        cpus = list(range(8))
+        assert child_cpu_set(0, 4, cpus) == [0, 1, 2, 3]
+        assert child_cpu_set(1, 4, cpus) == [4, 5, 6, 7]
+
+    def test_wraps_around(self):
+        """Extra children should reuse blocks."""
+        assert child_cpu_set(2, 4, list(range(8))) == [0, 1, 2, 3]